@@ -27,11 +27,13 @@ Persistencia mediante SQLite, usando módulos en Base_De_Datos/tablas.
 """
 
 
-import logging
+import math
 
-from flask import Flask, request, jsonify
+import os
+
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 
-from functools import wraps
+from functools import partial, wraps
 
 import requests
 
@@ -39,15 +41,15 @@ import uuid
 
 import sqlite3
 
-import os
+from datetime import datetime, timezone
 
-from werkzeug.security import generate_password_hash, check_password_hash  # Importar para hashing
+from urllib.parse import urlencode
 
-from datetime import datetime
+from sqlalchemy import create_engine, event
 
-from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
 
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import scoped_session, sessionmaker
 
 from sqlalchemy.orm import declarative_base
 
@@ -61,6 +63,10 @@ from sqlalchemy import Column, Integer, String
 
 # Importar módulos de BD
 
+from Base_De_Datos.tablas import conexion, consultas
+
+from Base_De_Datos.tablas.conexion import RUTA_BD, TIMEOUT_BD, abrir_conexion, configurar_conexion
+
 from Base_De_Datos.tablas.tabla_SIPS import crear_tabla_sip, insertar_sip, leer_sip, eliminar_sip
 
 from Base_De_Datos.tablas.tabla_paciente import crear_tabla_pacientes, insertar_paciente, leer_pacientes, eliminar_paciente
@@ -73,20 +79,42 @@ from Base_De_Datos.tablas.tabla_habitacion import crear_tabla_habitaciones, inse
 
 from Base_De_Datos.tablas.tabla_auxiliar import crear_tabla_auxiliares, insertar_auxiliar, leer_auxiliares, eliminar_auxiliar
 
+from Base_De_Datos.tablas.tabla_citas import (interpretar_fecha_hora, registrar_cita, cambiar_estado_cita,
+                                              leer_citas_filtradas)
+
+from Base_De_Datos.tablas.tabla_credenciales import actualizar_hash
+
+from Base_De_Datos.tablas import tabla_usuarios
+
 
 
 # Importar utilidades externas
 
 from generador_pdf import generar_pdf_paciente
 
-import gestor_de_citas
-from gestor_de_citas import CitaPresencial, CitaTelefonica, CitaUrgencias, GestorCitas
+import instrumentacion
+
+import despacho_ambulancias
+
+import triaje
+
+import cola_documentos
+
+import agenda
+
+import cache_respuestas
+
+import serializacion
+
+import altas_masivas
+
+import servicio_hash
 
+import credenciales
 
-from Base_De_Datos.tablas.modelos import PacienteDB, MedicoDB, EnfermeroDB  # Importación corregida
 
+from Base_De_Datos.tablas.modelos import PacienteDB, MedicoDB, EnfermeroDB, UsuarioDB  # Importación corregida
 
-from Clases_Base_de_datos.paciente import Paciente
 
 # Configuración RxNorm
 
@@ -98,13 +126,38 @@ RXNORM_URL = "https://rxnav.nlm.nih.gov/REST/drugs.json"
 
 app = Flask(__name__)
 
+# JSON con orjson si está instalado y respuestas grandes comprimidas (ver serializacion.py)
+
+serializacion.instalar(app)
+
 # --- Configuración de la base de datos ---
 
-DATABASE_URL = "sqlite:///./Base_De_Datos/tablas/bdd.db"
+DATABASE_URL = f"sqlite:///{RUTA_BD}"
+
+engine = create_engine(DATABASE_URL, echo=False, connect_args={"timeout": TIMEOUT_BD})  # echo=True para ver las consultas SQL
+
+
+@event.listens_for(engine, "do_connect")
+
+def _clase_conexion(_dialecto, _registro, _cargs, cparams):
+
+    # Misma clase de conexión que abrir_conexion (medida si hay estadísticas o métricas)
+
+    cparams['factory'] = conexion.FABRICA_CONEXION
 
-engine = create_engine(DATABASE_URL, echo=False)  # echo=True para ver las consultas SQL
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@event.listens_for(engine, "connect")
+
+def _configurar_sqlite(dbapi_conn, _registro):
+
+    # Mismos PRAGMA (claves foráneas, busy_timeout...) que las conexiones directas
+
+    configurar_conexion(dbapi_conn)
+
+# Una sesión por hilo; se cierra al terminar cada petición (ver cerrar_sesion_db)
+
+SessionLocal = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
 
 Base = declarative_base()
 
@@ -120,6 +173,16 @@ def get_db():
 
         db.close()
 
+
+
+@app.teardown_appcontext
+
+def cerrar_sesion_db(_exc=None):
+
+    # Devuelve la conexión al pool aunque el endpoint no cierre su sesión
+
+    SessionLocal.remove()
+
 # Crear tablas al inicio (Comentado para usar SQLAlchemy si los modelos están definidos)
 
 # crear_tabla_sip()
@@ -156,541 +219,800 @@ def _conectar_bd():
 
     """
 
-    path = os.path.join(os.path.dirname(__file__), 'Base_De_Datos', 'tablas', 'bdd.db')
+    return abrir_conexion(RUTA_BD)
 
-    conn = sqlite3.connect(path)
 
-    conn.execute("PRAGMA foreign_keys = ON;")
 
-    return conn
+# Cola de cifrado de contraseñas llena (ver servicio_hash.py)
 
+def _servicio_saturado():
 
+    respuesta = jsonify({"detail": "Demasiadas altas a la vez; inténtelo de nuevo en unos segundos."})
 
-# Autenticación
+    respuesta.headers['Retry-After'] = '1'
 
-def requiere_autenticacion(f):
+    return respuesta, 429
 
-    @wraps(f)
 
-    def deco(*args, **kwargs):
 
-        auth = request.authorization
+# Registro rechazado por una restricción de la tabla: la restricción UNIQUE decide los duplicados,
 
-        if not auth or not auth.username or not auth.password:
+# también entre registros simultáneos, sin consultar antes si el username existe
 
-            return jsonify({"detail": "Autenticación requerida."}), 401
+def _registro_rechazado(error, username, id, como=''):
 
-        rol = request.headers.get('X-ROL')
+    mensaje = str(error.orig)
 
-        user = auth.username
+    if not mensaje.startswith('UNIQUE'):
 
-        pwd = auth.password
+        return jsonify({"detail": f"Datos de registro no válidos: {mensaje}"}), 400
 
-        db = next(get_db())
+    if mensaje.endswith('.username') or id == username:
 
-        registro = None
+        return jsonify({"detail": f"El username '{username}' ya está registrado{como}."}), 409
 
-        if rol == 'paciente':
+    return jsonify({"detail": f"El id '{id}' ya está registrado{como}."}), 409
 
-            registro = db.query(PacienteDB).filter(PacienteDB.username == user).first()
 
-        elif rol == 'medico':
 
-            registro = db.query(MedicoDB).filter(MedicoDB.username == user).first()
+# Autenticación
 
-        elif rol == 'enfermero':
+# Usuarios (de cualquier rol) con permisos de administración, p. ej. para ?profile=1
 
-            registro = db.query(EnfermeroDB).filter(EnfermeroDB.username == user).first()
+ADMINISTRADORES = {u.strip() for u in os.environ.get('PROSALUD_ADMINS', '').split(',') if u.strip()}
 
-        else:
 
-            return jsonify({"detail": "Rol no reconocido."}), 403
 
+# El directorio 'usuarios' y sus disparadores se preparan una vez por proceso (ver tabla_usuarios.py)
 
+_usuarios_preparados = False
 
-        if not registro or not check_password_hash(registro.password, pwd):
 
-            return jsonify({"detail": "Credenciales inválidas."}), 401
 
+def _preparar_usuarios():
 
+    global _usuarios_preparados
 
-        class U:
+    if not _usuarios_preparados:
 
-            pass
+        tabla_usuarios.crear_tabla_usuarios()
 
-        usuario = U()
+        _usuarios_preparados = True
 
-        usuario.id = registro.id
 
-        usuario.rol = rol
 
-        return f(usuario, *args, **kwargs)
+def _autenticar():
 
-    return deco
+    """
 
+    Comprueba las credenciales HTTP Basic de la petición contra el directorio 'usuarios'.
 
+    La cabecera X-ROL es opcional: si viene, debe ser el rol de la cuenta.
 
-# === Endpoints básicos ===
+    Returns
 
-@app.route('/')
+        -------
 
-def home():
+        tuple
 
-    return jsonify({"mensaje": "API Salud funcionando."})
+            (usuario, None) si son válidas, o (None, respuesta de error).
 
+    """
 
+    auth = request.authorization
 
-@app.route('/test')
+    if not auth or not auth.username or not auth.password:
 
-def test():
+        return None, (jsonify({"detail": "Autenticación requerida."}), 401)
 
-    return jsonify({"mensaje": "Test OK."})
+    rol = request.headers.get('X-ROL')
 
+    user = auth.username
 
+    pwd = auth.password
 
-# RxNorm
+    if rol is not None and rol not in tabla_usuarios.ROLES:
 
-@app.route('/medicamento/info', methods=['GET'])
+        return None, (jsonify({"detail": "Rol no reconocido."}), 403)
 
-def info_medicamento():
+    _preparar_usuarios()
 
-    nombre = request.args.get('name')
+    db = next(get_db())
 
-    if not nombre:
+    # Una búsqueda por clave primaria, sea cual sea el rol
 
-        return jsonify({"error": "Parámetro 'name' requerido."}), 400
+    registro = db.get(UsuarioDB, user)
 
-    try:
 
-        resp = requests.get(RXNORM_URL, params={'name': nombre})
 
-        resp.raise_for_status()
+    if not registro or (rol is not None and registro.rol != rol) or not credenciales.verificar(registro.password, pwd):
 
-        data = resp.json()
+        return None, (jsonify({"detail": "Credenciales inválidas."}), 401)
 
-        return jsonify(data)
+    if credenciales.necesita_rehash(registro.password):
 
-    except Exception as e:
+        # Hash de un método o coste anterior: se recalcula en segundo plano sin retrasar la respuesta
 
-        return jsonify({"error": str(e)}), 502
+        credenciales.rehashear(pwd, partial(actualizar_hash, registro.rol, registro.id_entidad, registro.password))
 
 
 
-# Menú por rol
+    class U:
 
-@app.route('/menu', methods=['GET'])
+        pass
 
-@requiere_autenticacion
+    usuario = U()
 
-def menu(usuario):
+    usuario.id = registro.id_entidad
 
-    opciones = []
+    usuario.username = registro.username
 
-    if usuario.rol == 'paciente':
+    usuario.rol = registro.rol
 
-        opciones = ["Pedir cita", "Descargar PDF de mi informe", "Buscar información de medicamento por nombre", "Ver información de mi SIP"]
+    return usuario, None
 
-    elif usuario.rol == 'medico':
 
-        opciones = ["Listar pacientes", "Listar médicos", "Listar enfermeros", "Listar auxiliares", "Dar de alta paciente", "Dar de baja paciente", "Dar de alta médico", "Dar de baja médico", "Dar de alta enfermero", "Dar de baja enfermero", "Dar de alta auxiliar", "Dar de baja auxiliar", "Asignar médico a paciente", "Asignar habitación a paciente", "Crear SIP para paciente", "Consultar SIP de paciente", "Eliminar SIP de paciente"]
 
-    elif usuario.rol == 'enfermero':
+def requiere_autenticacion(f):
 
-        opciones = ["Listar pacientes", "Listar enfermeros", "Listar habitaciones", "Listar auxiliares", "Dar de alta enfermero", "Dar de baja enfermero", "Dar de alta auxiliar", "Dar de baja auxiliar", "Dar de alta habitación", "Dar de baja habitación", "Limpiar habitación"]
+    @wraps(f)
 
-    return jsonify({"rol": usuario.rol, "menu": opciones})
+    def deco(*args, **kwargs):
 
+        with instrumentacion.medir('auth'):
 
+            usuario, error = _autenticar()
 
-# SIPS
+        if error:
 
-@app.route('/crear_sip/<paciente_id>', methods=['GET'])
+            return error
 
-def crear_sip(paciente_id):
+        return f(usuario, *args, **kwargs)
 
-    conn = _conectar_bd()
+    return deco
 
-    cursor = conn.cursor()
 
-    cursor.execute("SELECT sip FROM sips WHERE paciente_id=?", (paciente_id,))
 
-    if cursor.fetchone():
+def es_administrador():
 
-        conn.close()
+    """
 
-        return jsonify({"error": "SIP ya existe."}), 400
+    Indica si la petición en curso viene autenticada por un administrador.
 
-    sip = f"SIP-{uuid.uuid4().hex[:10].upper()}"
+    """
 
-    cursor.execute("INSERT INTO sips (sip, paciente_id) VALUES (?, ?)", (sip, paciente_id))
+    if not request.authorization or request.authorization.username not in ADMINISTRADORES:
 
-    conn.commit()
+        return False
 
-    conn.close()
+    usuario, _error = _autenticar()
 
-    return jsonify({"sip": sip}), 201
+    return usuario is not None
 
 
 
-@app.route('/consultar_sip/<paciente_id>', methods=['GET'])
+def requiere_administrador(f):
 
-def consultar_sip(paciente_id):
+    @wraps(f)
 
-    conn = _conectar_bd()
+    def deco(*args, **kwargs):
 
-    cursor = conn.cursor()
+        with instrumentacion.medir('auth'):
 
-    cursor.execute("SELECT sip FROM sips WHERE paciente_id=?", (paciente_id,))
+            permitido = es_administrador()
 
-    resultado = cursor.fetchone()
+        if not permitido:
 
-    conn.close()
+            return jsonify({"detail": "Se requieren permisos de administrador."}), 403
 
-    if not resultado:
+        return f(*args, **kwargs)
 
-        return jsonify({"error": "No existe SIP."}), 404
+    return deco
 
-    return jsonify({"sip": resultado[0]})
 
 
+if instrumentacion.ACTIVADA:
 
-@app.route('/eliminar_sip/<paciente_id>', methods=['DELETE'])
+    instrumentacion.instalar(app, es_administrador)
 
-def eliminar_sip_endpoint(paciente_id):
 
-    conn = _conectar_bd()
 
-    cursor = conn.cursor()
+if consultas.ACTIVADAS:
 
-    cursor.execute("SELECT sip FROM sips WHERE paciente_id=?", (paciente_id,))
+    consultas.activar()
 
-    if not cursor.fetchone():
 
-        conn.close()
 
-        return jsonify({"error": "No existe SIP."}), 404
+    @app.before_request
 
-    cursor.execute("DELETE FROM sips WHERE paciente_id=?", (paciente_id,))
+    def _abrir_ambito_consultas():
 
-    conn.commit()
+        g.ambito_consultas = consultas.abrir_ambito()
 
-    conn.close()
 
-    return jsonify({"mensaje": "SIP eliminado."})
 
+    @app.teardown_request
 
+    def _cerrar_ambito_consultas(_exc=None):
 
-# === Pacientes CRUD ===
+        token = g.pop('ambito_consultas', None)
 
-@app.route('/pacientes', methods=['GET'])
+        if token is not None:
 
-def listar_pacientes():
+            regla = request.url_rule.rule if request.url_rule is not None else request.path
 
-    db = next(get_db())
+            consultas.cerrar_ambito(token, f"{request.method} {regla}")
 
-    pacientes = db.query(PacienteDB).all()
 
-    res = [{"id": p.id, "username": p.username, "nombre": p.nombre, "apellido": p.apellido,
 
-            "edad": p.edad, "genero": p.genero, "estado": p.estado,
+@app.route('/admin/consultas', methods=['GET', 'DELETE'])
 
-            "id_enfermero": p.id_enfermero, "id_medico": p.id_medico, "id_habitacion": p.id_habitacion} for p in pacientes]
+@requiere_administrador
 
-    return jsonify(res)
+def admin_consultas():
 
+    """
 
+    Estadísticas de las consultas SQL de este proceso (ver consultas.py).
 
-@app.route('/pacientes/alta', methods=['POST'])
+    GET devuelve las sentencias ordenadas por ?orden= (total_ms por defecto),
 
-def alta_paciente():
+    las consultas lentas y los posibles N+1; DELETE las reinicia.
 
-    data = request.get_json()
+    """
 
-    if not data:
+    if not consultas.ESTADISTICAS.activa:
 
-        return jsonify({"error": "No se proporcionaron datos."}), 400
+        return jsonify({"detail": "Estadísticas desactivadas (PROSALUD_ESTADISTICAS_SQL=1)."}), 404
 
-    try:
+    if request.method == 'DELETE':
 
-        hashed_password = generate_password_hash(data['password'])
+        consultas.ESTADISTICAS.reiniciar()
 
-        nuevo_paciente = PacienteDB(
+        return jsonify({"mensaje": "Estadísticas reiniciadas."}), 200
 
-            id=data['id'], username=data['username'], password=hashed_password,
+    limite = request.args.get('limite', type=int)
 
-            nombre=data.get('nombre'), apellido=data.get('apellido'), edad=data.get('edad'),
+    return jsonify(consultas.ESTADISTICAS.resumen(request.args.get('orden', 'total_ms'), limite)), 200
 
-            genero=data.get('genero'), estado=data.get('estado'),
 
-            historial_medico=data.get('historial_medico'), id_enfermero=data.get('id_enfermero'),
 
-            id_medico=data.get('id_medico'), id_habitacion=data.get('id_habitacion')
+# === Endpoints básicos ===
 
-        )
+@app.route('/')
 
-        db = next(get_db())
+def home():
 
-        db.add(nuevo_paciente)
+    return jsonify({"mensaje": "API Salud funcionando."})
 
-        db.commit()
 
-        return jsonify({"mensaje": "Paciente dado de alta."}), 201
 
-    except KeyError as e:
+@app.route('/test')
 
-        db = next(get_db())
+def test():
 
-        db.rollback()
+    return jsonify({"mensaje": "Test OK."})
 
-        return jsonify({"error": f"Campo requerido faltante: {str(e)}"}), 400
 
-    except Exception as e:
 
-        db = next(get_db())
+# RxNorm
 
-        db.rollback()
+@app.route('/medicamento/info', methods=['GET'])
 
-        return jsonify({"error": str(e)}), 500
+def info_medicamento():
 
+    nombre = request.args.get('name')
 
+    if not nombre:
 
-@app.route('/pacientes/baja/<paciente_id>', methods=['DELETE'])
+        return jsonify({"error": "Parámetro 'name' requerido."}), 400
 
-def baja_paciente(paciente_id: str):
+    try:
 
-    db = next(get_db())
+        with instrumentacion.medir('externo'):
 
-    paciente = db.query(PacienteDB).filter(PacienteDB.id == paciente_id).first()
+            resp = requests.get(RXNORM_URL, params={'name': nombre})
 
-    if not paciente:
+        resp.raise_for_status()
 
-        return jsonify({"error": "Paciente no existe."}), 404
+        data = resp.json()
 
-    db.delete(paciente)
+        return jsonify(data)
 
-    db.commit()
+    except Exception as e:
 
-    return jsonify({"mensaje": "Paciente eliminado."})
+        return jsonify({"error": str(e)}), 502
 
 
 
-@app.route("/cita/pedir", methods=["POST"])
+# === Respuestas de solo lectura con ETag ===
 
-@requiere_autenticacion
+# Cuerpos ya serializados de este proceso (ver cache_respuestas.py)
 
-def pedir_cita(usuario):
+_cache_respuestas = None
 
-    data = request.get_json()
 
-    if not data:
 
-        return jsonify({"detail": "No se proporcionaron datos en la solicitud."}), 400
 
-    tipo_cita = data.get("tipo_cita")
+def _respuestas():
 
-    fecha_hora_str = data.get("fecha_hora")
+    global _cache_respuestas
 
-    medico_asignado = data.get("medico", "Sin asignar")
+    if _cache_respuestas is None:
 
-    motivo = data.get("motivo", "")
+        from Base_De_Datos.tablas.tabla_versiones import crear_tabla_versiones
 
+        crear_tabla_versiones(cache_respuestas.TABLAS_VIGILADAS)
 
-    username_paciente_id = usuario.id  # Este es el ID del paciente
+        _cache_respuestas = cache_respuestas.CacheRespuestas()
 
-    if not tipo_cita or not fecha_hora_str:
-        return jsonify({"detail": "Debes especificar el tipo de cita y la fecha/hora."}), 400
+    return _cache_respuestas
 
-    try:
-        fecha_hora_dt = datetime.strptime(fecha_hora_str, '%Y-%m-%dT%H:%M:%S')
-        fecha_hora_fmt_gestor = fecha_hora_dt.strftime('%Y %m %d %H:%M')
-    except ValueError as e:
 
 
-        return jsonify({"detail": f"Formato de fecha/hora inválido. Usa YYYY-MM-DDTHH:MM:SS: {str(e)}"}), 400
 
+def _respuesta_condicional(clave, tablas, generar):
 
+    """
 
+    Respuesta JSON con ETag y Last-Modified según los contadores de cambios de ``tablas``.
 
+    Una petición con If-None-Match vigente recibe un 304 sin consultar las filas; si no, el
 
-    db = next(get_db())
+    cuerpo sale de la caché o de ``generar()``. Devuelve None si ``generar()`` devuelve None.
 
+    """
 
-    try:
+    cache = _respuestas()
 
+    etag, modificada = cache.validador(clave, tablas)
 
-        paciente_db_obj = db.query(PacienteDB).filter(PacienteDB.id == username_paciente_id).first()
+    if request.if_none_match.contains_weak(etag):
 
+        respuesta = Response(status=304)
 
-        if not paciente_db_obj:
+    else:
 
+        def serializar():
 
-            return jsonify({"detail": f"Paciente con ID {username_paciente_id} no encontrado en la base de datos."}), 404
+            datos = generar()
 
+            return None if datos is None else app.json.dumps(datos).encode('utf-8')
 
+        cuerpo = cache.cuerpo(clave, etag, tablas, serializar)
 
+        if cuerpo is None:
 
+            return None
 
-        paciente_obj = Paciente(
+        respuesta = Response(cuerpo, mimetype='application/json')
 
+    respuesta.set_etag(etag)
 
-            id=paciente_db_obj.id,
+    if modificada is not None:
 
+        respuesta.last_modified = datetime.fromtimestamp(modificada, timezone.utc)
 
-            username=paciente_db_obj.username,
+    respuesta.headers['Cache-Control'] = 'no-cache'
 
+    return respuesta.make_conditional(request)
 
-            password=paciente_db_obj.password, # Esto es el hash, tu clase Paciente lo acepta
 
 
-            nombre=paciente_db_obj.nombre,
+# Paginación de los listados (?limite=N&desde=<última clave>)
 
+# Elementos por página como máximo
+MAX_PAGINA = 1000
 
-            apellido=paciente_db_obj.apellido,
 
 
-            edad=paciente_db_obj.edad,
+def _pagina_pedida():
 
+    """
 
-            genero=paciente_db_obj.genero,
+    (limite, desde) de la petición, o None si se pide el listado completo (sin ?limite=).
 
+    """
 
-            estado=paciente_db_obj.estado,
+    limite = request.args.get('limite', type=int)
 
+    if limite is None:
 
-            historial_medico=getattr(paciente_db_obj, 'historial_medico', None) # Asumiendo que existe en PacienteDB
+        return None
 
+    return max(1, min(limite, MAX_PAGINA)), request.args.get('desde')
 
-        )
 
 
+def _listado_paginado(tabla, columnas, pagina, convertir=None):
 
+    """
 
-        id_cita = str(uuid.uuid4())
+    Una página de ``tabla`` ordenada por su clave (la primera de ``columnas``), a partir de ``desde``.
 
+    Si quedan más filas, la cabecera ``Link`` (rel="next") lleva la ruta de la página siguiente.
 
-        nueva_cita = None
+    """
 
+    limite, desde = pagina
 
-        if tipo_cita == "presencial":
+    clave = columnas[0]
 
+    sql = f"SELECT {', '.join(columnas)} FROM {tabla}"
 
-            centro = data.get("centro")
+    parametros = []
 
+    if desde is not None:
 
-            if not centro:
+        sql += f" WHERE {clave} > ?"
 
+        parametros.append(desde)
 
-                return jsonify({"detail": "Para cita presencial, se requiere el centro."}), 400
+    conn = _conectar_bd()
 
+    filas = conn.execute(f"{sql} ORDER BY {clave} LIMIT ?", (*parametros, limite + 1)).fetchall()
 
-            nueva_cita = gestor_de_citas.CitaPresencial(id_cita, paciente_obj, medico_asignado, fecha_hora_fmt_gestor, centro=centro, motivo=motivo)
+    conn.close()
 
+    convertir = convertir or (lambda fila: dict(zip(columnas, fila)))
 
-        elif tipo_cita == "telefonica":
+    respuesta = jsonify([convertir(fila) for fila in filas[:limite]])
 
+    if len(filas) > limite:
 
-            telefono_contacto = data.get("telefono_contacto")
+        siguiente = urlencode({'limite': limite, 'desde': filas[limite - 1][0]})
 
+        respuesta.headers['Link'] = f'<{request.path}?{siguiente}>; rel="next"'
 
-            if not telefono_contacto:
+    return respuesta
 
 
-                return jsonify({"detail": "Para cita telefónica, se requiere el teléfono de contacto."}), 400
 
+# Menú por rol
 
-            nueva_cita = gestor_de_citas.CitaTelefonica(id_cita, paciente_obj, medico_asignado, fecha_hora_fmt_gestor, telefono_contacto=telefono_contacto, motivo=motivo)
+@app.route('/menu', methods=['GET'])
 
+@requiere_autenticacion
 
-        elif tipo_cita == "urgencias":
+def menu(usuario):
 
+    opciones = []
 
-            nivel_prioridad = data.get("nivel_prioridad")
+    if usuario.rol == 'paciente':
 
+        opciones = ["Pedir cita", "Descargar PDF de mi informe", "Buscar información de medicamento por nombre", "Ver información de mi SIP"]
 
-            if not nivel_prioridad:
+    elif usuario.rol == 'medico':
 
+        opciones = ["Listar pacientes", "Listar médicos", "Listar enfermeros", "Listar auxiliares", "Dar de alta paciente", "Dar de baja paciente", "Dar de alta médico", "Dar de baja médico", "Dar de alta enfermero", "Dar de baja enfermero", "Dar de alta auxiliar", "Dar de baja auxiliar", "Asignar médico a paciente", "Asignar habitación a paciente", "Crear SIP para paciente", "Consultar SIP de paciente", "Eliminar SIP de paciente"]
 
-                return jsonify({"detail": "Para cita de urgencias, se requiere el nivel de prioridad."}), 400
+    elif usuario.rol == 'enfermero':
 
+        opciones = ["Listar pacientes", "Listar enfermeros", "Listar habitaciones", "Listar auxiliares", "Dar de alta enfermero", "Dar de baja enfermero", "Dar de alta auxiliar", "Dar de baja auxiliar", "Dar de alta habitación", "Dar de baja habitación", "Limpiar habitación"]
 
-            nueva_cita = gestor_de_citas.CitaUrgencias(id_cita, paciente_obj, medico_asignado, fecha_hora_fmt_gestor, nivel_prioridad=nivel_prioridad, motivo=motivo)
+    return _respuesta_condicional(f'/menu:{usuario.rol}', (), lambda: {"rol": usuario.rol, "menu": opciones})
 
 
-        else:
 
+# SIPS
 
-            return jsonify({"detail": "Tipo de cita no válido. Opciones: presencial, telefonica, urgencias."}), 400
+@app.route('/crear_sip/<paciente_id>', methods=['GET'])
 
+def crear_sip(paciente_id):
 
+    conn = _conectar_bd()
 
+    cursor = conn.cursor()
 
+    cursor.execute("SELECT sip FROM sips WHERE paciente_id=?", (paciente_id,))
 
-        if nueva_cita:
+    if cursor.fetchone():
 
+        conn.close()
 
-            try:
+        return jsonify({"error": "SIP ya existe."}), 400
 
+    sip = f"SIP-{uuid.uuid4().hex[:10].upper()}"
 
-                gestor = gestor_de_citas.GestorCitas()  # Crea una instancia aquí
+    cursor.execute("INSERT INTO sips (sip, paciente_id) VALUES (?, ?)", (sip, paciente_id))
 
+    conn.commit()
 
-                gestor.anadir_cita(nueva_cita)
+    conn.close()
 
+    return jsonify({"sip": sip}), 201
 
-                return jsonify({"mensaje": f"Tu solicitud de cita {tipo_cita} ha sido registrada con ID: {id_cita}.", "id_cita": id_cita}), 201
 
 
-            except Exception as e:
+@app.route('/consultar_sip/<paciente_id>', methods=['GET'])
 
+def consultar_sip(paciente_id):
 
-                error_message = f"Error al añadir la cita: {str(e)}"
+    def generar():
 
+        conn = _conectar_bd()
 
-                logging.error(error_message)
+        cursor = conn.cursor()
 
+        cursor.execute("SELECT sip FROM sips WHERE paciente_id=?", (paciente_id,))
 
-                return jsonify({"detail": error_message}), 500
+        resultado = cursor.fetchone()
 
+        conn.close()
 
-        else:
+        return {"sip": resultado[0]} if resultado else None
 
+    respuesta = _respuesta_condicional(f'/consultar_sip/{paciente_id}', ('sips',), generar)
 
-            return jsonify({"detail": "Error al crear la cita."}), 500
+    if respuesta is None:
 
+        return jsonify({"error": "No existe SIP."}), 404
 
+    return respuesta
 
 
 
-    except Exception as e:
+@app.route('/eliminar_sip/<paciente_id>', methods=['DELETE'])
 
+def eliminar_sip_endpoint(paciente_id):
 
-        db.rollback()
+    conn = _conectar_bd()
 
+    cursor = conn.cursor()
 
-        logging.error(f"Error general al pedir cita: {str(e)}")
+    cursor.execute("SELECT sip FROM sips WHERE paciente_id=?", (paciente_id,))
 
+    if not cursor.fetchone():
 
-        return jsonify({"detail": f"Error al procesar la solicitud de cita: {str(e)}"}), 500
+        conn.close()
 
+        return jsonify({"error": "No existe SIP."}), 404
+
+    cursor.execute("DELETE FROM sips WHERE paciente_id=?", (paciente_id,))
+
+    conn.commit()
+
+    conn.close()
+
+    return jsonify({"mensaje": "SIP eliminado."})
+
+
+
+# === Pacientes CRUD ===
+
+@app.route('/pacientes', methods=['GET'])
+
+def listar_pacientes():
+
+    pagina = _pagina_pedida()
+
+    if pagina:
+
+        return _listado_paginado('pacientes', ('id', 'username', 'nombre', 'apellido', 'edad', 'genero', 'estado',
+
+                                               'id_enfermero', 'id_medico', 'id_habitacion'), pagina)
+
+    db = next(get_db())
+
+    pacientes = db.query(PacienteDB).all()
+
+    res = [{"id": p.id, "username": p.username, "nombre": p.nombre, "apellido": p.apellido,
+
+            "edad": p.edad, "genero": p.genero, "estado": p.estado,
+
+            "id_enfermero": p.id_enfermero, "id_medico": p.id_medico, "id_habitacion": p.id_habitacion} for p in pacientes]
+
+    return jsonify(res)
+
+
+
+@app.route('/pacientes/alta', methods=['POST'])
+
+def alta_paciente():
+
+    data = request.get_json()
+
+    if not data:
+
+        return jsonify({"error": "No se proporcionaron datos."}), 400
+
+    try:
+
+        hashed_password = servicio_hash.cifrar(data['password'])
+
+        nuevo_paciente = PacienteDB(
+
+            id=data['id'], username=data['username'], password=hashed_password,
+
+            nombre=data.get('nombre'), apellido=data.get('apellido'), edad=data.get('edad'),
+
+            genero=data.get('genero'), estado=data.get('estado'),
+
+            historial_medico=data.get('historial_medico'), id_enfermero=data.get('id_enfermero'),
+
+            id_medico=data.get('id_medico'), id_habitacion=data.get('id_habitacion')
+
+        )
+
+        db = next(get_db())
+
+        db.add(nuevo_paciente)
+
+        db.commit()
+
+        return jsonify({"mensaje": "Paciente dado de alta."}), 201
+
+    except servicio_hash.ServicioSaturado:
+
+        return _servicio_saturado()
+
+    except KeyError as e:
+
+        db = next(get_db())
+
+        db.rollback()
+
+        return jsonify({"error": f"Campo requerido faltante: {str(e)}"}), 400
+
+    except Exception as e:
+
+        db = next(get_db())
+
+        db.rollback()
+
+        return jsonify({"error": str(e)}), 500
+
+
+
+@app.route('/pacientes/baja/<paciente_id>', methods=['DELETE'])
+
+def baja_paciente(paciente_id: str):
+
+    db = next(get_db())
+
+    paciente = db.query(PacienteDB).filter(PacienteDB.id == paciente_id).first()
+
+    if not paciente:
+
+        return jsonify({"error": "Paciente no existe."}), 404
+
+    db.delete(paciente)
+
+    db.commit()
+
+    return jsonify({"mensaje": "Paciente eliminado."})
+
+
+
+@app.route("/cita/pedir", methods=["POST"])
+
+@requiere_autenticacion
+
+def pedir_cita(usuario):
+
+    data = request.get_json()
+
+    if not data:
+
+        return jsonify({"detail": "No se proporcionaron datos en la solicitud."}), 400
+
+    tipo_cita = data.get("tipo_cita")
+
+    fecha_hora_str = data.get("fecha_hora")
+
+    medico_asignado = data.get("medico", "Sin asignar")
+
+    motivo = data.get("motivo", "")
+
+
+    username_paciente_id = usuario.id  # Este es el ID del paciente
+
+    if not tipo_cita or not fecha_hora_str:
+        return jsonify({"detail": "Debes especificar el tipo de cita y la fecha/hora."}), 400
+
+    try:
+        # Cualquiera de los formatos de 'citas'; la cita guarda el datetime tal cual
+        fecha_hora_dt = interpretar_fecha_hora(fecha_hora_str)
+    except ValueError as e:
+
+
+        return jsonify({"detail": f"Formato de fecha/hora inválido. Usa YYYY-MM-DDTHH:MM:SS: {str(e)}"}), 400
 
-    finally:
 
 
+
+
+    db = next(get_db())
+
+    try:
+
+        paciente_db_obj = db.query(PacienteDB).filter(PacienteDB.id == username_paciente_id).first()
+
+        if not paciente_db_obj:
+
+            return jsonify({"detail": f"Paciente con ID {username_paciente_id} no encontrado en la base de datos."}), 404
+
+    finally:
+
         db.close()
 
+    id_cita = str(uuid.uuid4())
+
+    if tipo_cita == "presencial":
+
+        if not data.get("centro"):
+
+            return jsonify({"detail": "Para cita presencial, se requiere el centro."}), 400
+
+    elif tipo_cita == "telefonica":
+
+        if not data.get("telefono_contacto"):
+
+            return jsonify({"detail": "Para cita telefónica, se requiere el teléfono de contacto."}), 400
+
+    elif tipo_cita == "urgencias":
+
+        if not data.get("nivel_prioridad"):
+
+            return jsonify({"detail": "Para cita de urgencias, se requiere el nivel de prioridad."}), 400
+
+    else:
+
+        return jsonify({"detail": "Tipo de cita no válido. Opciones: presencial, telefonica, urgencias."}), 400
+
+    if tipo_cita == "urgencias":
+
+        # Entra en la cola de triaje, que la guarda también en 'citas' con la hora de llegada
+
+        try:
+
+            id_cita = _urgencias().registrar(paciente_db_obj.id, data["nivel_prioridad"], motivo)
+
+        except ValueError as e:
+
+            return jsonify({"detail": str(e)}), 400
+
+        return jsonify({"mensaje": f"Tu solicitud de cita {tipo_cita} ha sido registrada con ID: {id_cita}.", "id_cita": id_cita}), 201
+
+    # Se guarda en 'citas' (y deja de valer la agenda de ese día del médico)
+
+    agendas = _agenda()
+
+    try:
+
+        medico_cita, dia_cita = registrar_cita(id_cita, paciente_db_obj.id, None if medico_asignado == "Sin asignar" else medico_asignado, fecha_hora_dt, tipo_cita, motivo, centro=data.get("centro"), telefono_contacto=data.get("telefono_contacto"), nivel_prioridad=data.get("nivel_prioridad"))
+
+    except ValueError as e:
+
+        return jsonify({"detail": str(e)}), 400
+
+    agendas.invalidar(medico_cita, dia_cita)
+
+    return jsonify({"mensaje": f"Tu solicitud de cita {tipo_cita} ha sido registrada con ID: {id_cita}.", "id_cita": id_cita}), 201
+
+
+
 # === Médicos CRUD ===
 
 @app.route('/medicos', methods=['GET'])
 
 def listar_medicos():
 
-    db = next(get_db())
+    pagina = _pagina_pedida()
 
-    medicos = db.query(MedicoDB).all()
+    if pagina:
 
-    res = [{"id": m.id, "username": m.username, "especialidad": m.especialidad, "antiguedad": m.antiguedad} for m in medicos]
+        return _listado_paginado('medicos', ('id', 'username', 'especialidad', 'antiguedad'), pagina)
 
-    return jsonify(res)
+    def generar():
+
+        db = next(get_db())
+
+        medicos = db.query(MedicoDB).all()
+
+        return [{"id": m.id, "username": m.username, "especialidad": m.especialidad, "antiguedad": m.antiguedad} for m in medicos]
+
+    return _respuesta_condicional('/medicos', ('medicos',), generar)
 
 
 
@@ -706,7 +1028,7 @@ def alta_medico():
 
     try:
 
-        hashed_password = generate_password_hash(data['password'])
+        hashed_password = servicio_hash.cifrar(data['password'])
 
         nuevo_medico = MedicoDB(
 
@@ -716,419 +1038,1147 @@ def alta_medico():
 
         )
 
-        db = next(get_db())
+        db = next(get_db())
+
+        db.add(nuevo_medico)
+
+        db.commit()
+
+        return jsonify({"mensaje": "Médico dado de alta."}), 201
+
+    except servicio_hash.ServicioSaturado:
+
+        return _servicio_saturado()
+
+    except KeyError as e:
+
+        db = next(get_db())
+
+        db.rollback()
+
+        return jsonify({"error": f"Campo requerido faltante: {str(e)}"}), 400
+
+    except Exception as e:
+
+        db = next(get_db())
+
+        db.rollback()
+
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/medicos/baja/<medico_id>', methods=['DELETE'])
+
+def baja_medico(medico_id):
+
+    db = next(get_db())
+
+    medico = db.query(MedicoDB).filter(MedicoDB.id == medico_id).first()
+
+    if not medico:
+
+        return jsonify({"error": "Médico no existe."}), 404
+
+    db.delete(medico)
+
+    db.commit()
+
+    return jsonify({"mensaje": "Médico eliminado."})
+
+
+
+@app.route("/citas", methods=["GET"])
+
+@requiere_autenticacion
+
+def listar_citas(usuario):
+
+    """
+
+    Citas en orden de fecha (?medico=, ?paciente=, ?limite=N); un paciente solo ve las suyas.
+
+    """
+
+    _agenda()  # Crea la columna 'estado' si falta
+
+    paciente_id = usuario.id if usuario.rol == 'paciente' else request.args.get('paciente')
+
+    limite = max(1, min(request.args.get('limite', 100, type=int), 1000))
+
+    filas = leer_citas_filtradas(paciente_id, request.args.get('medico'), limite)
+
+    campos = ('id_cita', 'paciente_id', 'medico_asignado', 'fecha_hora', 'tipo_cita', 'motivo', 'estado', 'centro',
+
+              'telefono_contacto', 'nivel_prioridad')
+
+    return jsonify([dict(zip(campos, fila)) for fila in filas])
+
+
+
+# === Agenda de los médicos ===
+
+# Agendas de este proceso (caché en memoria; ver agenda.py)
+
+_agenda_medicos = None
+
+
+
+def _agenda():
+
+    global _agenda_medicos
+
+    if _agenda_medicos is None:
+
+        from Base_De_Datos.tablas.tabla_citas import crear_tabla_agenda
+
+        crear_tabla_agenda()
+
+        _agenda_medicos = agenda.AgendaMedicos()
+
+    return _agenda_medicos
+
+
+
+@app.route('/medicos/<medico_id>/agenda', methods=['GET'])
+
+@requiere_autenticacion
+
+def agenda_medico(usuario, medico_id):
+
+    """
+
+    Citas de un médico en un día (?fecha=YYYY-MM-DD, hoy por defecto) en JSON compacto, con ETag.
+
+    """
+
+    if usuario.rol == 'paciente':
+
+        return jsonify({"error": "Acceso denegado."}), 403
+
+    dia = request.args.get('fecha') or datetime.now().strftime('%Y-%m-%d')
+
+    try:
+
+        etag, cuerpo = _agenda().vista(medico_id, dia)
+
+    except ValueError:
+
+        return jsonify({"error": "La fecha debe tener el formato YYYY-MM-DD."}), 400
+
+    respuesta = Response(cuerpo, mimetype='application/json')
+
+    respuesta.set_etag(etag)
+
+    respuesta.headers['Cache-Control'] = 'private, no-cache'
+
+    # 304 sin cuerpo si el cliente ya tiene esta versión (If-None-Match)
+
+    return respuesta.make_conditional(request)
+
+
+
+@app.route('/citas/<id_cita>/cancelar', methods=['POST'])
+
+@requiere_autenticacion
+
+def cancelar_cita(usuario, id_cita):
+
+    """
+
+    Cancela una cita pendiente; un paciente solo puede cancelar las suyas.
+
+    """
+
+    agendas = _agenda()  # Crea la columna 'estado' si falta
+
+    cita = cambiar_estado_cita(id_cita, 'cancelado', usuario.id if usuario.rol == 'paciente' else None)
+
+    if cita is None:
+
+        return jsonify({"error": "La cita no existe o ya no está pendiente."}), 404
+
+    medico, dia, tipo_cita = cita
+
+    if tipo_cita == 'urgencias' and _cola_urgencias is not None:
+
+        _cola_urgencias.descartar(id_cita)
+
+    agendas.invalidar(medico, dia)
+
+    return jsonify({"mensaje": "Cita cancelada."})
+
+
+
+@app.route('/citas/<id_cita>/atender', methods=['POST'])
+
+@requiere_autenticacion
+
+def atender_cita(usuario, id_cita):
+
+    """
+
+    Marca como atendida una cita pendiente.
+
+    """
+
+    if usuario.rol not in ('medico', 'enfermero'):
+
+        return jsonify({"error": "Acceso denegado."}), 403
+
+    agendas = _agenda()  # Crea la columna 'estado' si falta
+
+    cita = cambiar_estado_cita(id_cita, 'completado')
+
+    if cita is None:
+
+        return jsonify({"error": "La cita no existe o ya no está pendiente."}), 404
+
+    medico, dia, tipo_cita = cita
+
+    if tipo_cita == 'urgencias' and _cola_urgencias is not None:
+
+        _cola_urgencias.descartar(id_cita)
+
+    agendas.invalidar(medico, dia)
+
+    return jsonify({"mensaje": "Cita atendida."})
+
+
+
+# === Enfermeros CRUD ===
+
+@app.route('/enfermeros', methods=['GET'])
+
+def listar_enfermeros():
+
+    pagina = _pagina_pedida()
+
+    if pagina:
+
+        return _listado_paginado('enfermeros', ('id', 'username', 'antiguedad', 'especialidad'), pagina,
+
+                                 lambda e: {"id": e[0], "username": e[1], "antieguedad": e[2], "especialidad": e[3]})
+
+    def generar():
+
+        db = next(get_db())
+
+        enfermeros = db.query(EnfermeroDB).all()
+
+        return [{"id": e.id, "username": e.username, "antieguedad": e.antiguedad, "especialidad": e.especialidad} for e in enfermeros]
+
+    return _respuesta_condicional('/enfermeros', ('enfermeros',), generar)
+
+
+
+@app.route('/enfermeros/alta', methods=['POST'])
+
+def alta_enfermero():
+
+    data = request.get_json()
+
+    if not data:
+
+        return jsonify({"error": "No se proporcionaron datos."}), 400
+
+    try:
+
+        hashed_password = servicio_hash.cifrar(data['password'])
+
+        nuevo_enfermero = EnfermeroDB(
+
+            id=data['id'], username=data['username'], password=hashed_password,
+
+            antieguedad=data.get('antieguedad'), especialidad=data.get('especialidad')
+
+        )
+
+        db = next(get_db())
+
+        db.add(nuevo_enfermero)
+
+        db.commit()
+
+        return jsonify({"mensaje": "Enfermero dado de alta."}), 201
+
+    except servicio_hash.ServicioSaturado:
+
+        return _servicio_saturado()
+
+    except KeyError as e:
+
+        db = next(get_db())
+
+        db.rollback()
+
+        return jsonify({"error": f"Campo requerido faltante: {str(e)}"}), 400
+
+    except Exception as e:
+
+        db = next(get_db())
+
+        db.rollback()
+
+        return jsonify({"error": str(e)}), 500
+
+
+
+@app.route('/enfermeros/baja/<enf_id>', methods=['DELETE'])
+
+def baja_enfermero(enf_id):
+
+    db = next(get_db())
+
+    enfermero = db.query(EnfermeroDB).filter(EnfermeroDB.id == enf_id).first()
+
+    if not enfermero:
+
+        return jsonify({"error": "Enfermero no existe."}), 404
+
+    db.delete(enfermero)
+
+    db.commit()
+
+    return jsonify({"mensaje": "Enfermero eliminado."})
+
+
+
+# === Auxiliares CRUD ===
+
+@app.route('/auxiliares', methods=['GET'])
+
+def listar_auxiliares():
+
+    pagina = _pagina_pedida()
+
+    if pagina:
+
+        return _listado_paginado('auxiliares', ('id', 'antiguedad', 'id_enfermero'), pagina)
+
+    conn = _conectar_bd()
+
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT id, antiguedad, id_enfermero FROM auxiliares")
+
+    auxiliares = cursor.fetchall()
+
+    conn.close()
+
+    return jsonify([{"id": a[0], "antiguedad": a[1], "id_enfermero": a[2]} for a in auxiliares])
+
+
+
+@app.route('/auxiliares/alta', methods=['POST'])
+
+def alta_auxiliar():
+
+    data = request.get_json()
+
+    if not data:
+
+        return jsonify({"error": "No se proporcionaron datos."}), 400
+
+    try:
+
+        conn = _conectar_bd()
+
+        cursor = conn.cursor()
+
+        cursor.execute("INSERT INTO auxiliares (id, antiguedad, id_enfermero) VALUES (?, ?, ?)",
+
+                       (data['id'], data['antiguedad'], data.get('id_enfermero')))
+
+        conn.commit()
+
+        conn.close()
+
+        return jsonify({"mensaje": "Auxiliar dado de alta."}), 201
+
+    except KeyError as e:
+
+        conn = _conectar_bd()
+
+        conn.rollback()
+
+        conn.close()
+
+        return jsonify({"error": f"Campo requerido faltante: {str(e)}"}), 400
+
+    except sqlite3.IntegrityError as e:
+
+        conn = _conectar_bd()
+
+        conn.rollback()
+
+        conn.close()
+
+        return jsonify({"error": f"Error de integridad: {str(e)}"}), 400
+
+
+
+@app.route('/auxiliares/baja/<aux_id>', methods=['DELETE'])
+
+def baja_auxiliar(aux_id):
+
+    conn = _conectar_bd()
+
+    cursor = conn.cursor()
+
+    cursor.execute("DELETE FROM auxiliares WHERE id=?", (aux_id,))
+
+    conn.commit()
+
+    conn.close()
+
+    if cursor.rowcount > 0:
+
+        return jsonify({"mensaje": "Auxiliar eliminado."})
+
+    else:
+
+        return jsonify({"error": "Auxiliar no existe."}), 404
+
+
+
+# === Habitaciones CRUD ===
+
+@app.route('/habitaciones', methods=['GET'])
+
+def listar_habitaciones():
+
+    pagina = _pagina_pedida()
+
+    if pagina:
+
+        return _listado_paginado('habitaciones', ('numero_habitacion', 'capacidad', 'limpia'), pagina,
+
+                                 lambda h: {"numero": h[0], "capacidad": h[1], "limpia": bool(h[2])})
+
+    def generar():
+
+        conn = _conectar_bd()
+
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT numero_habitacion, capacidad, limpia FROM habitaciones")
+
+        habitaciones = cursor.fetchall()
+
+        conn.close()
+
+        return [{"numero": h[0], "capacidad": h[1], "limpia": bool(h[2])} for h in habitaciones]
+
+    return _respuesta_condicional('/habitaciones', ('habitaciones',), generar)
+
+
+
+@app.route('/habitaciones/alta', methods=['POST'])
+
+def alta_habitacion():
+
+    data = request.get_json()
+
+    if not data:
+
+        return jsonify({"error": "No se proporcionaron datos."}), 400
+
+    try:
+
+        conn = _conectar_bd()
+
+        cursor = conn.cursor()
+
+        cursor.execute("INSERT INTO habitaciones (numero_habitacion, capacidad, limpia) VALUES (?, ?, ?)",
+
+                       (data['numero'], data['capacidad'], 0))  # Por defecto, la habitación está sucia (0)
+
+        conn.commit()
+
+        conn.close()
+
+        return jsonify({"mensaje": "Habitación dada de alta."}), 201
+
+    except KeyError as e:
+
+        conn = _conectar_bd()
+
+        conn.rollback()
+
+        conn.close()
+
+        return jsonify({"error": f"Campo requerido faltante: {str(e)}"}), 400
+
+    except sqlite3.IntegrityError as e:
+
+        conn = _conectar_bd()
+
+        conn.rollback()
+
+        conn.close()
+
+        return jsonify({"error": f"Error de integridad: {str(e)}"}), 400
+
+
+
+@app.route('/habitaciones/limpiar/<int:numero>', methods=['PATCH'])
+
+def habitacion_limpiar(numero):
+
+    conn = _conectar_bd()
+
+    cursor = conn.cursor()
+
+    cursor.execute("UPDATE habitaciones SET limpia=1 WHERE numero_habitacion=?", (numero,))
+
+    conn.commit()
+
+    conn.close()
+
+    if cursor.rowcount > 0:
+
+        return jsonify({"mensaje": "Habitación limpiada."})
+
+    else:
+
+        return jsonify({"error": "Habitación no existe."}), 404
+
+
+
+@app.route('/habitaciones/baja/<int:numero>', methods=['DELETE'])
+
+def baja_habitacion(numero):
+
+    conn = _conectar_bd()
+
+    cursor = conn.cursor()
+
+    cursor.execute("DELETE FROM habitaciones WHERE numero_habitacion=?", (numero,))
+
+    conn.commit()
+
+    conn.close()
+
+    if cursor.rowcount > 0:
+
+        return jsonify({"mensaje": "Habitación eliminada."})
+
+    else:
+
+        return jsonify({"error": "Habitación no existe."}), 404
+
+
+
+# === Directorio de usuarios ===
+
+
+
+@app.route('/usuarios', methods=['POST'])
+
+@requiere_administrador
+
+def alta_usuario():
+
+    """
+
+    Crea la cuenta de un auxiliar, secretario o paramédico (``username``, ``password``, ``rol``, ``id``).
+
+    Las de pacientes, médicos y enfermeros se crean con su alta o su registro.
+
+    """
+
+    data = request.get_json(silent=True) or {}
+
+    username, password, rol, id_entidad = (data.get(c) for c in ('username', 'password', 'rol', 'id'))
+
+    if not all([username, password, rol, id_entidad]):
+
+        return jsonify({"detail": "Campos requeridos: username, password, rol, id."}), 400
+
+    if rol not in tabla_usuarios.ROLES_SIN_CLAVE:
+
+        return jsonify({"detail": f"Solo se crean aquí cuentas de: {', '.join(tabla_usuarios.ROLES_SIN_CLAVE)}."}), 400
+
+    try:
+
+        tabla_usuarios.insertar_usuario(username, rol, id_entidad, servicio_hash.cifrar(password))
+
+    except servicio_hash.ServicioSaturado:
+
+        return _servicio_saturado()
+
+    except ValueError as e:
+
+        return jsonify({"detail": str(e)}), 404
+
+    except sqlite3.IntegrityError:
+
+        return jsonify({"detail": f"El username '{username}' o la cuenta de ese {rol} ya existen."}), 409
+
+    return jsonify({"message": f"Cuenta '{username}' creada.", "rol": rol, "id": id_entidad}), 201
+
+
+
+@app.route('/usuarios/<username>', methods=['DELETE'])
+
+@requiere_administrador
+
+def baja_usuario(username):
+
+    """Borra la cuenta de un auxiliar, secretario o paramédico."""
+
+    if not tabla_usuarios.eliminar_usuario(username):
+
+        return jsonify({"detail": f"No existe la cuenta '{username}' (o es de un paciente, médico o enfermero)."}), 404
+
+    return jsonify({"message": f"Cuenta '{username}' eliminada."})
+
+
+
+# === Altas masivas ===
+
+@app.route('/bulk/<entidad>', methods=['POST'])
+
+@requiere_administrador
+
+def alta_masiva(entidad):
+
+    """
+
+    Alta de muchos pacientes, médicos, enfermeros, auxiliares o habitaciones (array JSON o NDJSON).
+
+    Responde con un flujo NDJSON con el resultado de cada elemento (ver altas_masivas.py).
+
+    """
+
+    if entidad not in altas_masivas.ENTIDADES:
+
+        return jsonify({"error": f"Entidad desconocida. Opciones: {', '.join(altas_masivas.ENTIDADES)}."}), 404
+
+    if request.mimetype in altas_masivas.TIPOS_NDJSON:
+
+        elementos = altas_masivas.leer_ndjson(request.stream, app.json.loads)
+
+    else:
+
+        datos = request.get_json(silent=True)
+
+        if not isinstance(datos, list):
+
+            return jsonify({"error": "Se esperaba un array JSON o NDJSON (application/x-ndjson)."}), 400
+
+        elementos = enumerate(datos)
+
+    resultados = altas_masivas.dar_de_alta(entidad, elementos)
+
+    lineas = (app.json.dumps(resultado) + '\n' for resultado in resultados)
+
+    return Response(stream_with_context(lineas), mimetype='application/x-ndjson')
+
+
+
+# === Asignaciones 1:N ===
+
+@app.route('/pacientes/asignar_medico', methods=['POST'])
+
+def asignar_medico():
+
+    data = request.get_json()
+
+    if not data or 'id_paciente' not in data or 'id_medico' not in data:
+
+        return jsonify({"error": "Se requieren id_paciente e id_medico."}), 400
+
+    id_p = data['id_paciente']; id_m = data['id_medico']
+
+    db = next(get_db())
+
+    paciente = db.query(PacienteDB).filter(PacienteDB.id == id_p).first()
+
+    medico = db.query(MedicoDB).filter(MedicoDB.id == id_m).first()
+
+    if not paciente or not medico:
+
+        return jsonify({"error": "Paciente o médico no existe."}), 404
+
+    paciente.id_medico = id_m
+
+    db.commit()
+
+    return jsonify({"mensaje": "Médico asignado."})
+
+
+
+@app.route('/pacientes/asignar_habitacion', methods=['POST'])
+
+def asignar_habitacion():
+
+    data = request.get_json()
+
+    if not data or 'id_paciente' not in data or 'numero' not in data:
+
+        return jsonify({"error": "Se requieren id_paciente y numero de habitación."}), 400
+
+    id_p = data['id_paciente']; num = data['numero']
+
+    db = next(get_db())
+
+    paciente = db.query(PacienteDB).filter(PacienteDB.id == id_p).first()
+
+    conn = _conectar_bd()
+
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT numero_habitacion FROM habitaciones WHERE numero_habitacion=?", (num,))
+
+    habitacion = cursor.fetchone()
+
+    conn.close()
+
+    if not paciente or not habitacion:
+
+        return jsonify({"error": "Paciente o habitación no existe."}), 404
+
+    paciente.id_habitacion = num
+
+    db.commit()
+
+    return jsonify({"mensaje": "Habitación asignada."})
+
+
+
+# === Despacho de ambulancias ===
+
+# Central de despacho de este proceso; se carga con la primera petición
+
+_central_despacho = None
+
+
+
+def _central():
+
+    global _central_despacho
+
+    if _central_despacho is None:
+
+        despacho_ambulancias.CentralDespacho.preparar()
+
+        central = despacho_ambulancias.CentralDespacho()
+
+        central.cargar()
+
+        _central_despacho = central
+
+    return _central_despacho
+
+
 
-        db.add(nuevo_medico)
+@app.route('/ambulancias/despachar', methods=['POST'])
 
-        db.commit()
+@requiere_autenticacion
 
-        return jsonify({"mensaje": "Médico dado de alta."}), 201
+def despachar_ambulancia(usuario):
 
-    except KeyError as e:
+    """
 
-        db = next(get_db())
+    Envía la ambulancia libre más cercana a un aviso.
 
-        db.rollback()
+    Cuerpo: latitud y longitud, o zona ("Granada 9"); opcionales especialidad
 
-        return jsonify({"error": f"Campo requerido faltante: {str(e)}"}), 400
+    (de algún paramédico de la tripulación), tripulacion_minima y estado del
 
-    except Exception as e:
+    paciente (urgente, grave o leve) para estimar el tiempo de llegada.
 
-        db = next(get_db())
+    """
 
-        db.rollback()
+    data = request.get_json(silent=True) or {}
 
-        return jsonify({"error": str(e)}), 500
+    central = _central()
 
-@app.route('/medicos/baja/<medico_id>', methods=['DELETE'])
+    if 'latitud' in data and 'longitud' in data:
 
-def baja_medico(medico_id):
+        try:
 
-    db = next(get_db())
+            latitud, longitud = float(data['latitud']), float(data['longitud'])
 
-    medico = db.query(MedicoDB).filter(MedicoDB.id == medico_id).first()
+        except (TypeError, ValueError):
 
-    if not medico:
+            return jsonify({"error": "latitud y longitud deben ser números."}), 400
 
-        return jsonify({"error": "Médico no existe."}), 404
+        if not (math.isfinite(latitud) and math.isfinite(longitud)):
 
-    db.delete(medico)
+            return jsonify({"error": "latitud y longitud deben ser números finitos."}), 400
 
-    db.commit()
+    elif 'zona' in data:
 
-    return jsonify({"mensaje": "Médico eliminado."})
+        coordenadas = despacho_ambulancias.ubicar_zona(str(data['zona']), central.zonas)
 
+        if coordenadas is None:
 
+            return jsonify({"error": f"Zona desconocida: {data['zona']}."}), 400
 
-@app.route("/citas", methods=["GET"])
+        latitud, longitud = coordenadas
 
-def listar_citas():
+    else:
 
-    citas = gestor_de_citas.mostrar_citas()
+        return jsonify({"error": "Se requieren latitud y longitud, o zona."}), 400
 
-    return jsonify(citas)
+    try:
 
+        tripulacion_minima = int(data.get('tripulacion_minima', 1))
 
+    except (TypeError, ValueError, OverflowError):
 
-# === Enfermeros CRUD ===
+        return jsonify({"error": "tripulacion_minima debe ser un número entero."}), 400
 
-@app.route('/enfermeros', methods=['GET'])
+    if tripulacion_minima < 0:
 
-def listar_enfermeros():
+        return jsonify({"error": "tripulacion_minima no puede ser negativa."}), 400
 
-    db = next(get_db())
+    try:
 
-    enfermeros = db.query(EnfermeroDB).all()
+        salida = central.asignar(latitud, longitud, data.get('especialidad'), tripulacion_minima)
 
-    res = [{"id": e.id, "username": e.username, "antieguedad": e.antieguedad, "especialidad": e.especialidad} for e in enfermeros]
+    except ValueError as e:
 
-    return jsonify(res)
+        # La base de datos rechazó la salida (p. ej. la ambulancia se dio de baja en otro proceso)
 
+        return jsonify({"error": str(e)}), 409
 
+    if salida is None:
 
-@app.route('/enfermeros/alta', methods=['POST'])
+        return jsonify({"error": "No hay ninguna ambulancia libre adecuada."}), 503
 
-def alta_enfermero():
+    if data.get('estado'):
 
-    data = request.get_json()
+        velocidad = despacho_ambulancias.velocidad_traslado(str(data['estado']))
 
-    if not data:
+        salida['minutos_estimados'] = round(salida['distancia_km'] / velocidad * 60, 1) if velocidad else None
 
-        return jsonify({"error": "No se proporcionaron datos."}), 400
+    return jsonify(salida), 201
 
-    try:
 
-        hashed_password = generate_password_hash(data['password'])
 
-        nuevo_enfermero = EnfermeroDB(
+@app.route('/ambulancias/<matricula>/liberar', methods=['POST'])
 
-            id=data['id'], username=data['username'], password=hashed_password,
+@requiere_autenticacion
 
-            antieguedad=data.get('antieguedad'), especialidad=data.get('especialidad')
+def liberar_ambulancia(usuario, matricula):
 
-        )
+    if not _central().liberar(matricula):
 
-        db = next(get_db())
+        return jsonify({"error": "La ambulancia no tiene ninguna salida en curso."}), 404
 
-        db.add(nuevo_enfermero)
+    return jsonify({"mensaje": "Ambulancia libre."})
 
-        db.commit()
 
-        return jsonify({"mensaje": "Enfermero dado de alta."}), 201
 
-    except KeyError as e:
+@app.route('/ambulancias/despacho', methods=['GET'])
 
-        db = next(get_db())
+@requiere_autenticacion
 
-        db.rollback()
+def estado_despacho(usuario):
 
-        return jsonify({"error": f"Campo requerido faltante: {str(e)}"}), 400
+    central = _central()
 
-    except Exception as e:
+    central.sincronizar()
 
-        db = next(get_db())
+    return jsonify(central.estado())
 
-        db.rollback()
 
-        return jsonify({"error": str(e)}), 500
 
+# === Cola de triaje de urgencias ===
 
+# Cola de este proceso; se reconstruye desde la base de datos con la primera petición
 
-@app.route('/enfermeros/baja/<enf_id>', methods=['DELETE'])
+_cola_urgencias = None
 
-def baja_enfermero(enf_id):
 
-    db = next(get_db())
 
-    enfermero = db.query(EnfermeroDB).filter(EnfermeroDB.id == enf_id).first()
+def _urgencias():
 
-    if not enfermero:
+    global _cola_urgencias
 
-        return jsonify({"error": "Enfermero no existe."}), 404
+    if _cola_urgencias is None:
 
-    db.delete(enfermero)
+        from Base_De_Datos.tablas.tabla_urgencias import crear_tabla_triaje
 
-    db.commit()
+        _agenda()  # Crea la columna 'estado' que marca al reclamar
 
-    return jsonify({"mensaje": "Enfermero eliminado."})
+        crear_tabla_triaje()
 
+        cola = triaje.ColaUrgencias()
 
+        cola.cargar()
 
-# === Auxiliares CRUD ===
+        _cola_urgencias = cola
 
-@app.route('/auxiliares', methods=['GET'])
+    return _cola_urgencias
 
-def listar_auxiliares():
 
-    conn = _conectar_bd()
 
-    cursor = conn.cursor()
+@app.route('/urgencias/cola', methods=['GET', 'POST'])
 
-    cursor.execute("SELECT id, antiguedad, id_enfermero FROM auxiliares")
+@requiere_autenticacion
 
-    auxiliares = cursor.fetchall()
+def cola_urgencias(usuario):
 
-    conn.close()
+    """
 
-    return jsonify([{"id": a[0], "antiguedad": a[1], "id_enfermero": a[2]} for a in auxiliares])
+    GET: pacientes en espera en el orden en que se atenderán (?limite=N).
 
+    POST: registra la llegada de un paciente (id_paciente, nivel_prioridad, motivo).
 
+    """
 
-@app.route('/auxiliares/alta', methods=['POST'])
+    if usuario.rol == 'paciente':
 
-def alta_auxiliar():
+        return jsonify({"error": "Acceso denegado."}), 403
 
-    data = request.get_json()
+    if request.method == 'GET':
 
-    if not data:
+        limite = request.args.get('limite', type=int)
 
-        return jsonify({"error": "No se proporcionaron datos."}), 400
+        cola = _urgencias().listar(limite)
 
-    try:
+        return jsonify({"en_espera": len(_urgencias()), "cola": cola})
 
-        conn = _conectar_bd()
+    data = request.get_json(silent=True) or {}
 
-        cursor = conn.cursor()
+    if not data.get('id_paciente') or not data.get('nivel_prioridad'):
 
-        cursor.execute("INSERT INTO auxiliares (id, antiguedad, id_enfermero) VALUES (?, ?, ?)",
+        return jsonify({"error": "Se requieren id_paciente y nivel_prioridad."}), 400
 
-                       (data['id'], data['antiguedad'], data.get('id_enfermero')))
+    try:
 
-        conn.commit()
+        id_cita = _urgencias().registrar(data['id_paciente'], data['nivel_prioridad'], data.get('motivo', ''))
 
-        conn.close()
+    except ValueError as e:
 
-        return jsonify({"mensaje": "Auxiliar dado de alta."}), 201
+        return jsonify({"error": str(e)}), 400
 
-    except KeyError as e:
+    return jsonify({"mensaje": "Paciente en la cola de urgencias.", "id_cita": id_cita}), 201
 
-        conn = _conectar_bd()
 
-        conn.rollback()
 
-        conn.close()
+@app.route('/urgencias/cola/<id_cita>', methods=['PATCH', 'DELETE'])
 
-        return jsonify({"error": f"Campo requerido faltante: {str(e)}"}), 400
+@requiere_autenticacion
 
-    except sqlite3.IntegrityError as e:
+def cita_urgencias(usuario, id_cita):
 
-        conn = _conectar_bd()
+    """
 
-        conn.rollback()
+    PATCH cambia el nivel_prioridad de una cita en espera; DELETE la saca de la cola.
 
-        conn.close()
+    """
 
-        return jsonify({"error": f"Error de integridad: {str(e)}"}), 400
+    if usuario.rol == 'paciente':
 
+        return jsonify({"error": "Acceso denegado."}), 403
 
+    if request.method == 'DELETE':
 
-@app.route('/auxiliares/baja/<aux_id>', methods=['DELETE'])
+        if not _urgencias().cancelar(id_cita):
 
-def baja_auxiliar(aux_id):
+            return jsonify({"error": "La cita no está en espera."}), 404
 
-    conn = _conectar_bd()
+        return jsonify({"mensaje": "Cita retirada de la cola."})
 
-    cursor = conn.cursor()
+    data = request.get_json(silent=True) or {}
 
-    cursor.execute("DELETE FROM auxiliares WHERE id=?", (aux_id,))
+    if not data.get('nivel_prioridad'):
 
-    conn.commit()
+        return jsonify({"error": "Se requiere nivel_prioridad."}), 400
 
-    conn.close()
+    try:
 
-    if cursor.rowcount > 0:
+        actualizada = _urgencias().repriorizar(id_cita, data['nivel_prioridad'])
 
-        return jsonify({"mensaje": "Auxiliar eliminado."})
+    except ValueError as e:
 
-    else:
+        return jsonify({"error": str(e)}), 400
 
-        return jsonify({"error": "Auxiliar no existe."}), 404
+    if not actualizada:
 
+        return jsonify({"error": "La cita no está en espera."}), 404
 
+    return jsonify({"mensaje": "Prioridad actualizada."})
 
-# === Habitaciones CRUD ===
 
-@app.route('/habitaciones', methods=['GET'])
 
-def listar_habitaciones():
+@app.route('/urgencias/siguiente', methods=['POST'])
 
-    conn = _conectar_bd()
+@requiere_autenticacion
 
-    cursor = conn.cursor()
+def siguiente_urgencia(usuario):
 
-    cursor.execute("SELECT numero_habitacion, capacidad, limpia FROM habitaciones")
+    """
 
-    habitaciones = cursor.fetchall()
+    Saca de la cola al paciente que toca atender; si lo pide un médico, queda asignado a él.
 
-    conn.close()
+    """
 
-    return jsonify([{"numero": h[0], "capacidad": h[1], "limpia": bool(h[2])} for h in habitaciones])
+    if usuario.rol not in ('medico', 'enfermero'):
 
+        return jsonify({"error": "Acceso denegado."}), 403
 
+    cita = _urgencias().siguiente(usuario.id if usuario.rol == 'medico' else None)
 
-@app.route('/habitaciones/alta', methods=['POST'])
+    if cita is None:
 
-def alta_habitacion():
+        return jsonify({"mensaje": "No hay pacientes esperando."}), 404
 
-    data = request.get_json()
+    return jsonify(cita)
 
-    if not data:
 
-        return jsonify({"error": "No se proporcionaron datos."}), 400
 
-    try:
+# === Cola de documentos de secretaría ===
 
-        conn = _conectar_bd()
+# Colas de este proceso (caché en memoria sobre el índice de 'documentos')
 
-        cursor = conn.cursor()
+_cola_documentos = None
 
-        cursor.execute("INSERT INTO habitaciones (numero_habitacion, capacidad, limpia) VALUES (?, ?, ?)",
 
-                       (data['numero'], data['capacidad'], 0))  # Por defecto, la habitación está sucia (0)
 
-        conn.commit()
+def _documentos():
 
-        conn.close()
+    global _cola_documentos
 
-        return jsonify({"mensaje": "Habitación dada de alta."}), 201
+    if _cola_documentos is None:
 
-    except KeyError as e:
+        from Base_De_Datos.tablas.tabla_documento import crear_tabla_documentos
 
-        conn = _conectar_bd()
+        crear_tabla_documentos()
 
-        conn.rollback()
+        _cola_documentos = cola_documentos.ColaDocumentos()
 
-        conn.close()
+    return _cola_documentos
 
-        return jsonify({"error": f"Campo requerido faltante: {str(e)}"}), 400
 
-    except sqlite3.IntegrityError as e:
 
-        conn = _conectar_bd()
+def _ids_documentos():
 
-        conn.rollback()
+    data = request.get_json(silent=True) or {}
 
-        conn.close()
+    ids = data.get('ids')
 
-        return jsonify({"error": f"Error de integridad: {str(e)}"}), 400
+    if not isinstance(ids, list) or not ids or not all(isinstance(i, str) for i in ids):
 
+        return None
 
+    return ids
 
-@app.route('/habitaciones/limpiar/<int:numero>', methods=['PATCH'])
 
-def habitacion_limpiar(numero):
 
-    conn = _conectar_bd()
+@app.route('/secretarios/<id_secretario>/documentos', methods=['GET'])
 
-    cursor = conn.cursor()
+@requiere_autenticacion
 
-    cursor.execute("UPDATE habitaciones SET limpia=1 WHERE numero_habitacion=?", (numero,))
+def documentos_secretario(usuario, id_secretario):
 
-    conn.commit()
+    """
 
-    conn.close()
+    Próximos documentos de la cola de un secretario (?limite=N, ?sin_asignar=0 para solo los suyos).
 
-    if cursor.rowcount > 0:
+    """
 
-        return jsonify({"mensaje": "Habitación limpiada."})
+    if usuario.rol == 'paciente':
 
-    else:
+        return jsonify({"error": "Acceso denegado."}), 403
 
-        return jsonify({"error": "Habitación no existe."}), 404
+    limite = max(1, min(request.args.get('limite', 10, type=int), 1000))
 
+    sin_asignar = request.args.get('sin_asignar', '1') != '0'
 
+    return jsonify(_documentos().siguientes(id_secretario, limite, sin_asignar))
 
-@app.route('/habitaciones/baja/<int:numero>', methods=['DELETE'])
 
-def baja_habitacion(numero):
 
-    conn = _conectar_bd()
+@app.route('/secretarios/<id_secretario>/documentos/reclamar', methods=['POST'])
 
-    cursor = conn.cursor()
+@requiere_autenticacion
 
-    cursor.execute("DELETE FROM habitaciones WHERE numero_habitacion=?", (numero,))
+def reclamar_documento(usuario, id_secretario):
 
-    conn.commit()
+    if usuario.rol == 'paciente':
 
-    conn.close()
+        return jsonify({"error": "Acceso denegado."}), 403
 
-    if cursor.rowcount > 0:
+    documento = _documentos().reclamar(id_secretario)
 
-        return jsonify({"mensaje": "Habitación eliminada."})
+    if documento is None:
 
-    else:
+        return jsonify({"mensaje": "No hay documentos pendientes."}), 404
 
-        return jsonify({"error": "Habitación no existe."}), 404
+    return jsonify(documento)
 
 
 
-# === Asignaciones 1:N ===
+@app.route('/secretarios/<id_secretario>/documentos/cerrar', methods=['POST'])
 
-@app.route('/pacientes/asignar_medico', methods=['POST'])
+@requiere_autenticacion
 
-def asignar_medico():
+def cerrar_documentos(usuario, id_secretario):
 
-    data = request.get_json()
+    if usuario.rol == 'paciente':
 
-    if not data or 'id_paciente' not in data or 'id_medico' not in data:
+        return jsonify({"error": "Acceso denegado."}), 403
 
-        return jsonify({"error": "Se requieren id_paciente e id_medico."}), 400
+    ids = _ids_documentos()
 
-    id_p = data['id_paciente']; id_m = data['id_medico']
+    if ids is None:
 
-    db = next(get_db())
+        return jsonify({"error": "Se requiere una lista 'ids' de documentos."}), 400
 
-    paciente = db.query(PacienteDB).filter(PacienteDB.id == id_p).first()
+    return jsonify({"cerrados": _documentos().cerrar(ids, id_secretario)})
 
-    medico = db.query(MedicoDB).filter(MedicoDB.id == id_m).first()
 
-    if not paciente or not medico:
 
-        return jsonify({"error": "Paciente o médico no existe."}), 404
+@app.route('/secretarios/<id_secretario>/documentos/asignar', methods=['POST'])
 
-    paciente.id_medico = id_m
+@requiere_autenticacion
 
-    db.commit()
+def asignar_documentos(usuario, id_secretario):
 
-    return jsonify({"mensaje": "Médico asignado."})
+    if usuario.rol == 'paciente':
 
+        return jsonify({"error": "Acceso denegado."}), 403
 
+    ids = _ids_documentos()
 
-@app.route('/pacientes/asignar_habitacion', methods=['POST'])
+    if ids is None:
 
-def asignar_habitacion():
+        return jsonify({"error": "Se requiere una lista 'ids' de documentos."}), 400
 
-    data = request.get_json()
+    try:
 
-    if not data or 'id_paciente' not in data or 'numero' not in data:
+        movidos = _documentos().asignar(ids, id_secretario)
 
-        return jsonify({"error": "Se requieren id_paciente y numero de habitación."}), 400
+    except ValueError as e:
 
-    id_p = data['id_paciente']; num = data['numero']
+        return jsonify({"error": str(e)}), 404
 
-    db = next(get_db())
+    return jsonify({"asignados": movidos})
 
-    paciente = db.query(PacienteDB).filter(PacienteDB.id == id_p).first()
 
-    conn = _conectar_bd()
 
-    cursor = conn.cursor()
+@app.route('/documentos/urgentes', methods=['POST'])
 
-    cursor.execute("SELECT numero_habitacion FROM habitaciones WHERE numero_habitacion=?", (num,))
+@requiere_autenticacion
 
-    habitacion = cursor.fetchone()
+def marcar_documentos_urgentes(usuario):
 
-    conn.close()
+    if usuario.rol == 'paciente':
 
-    if not paciente or not habitacion:
+        return jsonify({"error": "Acceso denegado."}), 403
 
-        return jsonify({"error": "Paciente o habitación no existe."}), 404
+    ids = _ids_documentos()
 
-    paciente.id_habitacion = num
+    if ids is None:
 
-    db.commit()
+        return jsonify({"error": "Se requiere una lista 'ids' de documentos."}), 400
 
-    return jsonify({"mensaje": "Habitación asignada."})
+    return jsonify({"marcados": _documentos().marcar_urgentes(ids)})
 
 
 
@@ -1230,13 +2280,7 @@ def register_paciente():
 
             return jsonify({"detail": "Todos los campos son obligatorios."}), 400
 
-        existing_user = db.query(PacienteDB).filter(PacienteDB.username == username).first()
-
-        if existing_user:
-
-            return jsonify({"detail": f"El username '{username}' ya está registrado."}), 409
-
-        hashed_password = generate_password_hash(password)
+        hashed_password = servicio_hash.cifrar(password)
 
         new_paciente = PacienteDB(id=username, username=username, password=hashed_password, nombre=nombre, apellido=apellido, edad=edad, genero=genero, estado=estado)
 
@@ -1244,13 +2288,23 @@ def register_paciente():
 
         db.commit()
 
-        return jsonify({"message": f"Paciente '{username}' registrado exitosamente."}, 201)
+        return jsonify({"message": f"Paciente '{username}' registrado exitosamente."}), 201
+
+    except servicio_hash.ServicioSaturado:
+
+        return _servicio_saturado()
+
+    except IntegrityError as e:
+
+        db.rollback()
+
+        return _registro_rechazado(e, username, username)
 
     except Exception as e:
 
         db.rollback()
 
-        return jsonify({"detail": f"Error al registrar el paciente: {str(e)}"}, 500)
+        return jsonify({"detail": f"Error al registrar el paciente: {str(e)}"}), 500
 
 
 
@@ -1296,13 +2350,7 @@ def register_medico():
 
             return jsonify({"detail": "Todos los campos son obligatorios."}), 400
 
-        existing_user = db.query(MedicoDB).filter(MedicoDB.username == username).first()
-
-        if existing_user:
-
-            return jsonify({"detail": f"El username '{username}' ya está registrado como médico."}), 409
-
-        hashed_password = generate_password_hash(password)
+        hashed_password = servicio_hash.cifrar(password)
 
         new_medico = MedicoDB(id=id, username=username, password=hashed_password, especialidad=especialidad, antiguedad=antiguedad)
 
@@ -1310,13 +2358,23 @@ def register_medico():
 
         db.commit()
 
-        return jsonify({"message": f"Médico '{username}' registrado exitosamente."}, 201)
+        return jsonify({"message": f"Médico '{username}' registrado exitosamente."}), 201
+
+    except servicio_hash.ServicioSaturado:
+
+        return _servicio_saturado()
+
+    except IntegrityError as e:
+
+        db.rollback()
+
+        return _registro_rechazado(e, username, id, ' como médico')
 
     except Exception as e:
 
         db.rollback()
 
-        return jsonify({"detail": f"Error al registrar el médico: {str(e)}"}, 500)
+        return jsonify({"detail": f"Error al registrar el médico: {str(e)}"}), 500
 
 
 
@@ -1362,27 +2420,31 @@ def register_enfermero():
 
             return jsonify({"detail": "Todos los campos son obligatorios."}), 400
 
-        existing_user = db.query(EnfermeroDB).filter(EnfermeroDB.username == username).first()
+        hashed_password = servicio_hash.cifrar(password)
 
-        if existing_user:
+        new_enfermero = EnfermeroDB(id=id, username=username, password=hashed_password, antiguedad=antieguedad, especialidad=especialidad)
 
-            return jsonify({"detail": f"El username '{username}' ya está registrado como enfermero."}), 409
+        db.add(new_enfermero)
 
-        hashed_password = generate_password_hash(password)
+        db.commit()
 
-        new_enfermero = EnfermeroDB(id=id, username=username, password=hashed_password, antieguedad=antieguedad, especialidad=especialidad)
+        return jsonify({"message": f"Enfermero '{username}' registrado exitosamente."}), 201
 
-        db.add(new_enfermero)
+    except servicio_hash.ServicioSaturado:
 
-        db.commit()
+        return _servicio_saturado()
+
+    except IntegrityError as e:
+
+        db.rollback()
 
-        return jsonify({"message": f"Enfermero '{username}' registrado exitosamente."}, 201)
+        return _registro_rechazado(e, username, id, ' como enfermero')
 
     except Exception as e:
 
         db.rollback()
 
-        return jsonify({"detail": f"Error al registrar el enfermero: {str(e)}"}, 500)
+        return jsonify({"detail": f"Error al registrar el enfermero: {str(e)}"}), 500
 
 
 
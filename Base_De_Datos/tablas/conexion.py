@@ -0,0 +1,87 @@
+import sqlite3
+import os
+
+# Base de datos en la misma carpeta que este script (se puede redirigir con PROSALUD_BD)
+RUTA_BD = os.environ.get(
+    'PROSALUD_BD',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bdd.db')
+)
+
+# Segundos que una conexión espera a que se libere un bloqueo antes de fallar
+TIMEOUT_BD = float(os.environ.get('PROSALUD_BD_TIMEOUT', '30'))
+
+# Clase de las conexiones que devuelve abrir_conexion (y las del engine de
+# APIS); consultas.py la sustituye por una subclase que mide cada sentencia
+FABRICA_CONEXION = sqlite3.Connection
+
+
+def configurar_conexion(conn: sqlite3.Connection) -> None:
+    """
+    Aplica la configuración por conexión de SQLite.
+
+    - foreign_keys : activa las claves foráneas.
+    - busy_timeout : espera ``TIMEOUT_BD`` segundos ante un bloqueo en lugar de
+      lanzar "database is locked" de inmediato.
+    - synchronous = NORMAL : en modo WAL es seguro ante caídas del proceso y
+      evita un fsync por cada commit.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        Conexión recién abierta (sqlite3 o la DBAPI usada por SQLAlchemy).
+
+    Returns
+    -------
+    None
+    """
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA foreign_keys = ON;")
+    cursor.execute(f"PRAGMA busy_timeout = {int(TIMEOUT_BD * 1000)};")
+    cursor.execute("PRAGMA synchronous = NORMAL;")
+    cursor.close()
+
+
+def abrir_conexion(ruta: str = RUTA_BD) -> sqlite3.Connection:
+    """
+    Abre una conexión SQLite con la configuración común del proyecto.
+
+    Parameters
+    ----------
+    ruta : str, optional
+        Ruta al fichero de base de datos; por defecto ``RUTA_BD``.
+
+    Returns
+    -------
+    sqlite3.Connection
+        Conexión activa al archivo de base de datos.
+    """
+    conn = sqlite3.connect(ruta, timeout=TIMEOUT_BD, factory=FABRICA_CONEXION)
+    configurar_conexion(conn)
+    return conn
+
+
+def activar_wal(ruta: str = RUTA_BD) -> str:
+    """
+    Pone la base de datos en modo WAL (write-ahead log).
+
+    En WAL los lectores no bloquean al escritor ni viceversa, que es lo que
+    necesitan varios procesos trabajadores compartiendo el mismo fichero.
+    El modo queda guardado en el propio fichero, así que basta con llamarla
+    una vez al arrancar cada proceso.
+
+    Parameters
+    ----------
+    ruta : str, optional
+        Ruta al fichero de base de datos; por defecto ``RUTA_BD``.
+
+    Returns
+    -------
+    str
+        Modo de journal resultante (debería ser 'wal').
+    """
+    conn = abrir_conexion(ruta)
+    try:
+        modo = conn.execute("PRAGMA journal_mode = WAL;").fetchone()[0]
+    finally:
+        conn.close()
+    return modo
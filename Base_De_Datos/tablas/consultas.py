@@ -0,0 +1,568 @@
+"""
+Estadísticas de consultas SQL
+=============================
+
+Capa de medición de todas las sentencias que llegan a SQLite, tanto desde
+las funciones ``tabla_*`` (``abrir_conexion``) como desde SQLAlchemy (el
+engine de ``APIS`` abre sus conexiones con la misma clase).
+
+Para cada sentencia *normalizada* (literales sustituidos por ``?``, listas
+``IN (?, ?, ...)`` colapsadas y espacios compactados) se acumulan:
+
+- llamadas, tiempo total, medio y máximo (ejecución más lectura de filas),
+- filas devueltas (o modificadas, en INSERT/UPDATE/DELETE),
+- el plan de ``EXPLAIN QUERY PLAN`` de la primera vez que se ve, marcando
+  las que recorren una tabla entera sin índice (``SCAN`` sin ``INDEX``),
+- el máximo de llamadas dentro de un mismo ámbito (una petición HTTP): una
+  sentencia que se repite decenas de veces por petición es un patrón N+1.
+
+Las que tardan más de ``UMBRAL_LENTA_MS`` van además al registro de
+consultas lentas (logger ``prosalud.consultas_lentas`` y una cola en
+memoria con las últimas ``MAX_LENTAS``) junto con su plan.
+
+Se activa con ``PROSALUD_ESTADISTICAS_SQL=1`` (o ``python servidor.py
+--estadisticas-sql``); los resultados se consultan en ``/admin/consultas``
+o desde la línea de comandos::
+
+    python -m Base_De_Datos.tablas.consultas --url http://127.0.0.1:5000 --usuario admin --rol medico
+"""
+
+import argparse
+import collections
+import contextvars
+import getpass
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from Base_De_Datos.tablas import conexion
+
+logger_lentas = logging.getLogger('prosalud.consultas_lentas')
+
+ACTIVADAS = os.environ.get('PROSALUD_ESTADISTICAS_SQL', '0') == '1'
+
+# Milisegundos a partir de los cuales una consulta se considera lenta
+UMBRAL_LENTA_MS = float(os.environ.get('PROSALUD_SQL_LENTA_MS', '100'))
+
+# Consultas lentas que se conservan en memoria
+MAX_LENTAS = 200
+
+# Llamadas a una misma sentencia dentro de una petición a partir de las que se avisa de un N+1
+UMBRAL_N_MAS_1 = int(os.environ.get('PROSALUD_SQL_N_MAS_1', '20'))
+
+_CADENAS = re.compile(r"'(?:[^']|'')*'")
+_NUMEROS = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_LISTAS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALORES = re.compile(r"VALUES\s*\(\?\)(?:\s*,\s*\(\?\))+", re.IGNORECASE)
+_ESPACIOS = re.compile(r"\s+")
+_EXPLICABLES = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+_cache_normalizadas: Dict[str, str] = {}
+
+
+def normalizar_sql(sql: str) -> str:
+    """
+    Convierte una sentencia en su forma canónica para agruparla.
+
+    Parameters
+    ----------
+    sql : str
+        Texto SQL tal como se ejecutó.
+
+    Returns
+    -------
+    str
+        Sentencia con literales como ``?``, listas ``IN`` y ``VALUES``
+        múltiples colapsadas y un único espacio entre palabras.
+    """
+    normalizada = _cache_normalizadas.get(sql)
+    if normalizada is None:
+        normalizada = _ESPACIOS.sub(' ', sql).strip().rstrip(';').rstrip()
+        normalizada = _CADENAS.sub('?', normalizada)
+        normalizada = _NUMEROS.sub('?', normalizada)
+        normalizada = _LISTAS.sub('(?)', normalizada)
+        normalizada = _VALORES.sub('VALUES (?)', normalizada)
+        if len(_cache_normalizadas) > 10_000:
+            _cache_normalizadas.clear()
+        _cache_normalizadas[sql] = normalizada
+    return normalizada
+
+
+def explicar(conn: sqlite3.Connection, sql: str, parametros: Any = ()) -> Optional[List[str]]:
+    """
+    Obtiene el ``EXPLAIN QUERY PLAN`` de una sentencia.
+
+    Se ejecuta con un cursor sqlite3 normal para que no cuente en las
+    estadísticas.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        Conexión en la que se ejecutó la sentencia.
+    sql : str
+        Sentencia original (con sus marcadores de parámetros).
+    parametros : Any, optional
+        Parámetros con los que se ejecutó.
+
+    Returns
+    -------
+    Optional[List[str]]
+        Líneas del plan, o None si la sentencia no se puede explicar.
+    """
+    if not sql.lstrip().upper().startswith(_EXPLICABLES):
+        return None
+    try:
+        cursor = conn.cursor(sqlite3.Cursor)
+        try:
+            filas = cursor.execute("EXPLAIN QUERY PLAN " + sql, parametros or ()).fetchall()
+        finally:
+            cursor.close()
+    except sqlite3.Error:
+        return None
+    return [fila[-1] for fila in filas]
+
+
+def recorre_tabla(plan: Optional[Sequence[str]]) -> bool:
+    """Indica si el plan recorre alguna tabla entera sin usar un índice."""
+    return any(paso.startswith('SCAN') and 'INDEX' not in paso for paso in plan or ())
+
+
+class EstadisticaSentencia:
+    """
+    Acumulados de una sentencia normalizada.
+
+    Parameters
+    ----------
+    sql : str
+        Sentencia normalizada.
+    """
+
+    __slots__ = ('sql', 'llamadas', 'total', 'maximo', 'filas', 'plan', 'max_por_ambito')
+
+    def __init__(self, sql: str) -> None:
+        self.sql = sql
+        self.llamadas = 0
+        self.total = 0.0
+        self.maximo = 0.0
+        self.filas = 0
+        self.plan: Optional[List[str]] = None
+        self.max_por_ambito = 0
+
+    def a_dict(self) -> dict:
+        """
+        Acumulados de la sentencia como diccionario.
+
+        Returns
+        -------
+        dict
+            Acumulados con los tiempos en milisegundos.
+        """
+        return {
+            'sql': self.sql,
+            'llamadas': self.llamadas,
+            'total_ms': round(self.total * 1000, 3),
+            'media_ms': round(self.total * 1000 / self.llamadas, 3) if self.llamadas else 0.0,
+            'max_ms': round(self.maximo * 1000, 3),
+            'filas': self.filas,
+            'filas_por_llamada': round(self.filas / self.llamadas, 1) if self.llamadas else 0.0,
+            'max_por_peticion': self.max_por_ambito,
+            'recorre_tabla': recorre_tabla(self.plan),
+            'plan': self.plan,
+        }
+
+
+class EstadisticasConsultas:
+    """
+    Registro, seguro entre hilos, de las estadísticas de las sentencias SQL
+    de un proceso.
+
+    Parameters
+    ----------
+    umbral_lenta_ms : float, optional
+        Milisegundos a partir de los que una consulta pasa al registro de lentas.
+    max_lentas : int, optional
+        Consultas lentas que se conservan en memoria.
+    """
+
+    def __init__(self, umbral_lenta_ms: float = UMBRAL_LENTA_MS, max_lentas: int = MAX_LENTAS) -> None:
+        self.activa = False
+        self.umbral_lenta = umbral_lenta_ms / 1000
+        self._bloqueo = threading.Lock()
+        self._sentencias: Dict[str, EstadisticaSentencia] = {}
+        self._lentas: collections.deque = collections.deque(maxlen=max_lentas)
+        self._n_mas_1: collections.deque = collections.deque(maxlen=max_lentas)
+
+    def registrar(self, sql: str, segundos: float, filas: int,
+                  conn: Optional[sqlite3.Connection] = None, parametros: Any = ()) -> None:
+        """
+        Añade una ejecución de ``sql``.
+
+        Parameters
+        ----------
+        sql : str
+            Sentencia ejecutada.
+        segundos : float
+            Duración de la ejecución y de la lectura de filas.
+        filas : int
+            Filas devueltas o modificadas.
+        conn : sqlite3.Connection, optional
+            Conexión en la que se ejecutó, para obtener su plan.
+        parametros : Any, optional
+            Parámetros de la ejecución.
+
+        Returns
+        -------
+        None
+        """
+        clave = normalizar_sql(sql)
+        with self._bloqueo:
+            estadistica = self._sentencias.get(clave)
+            nueva = estadistica is None
+            if nueva:
+                estadistica = self._sentencias[clave] = EstadisticaSentencia(clave)
+            estadistica.llamadas += 1
+            estadistica.total += segundos
+            estadistica.filas += max(filas, 0)
+            if segundos > estadistica.maximo:
+                estadistica.maximo = segundos
+        lenta = segundos >= self.umbral_lenta
+        plan = None
+        if conn is not None and (nueva or lenta):
+            plan = explicar(conn, sql, parametros)
+            if nueva:
+                estadistica.plan = plan
+        ambito = _ambito.get()
+        if ambito is not None:
+            ambito[clave] = ambito.get(clave, 0) + 1
+        if lenta:
+            self._lentas.append({
+                'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'sql': clave,
+                'ms': round(segundos * 1000, 3),
+                'filas': filas,
+                'plan': plan,
+            })
+            logger_lentas.warning("Consulta lenta (%.1f ms, %d filas): %s | plan: %s",
+                                  segundos * 1000, filas, clave, '; '.join(plan or ['-']))
+
+    def cerrar_ambito(self, llamadas: Dict[str, int], nombre: str) -> None:
+        """
+        Anota las llamadas por sentencia de un ámbito (una petición) ya terminado.
+
+        Parameters
+        ----------
+        llamadas : Dict[str, int]
+            Llamadas por sentencia normalizada.
+        nombre : str
+            Nombre del ámbito, p. ej. ``GET /pacientes``.
+
+        Returns
+        -------
+        None
+        """
+        with self._bloqueo:
+            for clave, n in llamadas.items():
+                estadistica = self._sentencias.get(clave)
+                if estadistica is not None and n > estadistica.max_por_ambito:
+                    estadistica.max_por_ambito = n
+        for clave, n in llamadas.items():
+            if n >= UMBRAL_N_MAS_1:
+                self._n_mas_1.append({'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                                      'ambito': nombre, 'sql': clave, 'llamadas': n})
+                logger_lentas.warning("Posible N+1 en %s: %d llamadas a %s", nombre, n, clave)
+
+    def resumen(self, orden: str = 'total_ms', limite: Optional[int] = None) -> dict:
+        """
+        Estadísticas acumuladas del proceso.
+
+        Parameters
+        ----------
+        orden : str, optional
+            Campo por el que se ordenan las sentencias.
+        limite : int, optional
+            Sentencias que se devuelven como mucho; todas por defecto.
+
+        Returns
+        -------
+        dict
+            ``sentencias`` ordenadas de mayor a menor por ``orden``,
+            ``lentas`` y ``n_mas_1`` (las más recientes al final).
+        """
+        with self._bloqueo:
+            sentencias = [e.a_dict() for e in self._sentencias.values()]
+            lentas = list(self._lentas)
+            n_mas_1 = list(self._n_mas_1)
+        sentencias.sort(key=lambda e: e.get(orden) or 0, reverse=True)
+        return {
+            'pid': os.getpid(),
+            'umbral_lenta_ms': self.umbral_lenta * 1000,
+            'sentencias': sentencias[:limite] if limite else sentencias,
+            'lentas': lentas,
+            'n_mas_1': n_mas_1,
+        }
+
+    def reiniciar(self) -> None:
+        """Borra todo lo acumulado."""
+        with self._bloqueo:
+            self._sentencias.clear()
+            self._lentas.clear()
+            self._n_mas_1.clear()
+
+
+ESTADISTICAS = EstadisticasConsultas()
+
+_ambito: contextvars.ContextVar[Optional[Dict[str, int]]] = contextvars.ContextVar('ambito_consultas', default=None)
+
+# Funciones a las que se pasa el tiempo (en segundos) de cada ejecución,
+# lectura o commit, p. ej. la fase ``db`` de instrumentacion.py
+_observadores_tiempo: List[Callable[[float], None]] = []
+
+
+def _tiempo(segundos: float) -> None:
+    for observador in _observadores_tiempo:
+        observador(segundos)
+
+
+class CursorMedido(sqlite3.Cursor):
+    """
+    Cursor sqlite3 que mide cada sentencia desde ``execute`` hasta que se
+    leen todas sus filas (o se cierra el cursor o su conexión).
+    """
+
+    _llamada: Optional[list] = None
+
+    def _empezar(self, sql: str, parametros: Any, segundos: float, filas: int, terminada: bool) -> None:
+        _tiempo(segundos)
+        if ESTADISTICAS.activa:
+            self._llamada = [sql, parametros, segundos, filas]
+            if terminada:
+                self._terminar()
+
+    def _leidas(self, segundos: float, filas: int, agotado: bool) -> None:
+        _tiempo(segundos)
+        llamada = self._llamada
+        if llamada is not None:
+            llamada[2] += segundos
+            llamada[3] += filas
+            if agotado:
+                self._terminar()
+
+    def _terminar(self) -> None:
+        llamada, self._llamada = self._llamada, None
+        if llamada is not None:
+            sql, parametros, segundos, filas = llamada
+            ESTADISTICAS.registrar(sql, segundos, filas, self.connection, parametros)
+
+    def execute(self, sql, parametros=()):
+        self._terminar()
+        inicio = time.perf_counter()
+        try:
+            resultado = super().execute(sql, parametros)
+        except sqlite3.Error:
+            self._empezar(sql, parametros, time.perf_counter() - inicio, 0, True)
+            raise
+        devuelve_filas = self.description is not None
+        self._empezar(sql, parametros, time.perf_counter() - inicio,
+                      0 if devuelve_filas else max(self.rowcount, 0), not devuelve_filas)
+        return resultado
+
+    def executemany(self, sql, secuencia):
+        self._terminar()
+        if ESTADISTICAS.activa and not isinstance(secuencia, (list, tuple)):
+            secuencia = list(secuencia)
+        inicio = time.perf_counter()
+        try:
+            resultado = super().executemany(sql, secuencia)
+        finally:
+            primeros = secuencia[0] if ESTADISTICAS.activa and secuencia else ()
+            self._empezar(sql, primeros, time.perf_counter() - inicio, max(self.rowcount, 0), True)
+        return resultado
+
+    def fetchone(self):
+        inicio = time.perf_counter()
+        fila = super().fetchone()
+        self._leidas(time.perf_counter() - inicio, fila is not None, fila is None)
+        return fila
+
+    def fetchmany(self, size=None):
+        tamano = self.arraysize if size is None else size
+        inicio = time.perf_counter()
+        filas = super().fetchmany(tamano)
+        self._leidas(time.perf_counter() - inicio, len(filas), len(filas) < tamano)
+        return filas
+
+    def fetchall(self):
+        inicio = time.perf_counter()
+        filas = super().fetchall()
+        self._leidas(time.perf_counter() - inicio, len(filas), True)
+        return filas
+
+    def __next__(self):
+        inicio = time.perf_counter()
+        try:
+            fila = super().__next__()
+        except StopIteration:
+            self._leidas(time.perf_counter() - inicio, 0, True)
+            raise
+        self._leidas(time.perf_counter() - inicio, 1, False)
+        return fila
+
+    def close(self):
+        self._terminar()
+        return super().close()
+
+
+class ConexionMedida(sqlite3.Connection):
+    """
+    Conexión sqlite3 cuyos cursores (también los de ``execute``) son
+    :class:`CursorMedido`. Al cerrarla se dan por terminadas las sentencias
+    cuyas filas no se llegaron a leer enteras.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._cursores = weakref.WeakSet()
+
+    def cursor(self, factory=CursorMedido):
+        cursor = super().cursor(factory)
+        if isinstance(cursor, CursorMedido):
+            self._cursores.add(cursor)
+        return cursor
+
+    # sqlite3.Connection.execute crea su cursor sin pasar por self.cursor()
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql, secuencia):
+        return self.cursor().executemany(sql, secuencia)
+
+    def commit(self):
+        inicio = time.perf_counter()
+        try:
+            return super().commit()
+        finally:
+            segundos = time.perf_counter() - inicio
+            _tiempo(segundos)
+            if ESTADISTICAS.activa:
+                ESTADISTICAS.registrar('COMMIT', segundos, 0)
+
+    def close(self):
+        for cursor in list(self._cursores):
+            cursor._terminar()
+        return super().close()
+
+
+def observar_tiempo(observador: Callable[[float], None]) -> None:
+    """
+    Pasa a medir todas las conexiones nuevas y llama a ``observador`` con
+    los segundos de cada ejecución, lectura de filas o commit.
+
+    Parameters
+    ----------
+    observador : Callable[[float], None]
+        Función que recibe la duración en segundos.
+
+    Returns
+    -------
+    None
+    """
+    conexion.FABRICA_CONEXION = ConexionMedida
+    _observadores_tiempo.append(observador)
+
+
+def activar() -> None:
+    """Empieza a acumular estadísticas de todas las conexiones nuevas."""
+    conexion.FABRICA_CONEXION = ConexionMedida
+    ESTADISTICAS.activa = True
+
+
+def abrir_ambito() -> contextvars.Token:
+    """
+    Empieza a contar las llamadas por sentencia del contexto actual (una
+    petición), para detectar patrones N+1.
+
+    Returns
+    -------
+    contextvars.Token
+        Token que hay que pasar a :func:`cerrar_ambito`.
+    """
+    return _ambito.set({})
+
+
+def cerrar_ambito(token: contextvars.Token, nombre: str) -> None:
+    """
+    Termina el ámbito abierto con :func:`abrir_ambito` y anota sus llamadas.
+
+    Parameters
+    ----------
+    token : contextvars.Token
+        Devuelto por :func:`abrir_ambito`.
+    nombre : str
+        Nombre del ámbito, p. ej. ``GET /pacientes``.
+
+    Returns
+    -------
+    None
+    """
+    llamadas = _ambito.get()
+    _ambito.reset(token)
+    if llamadas:
+        ESTADISTICAS.cerrar_ambito(llamadas, nombre)
+
+
+def imprimir(resumen: dict, limite: int = 20) -> None:
+    """Muestra un resumen (el de ``/admin/consultas``) como tablas de texto."""
+    print(f"Proceso {resumen['pid']} · umbral de consulta lenta {resumen['umbral_lenta_ms']:g} ms\n")
+    print(f"{'llamadas':>9}{'total ms':>12}{'media ms':>10}{'max ms':>10}{'filas':>10}{'x/pet':>7}  sentencia")
+    for e in resumen['sentencias'][:limite]:
+        aviso = ' [SCAN]' if e['recorre_tabla'] else ''
+        print(f"{e['llamadas']:>9}{e['total_ms']:>12.1f}{e['media_ms']:>10.2f}{e['max_ms']:>10.1f}"
+              f"{e['filas']:>10}{e['max_por_peticion']:>7}  {e['sql'][:100]}{aviso}")
+    if resumen['lentas']:
+        print("\nConsultas lentas más recientes:")
+        for lenta in resumen['lentas'][-limite:]:
+            print(f"  {lenta['fecha']} {lenta['ms']:>9.1f} ms {lenta['filas']:>8} filas  {lenta['sql'][:100]}")
+            for paso in lenta['plan'] or []:
+                print(f"      {paso}")
+    if resumen['n_mas_1']:
+        print("\nPosibles N+1:")
+        for aviso in resumen['n_mas_1'][-limite:]:
+            print(f"  {aviso['fecha']} {aviso['ambito']}: {aviso['llamadas']} x {aviso['sql'][:100]}")
+
+
+def main() -> None:
+    import requests
+
+    parser = argparse.ArgumentParser(description="Vuelca las estadísticas de consultas SQL de la API ProSalud")
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help="URL base de la API")
+    parser.add_argument('--usuario', required=True, help="Usuario administrador (PROSALUD_ADMINS)")
+    parser.add_argument('--rol', default='medico', choices=['paciente', 'medico', 'enfermero'])
+    parser.add_argument('--orden', default='total_ms', choices=['total_ms', 'llamadas', 'media_ms', 'max_ms', 'filas'])
+    parser.add_argument('--limite', type=int, default=20, help="Sentencias a mostrar")
+    parser.add_argument('--json', action='store_true', help="Imprime el JSON completo en lugar de las tablas")
+    parser.add_argument('--reiniciar', action='store_true', help="Borra las estadísticas después de leerlas")
+    args = parser.parse_args()
+
+    clave = os.environ.get('PROSALUD_CLAVE') or getpass.getpass(f"Contraseña de {args.usuario}: ")
+    sesion = requests.Session()
+    sesion.auth = (args.usuario, clave)
+    sesion.headers['X-ROL'] = args.rol
+    respuesta = sesion.get(f"{args.url.rstrip('/')}/admin/consultas", params={'orden': args.orden}, timeout=30)
+    respuesta.raise_for_status()
+    resumen = respuesta.json()
+    if args.reiniciar:
+        sesion.delete(f"{args.url.rstrip('/')}/admin/consultas", timeout=30).raise_for_status()
+    if args.json:
+        print(json.dumps(resumen, indent=2, ensure_ascii=False))
+    else:
+        imprimir(resumen, args.limite)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 
@@ -63,6 +63,16 @@ class AuxiliarDB(Base):
 
     enfermero = relationship("EnfermeroDB", back_populates="auxiliares")
 
+class UsuarioDB(Base):
+    # Directorio de cuentas de todos los roles; lo mantienen los disparadores de tabla_usuarios.py
+    __tablename__ = 'usuarios'
+    username = Column(String, primary_key=True)
+    rol = Column(String, nullable=False)
+    id_entidad = Column(String, nullable=False)
+    password = Column(String, nullable=False)
+
+    __table_args__ = (UniqueConstraint('rol', 'id_entidad'),)
+
 class SipDB(Base):
     __tablename__ = 'sips'
     sip = Column(String, primary_key=True)
@@ -1,9 +1,9 @@
 import sqlite3
-import os
 from typing import List, Tuple, Optional
+from Base_De_Datos.tablas.conexion import RUTA_BD, abrir_conexion
 
-# Base de datos en la misma carpeta que este script
-DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bdd.db')
+# Base de datos compartida (ver conexion.py)
+DB_PATH = RUTA_BD
 
 
 def conectar() -> sqlite3.Connection:
@@ -15,8 +15,7 @@ def conectar() -> sqlite3.Connection:
     sqlite3.Connection
         Conexión activa al archivo de base de datos.
     """
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute("PRAGMA foreign_keys = ON;")
+    conn = abrir_conexion(DB_PATH)
     return conn
 
 
@@ -37,7 +36,6 @@ def crear_tabla_ambulancias() -> None:
     """
     conn = conectar()
     cursor = conn.cursor()
-    cursor.execute("SELECT * FROM ambulancias;")
     cursor.execute(
         '''
         CREATE TABLE IF NOT EXISTS ambulancias (
@@ -193,7 +191,157 @@ def eliminar_ambulancia(matricula: str) -> None:
     conn.close()
 
 
+def crear_tabla_despachos() -> None:
+    """
+    Crea la tabla 'despachos' (salidas de ambulancias) si no existe.
+
+    La tabla contiene los siguientes campos:
+    - id           : INTEGER PRIMARY KEY AUTOINCREMENT
+    - matricula    : TEXT NOT NULL, ambulancia enviada
+    - latitud      : REAL NOT NULL, lugar del aviso
+    - longitud     : REAL NOT NULL
+    - distancia_km : REAL NOT NULL, distancia desde la zona de la ambulancia
+    - estado       : TEXT NOT NULL, 'en_curso' o 'finalizado'
+    - inicio       : TEXT NOT NULL, fecha y hora de la salida
+    - fin          : TEXT, fecha y hora en que la ambulancia vuelve a estar libre
+
+    Un índice único parcial impide que una ambulancia tenga dos despachos en
+    curso a la vez, aunque los asignen procesos distintos.
+
+    Returns
+    -------
+    None
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.executescript(
+        '''
+        CREATE TABLE IF NOT EXISTS despachos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            matricula TEXT NOT NULL,
+            latitud REAL NOT NULL,
+            longitud REAL NOT NULL,
+            distancia_km REAL NOT NULL,
+            estado TEXT NOT NULL DEFAULT 'en_curso' CHECK(estado IN ('en_curso','finalizado')),
+            inicio TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%S', 'now')),
+            fin TEXT,
+            FOREIGN KEY (matricula) REFERENCES ambulancias(matricula) ON DELETE CASCADE
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_despachos_en_curso ON despachos (matricula) WHERE estado = 'en_curso';
+        '''
+    )
+    conn.commit()
+    conn.close()
+
+
+def leer_flota() -> List[Tuple[str, str, str, Optional[str]]]:
+    """
+    Recupera las ambulancias con su tripulación (tabla 'paramedicos').
+
+    Returns
+    -------
+    List[Tuple[str, str, str, Optional[str]]]
+        Una tupla por ambulancia y paramédico:
+        (matricula, zona, id_centro, especialidad del paramédico o None si no tiene tripulación).
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT a.matricula, a.zona, a.id_centro, p.especialidad "
+        "FROM ambulancias a LEFT JOIN paramedicos p ON p.id_ambulancia = a.matricula;"
+    )
+    resultados = cursor.fetchall()
+    conn.close()
+    return resultados
+
+
+def insertar_despacho(matricula: str, latitud: float, longitud: float, distancia_km: float) -> Optional[int]:
+    """
+    Registra la salida de una ambulancia.
+
+    Parameters
+    ----------
+    matricula : str
+        Ambulancia enviada.
+    latitud, longitud : float
+        Lugar del aviso.
+    distancia_km : float
+        Distancia desde la zona de la ambulancia.
+
+    Raises
+    ------
+    ValueError
+        Si la base de datos rechaza el despacho por otro motivo (la
+        ambulancia no existe, datos fuera de rango...).
+
+    Returns
+    -------
+    Optional[int]
+        Identificador del despacho, o None si la ambulancia ya tiene un
+        despacho en curso (idx_despachos_en_curso).
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "INSERT INTO despachos (matricula, latitud, longitud, distancia_km) VALUES (?, ?, ?, ?);",
+            (matricula, latitud, longitud, distancia_km)
+        )
+        conn.commit()
+        return cursor.lastrowid
+    except sqlite3.IntegrityError as e:
+        if str(e) == 'UNIQUE constraint failed: despachos.matricula':
+            return None
+        raise ValueError(f"Error de integridad al registrar despacho: {e}")
+    finally:
+        conn.close()
+
+
+def finalizar_despacho(matricula: str) -> bool:
+    """
+    Cierra el despacho en curso de una ambulancia, que vuelve a estar libre.
+
+    Parameters
+    ----------
+    matricula : str
+        Matrícula de la ambulancia.
+
+    Returns
+    -------
+    bool
+        True si tenía un despacho en curso.
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute(
+        "UPDATE despachos SET estado = 'finalizado', fin = strftime('%Y-%m-%dT%H:%M:%S', 'now') "
+        "WHERE matricula = ? AND estado = 'en_curso';",
+        (matricula,)
+    )
+    conn.commit()
+    conn.close()
+    return cursor.rowcount > 0
+
+
+def leer_despachos_en_curso() -> List[str]:
+    """
+    Matrículas de las ambulancias que están atendiendo un aviso.
+
+    Returns
+    -------
+    List[str]
+        Matrículas con un despacho en curso.
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute("SELECT matricula FROM despachos WHERE estado = 'en_curso';")
+    resultados = [fila[0] for fila in cursor.fetchall()]
+    conn.close()
+    return resultados
+
+
 if __name__ == '__main__':
     crear_tabla_ambulancias()
+    crear_tabla_despachos()
 
 
@@ -1,9 +1,9 @@
 import sqlite3
-import os
 from typing import List, Tuple, Optional
+from Base_De_Datos.tablas.conexion import RUTA_BD, abrir_conexion
 
-# Base de datos en la misma carpeta que este script
-db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bdd.db')
+# Base de datos compartida (ver conexion.py)
+db_path = RUTA_BD
 
 
 def conectar() -> sqlite3.Connection:
@@ -15,8 +15,7 @@ def conectar() -> sqlite3.Connection:
     sqlite3.Connection
         Conexión activa al archivo de base de datos.
     """
-    conn = sqlite3.connect(db_path)
-    conn.execute("PRAGMA foreign_keys = ON;")
+    conn = abrir_conexion(db_path)
     return conn
 
 
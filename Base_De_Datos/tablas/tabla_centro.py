@@ -1,9 +1,10 @@
 import sqlite3
-import os
 from typing import List, Tuple, Optional
+from Base_De_Datos.tablas.conexion import RUTA_BD, abrir_conexion
+from Base_De_Datos.tablas.tabla_presupuesto import aplicar_cambio_presupuesto, crear_tabla_presupuestos
 
-# Base de datos en la misma carpeta que este script
-db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bdd.db')
+# Base de datos compartida (ver conexion.py)
+db_path = RUTA_BD
 
 def conectar() -> sqlite3.Connection:
     """
@@ -14,8 +15,7 @@ def conectar() -> sqlite3.Connection:
     sqlite3.Connection
         Conexión activa al archivo de base de datos.
     """
-    conn = sqlite3.connect(db_path)
-    conn.execute("PRAGMA foreign_keys = ON;")
+    conn = abrir_conexion(db_path)
     return conn
 
 
@@ -37,6 +37,9 @@ def crear_tabla_centros() -> None:
     - id_provincia : int
         Identificador de la provincia asociada.
 
+    También crea las tablas de totales por provincia y comunidad que
+    mantienen el resto de funciones (ver tabla_presupuesto.py).
+
     Returns
     -------
     None
@@ -56,8 +59,10 @@ def crear_tabla_centros() -> None:
         );
         """
     )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_centros_provincia ON centros (id_provincia);")
     conn.commit()
     conn.close()
+    crear_tabla_presupuestos()
 
 
 def insertar_centro(
@@ -102,6 +107,8 @@ def insertar_centro(
             "INSERT INTO centros (id_centro, nombre_centro, cantidad_trabajadores, presupuesto, habitaciones, id_provincia) VALUES (?, ?, ?, ?, ?, ?);",
             (id_centro, nombre_centro, cantidad_trabajadores, presupuesto, habitaciones, id_provincia)
         )
+        aplicar_cambio_presupuesto(cursor, id_provincia, centros=1, presupuesto=presupuesto,
+                                   trabajadores=cantidad_trabajadores, habitaciones=habitaciones)
         conn.commit()
     except sqlite3.IntegrityError as e:
         raise ValueError(f"Error de integridad al insertar centro: {e}")
@@ -129,6 +136,33 @@ def leer_centros() -> List[Tuple[str, str, int, float, int, int]]:
     return resultados
 
 
+def leer_centros_provincia(id_provincia: int) -> List[Tuple[str, str, int, float, int]]:
+    """
+    Recupera los centros de una provincia (usa el índice por id_provincia).
+
+    Parameters
+    ----------
+    id_provincia : int
+        Identificador de la provincia.
+
+    Returns
+    -------
+    List[Tuple[str, str, int, float, int]]
+        Tuplas con campos:
+        (id_centro, nombre_centro, cantidad_trabajadores, presupuesto, habitaciones).
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT id_centro, nombre_centro, cantidad_trabajadores, presupuesto, habitaciones "
+        "FROM centros WHERE id_provincia = ?;",
+        (id_provincia,)
+    )
+    resultados = cursor.fetchall()
+    conn.close()
+    return resultados
+
+
 def actualizar_centro(
     id_centro: str,
     nombre_centro: Optional[str] = None,
@@ -140,6 +174,11 @@ def actualizar_centro(
     """
     Actualiza los datos de un centro existente.
 
+    Los totales de la provincia (y comunidad) del centro se ajustan en la
+    misma transacción, que reserva la escritura antes de leer el centro
+    (BEGIN IMMEDIATE); si cambia de provincia, sus importes pasan de una a
+    otra.
+
     Parameters
     ----------
     id_centro : str
@@ -161,39 +200,138 @@ def actualizar_centro(
     """
     conn = conectar()
     cursor = conn.cursor()
-    if nombre_centro is not None:
-        cursor.execute(
-            "UPDATE centros SET nombre_centro = ? WHERE id_centro = ?;",
-            (nombre_centro, id_centro)
-        )
-    if cantidad_trabajadores is not None:
-        cursor.execute(
-            "UPDATE centros SET cantidad_trabajadores = ? WHERE id_centro = ?;",
-            (cantidad_trabajadores, id_centro)
-        )
-    if presupuesto is not None:
+    try:
+        # La transacción empieza antes de leer los valores anteriores: con una diferida, dos
+        # escrituras simultáneas leerían la misma fila y ajustarían los totales dos veces
+        conn.execute("BEGIN IMMEDIATE;")
         cursor.execute(
-            "UPDATE centros SET presupuesto = ? WHERE id_centro = ?;",
-            (presupuesto, id_centro)
+            "SELECT cantidad_trabajadores, presupuesto, habitaciones, id_provincia FROM centros WHERE id_centro = ?;",
+            (id_centro,)
         )
-    if habitaciones is not None:
+        anterior = cursor.fetchone()
+        if anterior is None:
+            conn.rollback()
+            return
+        trabajadores_antes, presupuesto_antes, habitaciones_antes, provincia_antes = anterior
+        if nombre_centro is not None:
+            cursor.execute(
+                "UPDATE centros SET nombre_centro = ? WHERE id_centro = ?;",
+                (nombre_centro, id_centro)
+            )
+        if cantidad_trabajadores is not None:
+            cursor.execute(
+                "UPDATE centros SET cantidad_trabajadores = ? WHERE id_centro = ?;",
+                (cantidad_trabajadores, id_centro)
+            )
+        if presupuesto is not None:
+            cursor.execute(
+                "UPDATE centros SET presupuesto = ? WHERE id_centro = ?;",
+                (presupuesto, id_centro)
+            )
+        if habitaciones is not None:
+            cursor.execute(
+                "UPDATE centros SET habitaciones = ? WHERE id_centro = ?;",
+                (habitaciones, id_centro)
+            )
+        if id_provincia is not None:
+            cursor.execute(
+                "UPDATE centros SET id_provincia = ? WHERE id_centro = ?;",
+                (id_provincia, id_centro)
+            )
+        trabajadores_despues = trabajadores_antes if cantidad_trabajadores is None else cantidad_trabajadores
+        presupuesto_despues = presupuesto_antes if presupuesto is None else presupuesto
+        habitaciones_despues = habitaciones_antes if habitaciones is None else habitaciones
+        provincia_despues = provincia_antes if id_provincia is None else id_provincia
+        if provincia_despues == provincia_antes:
+            aplicar_cambio_presupuesto(cursor, provincia_antes,
+                                       presupuesto=presupuesto_despues - presupuesto_antes,
+                                       trabajadores=trabajadores_despues - trabajadores_antes,
+                                       habitaciones=habitaciones_despues - habitaciones_antes)
+        else:
+            gasto = _gasto_centro(cursor, id_centro)
+            aplicar_cambio_presupuesto(cursor, provincia_antes, centros=-1, presupuesto=-presupuesto_antes,
+                                       gasto=-gasto, trabajadores=-trabajadores_antes,
+                                       habitaciones=-habitaciones_antes)
+            aplicar_cambio_presupuesto(cursor, provincia_despues, centros=1, presupuesto=presupuesto_despues,
+                                       gasto=gasto, trabajadores=trabajadores_despues,
+                                       habitaciones=habitaciones_despues)
+        conn.commit()
+    except sqlite3.IntegrityError as e:
+        conn.rollback()
+        raise ValueError(f"Error de integridad al actualizar centro: {e}")
+    finally:
+        conn.close()
+
+
+def _gasto_centro(cursor: sqlite3.Cursor, id_centro: str) -> float:
+    """Gasto acumulado (suma de pagos negativos, en positivo) de un centro."""
+    cursor.execute(
+        "SELECT -TOTAL(importe) FROM pagos_centros WHERE id_centro = ? AND importe < 0;",
+        (id_centro,)
+    )
+    return cursor.fetchone()[0]
+
+
+def registrar_pago(id_centro: str, pago: float) -> float:
+    """
+    Aplica un pago al presupuesto de un centro, como ``Centro.pagos``.
+
+    El pago queda anotado en 'pagos_centros' y los totales de la provincia
+    y la comunidad se ajustan en la misma transacción (los pagos negativos
+    cuentan además como gasto).
+
+    Parameters
+    ----------
+    id_centro : str
+        Identificador del centro.
+    pago : float
+        Cantidad a sumar al presupuesto (negativa para un gasto).
+
+    Raises
+    ------
+    ValueError
+        Si el centro no existe o el pago deja el presupuesto en negativo.
+
+    Returns
+    -------
+    float
+        Presupuesto del centro tras el pago.
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    try:
         cursor.execute(
-            "UPDATE centros SET habitaciones = ? WHERE id_centro = ?;",
-            (habitaciones, id_centro)
+            "UPDATE centros SET presupuesto = presupuesto + ? WHERE id_centro = ? AND presupuesto + ? >= 0 "
+            "RETURNING presupuesto, id_provincia;",
+            (pago, id_centro, pago)
         )
-    if id_provincia is not None:
+        fila = cursor.fetchone()
+        if fila is None:
+            conn.rollback()
+            cursor.execute("SELECT 1 FROM centros WHERE id_centro = ?;", (id_centro,))
+            if cursor.fetchone() is None:
+                raise ValueError(f"El centro {id_centro} no existe")
+            raise ValueError('No se admiten presupuestos negativos')
+        presupuesto, id_provincia = fila
         cursor.execute(
-            "UPDATE centros SET id_provincia = ? WHERE id_centro = ?;",
-            (id_provincia, id_centro)
+            "INSERT INTO pagos_centros (id_centro, importe) VALUES (?, ?);",
+            (id_centro, pago)
         )
-    conn.commit()
-    conn.close()
+        aplicar_cambio_presupuesto(cursor, id_provincia, presupuesto=pago, gasto=-pago if pago < 0 else 0.0)
+        conn.commit()
+    finally:
+        conn.close()
+    return presupuesto
 
 
 def eliminar_centro(id_centro: str) -> None:
     """
     Elimina un centro de la base de datos por su identificador.
 
+    Los totales de su provincia (y comunidad) se descuentan en la misma
+    transacción, que reserva la escritura antes de leer el centro
+    (BEGIN IMMEDIATE): dos bajas simultáneas no lo descuentan dos veces.
+
     Parameters
     ----------
     id_centro : str
@@ -205,9 +343,25 @@ def eliminar_centro(id_centro: str) -> None:
     """
     conn = conectar()
     cursor = conn.cursor()
-    cursor.execute('DELETE FROM centros WHERE id_centro = ?;', (id_centro,))
-    conn.commit()
-    conn.close()
+    try:
+        conn.execute("BEGIN IMMEDIATE;")
+        cursor.execute(
+            "SELECT cantidad_trabajadores, presupuesto, habitaciones, id_provincia FROM centros WHERE id_centro = ?;",
+            (id_centro,)
+        )
+        anterior = cursor.fetchone()
+        if anterior is not None:
+            trabajadores, presupuesto, habitaciones, id_provincia = anterior
+            aplicar_cambio_presupuesto(cursor, id_provincia, centros=-1, presupuesto=-presupuesto,
+                                       gasto=-_gasto_centro(cursor, id_centro), trabajadores=-trabajadores,
+                                       habitaciones=-habitaciones)
+            cursor.execute('DELETE FROM centros WHERE id_centro = ?;', (id_centro,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
 
 if __name__ == '__main__':
     crear_tabla_centros()
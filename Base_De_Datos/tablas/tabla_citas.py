@@ -1,9 +1,22 @@
 import sqlite3
-import os
-from typing import List, Tuple, Optional
+import time
+from datetime import datetime, timedelta
+from typing import List, Tuple, Optional, Union
+from Base_De_Datos.tablas.conexion import RUTA_BD, abrir_conexion
 
-# Base de datos en la misma carpeta que este script
-db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bdd.db')
+# Base de datos compartida (ver conexion.py)
+db_path = RUTA_BD
+
+# Formatos de 'fecha_hora' que se encuentran en 'citas': ISO (API y sembrado) y el de la clase Cita
+FORMATOS_FECHA_HORA = ('%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y %m %d %H:%M')
+
+# 'fecha_hora' en ISO canónico (YYYY-MM-DDTHH:MM:SS) o NULL si no se entiende. strftime ya
+# admite ISO con 'T' o espacio y sin segundos; el formato de Cita ('%Y %m %d %H:%M') se reescribe antes
+_SQL_INICIO = (
+    "strftime('%Y-%m-%dT%H:%M:%S', CASE WHEN fecha_hora GLOB '[0-9][0-9][0-9][0-9] [0-9][0-9] [0-9][0-9] *' "
+    "THEN substr(fecha_hora, 1, 4) || '-' || substr(fecha_hora, 6, 2) || '-' || substr(fecha_hora, 9, 2) "
+    "|| ' ' || substr(fecha_hora, 12) ELSE fecha_hora END)"
+)
 
 def conectar() -> sqlite3.Connection:
     """
@@ -14,8 +27,7 @@ def conectar() -> sqlite3.Connection:
     sqlite3.Connection
         Conexión activa al archivo de base de datos.
     """
-    conn = sqlite3.connect(db_path)
-    conn.execute("PRAGMA foreign_keys = ON;")
+    conn = abrir_conexion(db_path)
     return conn
 
 
@@ -80,7 +92,8 @@ def insertar_cita(
     motivo : str
         Motivo de la cita.
     fecha_hora : str
-        Fecha y hora de la cita en formato de texto.
+        Fecha y hora de la cita en cualquiera de ``FORMATOS_FECHA_HORA``; se
+        guarda en ISO canónico.
     estado : str, optional
         Estado de la cita ('pendiente', 'completado', 'cancelado').
     atendido : bool, optional
@@ -89,12 +102,13 @@ def insertar_cita(
     Raises
     ------
     ValueError
-        Si la inserción viola restricciones de integridad.
+        Si la fecha no se entiende o la inserción viola restricciones de integridad.
 
     Returns
     -------
     None
     """
+    fecha_hora = normalizar_fecha_hora(fecha_hora)
     conn = conectar()
     cursor = conn.cursor()
     try:
@@ -185,5 +199,514 @@ def eliminar_cita(id_cita: str) -> None:
     conn.commit()
     conn.close()
 
+
+def interpretar_fecha_hora(valor: Union[str, datetime]) -> datetime:
+    """
+    Interpreta una fecha y hora en cualquiera de los formatos que se encuentran en 'citas'.
+
+    Parameters
+    ----------
+    valor : str or datetime
+        Fecha y hora en cualquiera de ``FORMATOS_FECHA_HORA`` o un datetime.
+
+    Raises
+    ------
+    ValueError
+        Si el texto no está en ninguno de los formatos.
+
+    Returns
+    -------
+    datetime
+        La fecha y hora, sin zona horaria.
+    """
+    if isinstance(valor, datetime):
+        return valor
+    for formato in FORMATOS_FECHA_HORA:
+        try:
+            return datetime.strptime(valor, formato)
+        except (TypeError, ValueError):
+            continue
+    raise ValueError(f"Fecha y hora no reconocida: {valor!r}")
+
+
+def normalizar_fecha_hora(valor: Union[str, datetime]) -> str:
+    """
+    Lleva una fecha y hora a ISO canónico ('YYYY-MM-DDTHH:MM:SS'), el de la columna 'inicio'.
+
+    Parameters
+    ----------
+    valor : str or datetime
+        Fecha y hora en cualquiera de ``FORMATOS_FECHA_HORA`` o un datetime.
+
+    Raises
+    ------
+    ValueError
+        Si el texto no está en ninguno de los formatos.
+
+    Returns
+    -------
+    str
+        Fecha y hora en ISO canónico.
+    """
+    return interpretar_fecha_hora(valor).strftime('%Y-%m-%dT%H:%M:%S')
+
+
+def crear_columna_inicio() -> None:
+    """
+    Añade a 'citas' la columna 'inicio' y su índice si no los tiene.
+
+    'inicio' es una columna generada (virtual) con 'fecha_hora' en ISO
+    canónico, así que vale para las filas que ya existían y para las que
+    escriba cualquier código (ORM, sembrado, tabla_*) sin tocarlo. El índice
+    idx_citas_inicio (inicio, id_cita) permite recorrer solo las citas de un
+    intervalo, en orden.
+
+    Returns
+    -------
+    None
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    columnas = {fila[1] for fila in cursor.execute("PRAGMA table_xinfo(citas);")}
+    if 'inicio' not in columnas:
+        cursor.execute(f"ALTER TABLE citas ADD COLUMN inicio TEXT GENERATED ALWAYS AS ({_SQL_INICIO}) VIRTUAL;")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_citas_inicio ON citas (inicio, id_cita);")
+    conn.commit()
+    conn.close()
+
+
+def leer_citas_recordatorio(
+    desde: str,
+    hasta: str,
+    despues_de: Tuple[str, str] = ('', ''),
+    limite: int = 500
+) -> List[Tuple[str, str, str, str, str, str, str, str, str, str, str, str]]:
+    """
+    Citas de un intervalo con los datos de contacto del paciente, en una consulta.
+
+    Recorre idx_citas_inicio desde ``despues_de``, así que un trabajo puede
+    pedir el intervalo por páginas. Excluye las citas de urgencias, las que ya
+    no están pendientes (canceladas o atendidas) y las que ya tienen
+    recordatorio ('recordatorios_citas', ver tabla_recordatorios.py).
+
+    Parameters
+    ----------
+    desde : str
+        Inicio del intervalo (ISO canónico, incluido).
+    hasta : str
+        Fin del intervalo (ISO canónico, excluido).
+    despues_de : Tuple[str, str], optional
+        (inicio, id_cita) de la última cita ya procesada.
+    limite : int, optional
+        Máximo de citas a devolver.
+
+    Returns
+    -------
+    List[Tuple[str, str, str, str, str, str, str, str, str, str, str, str]]
+        Tuplas con campos:
+        (id_cita, inicio, tipo_cita, motivo, medico_asignado, centro, nombre_centro,
+        paciente_id, nombre, apellido, email, telefono), con el contacto de
+        'contactos_pacientes'; telefono es el de contacto de la cita o, si no
+        tiene, el del paciente.
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT c.id_cita, c.inicio, c.tipo_cita, c.motivo, c.medico_asignado, c.centro, ce.nombre_centro, "
+        "p.id, p.nombre, p.apellido, cp.email, COALESCE(c.telefono_contacto, cp.telefono) "
+        "FROM citas c JOIN pacientes p ON p.id = c.paciente_id "
+        "LEFT JOIN contactos_pacientes cp ON cp.paciente_id = c.paciente_id "
+        "LEFT JOIN centros ce ON ce.id_centro = c.centro "
+        "WHERE c.inicio >= ? AND c.inicio < ? AND (c.inicio, c.id_cita) > (?, ?) "
+        "AND c.tipo_cita IS NOT 'urgencias' AND c.estado = 'pendiente' "
+        "AND NOT EXISTS (SELECT 1 FROM recordatorios_citas r WHERE r.id_cita = c.id_cita) "
+        "ORDER BY c.inicio, c.id_cita LIMIT ?;",
+        (desde, hasta, *despues_de, limite)
+    )
+    resultados = cursor.fetchall()
+    conn.close()
+    return resultados
+
+def crear_indice_citas_medico() -> None:
+    """
+    Crea el índice idx_citas_medico_fecha (medico_asignado, fecha_hora, id_cita) si no existe.
+
+    Sirve las citas de un médico en un intervalo ya en orden
+    (``leer_citas_rango``); necesita 'fecha_hora' en ISO canónico (ver
+    ``normalizar_citas``).
+
+    Returns
+    -------
+    None
+    """
+    conn = conectar()
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_citas_medico_fecha ON citas (medico_asignado, fecha_hora, id_cita);")
+    conn.commit()
+    conn.close()
+
+
+def normalizar_citas() -> Tuple[int, int]:
+    """
+    Migración: reescribe en ISO canónico toda 'fecha_hora' que esté en otro formato.
+
+    Es una sola sentencia (y transacción) y se puede repetir sin efecto;
+    las filas cuya fecha no se entiende se dejan como están y se cuentan.
+
+    Returns
+    -------
+    Tuple[int, int]
+        (citas convertidas, citas con fecha no reconocida).
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"UPDATE citas SET fecha_hora = {_SQL_INICIO} "
+        f"WHERE {_SQL_INICIO} IS NOT NULL AND fecha_hora IS NOT {_SQL_INICIO};"
+    )
+    convertidas = cursor.rowcount
+    cursor.execute(f"SELECT COUNT(*) FROM citas WHERE fecha_hora IS NOT NULL AND {_SQL_INICIO} IS NULL;")
+    no_reconocidas = cursor.fetchone()[0]
+    conn.commit()
+    conn.close()
+    return convertidas, no_reconocidas
+
+
+def leer_citas_rango(
+    medico: str,
+    desde: Union[str, datetime],
+    hasta: Union[str, datetime]
+) -> List[Tuple[str, str, str, str, str, str, str, str, str]]:
+    """
+    Citas de un médico en un intervalo, en orden de fecha y hora.
+
+    Recorre solo el tramo del intervalo en idx_citas_medico_fecha.
+
+    Parameters
+    ----------
+    medico : str
+        Identificador del médico asignado.
+    desde : str or datetime
+        Inicio del intervalo (incluido), en cualquiera de ``FORMATOS_FECHA_HORA``.
+    hasta : str or datetime
+        Fin del intervalo (excluido), en cualquiera de ``FORMATOS_FECHA_HORA``.
+
+    Raises
+    ------
+    ValueError
+        Si alguno de los extremos no es una fecha reconocida.
+
+    Returns
+    -------
+    List[Tuple[str, str, str, str, str, str, str, str, str]]
+        Tuplas con campos:
+        (id_cita, paciente_id, medico_asignado, fecha_hora, tipo_cita, motivo,
+        centro, telefono_contacto, nivel_prioridad).
+    """
+    desde, hasta = normalizar_fecha_hora(desde), normalizar_fecha_hora(hasta)
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT id_cita, paciente_id, medico_asignado, fecha_hora, tipo_cita, motivo, centro, "
+        "telefono_contacto, nivel_prioridad FROM citas "
+        "WHERE medico_asignado = ? AND fecha_hora >= ? AND fecha_hora < ? "
+        "ORDER BY fecha_hora, id_cita;",
+        (medico, desde, hasta)
+    )
+    resultados = cursor.fetchall()
+    conn.close()
+    return resultados
+
+
+def leer_citas_filtradas(
+    paciente_id: Optional[str] = None,
+    medico: Optional[str] = None,
+    limite: int = 100
+) -> List[Tuple[str, str, str, str, str, str, str, str, str, str]]:
+    """
+    Citas de un paciente y/o de un médico, en orden de fecha y hora.
+
+    Parameters
+    ----------
+    paciente_id : str, optional
+        Si se indica, solo las citas de ese paciente.
+    medico : str, optional
+        Si se indica, solo las citas asignadas a ese médico.
+    limite : int, optional
+        Máximo de citas a devolver.
+
+    Returns
+    -------
+    List[Tuple[str, str, str, str, str, str, str, str, str, str]]
+        Tuplas con campos:
+        (id_cita, paciente_id, medico_asignado, fecha_hora, tipo_cita, motivo,
+        estado, centro, telefono_contacto, nivel_prioridad).
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT id_cita, paciente_id, medico_asignado, fecha_hora, tipo_cita, motivo, estado, centro, "
+        "telefono_contacto, nivel_prioridad FROM citas "
+        "WHERE (? IS NULL OR paciente_id = ?) AND (? IS NULL OR medico_asignado = ?) "
+        "ORDER BY fecha_hora, id_cita LIMIT ?;",
+        (paciente_id, paciente_id, medico, medico, limite)
+    )
+    resultados = cursor.fetchall()
+    conn.close()
+    return resultados
+
+
+# Estados de una cita (los de la clase Cita)
+ESTADOS_CITA = ('pendiente', 'cancelado', 'completado')
+
+
+def crear_tabla_agenda() -> None:
+    """
+    Prepara 'citas' para las agendas de los médicos.
+
+    - Añade la columna 'estado' ('pendiente', 'cancelado' o 'completado')
+      si no la tiene; las citas existentes quedan 'pendiente'.
+    - Crea la tabla 'agenda_versiones' (medico, dia, version) y los
+      disparadores que suben la versión del día de un médico con cada
+      cita que se inserta, cambia o borra en ese día, la escriba quien la
+      escriba (API, ORM o tabla_*). Una agenda guardada en memoria sigue
+      valiendo mientras su versión no cambie.
+    - Crea idx_citas_medico_fecha (ver ``crear_indice_citas_medico``).
+
+    Returns
+    -------
+    None
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    columnas = {fila[1] for fila in cursor.execute("PRAGMA table_xinfo(citas);")}
+    if 'estado' not in columnas:
+        cursor.execute("ALTER TABLE citas ADD COLUMN estado TEXT NOT NULL DEFAULT 'pendiente';")
+    subir = (
+        "INSERT INTO agenda_versiones (medico, dia, version) VALUES ({fila}.medico_asignado, "
+        "substr({fila}.fecha_hora, 1, 10), 1) ON CONFLICT (medico, dia) DO UPDATE SET version = version + 1;"
+    )
+    cursor.executescript(
+        f'''
+        CREATE TABLE IF NOT EXISTS agenda_versiones (
+            medico TEXT NOT NULL,
+            dia TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            PRIMARY KEY (medico, dia)
+        ) WITHOUT ROWID;
+        CREATE TRIGGER IF NOT EXISTS citas_agenda_insertar AFTER INSERT ON citas
+            WHEN NEW.medico_asignado IS NOT NULL
+        BEGIN {subir.format(fila='NEW')} END;
+        CREATE TRIGGER IF NOT EXISTS citas_agenda_borrar AFTER DELETE ON citas
+            WHEN OLD.medico_asignado IS NOT NULL
+        BEGIN {subir.format(fila='OLD')} END;
+        CREATE TRIGGER IF NOT EXISTS citas_agenda_actualizar_origen AFTER UPDATE ON citas
+            WHEN OLD.medico_asignado IS NOT NULL
+        BEGIN {subir.format(fila='OLD')} END;
+        CREATE TRIGGER IF NOT EXISTS citas_agenda_actualizar_destino AFTER UPDATE ON citas
+            WHEN NEW.medico_asignado IS NOT NULL AND (NEW.medico_asignado IS NOT OLD.medico_asignado
+                OR substr(NEW.fecha_hora, 1, 10) IS NOT substr(OLD.fecha_hora, 1, 10))
+        BEGIN {subir.format(fila='NEW')} END;
+        CREATE INDEX IF NOT EXISTS idx_citas_medico_fecha ON citas (medico_asignado, fecha_hora, id_cita);
+        '''
+    )
+    conn.commit()
+    conn.close()
+
+
+def registrar_cita(
+    id_cita: str,
+    paciente_id: str,
+    medico_asignado: Optional[str],
+    fecha_hora: Union[str, datetime],
+    tipo_cita: str,
+    motivo: str = '',
+    centro: Optional[str] = None,
+    telefono_contacto: Optional[str] = None,
+    nivel_prioridad: Optional[str] = None
+) -> Tuple[Optional[str], str]:
+    """
+    Guarda una cita pedida por un paciente, con la fecha en ISO canónico.
+
+    Parameters
+    ----------
+    id_cita : str
+        Identificador único de la cita.
+    paciente_id : str
+        Paciente que pide la cita.
+    medico_asignado : str, optional
+        Médico de la cita, o None si aún no tiene.
+    fecha_hora : str or datetime
+        Fecha y hora en cualquiera de ``FORMATOS_FECHA_HORA``.
+    tipo_cita : str
+        'presencial', 'telefonica' o 'urgencias'.
+    motivo : str, optional
+        Motivo de la cita.
+    centro : str, optional
+        Centro de una cita presencial.
+    telefono_contacto : str, optional
+        Teléfono de una cita telefónica.
+    nivel_prioridad : str, optional
+        Nivel de una cita de urgencias.
+
+    Raises
+    ------
+    ValueError
+        Si la fecha no se entiende, la cita ya existe o el paciente o el médico no existen.
+
+    Returns
+    -------
+    Tuple[Optional[str], str]
+        (medico_asignado, dia): la agenda que cambia.
+    """
+    fecha_hora = normalizar_fecha_hora(fecha_hora)
+    conn = conectar()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "INSERT INTO citas (id_cita, paciente_id, medico_asignado, fecha_hora, tipo_cita, motivo, centro, "
+            "telefono_contacto, nivel_prioridad) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);",
+            (id_cita, paciente_id, medico_asignado, fecha_hora, tipo_cita, motivo, centro, telefono_contacto,
+             nivel_prioridad)
+        )
+        conn.commit()
+    except sqlite3.IntegrityError as e:
+        raise ValueError(f"Error de integridad al registrar la cita: {e}")
+    finally:
+        conn.close()
+    return medico_asignado, fecha_hora[:10]
+
+
+def cambiar_estado_cita(
+    id_cita: str,
+    estado: str,
+    paciente_id: Optional[str] = None
+) -> Optional[Tuple[Optional[str], str, str]]:
+    """
+    Cancela o da por atendida una cita pendiente (atómico entre procesos).
+
+    Si es una cita de urgencias que sigue en la cola, su fila de
+    'triaje_urgencias' sale de la cola en la misma transacción.
+
+    Parameters
+    ----------
+    id_cita : str
+        Cita a cambiar.
+    estado : str
+        'cancelado' o 'completado'.
+    paciente_id : str, optional
+        Si se indica, solo cambia la cita si es de ese paciente.
+
+    Raises
+    ------
+    ValueError
+        Si el estado no es uno de ``ESTADOS_CITA``.
+
+    Returns
+    -------
+    Optional[Tuple[Optional[str], str, str]]
+        (medico_asignado, dia, tipo_cita) de la cita, o None si no existe,
+        no es del paciente o ya no estaba pendiente.
+    """
+    if estado not in ESTADOS_CITA:
+        raise ValueError(f"Estado de cita no válido: {estado!r}")
+    conn = conectar()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "UPDATE citas SET estado = ? WHERE id_cita = ? AND estado = 'pendiente' "
+            "AND (? IS NULL OR paciente_id = ?) RETURNING medico_asignado, substr(fecha_hora, 1, 10), tipo_cita;",
+            (estado, id_cita, paciente_id, paciente_id)
+        )
+        resultado = cursor.fetchone()
+        if resultado is not None and resultado[2] == 'urgencias' and cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'triaje_urgencias';").fetchone():
+            ahora = time.time()
+            cursor.execute(
+                "UPDATE triaje_urgencias SET estado = ?, atendida = ?, modificado = ? "
+                "WHERE id_cita = ? AND estado = 'en_espera';",
+                ('cancelada' if estado == 'cancelado' else 'atendida', ahora, ahora, id_cita)
+            )
+        conn.commit()
+    finally:
+        conn.close()
+    return resultado
+
+
+def leer_version_agenda(medico: str, dia: str) -> int:
+    """
+    Versión actual de la agenda de un médico en un día (0 si nunca ha cambiado).
+
+    Parameters
+    ----------
+    medico : str
+        Identificador del médico.
+    dia : str
+        Día (YYYY-MM-DD).
+
+    Returns
+    -------
+    int
+        Versión de 'agenda_versiones'.
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute("SELECT version FROM agenda_versiones WHERE medico = ? AND dia = ?;", (medico, dia))
+    fila = cursor.fetchone()
+    conn.close()
+    return fila[0] if fila else 0
+
+
+def leer_agenda_medico(
+    medico: str,
+    dia: str
+) -> Tuple[int, List[Tuple[str, str, str, str, str, str, str, str, str, str, str]]]:
+    """
+    Citas de un médico en un día, en orden de hora, con la versión de su agenda.
+
+    La versión y las citas se leen en la misma transacción, así que
+    corresponden al mismo momento.
+
+    Parameters
+    ----------
+    medico : str
+        Identificador del médico.
+    dia : str
+        Día (YYYY-MM-DD).
+
+    Raises
+    ------
+    ValueError
+        Si el día no tiene el formato YYYY-MM-DD.
+
+    Returns
+    -------
+    Tuple[int, List[Tuple[str, str, str, str, str, str, str, str, str, str, str]]]
+        (version, citas), con cada cita como
+        (id_cita, fecha_hora, tipo_cita, motivo, estado, centro, telefono_contacto,
+        nivel_prioridad, paciente_id, nombre, apellido).
+    """
+    inicio = datetime.strptime(dia, '%Y-%m-%d')
+    desde, hasta = normalizar_fecha_hora(inicio), normalizar_fecha_hora(inicio + timedelta(days=1))
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute("BEGIN;")
+    cursor.execute("SELECT version FROM agenda_versiones WHERE medico = ? AND dia = ?;", (medico, dia))
+    fila = cursor.fetchone()
+    cursor.execute(
+        "SELECT c.id_cita, c.fecha_hora, c.tipo_cita, c.motivo, c.estado, c.centro, c.telefono_contacto, "
+        "c.nivel_prioridad, c.paciente_id, p.nombre, p.apellido "
+        "FROM citas c LEFT JOIN pacientes p ON p.id = c.paciente_id "
+        "WHERE c.medico_asignado = ? AND c.fecha_hora >= ? AND c.fecha_hora < ? "
+        "ORDER BY c.fecha_hora, c.id_cita;",
+        (medico, desde, hasta)
+    )
+    citas = cursor.fetchall()
+    conn.commit()
+    conn.close()
+    return (fila[0] if fila else 0), citas
+
 if __name__ == '__main__':
-    crear_tabla_citas()
\ No newline at end of file
+    # Migración de una vez: fechas a ISO canónico y después el índice por médico
+    convertidas, no_reconocidas = normalizar_citas()
+    crear_indice_citas_medico()
+    print(f"Citas convertidas a ISO: {convertidas}; con fecha no reconocida: {no_reconocidas}")
@@ -0,0 +1,274 @@
+"""
+Bandeja de salida de correo.
+
+Quien envía un correo (``Secretario.enviar_correo``, los recordatorios de
+citas...) solo inserta una fila en 'correos_salientes'; el enviador en
+segundo plano de ``correo.py`` los reclama por lotes, los manda por SMTP y
+anota el resultado. Un lote reclamado queda 'enviando' hasta
+``proximo_intento``: si el proceso que lo reclamó muere, otro lo vuelve a
+reclamar al vencer ese plazo.
+"""
+
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from Base_De_Datos.tablas.conexion import RUTA_BD, abrir_conexion
+
+# Base de datos compartida (ver conexion.py)
+db_path = RUTA_BD
+
+
+def conectar() -> sqlite3.Connection:
+    """
+    Establece una conexión con la base de datos SQLite.
+
+    Returns
+    -------
+    sqlite3.Connection
+        Conexión activa al archivo de base de datos.
+    """
+    conn = abrir_conexion(db_path)
+    return conn
+
+
+def crear_tabla_correos() -> None:
+    """
+    Crea la tabla 'correos_salientes' si no existe.
+
+    La tabla contiene los siguientes campos:
+    - id              : INTEGER PRIMARY KEY AUTOINCREMENT
+    - remitente       : TEXT, dirección del remitente (NULL: la configurada)
+    - destinatario    : TEXT NOT NULL
+    - asunto          : TEXT NOT NULL
+    - cuerpo          : TEXT NOT NULL
+    - estado          : TEXT NOT NULL, 'pendiente', 'enviando', 'enviado' o 'fallido'
+    - intentos        : INTEGER NOT NULL, envíos fallidos hasta ahora
+    - proximo_intento : REAL NOT NULL, cuándo puede (re)intentarse (segundos desde epoch)
+    - ultimo_error    : TEXT, respuesta del servidor en el último fallo
+    - creado          : REAL NOT NULL
+    - enviado         : REAL, cuándo lo aceptó el servidor SMTP
+
+    Returns
+    -------
+    None
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.executescript(
+        '''
+        CREATE TABLE IF NOT EXISTS correos_salientes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            remitente TEXT,
+            destinatario TEXT NOT NULL,
+            asunto TEXT NOT NULL,
+            cuerpo TEXT NOT NULL,
+            estado TEXT NOT NULL DEFAULT 'pendiente'
+                CHECK(estado IN ('pendiente','enviando','enviado','fallido')),
+            intentos INTEGER NOT NULL DEFAULT 0,
+            proximo_intento REAL NOT NULL,
+            ultimo_error TEXT,
+            creado REAL NOT NULL,
+            enviado REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_correos_por_enviar ON correos_salientes (proximo_intento)
+            WHERE estado IN ('pendiente','enviando');
+        '''
+    )
+    conn.commit()
+    conn.close()
+
+
+def insertar_correos(conn: sqlite3.Connection, correos: Iterable[Tuple[str, str, str, Optional[str]]]) -> int:
+    """
+    Añade varios correos a la bandeja de salida sin hacer commit.
+
+    Sirve para encolar correos en la misma transacción que otros cambios
+    (ver ``tabla_recordatorios.guardar_lote_recordatorios``).
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        Conexión (y transacción) en la que insertar.
+    correos : Iterable[Tuple[str, str, str, Optional[str]]]
+        Tuplas (destinatario, asunto, cuerpo, remitente); remitente puede ser None.
+
+    Returns
+    -------
+    int
+        Correos insertados.
+    """
+    ahora = time.time()
+    cursor = conn.executemany(
+        "INSERT INTO correos_salientes (destinatario, asunto, cuerpo, remitente, proximo_intento, creado) "
+        "VALUES (?, ?, ?, ?, ?, ?);",
+        ((destinatario, asunto, cuerpo, remitente, ahora, ahora)
+         for destinatario, asunto, cuerpo, remitente in correos)
+    )
+    return cursor.rowcount
+
+
+def encolar_correos(correos: Iterable[Tuple[str, str, str, Optional[str]]]) -> int:
+    """
+    Añade varios correos a la bandeja de salida en una sola transacción.
+
+    Parameters
+    ----------
+    correos : Iterable[Tuple[str, str, str, Optional[str]]]
+        Tuplas (destinatario, asunto, cuerpo, remitente); remitente puede ser None.
+
+    Returns
+    -------
+    int
+        Correos encolados.
+    """
+    conn = conectar()
+    encolados = insertar_correos(conn, correos)
+    conn.commit()
+    conn.close()
+    return encolados
+
+
+def encolar_correo(destinatario: str, asunto: str, cuerpo: str, remitente: Optional[str] = None) -> int:
+    """
+    Añade un correo a la bandeja de salida.
+
+    Parameters
+    ----------
+    destinatario : str
+        Dirección de destino.
+    asunto : str
+        Asunto del correo.
+    cuerpo : str
+        Texto del correo.
+    remitente : str, optional
+        Dirección del remitente; por defecto la configurada en el enviador.
+
+    Returns
+    -------
+    int
+        Identificador del correo en la bandeja.
+    """
+    ahora = time.time()
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute(
+        "INSERT INTO correos_salientes (destinatario, asunto, cuerpo, remitente, proximo_intento, creado) "
+        "VALUES (?, ?, ?, ?, ?, ?);",
+        (destinatario, asunto, cuerpo, remitente, ahora, ahora)
+    )
+    conn.commit()
+    conn.close()
+    return cursor.lastrowid
+
+
+def reclamar_correos(limite: int, plazo_s: float) -> List[Tuple[int, Optional[str], str, str, str, int]]:
+    """
+    Reclama un lote de correos listos para enviar.
+
+    Pasan a 'enviando' con ``proximo_intento`` dentro de ``plazo_s``
+    segundos; es una sola sentencia, así que dos enviadores nunca se llevan
+    el mismo correo. También se reclaman los 'enviando' cuyo plazo venció
+    (su enviador murió a medias).
+
+    Parameters
+    ----------
+    limite : int
+        Máximo de correos del lote.
+    plazo_s : float
+        Segundos que el lote es de este enviador.
+
+    Returns
+    -------
+    List[Tuple[int, Optional[str], str, str, str, int]]
+        Tuplas (id, remitente, destinatario, asunto, cuerpo, intentos), por orden de llegada.
+    """
+    ahora = time.time()
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute(
+        "UPDATE correos_salientes SET estado = 'enviando', proximo_intento = ? "
+        "WHERE id IN (SELECT id FROM correos_salientes WHERE estado IN ('pendiente','enviando') "
+        "AND proximo_intento <= ? ORDER BY proximo_intento LIMIT ?) "
+        "RETURNING id, remitente, destinatario, asunto, cuerpo, intentos;",
+        (ahora + plazo_s, ahora, limite)
+    )
+    resultados = sorted(cursor.fetchall())
+    conn.commit()
+    conn.close()
+    return resultados
+
+
+def marcar_correos_enviados(ids: Iterable[int]) -> int:
+    """
+    Marca varios correos como enviados en una sola transacción.
+
+    Parameters
+    ----------
+    ids : Iterable[int]
+        Correos aceptados por el servidor SMTP.
+
+    Returns
+    -------
+    int
+        Correos marcados.
+    """
+    ahora = time.time()
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.executemany(
+        "UPDATE correos_salientes SET estado = 'enviado', enviado = ?, ultimo_error = NULL "
+        "WHERE id = ? AND estado = 'enviando';",
+        ((ahora, id_correo) for id_correo in ids)
+    )
+    conn.commit()
+    conn.close()
+    return cursor.rowcount
+
+
+def reprogramar_correos(fallos: Iterable[Tuple[int, Optional[float], str]]) -> int:
+    """
+    Anota el fallo de varios correos: vuelven a 'pendiente' para otro
+    intento o, si no lo tienen, quedan 'fallido'.
+
+    Parameters
+    ----------
+    fallos : Iterable[Tuple[int, Optional[float], str]]
+        Tuplas (id, proximo_intento, error); proximo_intento None si el
+        fallo es definitivo.
+
+    Returns
+    -------
+    int
+        Correos actualizados.
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.executemany(
+        "UPDATE correos_salientes SET intentos = intentos + 1, ultimo_error = ?, "
+        "estado = CASE WHEN ? IS NULL THEN 'fallido' ELSE 'pendiente' END, "
+        "proximo_intento = COALESCE(?, proximo_intento) WHERE id = ? AND estado = 'enviando';",
+        ((error, proximo, proximo, id_correo) for id_correo, proximo, error in fallos)
+    )
+    conn.commit()
+    conn.close()
+    return cursor.rowcount
+
+
+def contar_correos() -> Dict[str, int]:
+    """
+    Cuenta los correos de la bandeja por estado.
+
+    Returns
+    -------
+    Dict[str, int]
+        Número de correos por estado ('pendiente', 'enviando', 'enviado', 'fallido').
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute("SELECT estado, COUNT(*) FROM correos_salientes GROUP BY estado;")
+    resultados = dict(cursor.fetchall())
+    conn.close()
+    return resultados
+
+if __name__ == '__main__':
+    crear_tabla_correos()
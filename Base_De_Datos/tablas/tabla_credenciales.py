@@ -0,0 +1,154 @@
+"""
+Parámetros del cifrado de contraseñas y actualización de hashes.
+
+'parametros_credenciales' guarda el método de cifrado calibrado para el
+servidor (``python credenciales.py --objetivo-ms 100``), compartido por
+todos sus procesos: así todos cifran igual y ninguno re-cifra lo que otro
+acaba de cifrar con otros parámetros.
+"""
+
+import sqlite3
+import time
+from typing import Optional
+from Base_De_Datos.tablas.conexion import RUTA_BD, abrir_conexion
+from Base_De_Datos.tablas.tabla_usuarios import ROLES_CON_CLAVE, ROLES_SIN_CLAVE
+
+# Base de datos compartida (ver conexion.py)
+db_path = RUTA_BD
+
+def conectar() -> sqlite3.Connection:
+    """
+    Establece una conexión con la base de datos SQLite.
+
+    Returns
+    -------
+    sqlite3.Connection
+        Conexión activa al archivo de base de datos.
+    """
+    conn = abrir_conexion(db_path)
+    return conn
+
+
+def crear_tabla_parametros_credenciales() -> None:
+    """
+    Crea la tabla 'parametros_credenciales' si no existe.
+
+    La tabla contiene los siguientes campos:
+    - clave       : TEXT PRIMARY KEY, nombre del parámetro (p. ej. 'metodo_hash')
+    - valor       : TEXT NOT NULL, su valor
+    - actualizado : REAL NOT NULL, último cambio (segundos desde epoch)
+
+    Returns
+    -------
+    None
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute(
+        '''
+        CREATE TABLE IF NOT EXISTS parametros_credenciales (
+            clave TEXT PRIMARY KEY,
+            valor TEXT NOT NULL,
+            actualizado REAL NOT NULL
+        );
+        '''
+    )
+    conn.commit()
+    conn.close()
+
+
+def leer_parametro(clave: str) -> Optional[str]:
+    """
+    Valor de un parámetro.
+
+    Parameters
+    ----------
+    clave : str
+        Nombre del parámetro.
+
+    Returns
+    -------
+    Optional[str]
+        Su valor, o None si no se ha guardado.
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute("SELECT valor FROM parametros_credenciales WHERE clave = ?;", (clave,))
+    fila = cursor.fetchone()
+    conn.close()
+    return fila[0] if fila else None
+
+
+def guardar_parametro(clave: str, valor: str) -> None:
+    """
+    Guarda (o sustituye) el valor de un parámetro.
+
+    Parameters
+    ----------
+    clave : str
+        Nombre del parámetro.
+    valor : str
+        Nuevo valor.
+
+    Returns
+    -------
+    None
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute(
+        "INSERT INTO parametros_credenciales (clave, valor, actualizado) VALUES (?, ?, ?) "
+        "ON CONFLICT (clave) DO UPDATE SET valor = excluded.valor, actualizado = excluded.actualizado;",
+        (clave, valor, time.time())
+    )
+    conn.commit()
+    conn.close()
+
+
+def actualizar_hash(rol: str, id: str, anterior: str, nuevo: str) -> bool:
+    """
+    Sustituye el hash de contraseña de una cuenta si sigue siendo ``anterior``.
+
+    La condición evita pisar un cambio de contraseña hecho mientras se
+    calculaba el hash nuevo. Pacientes, médicos y enfermeros se actualizan
+    en su tabla (el directorio 'usuarios' lo copia); el resto, en el directorio.
+
+    Parameters
+    ----------
+    rol : str
+        Rol de la cuenta (ver ``tabla_usuarios.ROLES``).
+    id : str
+        Identificador de la entidad.
+    anterior : str
+        Hash con el que se ha verificado la contraseña.
+    nuevo : str
+        Hash de la misma contraseña con los parámetros actuales.
+
+    Returns
+    -------
+    bool
+        True si se ha actualizado.
+
+    Raises
+    ------
+    ValueError
+        Si el rol no existe.
+    """
+    if rol in ROLES_CON_CLAVE:
+        sql = f"UPDATE {ROLES_CON_CLAVE[rol]} SET password = ? WHERE id = ? AND password = ?;"
+        parametros = (nuevo, id, anterior)
+    elif rol in ROLES_SIN_CLAVE:
+        sql = "UPDATE usuarios SET password = ? WHERE rol = ? AND id_entidad = ? AND password = ?;"
+        parametros = (nuevo, rol, id, anterior)
+    else:
+        raise ValueError(f"Rol no reconocido: {rol}")
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute(sql, parametros)
+    actualizada = cursor.rowcount > 0
+    conn.commit()
+    conn.close()
+    return actualizada
+
+if __name__ == '__main__':
+    crear_tabla_parametros_credenciales()
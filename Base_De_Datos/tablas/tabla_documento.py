@@ -1,9 +1,23 @@
 import sqlite3
-import os
-from typing import List, Tuple
+import time
+from typing import Iterable, List, Optional, Tuple
+from Base_De_Datos.tablas.conexion import RUTA_BD, abrir_conexion
 
-# Base de datos en la misma carpeta que este script
-db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bdd.db')
+# Base de datos compartida (ver conexion.py)
+db_path = RUTA_BD
+
+# Columnas añadidas para la cola de trabajo; las bases de datos anteriores las reciben con ALTER TABLE
+_COLUMNAS_COLA = (
+    ("estado", "TEXT NOT NULL DEFAULT 'pendiente' CHECK (estado IN ('pendiente', 'en_proceso', 'cerrado'))"),
+    ("reclamado", "REAL"),
+    ("cerrado", "REAL"),
+)
+
+# Columnas de la cola: el rowid hace de orden de llegada dentro de cada prioridad
+_SQL_COLA = (
+    "SELECT rowid, id, titulo, descripcion, urgente, prioridad, id_secretario FROM documentos "
+    "WHERE estado = 'pendiente' AND id_secretario {} ORDER BY prioridad DESC, rowid LIMIT ?;"
+)
 
 def conectar() -> sqlite3.Connection:
     """
@@ -14,8 +28,7 @@ def conectar() -> sqlite3.Connection:
     sqlite3.Connection
         Conexión activa al archivo de base de datos.
     """
-    conn = sqlite3.connect(db_path)
-    conn.execute("PRAGMA foreign_keys = ON;")
+    conn = abrir_conexion(db_path)
     return conn
 
 
@@ -29,7 +42,14 @@ def crear_tabla_documentos() -> None:
     - descripcion : TEXT NOT NULL
     - urgente : INTEGER NOT NULL DEFAULT 0
     - prioridad : INTEGER NOT NULL DEFAULT 0 CHECK(prioridad IN (0, 1))
-    - id_secretario : TEXT
+    - id_secretario : TEXT, secretario en cuya cola está (NULL: sin asignar)
+    - estado : TEXT NOT NULL DEFAULT 'pendiente', 'pendiente', 'en_proceso' o 'cerrado'
+    - reclamado : REAL, cuándo lo reclamó su secretario (segundos desde epoch)
+    - cerrado : REAL, cuándo se cerró
+
+    Si la tabla ya existía sin las columnas de la cola, se añaden. El índice
+    parcial idx_documentos_cola sirve los documentos pendientes de cada
+    secretario ya ordenados por prioridad y llegada.
 
     Returns
     -------
@@ -50,6 +70,14 @@ def crear_tabla_documentos() -> None:
         );
         '''
     )
+    existentes = {fila[1] for fila in cursor.execute("PRAGMA table_info(documentos);")}
+    for columna, definicion in _COLUMNAS_COLA:
+        if columna not in existentes:
+            cursor.execute(f"ALTER TABLE documentos ADD COLUMN {columna} {definicion};")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_documentos_cola ON documentos (id_secretario, prioridad DESC) "
+        "WHERE estado = 'pendiente';"
+    )
     conn.commit()
     conn.close()
 
@@ -59,7 +87,8 @@ def insertar_documento(
     titulo: str,
     descripcion: str,
     urgente: bool = False,
-    prioridad: int = 0
+    prioridad: int = 0,
+    id_secretario: Optional[str] = None
 ) -> None:
     """
     Inserta un nuevo documento en la tabla 'documentos'.
@@ -76,6 +105,8 @@ def insertar_documento(
         Indicador de urgencia; por defecto False.
     prioridad : int, optional
         Nivel de prioridad (0: normal, 1: urgente); por defecto 0.
+    id_secretario : str, optional
+        Secretario a cuya cola va el documento; por defecto ninguno.
 
     Raises
     ------
@@ -90,8 +121,9 @@ def insertar_documento(
     cursor = conn.cursor()
     try:
         cursor.execute(
-            "INSERT INTO documentos (id, titulo, descripcion, urgente, prioridad) VALUES (?, ?, ?, ?, ?);",
-            (doc_id, titulo, descripcion, int(urgente), prioridad)
+            "INSERT INTO documentos (id, titulo, descripcion, urgente, prioridad, id_secretario) "
+            "VALUES (?, ?, ?, ?, ?, ?);",
+            (doc_id, titulo, descripcion, int(urgente), prioridad, id_secretario)
         )
         conn.commit()
     except sqlite3.IntegrityError as e:
@@ -102,7 +134,8 @@ def insertar_documento(
 
 def leer_documentos() -> List[Tuple[str, str, str, int, int, str]]:
     """
-    Recupera todos los documentos almacenados en la base de datos.
+    Recupera todos los documentos almacenados en la base de datos, los
+    urgentes primero y, dentro de cada prioridad, por orden de llegada.
 
     Returns
     -------
@@ -113,7 +146,8 @@ def leer_documentos() -> List[Tuple[str, str, str, int, int, str]]:
     conn = conectar()
     cursor = conn.cursor()
     cursor.execute(
-        "SELECT id, titulo, descripcion, urgente, prioridad, id_secretario FROM documentos;"
+        "SELECT id, titulo, descripcion, urgente, prioridad, id_secretario FROM documentos "
+        "ORDER BY prioridad DESC, rowid;"
     )
     resultados = cursor.fetchall()
     conn.close()
@@ -162,6 +196,195 @@ def eliminar_documento(doc_id: str) -> None:
     conn.commit()
     conn.close()
 
+
+def leer_cola_documentos(id_secretario: Optional[str], limite: int) -> List[Tuple[int, str, str, str, int, int, str]]:
+    """
+    Documentos pendientes de la cola de un secretario, los más urgentes primero.
+
+    Usa el índice idx_documentos_cola: lee solo ``limite`` filas, sin
+    recorrer ni ordenar la tabla.
+
+    Parameters
+    ----------
+    id_secretario : str, optional
+        Secretario; None para los documentos sin asignar.
+    limite : int
+        Máximo de documentos a devolver.
+
+    Returns
+    -------
+    List[Tuple[int, str, str, str, int, int, str]]
+        Tuplas con campos:
+        (orden, id, titulo, descripcion, urgente, prioridad, id_secretario),
+        donde orden es el rowid (orden de llegada).
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    if id_secretario is None:
+        cursor.execute(_SQL_COLA.format("IS NULL"), (limite,))
+    else:
+        cursor.execute(_SQL_COLA.format("= ?"), (id_secretario, limite))
+    resultados = cursor.fetchall()
+    conn.close()
+    return resultados
+
+
+def reclamar_documento(doc_id: str, id_secretario: str) -> bool:
+    """
+    Pasa un documento pendiente a 'en_proceso' para un secretario.
+
+    La comprobación y el cambio son una sola sentencia UPDATE, así que dos
+    secretarios (o dos procesos) nunca reclaman el mismo documento.
+
+    Parameters
+    ----------
+    doc_id : str
+        Documento a reclamar; debe estar pendiente y sin asignar o en la
+        cola de ``id_secretario``.
+    id_secretario : str
+        Secretario que lo reclama.
+
+    Returns
+    -------
+    bool
+        True si el documento era reclamable y ahora es de este secretario.
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute(
+        "UPDATE documentos SET estado = 'en_proceso', id_secretario = ?, reclamado = ? "
+        "WHERE id = ? AND estado = 'pendiente' AND (id_secretario IS NULL OR id_secretario = ?);",
+        (id_secretario, time.time(), doc_id, id_secretario)
+    )
+    conn.commit()
+    conn.close()
+    return cursor.rowcount > 0
+
+
+def reclamar_siguiente_documento(id_secretario: str) -> Optional[Tuple[str, str, str, int, int]]:
+    """
+    Reclama el documento pendiente más urgente de la cola del secretario o,
+    si su cola está vacía, de los documentos sin asignar.
+
+    Parameters
+    ----------
+    id_secretario : str
+        Secretario que lo reclama.
+
+    Returns
+    -------
+    Optional[Tuple[str, str, str, int, int]]
+        (id, titulo, descripcion, urgente, prioridad) del documento, o None
+        si no queda ninguno.
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    resultado = None
+    for filtro, parametros in (("= ?", (id_secretario,)), ("IS NULL", ())):
+        cursor.execute(
+            "UPDATE documentos SET estado = 'en_proceso', id_secretario = ?, reclamado = ? "
+            "WHERE rowid = (SELECT rowid FROM documentos WHERE estado = 'pendiente' "
+            f"AND id_secretario {filtro} ORDER BY prioridad DESC, rowid LIMIT 1) "
+            "RETURNING id, titulo, descripcion, urgente, prioridad;",
+            (id_secretario, time.time(), *parametros)
+        )
+        resultado = cursor.fetchone()
+        if resultado is not None:
+            break
+    conn.commit()
+    conn.close()
+    return resultado
+
+
+def marcar_documentos_urgentes(doc_ids: Iterable[str]) -> int:
+    """
+    Marca varios documentos como urgentes en una sola transacción.
+
+    Parameters
+    ----------
+    doc_ids : Iterable[str]
+        Identificadores de los documentos.
+
+    Returns
+    -------
+    int
+        Documentos que han pasado a urgentes.
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.executemany(
+        "UPDATE documentos SET urgente = 1, prioridad = 1 WHERE id = ? AND prioridad = 0;",
+        ((doc_id,) for doc_id in doc_ids)
+    )
+    conn.commit()
+    conn.close()
+    return cursor.rowcount
+
+
+def asignar_documentos(doc_ids: Iterable[str], id_secretario: Optional[str]) -> int:
+    """
+    Mueve varios documentos pendientes a la cola de un secretario (o los deja sin asignar).
+
+    Parameters
+    ----------
+    doc_ids : Iterable[str]
+        Identificadores de los documentos.
+    id_secretario : str, optional
+        Secretario de destino; None para devolverlos a los sin asignar.
+
+    Raises
+    ------
+    ValueError
+        Si el secretario no existe.
+
+    Returns
+    -------
+    int
+        Documentos movidos.
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    try:
+        cursor.executemany(
+            "UPDATE documentos SET id_secretario = ? WHERE id = ? AND estado = 'pendiente';",
+            ((id_secretario, doc_id) for doc_id in doc_ids)
+        )
+        conn.commit()
+    except sqlite3.IntegrityError as e:
+        conn.rollback()
+        raise ValueError(f"Error de integridad al asignar documentos: {e}")
+    finally:
+        conn.close()
+    return cursor.rowcount
+
+
+def cerrar_documentos(doc_ids: Iterable[str], id_secretario: str) -> int:
+    """
+    Cierra varios documentos de un secretario en una sola transacción.
+
+    Parameters
+    ----------
+    doc_ids : Iterable[str]
+        Identificadores de los documentos (pendientes en su cola o en proceso).
+    id_secretario : str
+        Secretario que los cierra; los documentos de otros no se tocan.
+
+    Returns
+    -------
+    int
+        Documentos cerrados.
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.executemany(
+        "UPDATE documentos SET estado = 'cerrado', cerrado = ? "
+        "WHERE id = ? AND id_secretario = ? AND estado != 'cerrado';",
+        ((time.time(), doc_id, id_secretario) for doc_id in doc_ids)
+    )
+    conn.commit()
+    conn.close()
+    return cursor.rowcount
+
 if __name__ == '__main__':
     crear_tabla_documentos()
 
@@ -0,0 +1,92 @@
+import sqlite3
+from typing import List, Tuple
+from Base_De_Datos.tablas.conexion import RUTA_BD, abrir_conexion
+
+# Base de datos compartida (ver conexion.py)
+db_path = RUTA_BD
+
+def conectar() -> sqlite3.Connection:
+    """
+    Establece una conexión con la base de datos SQLite.
+
+    Returns
+    -------
+    sqlite3.Connection
+        Conexión activa al archivo de base de datos.
+    """
+    conn = abrir_conexion(db_path)
+    return conn
+
+
+def crear_tabla_nominas() -> None:
+    """
+    Crea la tabla 'nominas' en la base de datos si no existe.
+
+    La tabla contiene los siguientes campos:
+    - periodo : TEXT
+        Mes de la nómina en formato 'AAAA-MM'.
+    - id_trabajador : TEXT
+        Identificador del trabajador (tabla 'trabajadores').
+    - rol : TEXT
+        Rol del trabajador al calcular la nómina.
+    - salario_base : REAL
+        Salario mensual base de 'trabajadores'.
+    - salario_mensual : REAL
+        Salario tras aplicar antigüedad y turno de noche.
+    - salario_anual : REAL
+        Salario mensual por doce pagas.
+
+    La clave primaria es (periodo, id_trabajador): recalcular un mes
+    sustituye sus nóminas.
+
+    Returns
+    -------
+    None
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute(
+        '''
+        CREATE TABLE IF NOT EXISTS nominas (
+            periodo TEXT NOT NULL,
+            id_trabajador TEXT NOT NULL,
+            rol TEXT NOT NULL,
+            salario_base REAL NOT NULL,
+            salario_mensual REAL NOT NULL,
+            salario_anual REAL NOT NULL,
+            PRIMARY KEY (periodo, id_trabajador)
+        );
+        '''
+    )
+    conn.commit()
+    conn.close()
+
+
+def leer_nominas(periodo: str) -> List[Tuple[str, str, float, float, float]]:
+    """
+    Recupera las nóminas de un mes.
+
+    Parameters
+    ----------
+    periodo : str
+        Mes en formato 'AAAA-MM'.
+
+    Returns
+    -------
+    List[Tuple[str, str, float, float, float]]
+        Tuplas con campos:
+        (id_trabajador, rol, salario_base, salario_mensual, salario_anual).
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT id_trabajador, rol, salario_base, salario_mensual, salario_anual "
+        "FROM nominas WHERE periodo = ? ORDER BY id_trabajador;",
+        (periodo,)
+    )
+    resultados = cursor.fetchall()
+    conn.close()
+    return resultados
+
+if __name__ == '__main__':
+    crear_tabla_nominas()
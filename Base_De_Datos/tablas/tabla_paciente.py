@@ -1,10 +1,10 @@
 import sqlite3
-import os
 import json
 from typing import List, Tuple, Optional
+from Base_De_Datos.tablas.conexion import RUTA_BD, abrir_conexion
 
-# Base de datos en la misma carpeta que este script
-_db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bdd.db')
+# Base de datos compartida (ver conexion.py)
+_db_path = RUTA_BD
 
 def conectar() -> sqlite3.Connection:
     """
@@ -15,8 +15,7 @@ def conectar() -> sqlite3.Connection:
     sqlite3.Connection
         Conexión activa al archivo de base de datos.
     """
-    conn = sqlite3.connect(_db_path)
-    conn.execute("PRAGMA foreign_keys = ON;")
+    conn = abrir_conexion(_db_path)
     return conn
 
 
@@ -280,6 +279,74 @@ def eliminar_paciente_enfermedad(paciente_id: str, enfermedad_id: str) -> None:
     conn.close()
 
 
+def crear_tabla_contactos_pacientes() -> None:
+    """
+    Crea la tabla 'contactos_pacientes' si no existe.
+
+    Datos de contacto para avisos (recordatorios de citas). Van en una tabla
+    aparte para no cambiar las columnas de 'pacientes' que lee el ORM.
+
+    La tabla contiene los siguientes campos:
+      - paciente_id : TEXT PRIMARY KEY
+      - email : TEXT
+      - telefono : TEXT
+
+    Returns
+    -------
+    None
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute(
+        '''
+        CREATE TABLE IF NOT EXISTS contactos_pacientes (
+            paciente_id TEXT PRIMARY KEY,
+            email TEXT,
+            telefono TEXT,
+            FOREIGN KEY(paciente_id) REFERENCES pacientes(id) ON DELETE CASCADE
+        );
+        '''
+    )
+    conn.commit()
+    conn.close()
+
+
+def guardar_contacto_paciente(paciente_id: str, email: Optional[str], telefono: Optional[str]) -> None:
+    """
+    Guarda (o sustituye) el contacto de un paciente.
+
+    Parameters
+    ----------
+    paciente_id : str
+        ID del paciente.
+    email : str, optional
+        Correo electrónico.
+    telefono : str, optional
+        Teléfono.
+
+    Raises
+    ------
+    ValueError
+        Si el paciente no existe.
+
+    Returns
+    -------
+    None
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "INSERT INTO contactos_pacientes (paciente_id, email, telefono) VALUES (?, ?, ?) "
+            "ON CONFLICT(paciente_id) DO UPDATE SET email = excluded.email, telefono = excluded.telefono;",
+            (paciente_id, email, telefono)
+        )
+        conn.commit()
+    except sqlite3.IntegrityError as e:
+        raise ValueError(f"Error de integridad al guardar el contacto: {e}")
+    finally:
+        conn.close()
+
 if __name__ == '__main__':
     crear_tabla_pacientes()
     crear_tabla_paciente_enfermedad()
@@ -1,13 +1,12 @@
 import sqlite3
-import os
+from Base_De_Datos.tablas.conexion import RUTA_BD, abrir_conexion
 
-# 1. Construir ruta absoluta al fichero de base de datos
-db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bdd.db')
+# Base de datos compartida (ver conexion.py)
+db_path = RUTA_BD
 
 def conectar() -> sqlite3.Connection:
     print(f"[DEBUG] Conectando a: {db_path}")
-    conn = sqlite3.connect(db_path)
-    conn.execute("PRAGMA foreign_keys = ON;")
+    conn = abrir_conexion(db_path)
     return conn
 def crear_tabla_personas() -> None:
     """
@@ -0,0 +1,299 @@
+"""
+Jerarquía de presupuestos Comunidad → Provincia → Centro.
+
+Los totales de los centros de cada provincia y de cada comunidad se guardan
+ya agregados en 'presupuesto_provincias' y 'presupuesto_comunidades'. Las
+funciones de 'tabla_centro' (insertar, actualizar, eliminar y registrar
+pagos) los ajustan con :func:`aplicar_cambio_presupuesto` dentro de su
+misma transacción, así que consultar el total de una provincia o comunidad
+es leer una fila por clave primaria. :func:`reconciliar_presupuestos` los
+recalcula desde cero a partir de 'centros' y 'pagos_centros'.
+"""
+
+import sqlite3
+from typing import List, Optional, Tuple
+from Base_De_Datos.tablas.conexion import RUTA_BD, abrir_conexion
+
+# Base de datos compartida (ver conexion.py)
+db_path = RUTA_BD
+
+# Columnas agregadas, en el orden en que se devuelven
+COLUMNAS = ('centros', 'presupuesto', 'gasto', 'trabajadores', 'habitaciones')
+
+_SUMAS = ", ".join(f"{c} = {c} + excluded.{c}" for c in COLUMNAS)
+
+_SQL_RECALCULO_PROVINCIAS = """
+    INSERT INTO presupuesto_provincias (id_provincia, centros, presupuesto, gasto, trabajadores, habitaciones)
+    SELECT c.id_provincia, COUNT(*), TOTAL(c.presupuesto), TOTAL(COALESCE(p.gasto, 0)),
+           TOTAL(c.cantidad_trabajadores), TOTAL(c.habitaciones)
+    FROM centros c
+    LEFT JOIN (SELECT id_centro, -TOTAL(importe) AS gasto FROM pagos_centros
+               WHERE importe < 0 GROUP BY id_centro) p ON p.id_centro = c.id_centro
+    GROUP BY c.id_provincia
+"""
+
+_SQL_RECALCULO_COMUNIDADES = """
+    INSERT INTO presupuesto_comunidades (nombre_comunidad, centros, presupuesto, gasto, trabajadores, habitaciones)
+    SELECT pr.nombre_comunidad, TOTAL(pp.centros), TOTAL(pp.presupuesto), TOTAL(pp.gasto),
+           TOTAL(pp.trabajadores), TOTAL(pp.habitaciones)
+    FROM presupuesto_provincias pp
+    JOIN provincias pr ON pr.id = pp.id_provincia
+    GROUP BY pr.nombre_comunidad
+"""
+
+def conectar() -> sqlite3.Connection:
+    """
+    Establece una conexión con la base de datos SQLite.
+
+    Returns
+    -------
+    sqlite3.Connection
+        Conexión activa al archivo de base de datos.
+    """
+    conn = abrir_conexion(db_path)
+    return conn
+
+
+def crear_tabla_presupuestos() -> None:
+    """
+    Crea las tablas de la jerarquía de presupuestos si no existen.
+
+    - pagos_centros : un registro por pago de un centro
+      (id, id_centro, importe, fecha); los importes negativos son gasto.
+    - presupuesto_provincias : totales por provincia (id_provincia).
+    - presupuesto_comunidades : totales por comunidad (nombre_comunidad).
+
+    Las dos últimas tienen las columnas de ``COLUMNAS``: número de centros,
+    presupuesto actual, gasto acumulado, trabajadores y habitaciones.
+
+    Returns
+    -------
+    None
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.executescript(
+        '''
+        CREATE TABLE IF NOT EXISTS pagos_centros (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            id_centro TEXT NOT NULL,
+            importe REAL NOT NULL,
+            fecha TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%S', 'now')),
+            FOREIGN KEY(id_centro) REFERENCES centros(id_centro) ON DELETE CASCADE
+        );
+        CREATE INDEX IF NOT EXISTS idx_pagos_centros_centro ON pagos_centros (id_centro);
+        CREATE TABLE IF NOT EXISTS presupuesto_provincias (
+            id_provincia INTEGER PRIMARY KEY,
+            centros INTEGER NOT NULL DEFAULT 0,
+            presupuesto REAL NOT NULL DEFAULT 0,
+            gasto REAL NOT NULL DEFAULT 0,
+            trabajadores INTEGER NOT NULL DEFAULT 0,
+            habitaciones INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY(id_provincia) REFERENCES provincias(id) ON DELETE CASCADE
+        );
+        CREATE TABLE IF NOT EXISTS presupuesto_comunidades (
+            nombre_comunidad TEXT PRIMARY KEY,
+            centros INTEGER NOT NULL DEFAULT 0,
+            presupuesto REAL NOT NULL DEFAULT 0,
+            gasto REAL NOT NULL DEFAULT 0,
+            trabajadores INTEGER NOT NULL DEFAULT 0,
+            habitaciones INTEGER NOT NULL DEFAULT 0
+        );
+        '''
+    )
+    conn.commit()
+    conn.close()
+
+
+def aplicar_cambio_presupuesto(
+    cursor: sqlite3.Cursor,
+    id_provincia: int,
+    centros: int = 0,
+    presupuesto: float = 0.0,
+    gasto: float = 0.0,
+    trabajadores: int = 0,
+    habitaciones: int = 0
+) -> None:
+    """
+    Suma una variación a los totales de una provincia y de su comunidad.
+
+    No hace commit: se llama desde la transacción que modifica el centro
+    para que los totales nunca queden desfasados.
+
+    Parameters
+    ----------
+    cursor : sqlite3.Cursor
+        Cursor de la transacción en curso.
+    id_provincia : int
+        Provincia del centro modificado.
+    centros, presupuesto, gasto, trabajadores, habitaciones
+        Variación de cada total (negativa para restar).
+
+    Returns
+    -------
+    None
+    """
+    cambio = (centros, presupuesto, gasto, trabajadores, habitaciones)
+    if not any(cambio):
+        return
+    cursor.execute(
+        f"INSERT INTO presupuesto_provincias (id_provincia, {', '.join(COLUMNAS)}) VALUES (?, ?, ?, ?, ?, ?) "
+        f"ON CONFLICT(id_provincia) DO UPDATE SET {_SUMAS};",
+        (id_provincia, *cambio)
+    )
+    cursor.execute(
+        f"INSERT INTO presupuesto_comunidades (nombre_comunidad, {', '.join(COLUMNAS)}) "
+        f"SELECT nombre_comunidad, ?, ?, ?, ?, ? FROM provincias WHERE id = ? "
+        f"ON CONFLICT(nombre_comunidad) DO UPDATE SET {_SUMAS};",
+        (*cambio, id_provincia)
+    )
+
+
+def leer_presupuesto_provincia(id_provincia: int) -> Optional[Tuple[int, float, float, int, int]]:
+    """
+    Totales de los centros de una provincia.
+
+    Parameters
+    ----------
+    id_provincia : int
+        Identificador de la provincia.
+
+    Returns
+    -------
+    Optional[Tuple[int, float, float, int, int]]
+        (centros, presupuesto, gasto, trabajadores, habitaciones), o None si
+        la provincia no tiene centros.
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"SELECT {', '.join(COLUMNAS)} FROM presupuesto_provincias WHERE id_provincia = ?;",
+        (id_provincia,)
+    )
+    resultado = cursor.fetchone()
+    conn.close()
+    return resultado
+
+
+def leer_presupuesto_comunidad(nombre_comunidad: str) -> Optional[Tuple[int, float, float, int, int]]:
+    """
+    Totales de los centros de una comunidad.
+
+    Parameters
+    ----------
+    nombre_comunidad : str
+        Nombre de la comunidad autónoma.
+
+    Returns
+    -------
+    Optional[Tuple[int, float, float, int, int]]
+        (centros, presupuesto, gasto, trabajadores, habitaciones), o None si
+        la comunidad no tiene centros.
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"SELECT {', '.join(COLUMNAS)} FROM presupuesto_comunidades WHERE nombre_comunidad = ?;",
+        (nombre_comunidad,)
+    )
+    resultado = cursor.fetchone()
+    conn.close()
+    return resultado
+
+
+def leer_presupuestos_comunidades() -> List[Tuple[str, int, float, float, int, int]]:
+    """
+    Totales de todas las comunidades.
+
+    Returns
+    -------
+    List[Tuple[str, int, float, float, int, int]]
+        Tuplas con campos:
+        (nombre_comunidad, centros, presupuesto, gasto, trabajadores, habitaciones).
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"SELECT nombre_comunidad, {', '.join(COLUMNAS)} FROM presupuesto_comunidades ORDER BY nombre_comunidad;"
+    )
+    resultados = cursor.fetchall()
+    conn.close()
+    return resultados
+
+
+def recalcular_presupuestos(conn: sqlite3.Connection) -> None:
+    """
+    Rehace los totales desde 'centros' y 'pagos_centros' sin hacer commit.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        Conexión (y transacción) en la que recalcular.
+
+    Returns
+    -------
+    None
+    """
+    conn.execute("DELETE FROM presupuesto_comunidades;")
+    conn.execute("DELETE FROM presupuesto_provincias;")
+    conn.execute(_SQL_RECALCULO_PROVINCIAS)
+    conn.execute(_SQL_RECALCULO_COMUNIDADES)
+
+
+def reconciliar_presupuestos(tolerancia: float = 0.005) -> List[Tuple[str, str, str, float, float]]:
+    """
+    Recalcula desde cero todos los totales e informa de los que no cuadraban.
+
+    Sirve como tarea periódica: corrige el redondeo acumulado de los
+    importes y cualquier cambio hecho en 'centros' sin pasar por
+    'tabla_centro'.
+
+    Parameters
+    ----------
+    tolerancia : float, optional
+        Diferencia por debajo de la cual dos importes se consideran iguales.
+
+    Returns
+    -------
+    List[Tuple[str, str, str, float, float]]
+        Diferencias encontradas: (nivel, clave, columna, antes, después),
+        donde nivel es 'provincia' o 'comunidad'.
+    """
+    conn = conectar()
+    try:
+        conn.execute("BEGIN IMMEDIATE;")
+        antes = {
+            'provincia': {str(f[0]): f[1:] for f in conn.execute(
+                f"SELECT id_provincia, {', '.join(COLUMNAS)} FROM presupuesto_provincias;")},
+            'comunidad': {f[0]: f[1:] for f in conn.execute(
+                f"SELECT nombre_comunidad, {', '.join(COLUMNAS)} FROM presupuesto_comunidades;")},
+        }
+        recalcular_presupuestos(conn)
+        despues = {
+            'provincia': {str(f[0]): f[1:] for f in conn.execute(
+                f"SELECT id_provincia, {', '.join(COLUMNAS)} FROM presupuesto_provincias;")},
+            'comunidad': {f[0]: f[1:] for f in conn.execute(
+                f"SELECT nombre_comunidad, {', '.join(COLUMNAS)} FROM presupuesto_comunidades;")},
+        }
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    diferencias = []
+    ceros = (0,) * len(COLUMNAS)
+    for nivel in ('provincia', 'comunidad'):
+        for clave in sorted(antes[nivel].keys() | despues[nivel].keys()):
+            viejo = antes[nivel].get(clave, ceros)
+            nuevo = despues[nivel].get(clave, ceros)
+            for columna, a, b in zip(COLUMNAS, viejo, nuevo):
+                if abs(a - b) > tolerancia:
+                    diferencias.append((nivel, clave, columna, a, b))
+    return diferencias
+
+if __name__ == '__main__':
+    crear_tabla_presupuestos()
+    for nivel, clave, columna, antes, despues in reconciliar_presupuestos():
+        print(f"{nivel} {clave}: {columna} {antes} -> {despues}")
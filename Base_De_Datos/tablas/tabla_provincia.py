@@ -1,9 +1,10 @@
 import sqlite3
-import os
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+from Base_De_Datos.tablas.conexion import RUTA_BD, abrir_conexion
+from Base_De_Datos.tablas.tabla_presupuesto import aplicar_cambio_presupuesto, crear_tabla_presupuestos
 
-# Base de datos en la misma carpeta que este script
-_db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bdd.db')
+# Base de datos compartida (ver conexion.py)
+_db_path = RUTA_BD
 
 def conectar() -> sqlite3.Connection:
     """
@@ -14,8 +15,7 @@ def conectar() -> sqlite3.Connection:
     sqlite3.Connection
         Conexión activa al archivo de base de datos.
     """
-    conn = sqlite3.connect(_db_path)
-    conn.execute("PRAGMA foreign_keys = ON;")
+    conn = abrir_conexion(_db_path)
     return conn
 
 
@@ -51,6 +51,7 @@ def crear_tabla_provincias() -> None:
     )
     conn.commit()
     conn.close()
+    crear_tabla_presupuestos()
 
 
 def insertar_provincia(
@@ -113,10 +114,39 @@ def leer_provincias() -> List[Tuple[int, str, str, float]]:
     return resultados
 
 
+def leer_provincia(id_provincia: int) -> Optional[Tuple[int, str, str, float]]:
+    """
+    Recupera una provincia por su identificador.
+
+    Parameters
+    ----------
+    id_provincia : int
+        Identificador de la provincia.
+
+    Returns
+    -------
+    Optional[Tuple[int, str, str, float]]
+        (id, nombre_comunidad, nombre_provincia, presupuesto), o None si no existe.
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT id, nombre_comunidad, nombre_provincia, presupuesto FROM provincias WHERE id = ?;",
+        (id_provincia,)
+    )
+    resultado = cursor.fetchone()
+    conn.close()
+    return resultado
+
+
 def eliminar_provincia(nombre_provincia: str) -> None:
     """
     Elimina una provincia de la base de datos por su nombre.
 
+    Sus totales se descuentan de la comunidad en la misma transacción, que
+    reserva la escritura antes de leerlos (BEGIN IMMEDIATE): un centro dado
+    de alta o de baja a la vez no deja la comunidad descuadrada.
+
     Parameters
     ----------
     nombre_provincia : str
@@ -128,12 +158,29 @@ def eliminar_provincia(nombre_provincia: str) -> None:
     """
     conn = conectar()
     cursor = conn.cursor()
-    cursor.execute(
-        "DELETE FROM provincias WHERE nombre_provincia = ?;",
-        (nombre_provincia,)
-    )
-    conn.commit()
-    conn.close()
+    try:
+        conn.execute("BEGIN IMMEDIATE;")
+        # Sus centros se borran en cascada: se descuentan de los totales de la comunidad
+        cursor.execute(
+            "SELECT p.id, pp.centros, pp.presupuesto, pp.gasto, pp.trabajadores, pp.habitaciones "
+            "FROM provincias p JOIN presupuesto_provincias pp ON pp.id_provincia = p.id "
+            "WHERE p.nombre_provincia = ?;",
+            (nombre_provincia,)
+        )
+        totales = cursor.fetchone()
+        if totales is not None:
+            id_provincia, *cantidades = totales
+            aplicar_cambio_presupuesto(cursor, id_provincia, *(-c for c in cantidades))
+        cursor.execute(
+            "DELETE FROM provincias WHERE nombre_provincia = ?;",
+            (nombre_provincia,)
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,193 @@
+"""
+Progreso del trabajo de recordatorios de citas.
+
+Cada cita que procesa ``recordatorios.py`` queda anotada en
+'recordatorios_citas', en la misma transacción que los correos de su lote:
+si el trabajo se interrumpe, la siguiente ejecución salta las citas ya
+anotadas y sigue con el resto, y una cita pedida después de una ejecución
+recibe su recordatorio en la siguiente. Ningún paciente recibe el
+recordatorio dos veces ni se queda sin él.
+
+'recordatorios_ejecuciones' acumula por día las citas, correos y lotes
+procesados y la última cita de la última ejecución (solo informativo).
+"""
+
+import sqlite3
+import time
+from typing import Iterable, Optional, Sequence, Tuple
+from Base_De_Datos.tablas.conexion import RUTA_BD, abrir_conexion
+from Base_De_Datos.tablas.tabla_correo import insertar_correos
+
+# Base de datos compartida (ver conexion.py)
+db_path = RUTA_BD
+
+
+def conectar() -> sqlite3.Connection:
+    """
+    Establece una conexión con la base de datos SQLite.
+
+    Returns
+    -------
+    sqlite3.Connection
+        Conexión activa al archivo de base de datos.
+    """
+    conn = abrir_conexion(db_path)
+    return conn
+
+
+def crear_tabla_recordatorios() -> None:
+    """
+    Crea las tablas 'recordatorios_citas' y 'recordatorios_ejecuciones' si no existen.
+
+    'recordatorios_citas' tiene una fila por cita ya procesada:
+    - id_cita : TEXT PRIMARY KEY, cita recordada
+    - dia     : TEXT NOT NULL, día de la cita (YYYY-MM-DD)
+    - encolado: REAL NOT NULL, cuándo se procesó (segundos desde epoch)
+
+    'recordatorios_ejecuciones' tiene una fila por día:
+    - dia           : TEXT PRIMARY KEY, día de las citas recordadas (YYYY-MM-DD)
+    - ultimo_inicio : TEXT NOT NULL, 'inicio' de la última cita procesada
+    - ultima_cita   : TEXT NOT NULL, id_cita de la última cita procesada
+    - citas         : INTEGER NOT NULL, citas procesadas
+    - correos       : INTEGER NOT NULL, recordatorios encolados
+    - lotes         : INTEGER NOT NULL, lotes guardados
+    - completada    : INTEGER NOT NULL, 1 cuando alguna ejecución ha recorrido el día entero
+    - actualizada   : REAL NOT NULL, último cambio (segundos desde epoch)
+
+    Returns
+    -------
+    None
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute(
+        '''
+        CREATE TABLE IF NOT EXISTS recordatorios_citas (
+            id_cita TEXT PRIMARY KEY,
+            dia TEXT NOT NULL,
+            encolado REAL NOT NULL
+        );
+        '''
+    )
+    cursor.execute(
+        '''
+        CREATE TABLE IF NOT EXISTS recordatorios_ejecuciones (
+            dia TEXT PRIMARY KEY,
+            ultimo_inicio TEXT NOT NULL DEFAULT '',
+            ultima_cita TEXT NOT NULL DEFAULT '',
+            citas INTEGER NOT NULL DEFAULT 0,
+            correos INTEGER NOT NULL DEFAULT 0,
+            lotes INTEGER NOT NULL DEFAULT 0,
+            completada INTEGER NOT NULL DEFAULT 0,
+            actualizada REAL NOT NULL
+        );
+        '''
+    )
+    conn.commit()
+    conn.close()
+
+
+def leer_ejecucion(dia: str) -> Optional[Tuple[str, str, str, int, int, int, int, float]]:
+    """
+    Recupera el progreso del trabajo para un día.
+
+    Parameters
+    ----------
+    dia : str
+        Día de las citas (YYYY-MM-DD).
+
+    Returns
+    -------
+    Optional[Tuple[str, str, str, int, int, int, int, float]]
+        (dia, ultimo_inicio, ultima_cita, citas, correos, lotes, completada,
+        actualizada), o None si no se ha ejecutado nunca para ese día.
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT dia, ultimo_inicio, ultima_cita, citas, correos, lotes, completada, actualizada "
+        "FROM recordatorios_ejecuciones WHERE dia = ?;",
+        (dia,)
+    )
+    resultado = cursor.fetchone()
+    conn.close()
+    return resultado
+
+
+def guardar_lote_recordatorios(
+    dia: str,
+    ultimo: Tuple[str, str],
+    citas: Sequence[str],
+    correos: Iterable[Tuple[str, Tuple[str, str, str, Optional[str]]]]
+) -> int:
+    """
+    Anota las citas de un lote y encola sus correos, en una transacción.
+
+    Las citas que otra ejecución ya había anotado se saltan, con su correo.
+
+    Parameters
+    ----------
+    dia : str
+        Día de las citas (YYYY-MM-DD).
+    ultimo : Tuple[str, str]
+        (inicio, id_cita) de la última cita del lote.
+    citas : Sequence[str]
+        id_cita de las citas del lote.
+    correos : Iterable[Tuple[str, Tuple[str, str, str, Optional[str]]]]
+        (id_cita, recordatorio) con el recordatorio como (destinatario, asunto, cuerpo,
+        remitente) para la bandeja de salida.
+
+    Returns
+    -------
+    int
+        Correos encolados.
+    """
+    conn = conectar()
+    try:
+        conn.execute("BEGIN IMMEDIATE;")
+        ahora = time.time()
+        nuevas = {id_cita for id_cita in citas if conn.execute(
+            "INSERT OR IGNORE INTO recordatorios_citas (id_cita, dia, encolado) VALUES (?, ?, ?);",
+            (id_cita, dia, ahora)).rowcount}
+        encolados = insertar_correos(conn, (correo for id_cita, correo in correos if id_cita in nuevas))
+        conn.execute(
+            "INSERT INTO recordatorios_ejecuciones (dia, ultimo_inicio, ultima_cita, citas, correos, lotes, "
+            "actualizada) VALUES (?, ?, ?, ?, ?, 1, ?) "
+            "ON CONFLICT(dia) DO UPDATE SET ultimo_inicio = excluded.ultimo_inicio, "
+            "ultima_cita = excluded.ultima_cita, citas = citas + excluded.citas, "
+            "correos = correos + excluded.correos, lotes = lotes + 1, actualizada = excluded.actualizada;",
+            (dia, *ultimo, len(nuevas), encolados, ahora)
+        )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return encolados
+
+
+def marcar_ejecucion_completada(dia: str) -> None:
+    """
+    Marca que la ejecución del trabajo ha recorrido todas las citas del día.
+
+    Parameters
+    ----------
+    dia : str
+        Día de las citas (YYYY-MM-DD).
+
+    Returns
+    -------
+    None
+    """
+    conn = conectar()
+    conn.execute(
+        "INSERT INTO recordatorios_ejecuciones (dia, completada, actualizada) VALUES (?, 1, ?) "
+        "ON CONFLICT(dia) DO UPDATE SET completada = 1, actualizada = excluded.actualizada;",
+        (dia, time.time())
+    )
+    conn.commit()
+    conn.close()
+
+if __name__ == '__main__':
+    crear_tabla_recordatorios()
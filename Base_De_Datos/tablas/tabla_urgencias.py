@@ -0,0 +1,259 @@
+"""
+Cola de triaje de urgencias.
+
+Cada cita de urgencias ('citas' con tipo_cita = 'urgencias') que espera
+ser atendida tiene una fila en 'triaje_urgencias' con su prioridad numérica
+y su hora de llegada. La cola en memoria de ``triaje.py`` se reconstruye
+desde aquí tras un reinicio y se sincroniza con los cambios de otros
+procesos a través de la columna 'modificado'.
+"""
+
+import sqlite3
+import time
+from typing import List, Optional, Tuple
+from Base_De_Datos.tablas.conexion import RUTA_BD, abrir_conexion
+
+# Base de datos compartida (ver conexion.py)
+db_path = RUTA_BD
+
+_COLUMNAS = "t.id_cita, t.prioridad, t.llegada, t.estado, t.modificado, c.paciente_id, c.motivo"
+
+
+def conectar() -> sqlite3.Connection:
+    """
+    Establece una conexión con la base de datos SQLite.
+
+    Returns
+    -------
+    sqlite3.Connection
+        Conexión activa al archivo de base de datos.
+    """
+    conn = abrir_conexion(db_path)
+    return conn
+
+
+def crear_tabla_triaje() -> None:
+    """
+    Crea la tabla 'triaje_urgencias' si no existe.
+
+    La tabla contiene los siguientes campos:
+    - id_cita    : TEXT PRIMARY KEY, cita de urgencias de 'citas'
+    - prioridad  : INTEGER NOT NULL, 1 (alta) a 3 (baja)
+    - llegada    : REAL NOT NULL, hora de llegada (segundos desde epoch)
+    - estado     : TEXT NOT NULL, 'en_espera', 'atendida' o 'cancelada'
+    - medico     : TEXT, quien la sacó de la cola
+    - atendida   : REAL, hora en que salió de la cola
+    - modificado : REAL NOT NULL, hora del último cambio (para sincronizar procesos)
+
+    Returns
+    -------
+    None
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.executescript(
+        '''
+        CREATE TABLE IF NOT EXISTS triaje_urgencias (
+            id_cita TEXT PRIMARY KEY,
+            prioridad INTEGER NOT NULL CHECK(prioridad BETWEEN 1 AND 3),
+            llegada REAL NOT NULL,
+            estado TEXT NOT NULL DEFAULT 'en_espera' CHECK(estado IN ('en_espera','atendida','cancelada')),
+            medico TEXT,
+            atendida REAL,
+            modificado REAL NOT NULL,
+            FOREIGN KEY (id_cita) REFERENCES citas(id_cita) ON DELETE CASCADE
+        );
+        CREATE INDEX IF NOT EXISTS idx_triaje_en_espera ON triaje_urgencias (llegada) WHERE estado = 'en_espera';
+        CREATE INDEX IF NOT EXISTS idx_triaje_modificado ON triaje_urgencias (modificado);
+        '''
+    )
+    conn.commit()
+    conn.close()
+
+
+def insertar_urgencia(
+    id_cita: str,
+    paciente_id: str,
+    prioridad: int,
+    nivel_prioridad: str,
+    llegada: float,
+    motivo: str = ''
+) -> None:
+    """
+    Registra la cita de urgencias y la pone en la cola, en una transacción.
+
+    Parameters
+    ----------
+    id_cita : str
+        Identificador de la nueva cita.
+    paciente_id : str
+        Paciente que llega a urgencias.
+    prioridad : int
+        Prioridad numérica (1 alta, 3 baja).
+    nivel_prioridad : str
+        Nivel tal como se guarda en 'citas'.
+    llegada : float
+        Hora de llegada (segundos desde epoch).
+    motivo : str, optional
+        Motivo de la consulta.
+
+    Raises
+    ------
+    ValueError
+        Si la cita ya existe o el paciente no existe.
+
+    Returns
+    -------
+    None
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "INSERT INTO citas (id_cita, paciente_id, fecha_hora, tipo_cita, motivo, nivel_prioridad) "
+            "VALUES (?, ?, strftime('%Y-%m-%dT%H:%M:%S', ?, 'unixepoch', 'localtime'), 'urgencias', ?, ?);",
+            (id_cita, paciente_id, llegada, motivo, nivel_prioridad)
+        )
+        cursor.execute(
+            "INSERT INTO triaje_urgencias (id_cita, prioridad, llegada, modificado) VALUES (?, ?, ?, ?);",
+            (id_cita, prioridad, llegada, time.time())
+        )
+        conn.commit()
+    except sqlite3.IntegrityError as e:
+        conn.rollback()
+        raise ValueError(f"Error de integridad al registrar la urgencia: {e}")
+    finally:
+        conn.close()
+
+
+def reclamar_urgencia(id_cita: str, medico: Optional[str]) -> bool:
+    """
+    Saca una cita de la cola si sigue en espera (atómico entre procesos).
+
+    La cita queda 'completado' en 'citas' en la misma transacción (requiere
+    la columna 'estado', ver ``tabla_citas.crear_tabla_agenda``).
+
+    Parameters
+    ----------
+    id_cita : str
+        Cita a atender.
+    medico : str, optional
+        Médico que la atiende; se guarda también en 'citas.medico_asignado'.
+
+    Returns
+    -------
+    bool
+        True si la cita estaba en espera y ahora es de este médico.
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    ahora = time.time()
+    cursor.execute(
+        "UPDATE triaje_urgencias SET estado = 'atendida', medico = ?, atendida = ?, modificado = ? "
+        "WHERE id_cita = ? AND estado = 'en_espera';",
+        (medico, ahora, ahora, id_cita)
+    )
+    reclamada = cursor.rowcount > 0
+    if reclamada:
+        cursor.execute(
+            "UPDATE citas SET estado = 'completado', medico_asignado = COALESCE(?, medico_asignado) "
+            "WHERE id_cita = ?;",
+            (medico, id_cita)
+        )
+    conn.commit()
+    conn.close()
+    return reclamada
+
+
+def actualizar_urgencia(id_cita: str, prioridad: Optional[int] = None, nivel_prioridad: Optional[str] = None,
+                        estado: Optional[str] = None) -> bool:
+    """
+    Cambia la prioridad o el estado de una cita que sigue en espera.
+
+    Parameters
+    ----------
+    id_cita : str
+        Cita de urgencias.
+    prioridad : int, optional
+        Nueva prioridad numérica.
+    nivel_prioridad : str, optional
+        Nuevo nivel, tal como se guarda en 'citas'.
+    estado : str, optional
+        Nuevo estado ('cancelada' para sacarla de la cola).
+
+    Returns
+    -------
+    bool
+        True si la cita estaba en espera.
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "UPDATE triaje_urgencias SET prioridad = COALESCE(?, prioridad), estado = COALESCE(?, estado), "
+            "modificado = ? WHERE id_cita = ? AND estado = 'en_espera';",
+            (prioridad, estado, time.time(), id_cita)
+        )
+        actualizada = cursor.rowcount > 0
+        if actualizada and nivel_prioridad is not None:
+            cursor.execute("UPDATE citas SET nivel_prioridad = ? WHERE id_cita = ?;", (nivel_prioridad, id_cita))
+        if actualizada and estado == 'cancelada':
+            cursor.execute("UPDATE citas SET estado = 'cancelado' WHERE id_cita = ?;", (id_cita,))
+        conn.commit()
+    except sqlite3.IntegrityError as e:
+        conn.rollback()
+        raise ValueError(f"Error de integridad al actualizar la urgencia: {e}")
+    finally:
+        conn.close()
+    return actualizada
+
+
+def leer_urgencias_en_espera() -> List[Tuple[str, int, float, str, float, str, str]]:
+    """
+    Recupera la cola entera (para reconstruirla tras un reinicio).
+
+    Returns
+    -------
+    List[Tuple[str, int, float, str, float, str, str]]
+        Tuplas con campos:
+        (id_cita, prioridad, llegada, estado, modificado, paciente_id, motivo).
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"SELECT {_COLUMNAS} FROM triaje_urgencias t JOIN citas c ON c.id_cita = t.id_cita "
+        "WHERE t.estado = 'en_espera';"
+    )
+    resultados = cursor.fetchall()
+    conn.close()
+    return resultados
+
+
+def leer_urgencias_modificadas(desde: float) -> List[Tuple[str, int, float, str, float, str, str]]:
+    """
+    Recupera las filas de la cola cambiadas desde un instante, en cualquier estado.
+
+    Parameters
+    ----------
+    desde : float
+        Instante (segundos desde epoch) a partir del cual buscar.
+
+    Returns
+    -------
+    List[Tuple[str, int, float, str, float, str, str]]
+        Tuplas con campos:
+        (id_cita, prioridad, llegada, estado, modificado, paciente_id, motivo).
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"SELECT {_COLUMNAS} FROM triaje_urgencias t JOIN citas c ON c.id_cita = t.id_cita "
+        "WHERE t.modificado >= ?;",
+        (desde,)
+    )
+    resultados = cursor.fetchall()
+    conn.close()
+    return resultados
+
+if __name__ == '__main__':
+    crear_tabla_triaje()
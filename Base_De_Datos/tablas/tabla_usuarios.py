@@ -0,0 +1,278 @@
+"""
+Directorio de usuarios de todos los roles.
+
+'usuarios' guarda una fila por cuenta (username, rol, id de la entidad y
+hash de la contraseña), con el username como clave primaria: autenticar a
+cualquier rol es una sola búsqueda por índice.
+
+- Pacientes, médicos y enfermeros guardan su contraseña en su propia
+  tabla; unos disparadores copian al directorio cada alta, cambio de
+  username o contraseña y baja, la haga quien la haga (altas, registros,
+  altas masivas, funciones tabla_*, el ORM u otro proceso).
+- Auxiliares, secretarios y paramédicos no tienen contraseña en su tabla:
+  su cuenta se crea con ``insertar_usuario`` (``POST /usuarios``) y se
+  borra sola con su baja.
+
+Como el username es único en el directorio, un mismo username no puede
+tener cuentas en dos roles. Si al migrar una base de datos antigua un
+username está en dos tablas, solo se copia la primera cuenta (por el orden
+de ``ROLES_CON_CLAVE``); las demás no pueden iniciar sesión hasta que se
+les cambie el username. Se avisa de cada una en el log y en ``python
+tabla_usuarios.py``, que termina con código 1 mientras quede alguna.
+"""
+
+import logging
+import sqlite3
+from typing import List, Optional, Tuple
+from Base_De_Datos.tablas.conexion import RUTA_BD, abrir_conexion
+
+# Base de datos compartida (ver conexion.py)
+db_path = RUTA_BD
+
+# Roles cuya tabla tiene username y password (el directorio los copia)
+ROLES_CON_CLAVE = {'paciente': 'pacientes', 'medico': 'medicos', 'enfermero': 'enfermeros'}
+
+# Roles cuya cuenta solo está en el directorio
+ROLES_SIN_CLAVE = {'auxiliar': 'auxiliares', 'secretario': 'secretarios', 'paramedico': 'paramedicos'}
+
+ROLES = {**ROLES_CON_CLAVE, **ROLES_SIN_CLAVE}
+
+logger = logging.getLogger(__name__)
+
+
+def conectar() -> sqlite3.Connection:
+    """
+    Establece una conexión con la base de datos SQLite.
+
+    Returns
+    -------
+    sqlite3.Connection
+        Conexión activa al archivo de base de datos.
+    """
+    conn = abrir_conexion(db_path)
+    return conn
+
+
+def crear_tabla_usuarios(conn: Optional[sqlite3.Connection] = None) -> None:
+    """
+    Crea la tabla 'usuarios' y los disparadores que la mantienen al día.
+
+    La tabla contiene los siguientes campos:
+    - username   : TEXT PRIMARY KEY, nombre de usuario (único entre todos los roles)
+    - rol        : TEXT NOT NULL, una de las claves de ``ROLES``
+    - id_entidad : TEXT NOT NULL, id del paciente, médico... (único por rol)
+    - password   : TEXT NOT NULL, hash de la contraseña (ver credenciales.py)
+
+    La primera vez (sin disparadores aún) copia también las cuentas que ya
+    existen, en la misma transacción (ver ``migrar_usuarios``), y avisa en
+    el log de las que no se han podido copiar. Los
+    disparadores de las tablas que todavía no existen se crean en una
+    llamada posterior.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection, optional
+        Conexión ya abierta a usar (no se confirma ni se cierra); por defecto se abre una.
+
+    Returns
+    -------
+    None
+    """
+    propia = conn is None
+    if propia:
+        conn = conectar()
+        # Inmediata: dos procesos que arrancan a la vez no migran dos veces
+        conn.execute("BEGIN IMMEDIATE;")
+    cursor = conn.cursor()
+    cursor.execute(
+        '''
+        CREATE TABLE IF NOT EXISTS usuarios (
+            username TEXT PRIMARY KEY,
+            rol TEXT NOT NULL,
+            id_entidad TEXT NOT NULL,
+            password TEXT NOT NULL,
+            UNIQUE (rol, id_entidad)
+        );
+        '''
+    )
+    existentes = {fila[0] for fila in cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger');"
+    )}
+    migrar = 'pacientes_usuarios_insert' not in existentes
+    for rol, tabla in ROLES.items():
+        if tabla not in existentes:
+            continue
+        if rol in ROLES_CON_CLAVE:
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {tabla}_usuarios_insert AFTER INSERT ON {tabla} "
+                f"BEGIN INSERT INTO usuarios (username, rol, id_entidad, password) "
+                f"VALUES (NEW.username, '{rol}', NEW.id, NEW.password); END;"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {tabla}_usuarios_update "
+                f"AFTER UPDATE OF id, username, password ON {tabla} "
+                f"BEGIN UPDATE usuarios SET username = NEW.username, id_entidad = NEW.id, password = NEW.password "
+                f"WHERE rol = '{rol}' AND id_entidad = OLD.id; END;"
+            )
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {tabla}_usuarios_delete AFTER DELETE ON {tabla} "
+            f"BEGIN DELETE FROM usuarios WHERE rol = '{rol}' AND id_entidad = OLD.id; END;"
+        )
+    if migrar:
+        for username, rol, id_entidad in migrar_usuarios(conn)[1]:
+            logger.warning("Cuenta sin migrar: el username %r ya tiene otro rol en el directorio; %s %s no podrá "
+                           "iniciar sesión hasta que se le cambie el username", username, rol, id_entidad)
+    cursor.close()
+    if propia:
+        conn.commit()
+        conn.close()
+
+
+def migrar_usuarios(conn: Optional[sqlite3.Connection] = None) -> Tuple[int, List[Tuple[str, str, str]]]:
+    """
+    Copia al directorio las cuentas de pacientes, médicos y enfermeros que aún no están.
+
+    Se puede repetir sin efecto. Una cuenta cuyo username ya tiene otro rol
+    en el directorio no se copia y se devuelve como conflicto.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection, optional
+        Conexión ya abierta a usar (no se confirma ni se cierra); por defecto se abre una.
+
+    Returns
+    -------
+    Tuple[int, List[Tuple[str, str, str]]]
+        Cuentas copiadas y (username, rol, id) de las que están en conflicto.
+    """
+    propia = conn is None
+    if propia:
+        conn = conectar()
+    cursor = conn.cursor()
+    existentes = {fila[0] for fila in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table';")}
+    copiadas = 0
+    conflictos: List[Tuple[str, str, str]] = []
+    for rol, tabla in ROLES_CON_CLAVE.items():
+        if tabla not in existentes:
+            continue
+        cursor.execute(
+            f"INSERT OR IGNORE INTO usuarios (username, rol, id_entidad, password) "
+            f"SELECT username, '{rol}', id, password FROM {tabla};"
+        )
+        copiadas += cursor.rowcount
+        cursor.execute(
+            f"SELECT t.username, '{rol}', t.id FROM {tabla} t WHERE NOT EXISTS "
+            f"(SELECT 1 FROM usuarios u WHERE u.rol = '{rol}' AND u.id_entidad = t.id);"
+        )
+        conflictos.extend(cursor.fetchall())
+    cursor.close()
+    if propia:
+        conn.commit()
+        conn.close()
+    return copiadas, conflictos
+
+
+def leer_usuario(username: str) -> Optional[Tuple[str, str, str]]:
+    """
+    Cuenta de un username.
+
+    Parameters
+    ----------
+    username : str
+        Nombre de usuario.
+
+    Returns
+    -------
+    Optional[Tuple[str, str, str]]
+        (rol, id_entidad, password), o None si no existe.
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute("SELECT rol, id_entidad, password FROM usuarios WHERE username = ?;", (username,))
+    fila = cursor.fetchone()
+    conn.close()
+    return fila
+
+
+def insertar_usuario(username: str, rol: str, id_entidad: str, password_hash: str) -> None:
+    """
+    Crea la cuenta de un auxiliar, secretario o paramédico.
+
+    Parameters
+    ----------
+    username : str
+        Nombre de usuario (único entre todos los roles).
+    rol : str
+        Una de las claves de ``ROLES_SIN_CLAVE``.
+    id_entidad : str
+        Id del auxiliar, secretario o paramédico; debe existir.
+    password_hash : str
+        Hash de la contraseña (``servicio_hash.cifrar``).
+
+    Returns
+    -------
+    None
+
+    Raises
+    ------
+    ValueError
+        Si el rol guarda la contraseña en su tabla o no existe, o la entidad no existe.
+    sqlite3.IntegrityError
+        Si el username ya existe o la entidad ya tiene cuenta.
+    """
+    if rol in ROLES_CON_CLAVE:
+        raise ValueError(f"Las cuentas de '{rol}' se crean con su alta o su registro.")
+    if rol not in ROLES_SIN_CLAVE:
+        raise ValueError(f"Rol no reconocido: {rol}")
+    conn = conectar()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"INSERT INTO usuarios (username, rol, id_entidad, password) "
+            f"SELECT ?, ?, id, ? FROM {ROLES_SIN_CLAVE[rol]} WHERE id = ?;",
+            (username, rol, password_hash, id_entidad)
+        )
+        if not cursor.rowcount:
+            raise ValueError(f"No existe ningún {rol} con id '{id_entidad}'.")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def eliminar_usuario(username: str) -> bool:
+    """
+    Borra la cuenta de un auxiliar, secretario o paramédico.
+
+    Las de pacientes, médicos y enfermeros se borran con su baja.
+
+    Parameters
+    ----------
+    username : str
+        Nombre de usuario.
+
+    Returns
+    -------
+    bool
+        True si existía y se ha borrado.
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"DELETE FROM usuarios WHERE username = ? AND rol IN ({', '.join('?' * len(ROLES_SIN_CLAVE))});",
+        (username, *ROLES_SIN_CLAVE)
+    )
+    borrada = cursor.rowcount > 0
+    conn.commit()
+    conn.close()
+    return borrada
+
+
+if __name__ == '__main__':
+    crear_tabla_usuarios()
+    copiadas, conflictos = migrar_usuarios()
+    print(f"Cuentas copiadas al directorio: {copiadas}")
+    for username, rol, id_entidad in conflictos:
+        print(f"  Sin copiar (el username ya tiene otro rol): {username} ({rol} {id_entidad})")
+    if conflictos:
+        print(f"{len(conflictos)} cuenta(s) no pueden iniciar sesión hasta que se les cambie el username.")
+        raise SystemExit(1)
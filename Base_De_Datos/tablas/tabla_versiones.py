@@ -0,0 +1,121 @@
+"""
+Contadores de cambios por tabla.
+
+'versiones_tablas' guarda, para cada tabla vigilada, cuántas veces ha
+cambiado y cuándo fue el último cambio. Los mantienen disparadores sobre
+la propia tabla (uno por INSERT, UPDATE y DELETE), así que cuentan
+cualquier escritura: rutas de APIS.py, funciones tabla_*, el ORM u otro
+proceso. Leerlos es una consulta por clave primaria a una tabla de pocas
+filas; con ellos se calculan los ETag de las respuestas de solo lectura
+(ver ``cache_respuestas.py``).
+"""
+
+import sqlite3
+from typing import Dict, Iterable, Optional, Tuple
+from Base_De_Datos.tablas.conexion import RUTA_BD, abrir_conexion
+
+# Base de datos compartida (ver conexion.py)
+db_path = RUTA_BD
+
+# Segundos desde epoch con decimales, en SQL
+_SQL_AHORA = "(julianday('now') - 2440587.5) * 86400.0"
+
+
+def conectar() -> sqlite3.Connection:
+    """
+    Establece una conexión con la base de datos SQLite.
+
+    Returns
+    -------
+    sqlite3.Connection
+        Conexión activa al archivo de base de datos.
+    """
+    conn = abrir_conexion(db_path)
+    return conn
+
+
+def crear_tabla_versiones(tablas: Iterable[str]) -> None:
+    """
+    Crea 'versiones_tablas' y los disparadores que cuentan los cambios de ``tablas``.
+
+    La tabla contiene los siguientes campos:
+    - tabla      : TEXT PRIMARY KEY, nombre de la tabla vigilada
+    - version    : INTEGER NOT NULL, cambios (filas insertadas, modificadas o borradas)
+    - modificada : REAL NOT NULL, último cambio (segundos desde epoch)
+
+    Las tablas que no existen en la base de datos se ignoran.
+
+    Parameters
+    ----------
+    tablas : Iterable[str]
+        Nombres de las tablas a vigilar.
+
+    Returns
+    -------
+    None
+    """
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute(
+        '''
+        CREATE TABLE IF NOT EXISTS versiones_tablas (
+            tabla TEXT PRIMARY KEY,
+            version INTEGER NOT NULL,
+            modificada REAL NOT NULL
+        ) WITHOUT ROWID;
+        '''
+    )
+    existentes = {fila[0] for fila in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table';")}
+    for tabla in tablas:
+        if tabla not in existentes:
+            continue
+        for evento in ('INSERT', 'UPDATE', 'DELETE'):
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {tabla}_version_{evento.lower()} AFTER {evento} ON {tabla} "
+                f"BEGIN INSERT INTO versiones_tablas (tabla, version, modificada) VALUES ('{tabla}', 1, {_SQL_AHORA}) "
+                f"ON CONFLICT (tabla) DO UPDATE SET version = version + 1, modificada = excluded.modificada; END;"
+            )
+    conn.commit()
+    conn.close()
+
+
+def leer_versiones(tablas: Iterable[str],
+                   conn: Optional[sqlite3.Connection] = None) -> Dict[str, Tuple[int, Optional[float]]]:
+    """
+    Contadores de cambios de varias tablas, leídos a la vez.
+
+    Parameters
+    ----------
+    tablas : Iterable[str]
+        Nombres de las tablas.
+    conn : sqlite3.Connection, optional
+        Conexión ya abierta a usar (no se cierra); por defecto se abre una.
+
+    Returns
+    -------
+    Dict[str, Tuple[int, Optional[float]]]
+        Por tabla, (version, modificada); (0, None) si no ha cambiado desde
+        que se crearon sus disparadores.
+    """
+    tablas = list(tablas)
+    versiones: Dict[str, Tuple[int, Optional[float]]] = {tabla: (0, None) for tabla in tablas}
+    if not tablas:
+        return versiones
+    propia = conn is None
+    if propia:
+        conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"SELECT tabla, version, modificada FROM versiones_tablas WHERE tabla IN ({', '.join('?' * len(tablas))});",
+        tablas
+    )
+    for tabla, version, modificada in cursor.fetchall():
+        versiones[tabla] = (version, modificada)
+    cursor.close()
+    if propia:
+        conn.close()
+    return versiones
+
+
+if __name__ == '__main__':
+    crear_tabla_versiones(('medicos', 'enfermeros', 'habitaciones', 'sips'))
@@ -132,6 +132,8 @@ class Centro(Provincia):
     def pagos(self, pago: float) -> None:
         """
         Realiza un pago que ajusta el presupuesto del centro. La operación no puede dejar el presupuesto en negativo.
+        Si el centro está guardado en la base de datos (tiene id_provincia), el pago se aplica con
+        `tabla_centro.registrar_pago`, que ajusta también el gasto y los totales de la provincia y la comunidad.
 
         Parámetros
         ----------
@@ -143,6 +145,10 @@ class Centro(Provincia):
         ValueError
             Si el pago deja el presupuesto en negativo.
         """
+        if self.id_provincia is not None:
+            from Base_De_Datos.tablas.tabla_centro import registrar_pago
+            self.presupuesto = registrar_pago(self.id_centro, pago)
+            return
         if self.presupuesto + pago < 0:
             raise ValueError('No se admiten presupuestos negativos')
         self.presupuesto += pago
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
+from typing import Union
 from Clases_Base_de_datos.paciente import Paciente
 
 class Cita(ABC):
@@ -35,7 +36,7 @@ class Cita(ABC):
     ser_atendido(self)
         Marca la cita como atendida y cambia su estado a 'completado'.
     """
-    def __init__(self, id_cita: str, paciente: Paciente, medico: str, fecha_hora: str, motivo: str = '',  estado: str='pendiente', atendido: bool=False) -> None:
+    def __init__(self, id_cita: str, paciente: Paciente, medico: str, fecha_hora: Union[str, datetime], motivo: str = '',  estado: str='pendiente', atendido: bool=False) -> None:
         """
         Inicializa una nueva cita médica con el ID, paciente, médico, fecha_hora, estado y si ha sido atendida o no.
 
@@ -47,8 +48,9 @@ class Cita(ABC):
             Nombre del paciente.
         medico : str
             Nombre del médico asignado.
-        fecha_hora : str
-            Fecha y hora en la que se llevará a cabo la cita.
+        fecha_hora : str o datetime
+            Fecha y hora en la que se llevará a cabo la cita: un datetime,
+            ISO ('2025-06-01T10:30:00') o '2025 06 01 10:30'.
         estado : str, opcional
             Estado de la cita, por defecto 'pendiente'.
         atendido : bool, opcional
@@ -58,7 +60,9 @@ class Cita(ABC):
         self.paciente = paciente
         self.medico = medico
         self.motivo = motivo
-        self.fecha_hora_dt = datetime.strptime(fecha_hora, '%Y %m %d %H:%M')
+        from Base_De_Datos.tablas.tabla_citas import interpretar_fecha_hora
+
+        self.fecha_hora_dt = interpretar_fecha_hora(fecha_hora)
         self.estado = estado
         self.atendido = atendido
 
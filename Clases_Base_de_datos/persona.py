@@ -1,4 +1,4 @@
-import bcrypt as bcrypt
+import credenciales
 
 class Persona:
     """
@@ -32,6 +32,9 @@ class Persona:
         genero (str): Género de la persona.
         rol (str): Rol o puesto que ocupa la persona (por ejemplo, 'paciente', 'médico').
         password (str): Contraseña de la persona. Se guardará como hash.
+
+        Excepciones:
+        servicio_hash.ServicioSaturado: Si la cola de cifrado está llena.
         """
 
         self.id = id
@@ -39,7 +42,10 @@ class Persona:
         self._apellido = apellido
         self.edad = edad
         self._genero = genero
-        self.__password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()) # Convierte la contraseña en bytes, genera un salt y la hashea con bcrypt para guardarla de forma segura
+        # Se hashea con el método actual (ver credenciales.py) en el servicio de cifrado: en el propio hilo,
+        # salvo en el servidor, que lo pasa a un grupo de procesos (ver servicio_hash.py)
+        from servicio_hash import cifrar
+        self.__password_hash = cifrar(password)
         self._rol = rol
 
     def a_diccionario(self) -> dict:
@@ -63,13 +69,24 @@ class Persona:
         """
         Verifica si la contraseña proporcionada coincide con el hash guardado.
 
+        Si coincide y el hash es de un método anterior (p. ej. bcrypt o un
+        coste ya cambiado), se vuelve a cifrar con el actual en segundo plano.
+
         Parámetros:
         password (str): La contraseña a verificar.
 
         Devuelve:
         bool: True si la contraseña coincide con el hash, False de lo contrario.
         """
-        return bcrypt.checkpw(password.encode('utf-8'), self.__password_hash) #compara la nueva contraseña escrita con el hash guardado
+        if not credenciales.verificar(self.__password_hash, password): #compara la nueva contraseña escrita con el hash guardado
+            return False
+        if credenciales.necesita_rehash(self.__password_hash):
+            credenciales.rehashear(password, self._actualizar_hash)
+        return True
+
+    def _actualizar_hash(self, nuevo: str) -> None:
+        # Lo llama credenciales.rehashear desde otro hilo con el hash recalculado
+        self.__password_hash = nuevo
 
     def __str__(self) -> str:
         """
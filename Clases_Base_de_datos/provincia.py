@@ -1,5 +1,33 @@
+import bisect
+import unicodedata
+from typing import Dict, List, Optional
+
 from Clases_Base_de_datos.comunidad import Comunidad
 
+# Vocales acentuadas, ñ y ç más habituales; el resto de caracteres no ASCII pasa por unicodedata
+_SIN_TILDES = str.maketrans('áéíóúàèìòùäëïöüâêîôûñçÁÉÍÓÚÀÈÌÒÙÄËÏÖÜÂÊÎÔÛÑÇ',
+                            'aeiouaeiouaeiouaeiouncAEIOUAEIOUAEIOUAEIOUNC')
+
+def normalizar_nombre(nombre: str) -> str:
+    """
+    Normaliza un nombre de centro para buscarlo: sin tildes, en minúsculas y
+    con un solo espacio entre palabras.
+
+    Parámetros
+    ----------
+    nombre : str
+        Nombre tal como se escribió.
+
+    Devuelve
+    -------
+    str
+        Nombre normalizado ("Hospital  La Fe" -> "hospital la fe").
+    """
+    sin_tildes = nombre.translate(_SIN_TILDES)
+    if not sin_tildes.isascii():
+        sin_tildes = ''.join(c for c in unicodedata.normalize('NFKD', sin_tildes) if not unicodedata.combining(c))
+    return ' '.join(sin_tildes.split()).casefold()
+
 
 class Provincia(Comunidad):
     """
@@ -12,8 +40,13 @@ class Provincia(Comunidad):
         Nombre de la comunidad autónoma a la que pertenece la provincia.
     nombre_provincia : str
         Nombre de la provincia.
-    centros : list
-        Lista que almacena los centros médicos registrados en la provincia.
+    id_provincia : int or None
+        Identificador de la provincia en la tabla 'provincias'. Si se indica, los centros que se añaden o
+        eliminan se guardan también en la tabla 'centros'.
+    centros : dict
+        Centros médicos registrados en la provincia, indexados por su id_centro. Se mantiene además un
+        índice por nombre normalizado (ver `normalizar_nombre`) y una lista ordenada de nombres para la
+        búsqueda por prefijo, así que añadir, eliminar y buscar no recorren todos los centros.
 
     Métodos
     -------
@@ -32,11 +65,19 @@ class Provincia(Comunidad):
     buscar_centro(nombre_centro) -> Union[Centro, str]
         Busca un centro médico por su nombre dentro de la provincia. Si el centro se encuentra, devuelve el objeto del centro,
         de lo contrario, muestra un mensaje indicando que no se ha encontrado.
+    asignar_presupuesto(cantidad) -> str
+        Suma una cantidad no negativa al presupuesto (implementa el método abstracto de Comunidad).
+    buscar_centro_por_id(id_centro) -> Optional[Centro]
+        Devuelve el centro con ese identificador, o None.
+    buscar_por_prefijo(prefijo, limite) -> list
+        Centros cuyo nombre normalizado empieza por el prefijo (autocompletado).
+    desde_bd(id_provincia) -> Provincia
+        Carga una provincia y sus centros desde la base de datos.
     """
 
-    def __init__(self, nombre_comunidad: str, nombre_provincia: str) -> None:
+    def __init__(self, nombre_comunidad: str, nombre_provincia: str, id_provincia: Optional[int] = None) -> None:
         """
-        Inicializa los atributos de la provincia, incluyendo el nombre de la comunidad, el nombre de la provincia y la lista de centros médicos.
+        Inicializa los atributos de la provincia, incluyendo el nombre de la comunidad, el nombre de la provincia y el registro de centros médicos.
 
         Parámetros
         ----------
@@ -44,10 +85,16 @@ class Provincia(Comunidad):
             Nombre de la comunidad autónoma a la que pertenece la provincia.
         nombre_provincia : str
             Nombre de la provincia.
+        id_provincia : int, opcional
+            Identificador en la tabla 'provincias'; si se indica, los cambios de centros se guardan en la base de datos.
         """
         super().__init__(nombre_comunidad)
         self.nombre_provincia = nombre_provincia
-        self._centros = []
+        self.id_provincia = id_provincia
+        self._centros: Dict[str, object] = {}
+        self._por_nombre: Dict[str, List[object]] = {}
+        self._nombres_ordenados: List[str] = []
+        self._nombres_desordenados = False
 
     def obtener_info(self) -> str:
         """
@@ -65,10 +112,57 @@ class Provincia(Comunidad):
         info += f'Presupuesto: {self.presupuesto}€\n'
         return info
 
+    def asignar_presupuesto(self, cantidad: float) -> str:
+        """
+        Asigna un presupuesto a la provincia con la validación de `Comunidad` (sin cantidades negativas).
+
+        Parámetros
+        ----------
+        cantidad : float
+            La cantidad que se desea agregar al presupuesto.
+
+        Devuelve
+        -------
+        str
+            Mensaje confirmando el nuevo presupuesto.
+        """
+        return super().asignar_presupuesto(cantidad)
+
+    def _indexar(self, centro) -> None:
+        """Añade el centro a los índices por id y por nombre."""
+        self._centros[centro.id_centro] = centro
+        nombre = normalizar_nombre(centro.nombre_centro)
+        if nombre not in self._por_nombre:
+            self._por_nombre[nombre] = []
+            self._nombres_ordenados.append(nombre)
+            self._nombres_desordenados = True
+        self._por_nombre[nombre].append(centro)
+
+    def _desindexar(self, centro) -> None:
+        """Quita el centro de los índices por id y por nombre."""
+        del self._centros[centro.id_centro]
+        nombre = normalizar_nombre(centro.nombre_centro)
+        mismos = self._por_nombre[nombre]
+        mismos.remove(centro)
+        if not mismos:
+            del self._por_nombre[nombre]
+            if self._nombres_desordenados:
+                # Sin ordenar todavía: se quita sin ordenar (lo hará la próxima búsqueda por prefijo)
+                self._nombres_ordenados.remove(nombre)
+            else:
+                del self._nombres_ordenados[bisect.bisect_left(self._nombres_ordenados, nombre)]
+
+    def _ordenar_nombres(self) -> None:
+        """Ordena la lista de nombres si ha habido altas desde la última búsqueda por prefijo."""
+        if self._nombres_desordenados:
+            self._nombres_ordenados.sort()
+            self._nombres_desordenados = False
+
     def anadir_centro(self, centro: object) -> str:
         """
-        Añade un centro médico a la provincia si no está ya registrado. Si el centro ya existe,
-        se devuelve un mensaje indicando que no se puede añadir.
+        Añade un centro médico a la provincia si no está ya registrado (mismo id_centro). Si el centro ya existe,
+        se devuelve un mensaje indicando que no se puede añadir. Si la provincia tiene id_provincia, el centro se
+        inserta también en la tabla 'centros'.
 
         Parámetros
         ----------
@@ -79,17 +173,27 @@ class Provincia(Comunidad):
         -------
         str
             Mensaje que indica si el centro fue añadido correctamente o no.
+
+        Excepciones
+        -----------
+        ValueError
+            Si la base de datos rechaza el centro (por ejemplo, su id ya está guardado en otra provincia).
         """
-        if centro in self._centros:
+        if centro.id_centro in self._centros:
             return f'No puedes añadir este centro porque ya está registrado'
-        else:
-            self._centros.append(centro)
+        if self.id_provincia is not None:
+            from Base_De_Datos.tablas.tabla_centro import insertar_centro
+            insertar_centro(centro.id_centro, centro.nombre_centro, centro.cantidad_trabajadores,
+                            centro.presupuesto, centro.habitaciones, self.id_provincia)
+            centro.id_provincia = self.id_provincia  # Sus pagos se guardan (ver Centro.pagos)
+        self._indexar(centro)
         return f'Se ha añadirdo el centro correctamente a la provincia {self.nombre_provincia}'
 
     def eliminar_centro(self, centro) -> str:
         """
         Elimina un centro médico de la provincia si está registrado. Si el centro no está registrado,
-        se devuelve un mensaje indicando que no se puede eliminar.
+        se devuelve un mensaje indicando que no se puede eliminar. Si la provincia tiene id_provincia, el centro
+        se borra también de la tabla 'centros'.
 
         Parámetros
         ----------
@@ -101,17 +205,22 @@ class Provincia(Comunidad):
         str
             Mensaje que indica si el centro fue eliminado correctamente o no.
         """
-        if centro not in self._centros:
+        registrado = self._centros.get(centro.id_centro)
+        if registrado is None:
             return f'No puedes eliminar el centro {centro.nombre_centro} porque este no está registrado'
-        else:
-            self._centros.remove(centro)
-            return (
-                f'Se ha eliminado el centro {centro.nombre_centro} correctamente a la provincia {self.nombre_provincia}')
+        if self.id_provincia is not None:
+            from Base_De_Datos.tablas.tabla_centro import eliminar_centro
+            eliminar_centro(centro.id_centro)
+            registrado.id_provincia = None
+        self._desindexar(registrado)
+        return (
+            f'Se ha eliminado el centro {centro.nombre_centro} correctamente a la provincia {self.nombre_provincia}')
 
     def buscar_centro(self, nombre_centro: str) -> str:
         """
-        Busca un centro médico por su nombre dentro de la provincia. Si el centro se encuentra,
-        devuelve el objeto del centro, de lo contrario, muestra un mensaje indicando que no se ha encontrado.
+        Busca un centro médico por su nombre dentro de la provincia (sin distinguir mayúsculas, tildes ni espacios
+        repetidos). Si el centro se encuentra, devuelve el objeto del centro (el primero añadido si hay varios con
+        el mismo nombre), de lo contrario, muestra un mensaje indicando que no se ha encontrado.
 
         Parámetros
         ----------
@@ -123,7 +232,90 @@ class Provincia(Comunidad):
         Union[Centro, str]
             El objeto del centro médico si se encuentra, o un mensaje indicando que no se ha encontrado.
         """
-        for centro in self._centros:
-            if centro.nombre_centro == nombre_centro:
-                return centro
+        encontrados = self._por_nombre.get(normalizar_nombre(nombre_centro))
+        if encontrados:
+            return encontrados[0]
         return f'Centro {nombre_centro} no encontrado en la provincia {self.nombre_provincia}'
+
+    def buscar_centro_por_id(self, id_centro: str) -> Optional[object]:
+        """
+        Busca un centro médico por su identificador.
+
+        Parámetros
+        ----------
+        id_centro : str
+            Identificador del centro.
+
+        Devuelve
+        -------
+        Optional[Centro]
+            El centro, o None si no está registrado en la provincia.
+        """
+        return self._centros.get(id_centro)
+
+    def buscar_por_prefijo(self, prefijo: str, limite: int = 10) -> List[object]:
+        """
+        Devuelve los centros cuyo nombre normalizado empieza por el prefijo, en orden alfabético (para autocompletar).
+
+        Parámetros
+        ----------
+        prefijo : str
+            Comienzo del nombre; se normaliza igual que los nombres.
+        limite : int, opcional
+            Número máximo de centros a devolver. Por defecto 10.
+
+        Devuelve
+        -------
+        list
+            Centros encontrados (como mucho `limite`).
+        """
+        self._ordenar_nombres()
+        prefijo = normalizar_nombre(prefijo)
+        resultado = []
+        i = bisect.bisect_left(self._nombres_ordenados, prefijo)
+        while i < len(self._nombres_ordenados) and len(resultado) < limite:
+            nombre = self._nombres_ordenados[i]
+            if not nombre.startswith(prefijo):
+                break
+            resultado.extend(self._por_nombre[nombre][:limite - len(resultado)])
+            i += 1
+        return resultado
+
+    @classmethod
+    def desde_bd(cls, id_provincia: int) -> 'Provincia':
+        """
+        Carga una provincia y todos sus centros desde las tablas 'provincias' y 'centros'.
+
+        Parámetros
+        ----------
+        id_provincia : int
+            Identificador de la provincia.
+
+        Devuelve
+        -------
+        Provincia
+            Provincia con sus centros indexados; los cambios posteriores se guardan en la base de datos.
+
+        Excepciones
+        -----------
+        ValueError
+            Si la provincia no existe.
+        """
+        from Base_De_Datos.tablas.tabla_centro import leer_centros_provincia
+        from Base_De_Datos.tablas.tabla_provincia import leer_provincia
+        from Clases_Base_de_datos.centro import Centro
+
+        fila = leer_provincia(id_provincia)
+        if fila is None:
+            raise ValueError(f'La provincia {id_provincia} no existe')
+        _, nombre_comunidad, nombre_provincia, presupuesto = fila
+        provincia = cls(nombre_comunidad, nombre_provincia, id_provincia)
+        provincia.presupuesto = presupuesto
+        for id_centro, nombre_centro, trabajadores, presupuesto_centro, habitaciones in leer_centros_provincia(id_provincia):
+            # El centro ya está guardado: si se había creado antes en este proceso, se recarga con el mismo id
+            Centro.ids_usados.discard(id_centro)
+            centro = Centro(nombre_comunidad, nombre_provincia, id_centro, nombre_centro,
+                            trabajadores, presupuesto_centro, habitaciones)
+            centro.id_provincia = id_provincia
+            provincia._indexar(centro)
+        return provincia
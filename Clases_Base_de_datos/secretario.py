@@ -91,6 +91,10 @@ class Secretario(Trabajador, Documento):
         """
         Envía un correo electrónico con el asunto y mensaje proporcionados al destinatario.
 
+        El correo se deja en la bandeja de salida con el email del secretario
+        como remitente; lo manda después el enviador en segundo plano (ver
+        correo.py), así que la llamada no espera al servidor SMTP.
+
         Parámetros
         -----------
         destinatario : str
@@ -103,7 +107,10 @@ class Secretario(Trabajador, Documento):
         Devuelve
         --------
         str
-            Un mensaje confirmando que el correo ha sido enviado.
+            Un mensaje confirmando que el correo ha quedado pendiente de envío.
         """
-        return f'Correo enviado a {destinatario} con asunto "{asunto}" y mensaje: {mensaje}'
+        from correo import encolar
+
+        id_correo = encolar(destinatario, asunto, mensaje, self.email)
+        return f'Correo {id_correo} encolado para {destinatario} con asunto "{asunto}" y mensaje: {mensaje}'
 
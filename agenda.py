@@ -0,0 +1,136 @@
+"""
+Agenda diaria de los médicos
+============================
+
+La agenda de un médico para un día son sus citas de ese día en orden de
+hora (``tabla_citas.leer_agenda_medico``, servida por el índice
+idx_citas_medico_fecha). Cada proceso guarda en memoria, por médico y día,
+la agenda ya serializada en JSON compacto junto con su ETag y la versión
+de 'agenda_versiones' con la que se leyó.
+
+- Pedir otra vez la misma agenda no toca la base de datos mientras no
+  pasen ``VIGENCIA_CACHE_S`` segundos desde la última comprobación; después
+  basta con leer su versión (una fila por clave primaria) y solo si ha
+  cambiado se vuelve a consultar.
+- Los disparadores de 'citas' suben la versión del día afectado con cada
+  cita que se crea, cancela, atiende o mueve, sea cual sea el proceso que
+  la cambia; el proceso que la cambia además descarta su copia al momento
+  (``invalidar``). Solo se recalcula la agenda de ese médico y ese día.
+- El ETag depende solo del contenido: quien ya tiene la agenda recibe un
+  304 sin cuerpo mientras no cambie.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from Base_De_Datos.tablas import tabla_citas
+
+# Agendas (médico y día) que se guardan en memoria; se descartan las menos usadas
+TAMANO_CACHE = 4096
+
+# Segundos que se da por buena una agenda sin comprobar su versión (cambios hechos por otros procesos)
+VIGENCIA_CACHE_S = 1.0
+
+
+class _Vista:
+    """Agenda serializada de un médico y un día."""
+
+    __slots__ = ('version', 'etag', 'cuerpo', 'comprobada')
+
+    def __init__(self, version: int, cuerpo: bytes) -> None:
+        self.version = version
+        self.cuerpo = cuerpo
+        self.etag = hashlib.blake2b(cuerpo, digest_size=12).hexdigest()
+        self.comprobada = time.monotonic()
+
+
+def serializar_agenda(medico: str, dia: str, filas: List[tuple]) -> bytes:
+    """
+    JSON compacto de una agenda (sin espacios y sin los campos vacíos).
+
+    Returns
+    -------
+    bytes
+        ``{"medico", "fecha", "citas": [...]}`` en UTF-8.
+    """
+    citas = []
+    for (id_cita, fecha_hora, tipo, motivo, estado, centro, telefono, nivel_prioridad,
+         paciente_id, nombre, apellido) in filas:
+        cita = {"id_cita": id_cita, "hora": fecha_hora[11:16], "tipo": tipo, "motivo": motivo, "estado": estado,
+                "centro": centro, "telefono": telefono, "nivel_prioridad": nivel_prioridad,
+                "paciente": {"id": paciente_id, "nombre": f"{nombre or ''} {apellido or ''}".strip() or None}}
+        citas.append({clave: valor for clave, valor in cita.items() if valor not in (None, '')})
+    return json.dumps({"medico": medico, "fecha": dia, "citas": citas},
+                      ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class AgendaMedicos:
+    """
+    Agendas diarias de los médicos con caché en memoria.
+
+    Parámetros:
+        tamano_cache (int, opcional): Agendas en memoria.
+        vigencia_s (float, opcional): Segundos que se usa una agenda sin comprobar su versión.
+    """
+
+    def __init__(self, tamano_cache: int = TAMANO_CACHE, vigencia_s: float = VIGENCIA_CACHE_S) -> None:
+        self.tamano_cache = tamano_cache
+        self.vigencia_s = vigencia_s
+        self._vistas: 'OrderedDict[Tuple[str, str], _Vista]' = OrderedDict()
+        self._cerrojo = threading.Lock()
+        self._invalidaciones = 0
+        self.estadisticas: Dict[str, int] = {'aciertos': 0, 'comprobaciones': 0, 'consultas': 0}
+
+    def vista(self, medico: str, dia: str) -> Tuple[str, bytes]:
+        """
+        Agenda de un médico en un día.
+
+        Parámetros:
+            medico (str): Identificador del médico.
+            dia (str): Día (YYYY-MM-DD).
+
+        Devuelve:
+            Tuple[str, bytes]: (ETag, JSON de la agenda).
+
+        Excepciones:
+            ValueError: Si el día no tiene el formato YYYY-MM-DD.
+        """
+        clave = (medico, dia)
+        # Las consultas se hacen fuera del cerrojo: solo protege el diccionario y los contadores
+        with self._cerrojo:
+            vista = self._vistas.get(clave)
+            if vista is not None and time.monotonic() - vista.comprobada < self.vigencia_s:
+                self.estadisticas['aciertos'] += 1
+                self._vistas.move_to_end(clave)
+                return vista.etag, vista.cuerpo
+            generacion = self._invalidaciones
+        if vista is not None and tabla_citas.leer_version_agenda(medico, dia) == vista.version:
+            with self._cerrojo:
+                self.estadisticas['comprobaciones'] += 1
+                vista.comprobada = time.monotonic()
+                if clave in self._vistas:
+                    self._vistas.move_to_end(clave)
+            return vista.etag, vista.cuerpo
+        version, filas = tabla_citas.leer_agenda_medico(medico, dia)
+        vista = _Vista(version, serializar_agenda(medico, dia, filas))
+        with self._cerrojo:
+            self.estadisticas['consultas'] += 1
+            # Si se invalidó algo mientras se consultaba, la vista puede ser anterior al cambio: no se guarda
+            if generacion == self._invalidaciones:
+                self._vistas[clave] = vista
+                self._vistas.move_to_end(clave)
+                if len(self._vistas) > self.tamano_cache:
+                    self._vistas.popitem(last=False)
+        return vista.etag, vista.cuerpo
+
+    def invalidar(self, medico: Optional[str], dia: str) -> None:
+        """Descarta la agenda guardada de un médico y un día (si el médico es None, no hace nada)."""
+        if medico is None:
+            return
+        with self._cerrojo:
+            self._invalidaciones += 1
+            self._vistas.pop((medico, dia), None)
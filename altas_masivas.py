@@ -0,0 +1,232 @@
+"""
+Altas masivas
+=============
+
+Da de alta de una vez muchos pacientes, médicos, enfermeros, auxiliares o
+habitaciones (``POST /bulk/<entidad>``), p. ej. al incorporar un hospital.
+
+- Los elementos llegan como un array JSON o como NDJSON (un objeto por
+  línea), que se lee a medida que llega sin cargarlo entero en memoria.
+- Se procesan por lotes de ``TAMANO_LOTE``: las contraseñas de cada lote se
+  cifran en paralelo con el servicio de cifrado (``servicio_hash.py``), igual
+  que en las altas individuales, y sus filas se insertan en una sola
+  transacción.
+- El resultado es un flujo NDJSON con una línea por elemento, en el mismo
+  orden y en cuanto se confirma su lote: ``{"indice", "estado", "id"}`` si
+  se ha creado (201) o ``{"indice", "estado", "error"}`` si no (400 si faltan
+  campos o son incorrectos, 409 si ya existe). Un elemento erróneo no
+  impide el alta de los demás. La última línea es un resumen.
+
+El coste lo domina el cifrado de las contraseñas, así que en las entidades
+con contraseña la mejora frente a las altas individuales crece con los
+núcleos disponibles; en las demás la da sobre todo la transacción por lote.
+"""
+
+import io
+import sqlite3
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import servicio_hash
+from Base_De_Datos.tablas.conexion import RUTA_BD, abrir_conexion
+
+# Base de datos compartida (ver conexion.py)
+db_path = RUTA_BD
+
+# Elementos por lote (un cifrado en paralelo y una transacción cada uno)
+TAMANO_LOTE = 500
+
+# Tipos de contenido que se leen como NDJSON
+TIPOS_NDJSON = ('application/x-ndjson', 'application/jsonl', 'application/json-seq')
+
+
+class Entidad:
+    """
+    Tabla de una entidad y campos de sus elementos.
+
+    Parámetros:
+        tabla (str): Tabla donde se insertan.
+        obligatorios (Tuple[str, ...]): Columnas que deben venir; la primera identifica el elemento.
+        opcionales (Tuple[str, ...], opcional): Columnas que pueden venir.
+        alias (Dict[str, str], opcional): Nombre del campo en el JSON -> columna.
+        fijos (Dict[str, Any], opcional): Columnas con un valor fijo.
+    """
+
+    __slots__ = ('tabla', 'obligatorios', 'opcionales', 'alias', 'fijos')
+
+    def __init__(self, tabla: str, obligatorios: Tuple[str, ...], opcionales: Tuple[str, ...] = (),
+                 alias: Optional[Dict[str, str]] = None, fijos: Optional[Dict[str, Any]] = None) -> None:
+        self.tabla = tabla
+        self.obligatorios = obligatorios
+        self.opcionales = opcionales
+        self.alias = alias or {}
+        self.fijos = fijos or {}
+
+    @property
+    def columnas(self) -> Tuple[str, ...]:
+        return self.obligatorios + self.opcionales + tuple(self.fijos)
+
+
+# Mismos campos que las altas individuales (/pacientes/alta, /medicos/alta...)
+ENTIDADES: Dict[str, Entidad] = {
+    'pacientes': Entidad('pacientes', ('id', 'username', 'password'),
+                         ('nombre', 'apellido', 'edad', 'genero', 'estado', 'historial_medico',
+                          'id_enfermero', 'id_medico', 'id_habitacion')),
+    'medicos': Entidad('medicos', ('id', 'username', 'password'), ('especialidad', 'antiguedad')),
+    'enfermeros': Entidad('enfermeros', ('id', 'username', 'password', 'antiguedad'), ('especialidad',),
+                          alias={'antieguedad': 'antiguedad'}),
+    'auxiliares': Entidad('auxiliares', ('id', 'antiguedad'), ('id_enfermero',)),
+    'habitaciones': Entidad('habitaciones', ('numero_habitacion', 'capacidad'),
+                            alias={'numero': 'numero_habitacion'}, fijos={'limpia': 0}),
+}
+
+
+def conectar() -> sqlite3.Connection:
+    """
+    Establece una conexión con la base de datos SQLite.
+
+    Returns
+    -------
+    sqlite3.Connection
+        Conexión activa al archivo de base de datos.
+    """
+    conn = abrir_conexion(db_path)
+    return conn
+
+
+def leer_ndjson(flujo: io.RawIOBase, cargar: Callable[[bytes], Any]) -> Iterator[Tuple[int, Any]]:
+    """
+    Elementos de un flujo NDJSON, a medida que se leen.
+
+    Parameters
+    ----------
+    flujo : io.RawIOBase
+        Cuerpo de la petición (``request.stream``).
+    cargar : Callable[[bytes], Any]
+        Función que interpreta una línea JSON (``app.json.loads``).
+
+    Returns
+    -------
+    Iterator[Tuple[int, Any]]
+        (índice, elemento); las líneas que no son JSON válido dan un
+        ``ValueError`` como elemento. Las líneas vacías no cuentan.
+    """
+    indice = 0
+    # El flujo de la petición (werkzeug) lee las líneas byte a byte si no se le pone un búfer
+    for linea in io.BufferedReader(flujo, 64 * 1024):
+        linea = linea.strip()
+        if not linea:
+            continue
+        try:
+            elemento = cargar(linea)
+        except ValueError as e:
+            elemento = e
+        yield indice, elemento
+        indice += 1
+
+
+def _valores(entidad: Entidad, elemento: Any) -> List[Any]:
+    """Valores de las columnas de ``entidad`` para un elemento (ValueError si no es válido)."""
+    if isinstance(elemento, ValueError):
+        raise ValueError(f"JSON no válido: {elemento}")
+    if not isinstance(elemento, dict):
+        raise ValueError("Cada elemento debe ser un objeto JSON.")
+    campos = {entidad.alias.get(clave, clave): valor for clave, valor in elemento.items()}
+    faltan = [columna for columna in entidad.obligatorios if campos.get(columna) in (None, '')]
+    if faltan:
+        raise ValueError(f"Campo requerido faltante: {', '.join(faltan)}")
+    return [campos[c] for c in entidad.obligatorios] + [campos.get(c) for c in entidad.opcionales] \
+        + list(entidad.fijos.values())
+
+
+def _alta_lote(entidad: Entidad, lote: List[Tuple[int, Any]]) -> List[Dict[str, Any]]:
+    """Da de alta un lote en una transacción; devuelve el resultado de cada elemento, en orden."""
+    resultados: List[Dict[str, Any]] = []
+    filas: List[Tuple[Dict[str, Any], List[Any]]] = []
+    for indice, elemento in lote:
+        try:
+            valores = _valores(entidad, elemento)
+        except ValueError as e:
+            resultados.append({"indice": indice, "estado": 400, "error": str(e)})
+            continue
+        resultado = {"indice": indice, "estado": 201, "id": valores[0]}
+        resultados.append(resultado)
+        filas.append((resultado, valores))
+    if 'password' in entidad.obligatorios:
+        posicion = entidad.obligatorios.index('password')
+        # Sin límite de espera: la respuesta ya ha empezado y no puede ser un 429
+        hashes = servicio_hash.servicio().cifrar_varios([str(valores[posicion]) for _, valores in filas])
+        for (_, valores), hash_contrasena in zip(filas, hashes):
+            valores[posicion] = hash_contrasena
+    if not filas:
+        return resultados
+    sql = (f"INSERT INTO {entidad.tabla} ({', '.join(entidad.columnas)}) "
+           f"VALUES ({', '.join('?' * len(entidad.columnas))});")
+    conn = conectar()
+    try:
+        cursor = conn.cursor()
+        for resultado, valores in filas:
+            try:
+                cursor.execute(sql, valores)
+            except sqlite3.IntegrityError as e:
+                # Solo se deshace esta sentencia; el resto del lote sigue en la transacción
+                duplicado = str(e).startswith('UNIQUE')
+                resultado.update(estado=409 if duplicado else 400,
+                                 error=f"Ya existe: {e}" if duplicado else str(e))
+                del resultado['id']
+            except (sqlite3.InterfaceError, sqlite3.ProgrammingError) as e:
+                # Valores que SQLite no admite (listas, objetos...)
+                resultado.update(estado=400, error=f"Valor no válido: {e}")
+                del resultado['id']
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return resultados
+
+
+def dar_de_alta(nombre_entidad: str, elementos: Iterable[Tuple[int, Any]],
+                tamano_lote: int = TAMANO_LOTE) -> Iterator[Dict[str, Any]]:
+    """
+    Da de alta ``elementos`` por lotes y devuelve el resultado de cada uno a medida que se confirman.
+
+    Parameters
+    ----------
+    nombre_entidad : str
+        Clave de ``ENTIDADES``.
+    elementos : Iterable[Tuple[int, Any]]
+        (índice, elemento), p. ej. de ``leer_ndjson`` o ``enumerate`` de un array JSON.
+    tamano_lote : int, optional
+        Elementos por transacción.
+
+    Returns
+    -------
+    Iterator[Dict[str, Any]]
+        Un resultado por elemento, en orden, y al final
+        ``{"resumen": {"creados", "errores"}}``.
+
+    Raises
+    ------
+    KeyError
+        Si la entidad no existe.
+    """
+    entidad = ENTIDADES[nombre_entidad]
+    creados = errores = 0
+    lote: List[Tuple[int, Any]] = []
+    iterador = iter(elementos)
+    while True:
+        elemento = next(iterador, None)
+        if elemento is not None:
+            lote.append(elemento)
+        if lote and (elemento is None or len(lote) >= tamano_lote):
+            for resultado in _alta_lote(entidad, lote):
+                if resultado['estado'] == 201:
+                    creados += 1
+                else:
+                    errores += 1
+                yield resultado
+            lote = []
+        if elemento is None:
+            break
+    yield {"resumen": {"creados": creados, "errores": errores}}
@@ -0,0 +1,131 @@
+"""
+Caché de respuestas de solo lectura
+===================================
+
+Para endpoints cuyos datos cambian poco (``/medicos``, ``/enfermeros``,
+``/habitaciones``, ``/consultar_sip/<id>``, ``/menu``):
+
+- El ETag de una respuesta se calcula de su clave (ruta y, si depende de
+  él, el rol) y de los contadores de cambios de las tablas que lee
+  (``tabla_versiones``), no de su contenido. Una petición condicional
+  (If-None-Match) se contesta con un 304 leyendo solo esos contadores, sin
+  tocar las filas ni serializar nada, en cualquier proceso. Cada hilo
+  lee los contadores con su propia conexión, que se abre una sola vez.
+- El cuerpo ya serializado se guarda en memoria junto con su ETag. En
+  cuanto se ve que una tabla ha cambiado se descartan todos los cuerpos
+  que dependen de ella.
+
+Si cambia la forma de alguna respuesta hay que subir ``VERSION_RESPUESTAS``
+para que los clientes no sigan usando su copia anterior.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from Base_De_Datos.tablas import tabla_versiones
+
+# Tablas cuyos cambios se cuentan (ver tabla_versiones.crear_tabla_versiones)
+TABLAS_VIGILADAS = ('medicos', 'enfermeros', 'habitaciones', 'sips')
+
+# Respuestas guardadas en memoria; se descartan las menos usadas
+TAMANO_CACHE = 4096
+
+# Forma de las respuestas; forma parte de todos los ETag
+VERSION_RESPUESTAS = '1'
+
+
+class _Entrada:
+    """Cuerpo serializado de una respuesta con el ETag y las tablas de las que depende."""
+
+    __slots__ = ('etag', 'cuerpo', 'tablas')
+
+    def __init__(self, etag: str, cuerpo: bytes, tablas: Tuple[str, ...]) -> None:
+        self.etag = etag
+        self.cuerpo = cuerpo
+        self.tablas = tablas
+
+
+class CacheRespuestas:
+    """
+    ETag por contadores de cambios y cuerpos serializados en memoria.
+
+    Parámetros:
+        tamano_cache (int, opcional): Respuestas en memoria.
+    """
+
+    def __init__(self, tamano_cache: int = TAMANO_CACHE) -> None:
+        self.tamano_cache = tamano_cache
+        self._entradas: 'OrderedDict[str, _Entrada]' = OrderedDict()
+        # Última versión vista de cada tabla
+        self._versiones: Dict[str, int] = {}
+        self._cerrojo = threading.Lock()
+        # Conexión de cada hilo para leer los contadores
+        self._hilos = threading.local()
+        self.estadisticas: Dict[str, int] = {'aciertos': 0, 'generadas': 0, 'descartadas': 0}
+
+    def validador(self, clave: str, tablas: Iterable[str]) -> Tuple[str, Optional[float]]:
+        """
+        ETag y fecha del último cambio de una respuesta, según los contadores de sus tablas.
+
+        Si alguna tabla ha cambiado desde la última vez, descarta los cuerpos
+        guardados que dependen de ella.
+
+        Parámetros:
+            clave (str): Identifica la respuesta (p. ej. la ruta).
+            tablas (Iterable[str]): Tablas que lee la respuesta.
+
+        Devuelve:
+            Tuple[str, Optional[float]]: (ETag sin comillas, último cambio en
+            segundos desde epoch o None si no se conoce).
+        """
+        tablas = tuple(sorted(tablas))
+        conn = getattr(self._hilos, 'conn', None)
+        if conn is None:
+            conn = self._hilos.conn = tabla_versiones.conectar()
+        versiones = tabla_versiones.leer_versiones(tablas, conn)
+        with self._cerrojo:
+            cambiadas = {tabla for tabla, (version, _) in versiones.items()
+                         if self._versiones.get(tabla, version) != version}
+            for tabla, (version, _) in versiones.items():
+                self._versiones[tabla] = version
+            if cambiadas:
+                for clave_entrada in [c for c, e in self._entradas.items() if cambiadas.intersection(e.tablas)]:
+                    del self._entradas[clave_entrada]
+                    self.estadisticas['descartadas'] += 1
+        huella = '\0'.join([VERSION_RESPUESTAS, clave] + [f"{tabla}:{versiones[tabla][0]}" for tabla in tablas])
+        modificadas = [modificada for _, modificada in versiones.values() if modificada is not None]
+        return hashlib.blake2b(huella.encode('utf-8'), digest_size=12).hexdigest(), max(modificadas, default=None)
+
+    def cuerpo(self, clave: str, etag: str, tablas: Iterable[str],
+               generar: Callable[[], Optional[bytes]]) -> Optional[bytes]:
+        """
+        Cuerpo de una respuesta: el guardado si corresponde a ``etag``, o el que devuelva ``generar``.
+
+        Parámetros:
+            clave (str): Identifica la respuesta.
+            etag (str): ETag actual (de ``validador``).
+            tablas (Iterable[str]): Tablas que lee la respuesta.
+            generar (Callable[[], Optional[bytes]]): Consulta y serializa la
+                respuesta; None si no existe (no se guarda).
+
+        Devuelve:
+            Optional[bytes]: El cuerpo serializado, o None.
+        """
+        with self._cerrojo:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and entrada.etag == etag:
+                self._entradas.move_to_end(clave)
+                self.estadisticas['aciertos'] += 1
+                return entrada.cuerpo
+        cuerpo = generar()
+        if cuerpo is None:
+            return None
+        with self._cerrojo:
+            self.estadisticas['generadas'] += 1
+            self._entradas[clave] = _Entrada(etag, cuerpo, tuple(tablas))
+            self._entradas.move_to_end(clave)
+            if len(self._entradas) > self.tamano_cache:
+                self._entradas.popitem(last=False)
+        return cuerpo
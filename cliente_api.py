@@ -0,0 +1,225 @@
+"""
+Cliente HTTP de la API
+======================
+
+Cliente que usa la aplicación de terminal (``menu's.py``) para hablar con
+la API, pensado también para usarla desde scripts contra un servidor remoto:
+
+- Una sola ``requests.Session``: las conexiones se reutilizan (keep-alive)
+  desde un pool de hasta ``POOL_CONEXIONES`` por servidor, en lugar de abrir
+  una conexión TCP por petición.
+- Límites de tiempo: ``TIMEOUT_CONEXION_S`` para conectar y
+  ``TIMEOUT_LECTURA_S`` para cada lectura de la respuesta.
+- Reintentos con espera exponencial (``ESPERA_REINTENTO_S`` × 2ⁿ, o la que
+  indique ``Retry-After``): los fallos de conexión se reintentan siempre
+  (la petición no llegó a salir); las lecturas cortadas y las respuestas
+  429, 502, 503 y 504 solo en los métodos idempotentes (GET, HEAD, PUT,
+  DELETE, OPTIONS), nunca en POST ni PATCH.
+- Caché local opcional (``cache_s`` > 0) de los listados de solo lectura
+  (``RUTAS_EN_CACHE``): durante ``cache_s`` segundos se responden sin ir al
+  servidor y después se revalidan con ``If-None-Match`` (un 304 no trae el
+  cuerpo). Cada listado se guarda por usuario, contraseña y rol, así que
+  unas credenciales incorrectas siempre llegan al servidor. Cualquier
+  escritura correcta vacía la caché.
+
+Se configura con ``PROSALUD_API_URL``, ``PROSALUD_CLIENTE_TIMEOUT``,
+``PROSALUD_CLIENTE_REINTENTOS``, ``PROSALUD_CLIENTE_ESPERA`` y
+``PROSALUD_CLIENTE_CACHE``.
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# URL de la API
+URL_API = os.environ.get('PROSALUD_API_URL', 'http://127.0.0.1:5000')
+
+# Segundos para conectar y para cada lectura de la respuesta
+TIMEOUT_CONEXION_S = 3.05
+TIMEOUT_LECTURA_S = float(os.environ.get('PROSALUD_CLIENTE_TIMEOUT', '30'))
+
+# Reintentos por petición y espera inicial entre ellos (se dobla en cada uno)
+REINTENTOS = int(os.environ.get('PROSALUD_CLIENTE_REINTENTOS', '3'))
+ESPERA_REINTENTO_S = float(os.environ.get('PROSALUD_CLIENTE_ESPERA', '0.5'))
+
+# Segundos que vale un listado guardado sin revalidarlo (0 = sin caché)
+CACHE_S = float(os.environ.get('PROSALUD_CLIENTE_CACHE', '0'))
+
+# Conexiones abiertas que se guardan por servidor
+POOL_CONEXIONES = 10
+
+# Métodos que se pueden repetir sin efectos añadidos
+METODOS_IDEMPOTENTES = frozenset({'GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS'})
+
+# Respuestas que se reintentan (en los métodos idempotentes)
+CODIGOS_REINTENTO = (429, 502, 503, 504)
+
+# Listados de solo lectura que se pueden guardar en la caché
+RUTAS_EN_CACHE = ('/menu', '/pacientes', '/medicos', '/enfermeros', '/auxiliares', '/habitaciones')
+
+
+class ClienteAPI:
+    """
+    Sesión HTTP con la API: conexiones reutilizadas, límites de tiempo, reintentos y caché opcional.
+
+    Parámetros:
+        url (str, opcional): URL base de la API.
+        timeout (Tuple[float, float], opcional): Segundos para conectar y para leer.
+        reintentos (int, opcional): Reintentos por petición.
+        espera_s (float, opcional): Espera antes del primer reintento (se dobla en cada uno).
+        cache_s (float, opcional): Segundos que vale un listado guardado; 0 desactiva la caché.
+        conexiones (int, opcional): Conexiones abiertas que se guardan; al menos las peticiones simultáneas.
+    """
+
+    def __init__(self, url: str = URL_API, timeout: Tuple[float, float] = (TIMEOUT_CONEXION_S, TIMEOUT_LECTURA_S),
+                 reintentos: int = REINTENTOS, espera_s: float = ESPERA_REINTENTO_S, cache_s: float = CACHE_S,
+                 conexiones: int = POOL_CONEXIONES) -> None:
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.cache_s = cache_s
+        self.sesion = requests.Session()
+        politica = Retry(total=reintentos, backoff_factor=espera_s, status_forcelist=CODIGOS_REINTENTO,
+                         allowed_methods=METODOS_IDEMPOTENTES, respect_retry_after_header=True,
+                         raise_on_status=False)
+        adaptador = HTTPAdapter(pool_connections=POOL_CONEXIONES, pool_maxsize=conexiones,
+                                max_retries=politica)
+        self.sesion.mount('http://', adaptador)
+        self.sesion.mount('https://', adaptador)
+        # (usuario, huella de la contraseña, rol, ruta, parámetros) -> (momento, ETag, datos)
+        self._cache: Dict[tuple, Tuple[float, Optional[str], Any]] = {}
+        # Clave de este cliente para la huella: la contraseña no se guarda ni se puede comparar fuera de él
+        self._sal_cache = os.urandom(16)
+        self._cerrojo = threading.Lock()
+        self.estadisticas: Dict[str, int] = {'peticiones': 0, 'aciertos_cache': 0, 'revalidadas': 0}
+
+    def _en_cache(self, metodo: str, ruta: str) -> bool:
+        return self.cache_s > 0 and metodo == 'GET' and ruta in RUTAS_EN_CACHE
+
+    def pedir(self, metodo: str, ruta: str, datos: Any = None, params: Optional[Dict[str, Any]] = None,
+              auth: Optional[Tuple[str, str]] = None, cabeceras: Optional[Dict[str, str]] = None) -> Any:
+        """
+        Hace una petición a la API y devuelve su JSON.
+
+        Parámetros:
+            metodo (str): Método HTTP ('GET', 'POST', 'DELETE', 'PATCH'...).
+            ruta (str): Ruta del endpoint, p. ej. '/medicos'.
+            datos (Any, opcional): Cuerpo JSON.
+            params (Dict[str, Any], opcional): Parámetros de la URL.
+            auth (Tuple[str, str], opcional): Usuario y contraseña (HTTP Basic).
+            cabeceras (Dict[str, str], opcional): Cabeceras adicionales (p. ej. X-ROL).
+
+        Devuelve:
+            Any: El cuerpo de la respuesta interpretado como JSON.
+
+        Excepciones:
+            requests.HTTPError: Si la respuesta final es 4xx o 5xx.
+            requests.ConnectionError: Si no se puede conectar tras los reintentos.
+            requests.Timeout: Si el servidor no responde a tiempo.
+            ValueError: Si la respuesta no es JSON.
+        """
+        metodo = metodo.upper()
+        cabeceras = dict(cabeceras or {})
+        # Con la contraseña en la clave, una contraseña incorrecta nunca recibe lo guardado con la buena
+        huella = hmac.new(self._sal_cache, auth[1].encode(), hashlib.sha256).digest() if auth else None
+        clave = (auth[0] if auth else None, huella, cabeceras.get('X-ROL'), ruta,
+                 tuple(sorted((params or {}).items())))
+        guardada = None
+        if self._en_cache(metodo, ruta):
+            with self._cerrojo:
+                guardada = self._cache.get(clave)
+            if guardada and time.monotonic() - guardada[0] < self.cache_s:
+                self.estadisticas['aciertos_cache'] += 1
+                return guardada[2]
+            if guardada and guardada[1]:
+                cabeceras['If-None-Match'] = guardada[1]
+
+        respuesta = self.peticion(metodo, ruta, datos, params, auth, cabeceras)
+        if guardada and respuesta.status_code == 304:
+            self.estadisticas['revalidadas'] += 1
+            with self._cerrojo:
+                self._cache[clave] = (time.monotonic(), guardada[1], guardada[2])
+            return guardada[2]
+        respuesta.raise_for_status()
+        contenido = respuesta.json()
+        if self._en_cache(metodo, ruta):
+            with self._cerrojo:
+                self._cache[clave] = (time.monotonic(), respuesta.headers.get('ETag'), contenido)
+        elif metodo not in ('GET', 'HEAD'):
+            # Una escritura puede cambiar cualquier listado
+            self.vaciar_cache()
+        return contenido
+
+    def peticion(self, metodo: str, ruta: str, datos: Any = None, params: Optional[Dict[str, Any]] = None,
+                 auth: Optional[Tuple[str, str]] = None, cabeceras: Optional[Dict[str, str]] = None,
+                 **opciones: Any) -> requests.Response:
+        """
+        Hace una petición a la API sin pasar por la caché y devuelve la respuesta tal cual.
+
+        Parámetros:
+            metodo, ruta, datos, params, auth, cabeceras: Como en ``pedir``.
+            **opciones: Otros argumentos de ``requests.Session.request`` (p. ej. ``data``, ``stream``).
+
+        Devuelve:
+            requests.Response: La respuesta, también si es 4xx o 5xx.
+
+        Excepciones:
+            requests.ConnectionError: Si no se puede conectar tras los reintentos.
+            requests.Timeout: Si el servidor no responde a tiempo.
+        """
+        self.estadisticas['peticiones'] += 1
+        return self.sesion.request(metodo.upper(), f"{self.url}{ruta}", json=datos, params=params, auth=auth,
+                                   headers=cabeceras, timeout=self.timeout, **opciones)
+
+    def pedir_ndjson(self, ruta: str, elementos: Iterable[Any], auth: Optional[Tuple[str, str]] = None,
+                     cabeceras: Optional[Dict[str, str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Envía ``elementos`` como NDJSON por POST y devuelve las líneas NDJSON de la respuesta a medida que llegan.
+
+        Pensado para las altas masivas (``POST /bulk/<entidad>``).
+
+        Parámetros:
+            ruta (str): Ruta del endpoint.
+            elementos (Iterable[Any]): Objetos a enviar, uno por línea.
+            auth (Tuple[str, str], opcional): Usuario y contraseña (HTTP Basic).
+            cabeceras (Dict[str, str], opcional): Cabeceras adicionales.
+
+        Devuelve:
+            Iterator[Dict[str, Any]]: Cada línea de la respuesta interpretada como JSON.
+
+        Excepciones:
+            requests.HTTPError: Si la respuesta es 4xx o 5xx (antes de leer ninguna línea).
+            requests.ConnectionError: Si no se puede conectar.
+            requests.Timeout: Si el servidor no responde a tiempo.
+        """
+        cuerpo = ''.join(json.dumps(elemento, ensure_ascii=False) + '\n' for elemento in elementos)
+        cabeceras = dict(cabeceras or {}, **{'Content-Type': 'application/x-ndjson'})
+        with self.peticion('POST', ruta, auth=auth, cabeceras=cabeceras, data=cuerpo.encode('utf-8'),
+                           stream=True) as respuesta:
+            respuesta.raise_for_status()
+            self.vaciar_cache()
+            for linea in respuesta.iter_lines():
+                if linea:
+                    yield json.loads(linea)
+
+    def vaciar_cache(self) -> None:
+        """Descarta todos los listados guardados (p. ej. al cerrar sesión)."""
+        with self._cerrojo:
+            self._cache.clear()
+
+    def cerrar(self) -> None:
+        """Cierra las conexiones abiertas."""
+        self.sesion.close()
+
+    def __enter__(self) -> 'ClienteAPI':
+        return self
+
+    def __exit__(self, *_excepcion) -> None:
+        self.cerrar()
@@ -0,0 +1,514 @@
+"""
+SDK asíncrono de la API
+=======================
+
+Cliente con asyncio para los servicios que consultan la API muchas veces
+a la vez (p. ej. los SIP y los médicos de todos los pacientes de una planta)::
+
+    async with ClienteAsync(auth=('admin', 'clave'), rol='medico', concurrencia=32) as api:
+        pacientes = [p async for p in api.pacientes()]
+        sips = await asyncio.gather(*(api.consultar_sip(p.id) for p in pacientes))
+
+- Un método ``async`` por endpoint; ``pedir`` sirve para cualquier otro.
+- Las peticiones salen por la sesión de ``cliente_api.ClienteAPI``
+  (conexiones reutilizadas, límites de tiempo y reintentos) en un grupo de
+  ``concurrencia`` hilos. Un semáforo deja en vuelo como mucho
+  ``concurrencia`` peticiones; el resto espera en el bucle sin ocupar un hilo
+  ni una conexión.
+- Los listados devuelven fichas tipadas (``FichaPaciente``, ``FichaMedico``...)
+  y se recorren por páginas de ``por_pagina`` (``?limite=&desde=``)
+  siguiendo la cabecera ``Link`` (rel="next"). Un servidor sin paginación
+  devuelve el listado completo en la primera página.
+- Las respuestas 4xx y 5xx lanzan ``requests.HTTPError``, salvo las
+  consultas que devuelven None cuando no existe lo consultado (404).
+- ``ClienteSincrono`` tiene los mismos métodos, bloqueantes, para scripts
+  sin asyncio. Ejecuta las corrutinas en un bucle propio en segundo plano;
+  los listados devuelven listas y ``mapear`` reparte un método entre muchos
+  argumentos a la vez.
+
+No usa aiohttp ni httpx: la API solo necesita requests, y el límite de
+peticiones simultáneas lo pone el semáforo. Un hilo por petición en vuelo
+basta para las decenas de peticiones simultáneas que admite el servidor.
+"""
+
+import asyncio
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Type, TypeVar
+from urllib.parse import quote, urlencode
+
+import requests
+
+from cliente_api import URL_API, ClienteAPI
+
+# Peticiones simultáneas por defecto
+CONCURRENCIA = 16
+
+# Elementos por página de los listados (el servidor admite hasta 1000)
+POR_PAGINA = 500
+
+F = TypeVar('F', bound='Ficha')
+
+
+class Ficha:
+    """
+    Elemento de un listado de la API, con sus campos como atributos.
+
+    Las subclases declaran los campos en ``__slots__`` y, si el JSON los
+    llama de otra forma, la equivalencia en ``ALIAS``.
+    """
+
+    __slots__ = ()
+    ALIAS: Dict[str, str] = {}
+
+    def __init__(self, **campos: Any) -> None:
+        for campo in self.__slots__:
+            setattr(self, campo, campos.get(campo))
+
+    @classmethod
+    def desde_json(cls: Type[F], datos: Dict[str, Any]) -> F:
+        """
+        Crea la ficha a partir de un objeto JSON de la API.
+
+        Parámetros:
+            datos (Dict[str, Any]): Objeto del listado.
+
+        Devuelve:
+            Ficha: La ficha; los campos que faltan quedan a None y los desconocidos se ignoran.
+        """
+        return cls(**{cls.ALIAS.get(clave, clave): valor for clave, valor in datos.items()})
+
+    def como_dict(self) -> Dict[str, Any]:
+        """Campos de la ficha."""
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+    def __eq__(self, otra: object) -> bool:
+        return type(otra) is type(self) and otra.como_dict() == self.como_dict()
+
+    def __repr__(self) -> str:
+        campos = ', '.join(f"{campo}={valor!r}" for campo, valor in self.como_dict().items())
+        return f"{type(self).__name__}({campos})"
+
+
+class FichaPaciente(Ficha):
+    """Paciente de ``GET /pacientes``."""
+
+    __slots__ = ('id', 'username', 'nombre', 'apellido', 'edad', 'genero', 'estado',
+                 'id_enfermero', 'id_medico', 'id_habitacion')
+    id: str
+    username: str
+    nombre: Optional[str]
+    apellido: Optional[str]
+    edad: Optional[int]
+    genero: Optional[str]
+    estado: Optional[str]
+    id_enfermero: Optional[str]
+    id_medico: Optional[str]
+    id_habitacion: Optional[int]
+
+
+class FichaMedico(Ficha):
+    """Médico de ``GET /medicos``."""
+
+    __slots__ = ('id', 'username', 'especialidad', 'antiguedad')
+    id: str
+    username: str
+    especialidad: Optional[str]
+    antiguedad: Optional[int]
+
+
+class FichaEnfermero(Ficha):
+    """Enfermero de ``GET /enfermeros`` (la API llama ``antieguedad`` a la antigüedad)."""
+
+    __slots__ = ('id', 'username', 'antiguedad', 'especialidad')
+    ALIAS = {'antieguedad': 'antiguedad'}
+    id: str
+    username: str
+    antiguedad: Optional[int]
+    especialidad: Optional[str]
+
+
+class FichaAuxiliar(Ficha):
+    """Auxiliar de ``GET /auxiliares``."""
+
+    __slots__ = ('id', 'antiguedad', 'id_enfermero')
+    id: str
+    antiguedad: Optional[int]
+    id_enfermero: Optional[str]
+
+
+class FichaHabitacion(Ficha):
+    """Habitación de ``GET /habitaciones``."""
+
+    __slots__ = ('numero', 'capacidad', 'limpia')
+    numero: int
+    capacidad: Optional[int]
+    limpia: bool
+
+
+def _segmento(valor: Any) -> str:
+    """Valor escapado para ir en la ruta."""
+    return quote(str(valor), safe='')
+
+
+class ClienteAsync:
+    """
+    Cliente asíncrono de la API con peticiones simultáneas limitadas.
+
+    Parámetros:
+        url (str, opcional): URL base de la API.
+        auth (Tuple[str, str], opcional): Usuario y contraseña (HTTP Basic).
+        rol (str, opcional): Rol que se envía en X-ROL.
+        concurrencia (int, opcional): Peticiones simultáneas como máximo (y conexiones del pool).
+        **opciones: Otros argumentos de ``ClienteAPI`` (``timeout``, ``reintentos``, ``espera_s``).
+    """
+
+    def __init__(self, url: str = URL_API, auth: Optional[Tuple[str, str]] = None, rol: Optional[str] = None,
+                 concurrencia: int = CONCURRENCIA, **opciones: Any) -> None:
+        self.concurrencia = max(1, concurrencia)
+        self.auth = auth
+        self.cabeceras = {'X-ROL': rol} if rol else {}
+        self.cliente = ClienteAPI(url, conexiones=self.concurrencia, **opciones)
+        self._hilos = ThreadPoolExecutor(self.concurrencia, thread_name_prefix='cliente-async')
+        self._limite = asyncio.Semaphore(self.concurrencia)
+
+    # --- Peticiones ---
+
+    async def peticion(self, metodo: str, ruta: str, datos: Any = None,
+                       params: Optional[Dict[str, Any]] = None) -> requests.Response:
+        """
+        Hace una petición y devuelve la respuesta tal cual (también si es 4xx o 5xx).
+
+        Excepciones:
+            requests.ConnectionError: Si no se puede conectar tras los reintentos.
+            requests.Timeout: Si el servidor no responde a tiempo.
+        """
+        async with self._limite:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._hilos, partial(self.cliente.peticion, metodo, ruta, datos, params, self.auth, self.cabeceras))
+
+    async def pedir(self, metodo: str, ruta: str, datos: Any = None, params: Optional[Dict[str, Any]] = None,
+                    opcional: bool = False) -> Any:
+        """
+        Hace una petición y devuelve su JSON.
+
+        Parámetros:
+            metodo (str): Método HTTP.
+            ruta (str): Ruta del endpoint.
+            datos (Any, opcional): Cuerpo JSON.
+            params (Dict[str, Any], opcional): Parámetros de la URL.
+            opcional (bool, opcional): Si un 404 devuelve None en lugar de lanzar la excepción.
+
+        Devuelve:
+            Any: El cuerpo de la respuesta.
+
+        Excepciones:
+            requests.HTTPError: Si la respuesta es 4xx o 5xx.
+        """
+        respuesta = await self.peticion(metodo, ruta, datos, params)
+        if opcional and respuesta.status_code == 404:
+            return None
+        respuesta.raise_for_status()
+        return respuesta.json()
+
+    async def _listar(self, ruta: str, tipo: Type[F], por_pagina: int) -> AsyncIterator[F]:
+        """Recorre un listado página a página siguiendo la cabecera Link."""
+        siguiente: Optional[str] = f"{ruta}?{urlencode({'limite': por_pagina})}"
+        while siguiente:
+            respuesta = await self.peticion('GET', siguiente)
+            respuesta.raise_for_status()
+            for elemento in respuesta.json():
+                yield tipo.desde_json(elemento)
+            siguiente = respuesta.links.get('next', {}).get('url')
+
+    async def mapear(self, metodo: str, argumentos: Iterable[Any]) -> List[Any]:
+        """
+        Llama a la vez al método ``metodo`` con cada argumento.
+
+        Parámetros:
+            metodo (str): Nombre del método, p. ej. 'consultar_sip'.
+            argumentos (Iterable[Any]): Un argumento por llamada.
+
+        Devuelve:
+            List[Any]: Los resultados, en el orden de ``argumentos``.
+        """
+        funcion = getattr(self, metodo)
+        return list(await asyncio.gather(*(funcion(argumento) for argumento in argumentos)))
+
+    # --- Listados ---
+
+    def pacientes(self, por_pagina: int = POR_PAGINA) -> AsyncIterator[FichaPaciente]:
+        """Todos los pacientes (``GET /pacientes``), página a página."""
+        return self._listar('/pacientes', FichaPaciente, por_pagina)
+
+    def medicos(self, por_pagina: int = POR_PAGINA) -> AsyncIterator[FichaMedico]:
+        """Todos los médicos (``GET /medicos``), página a página."""
+        return self._listar('/medicos', FichaMedico, por_pagina)
+
+    def enfermeros(self, por_pagina: int = POR_PAGINA) -> AsyncIterator[FichaEnfermero]:
+        """Todos los enfermeros (``GET /enfermeros``), página a página."""
+        return self._listar('/enfermeros', FichaEnfermero, por_pagina)
+
+    def auxiliares(self, por_pagina: int = POR_PAGINA) -> AsyncIterator[FichaAuxiliar]:
+        """Todos los auxiliares (``GET /auxiliares``), página a página."""
+        return self._listar('/auxiliares', FichaAuxiliar, por_pagina)
+
+    def habitaciones(self, por_pagina: int = POR_PAGINA) -> AsyncIterator[FichaHabitacion]:
+        """Todas las habitaciones (``GET /habitaciones``), página a página."""
+        return self._listar('/habitaciones', FichaHabitacion, por_pagina)
+
+    async def citas(self) -> List[Dict[str, Any]]:
+        """Citas registradas (``GET /citas``)."""
+        return await self.pedir('GET', '/citas')
+
+    async def menu(self) -> Dict[str, Any]:
+        """Rol y opciones de menú del usuario (``GET /menu``)."""
+        return await self.pedir('GET', '/menu')
+
+    # --- Altas, bajas y asignaciones ---
+
+    async def alta(self, entidad: str, **campos: Any) -> str:
+        """
+        Da de alta un paciente, médico, enfermero, auxiliar o habitación (``POST /<entidad>/alta``).
+
+        Parámetros:
+            entidad (str): 'pacientes', 'medicos', 'enfermeros', 'auxiliares' o 'habitaciones'.
+            **campos: Campos del alta, los mismos que en el menú.
+
+        Devuelve:
+            str: Mensaje de la API.
+        """
+        return (await self.pedir('POST', f'/{entidad}/alta', campos))['mensaje']
+
+    async def baja(self, entidad: str, id_elemento: Any) -> str:
+        """Da de baja un elemento (``DELETE /<entidad>/baja/<id>``); devuelve el mensaje de la API."""
+        return (await self.pedir('DELETE', f'/{entidad}/baja/{_segmento(id_elemento)}'))['mensaje']
+
+    async def registrar(self, entidad: str, **campos: Any) -> str:
+        """Registro de un paciente, médico o enfermero (``POST /<entidad>/register``); devuelve el mensaje."""
+        return (await self.pedir('POST', f'/{entidad}/register', campos))['message']
+
+    async def alta_masiva(self, entidad: str, elementos: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Da de alta muchos elementos de una vez (``POST /bulk/<entidad>``, solo administradores).
+
+        Devuelve:
+            List[Dict[str, Any]]: El resultado de cada elemento y, al final, el resumen (ver altas_masivas.py).
+        """
+        async with self._limite:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._hilos, lambda: list(self.cliente.pedir_ndjson(f'/bulk/{entidad}', elementos,
+                                                                    self.auth, self.cabeceras)))
+
+    async def limpiar_habitacion(self, numero: int) -> str:
+        """Marca una habitación como limpia (``PATCH /habitaciones/limpiar/<numero>``)."""
+        return (await self.pedir('PATCH', f'/habitaciones/limpiar/{int(numero)}'))['mensaje']
+
+    async def asignar_medico(self, id_paciente: str, id_medico: str) -> str:
+        """Asigna un médico a un paciente (``POST /pacientes/asignar_medico``)."""
+        datos = {'id_paciente': id_paciente, 'id_medico': id_medico}
+        return (await self.pedir('POST', '/pacientes/asignar_medico', datos))['mensaje']
+
+    async def asignar_habitacion(self, id_paciente: str, numero: int) -> str:
+        """Asigna una habitación a un paciente (``POST /pacientes/asignar_habitacion``)."""
+        datos = {'id_paciente': id_paciente, 'numero': numero}
+        return (await self.pedir('POST', '/pacientes/asignar_habitacion', datos))['mensaje']
+
+    async def crear_usuario(self, username: str, password: str, rol: str, id_entidad: str) -> Dict[str, Any]:
+        """Cuenta para un auxiliar, secretario o paramédico (``POST /usuarios``, solo administradores)."""
+        datos = {'username': username, 'password': password, 'rol': rol, 'id': id_entidad}
+        return await self.pedir('POST', '/usuarios', datos)
+
+    async def eliminar_usuario(self, username: str) -> Dict[str, Any]:
+        """Borra una cuenta creada con ``crear_usuario`` (``DELETE /usuarios/<username>``)."""
+        return await self.pedir('DELETE', f'/usuarios/{_segmento(username)}')
+
+    # --- SIP ---
+
+    async def crear_sip(self, id_paciente: str) -> Any:
+        """Crea el SIP de un paciente (``GET /crear_sip/<id>``) y lo devuelve."""
+        return (await self.pedir('GET', f'/crear_sip/{_segmento(id_paciente)}'))['sip']
+
+    async def consultar_sip(self, id_paciente: str) -> Optional[Any]:
+        """SIP de un paciente (``GET /consultar_sip/<id>``), o None si no tiene."""
+        respuesta = await self.pedir('GET', f'/consultar_sip/{_segmento(id_paciente)}', opcional=True)
+        return None if respuesta is None else respuesta['sip']
+
+    async def eliminar_sip(self, id_paciente: str) -> str:
+        """Elimina el SIP de un paciente (``DELETE /eliminar_sip/<id>``)."""
+        return (await self.pedir('DELETE', f'/eliminar_sip/{_segmento(id_paciente)}'))['mensaje']
+
+    # --- Pacientes ---
+
+    async def pedir_cita(self, tipo_cita: str, fecha_hora: str, **campos: Any) -> str:
+        """
+        Pide una cita como paciente (``POST /cita/pedir``).
+
+        Parámetros:
+            tipo_cita (str): 'presencial', 'telefonica' o 'urgencias'.
+            fecha_hora (str): YYYY-MM-DDTHH:MM:SS.
+            **campos: ``medico``, ``motivo`` y ``centro``, ``telefono_contacto`` o ``nivel_prioridad``.
+
+        Devuelve:
+            str: Id de la cita.
+        """
+        datos = dict(campos, tipo_cita=tipo_cita, fecha_hora=fecha_hora)
+        return (await self.pedir('POST', '/cita/pedir', datos))['id_cita']
+
+    async def descargar_pdf(self) -> str:
+        """Genera el informe PDF del paciente autenticado (``GET /paciente/descargar_pdf``); devuelve su nombre."""
+        return (await self.pedir('GET', '/paciente/descargar_pdf'))['pdf']
+
+    async def info_medicamento(self, nombre: str) -> Dict[str, Any]:
+        """Información de un medicamento (``GET /medicamento/info``)."""
+        return await self.pedir('GET', '/medicamento/info', params={'name': nombre})
+
+    # --- Agenda ---
+
+    async def agenda(self, id_medico: str, fecha: Optional[str] = None) -> Dict[str, Any]:
+        """Agenda de un médico para un día YYYY-MM-DD, hoy por defecto (``GET /medicos/<id>/agenda``)."""
+        params = {'fecha': fecha} if fecha else None
+        return await self.pedir('GET', f'/medicos/{_segmento(id_medico)}/agenda', params=params)
+
+    async def cancelar_cita(self, id_cita: str) -> str:
+        """Cancela una cita pendiente (``POST /citas/<id>/cancelar``)."""
+        return (await self.pedir('POST', f'/citas/{_segmento(id_cita)}/cancelar'))['mensaje']
+
+    async def atender_cita(self, id_cita: str) -> str:
+        """Marca una cita pendiente como atendida (``POST /citas/<id>/atender``)."""
+        return (await self.pedir('POST', f'/citas/{_segmento(id_cita)}/atender'))['mensaje']
+
+    # --- Urgencias y ambulancias ---
+
+    async def cola_urgencias(self, limite: Optional[int] = None) -> Dict[str, Any]:
+        """Pacientes en espera en urgencias (``GET /urgencias/cola``)."""
+        return await self.pedir('GET', '/urgencias/cola', params={'limite': limite} if limite else None)
+
+    async def registrar_urgencia(self, id_paciente: str, nivel_prioridad: str, motivo: str = '') -> str:
+        """Pone a un paciente en la cola de urgencias (``POST /urgencias/cola``); devuelve el id de la cita."""
+        datos = {'id_paciente': id_paciente, 'nivel_prioridad': nivel_prioridad, 'motivo': motivo}
+        return (await self.pedir('POST', '/urgencias/cola', datos))['id_cita']
+
+    async def repriorizar_urgencia(self, id_cita: str, nivel_prioridad: str) -> str:
+        """Cambia la prioridad de una cita en espera (``PATCH /urgencias/cola/<id>``)."""
+        ruta = f'/urgencias/cola/{_segmento(id_cita)}'
+        return (await self.pedir('PATCH', ruta, {'nivel_prioridad': nivel_prioridad}))['mensaje']
+
+    async def retirar_urgencia(self, id_cita: str) -> str:
+        """Retira una cita de la cola de urgencias (``DELETE /urgencias/cola/<id>``)."""
+        return (await self.pedir('DELETE', f'/urgencias/cola/{_segmento(id_cita)}'))['mensaje']
+
+    async def siguiente_urgencia(self) -> Optional[Dict[str, Any]]:
+        """Saca de la cola al siguiente paciente (``POST /urgencias/siguiente``), o None si no hay nadie."""
+        return await self.pedir('POST', '/urgencias/siguiente', opcional=True)
+
+    async def despachar_ambulancia(self, **datos: Any) -> Dict[str, Any]:
+        """Ambulancia libre más cercana a ``latitud`` y ``longitud`` o a ``zona`` (``POST /ambulancias/despachar``)."""
+        return await self.pedir('POST', '/ambulancias/despachar', datos)
+
+    async def liberar_ambulancia(self, matricula: str) -> str:
+        """Da por terminada la salida de una ambulancia (``POST /ambulancias/<matricula>/liberar``)."""
+        return (await self.pedir('POST', f'/ambulancias/{_segmento(matricula)}/liberar'))['mensaje']
+
+    async def estado_despacho(self) -> Dict[str, Any]:
+        """Ambulancias libres y en servicio (``GET /ambulancias/despacho``)."""
+        return await self.pedir('GET', '/ambulancias/despacho')
+
+    # --- Documentos de secretaría ---
+
+    async def documentos(self, id_secretario: str, limite: int = 10, sin_asignar: bool = True) -> List[Dict[str, Any]]:
+        """Próximos documentos de un secretario (``GET /secretarios/<id>/documentos``)."""
+        params = {'limite': limite, 'sin_asignar': int(sin_asignar)}
+        return await self.pedir('GET', f'/secretarios/{_segmento(id_secretario)}/documentos', params=params)
+
+    async def reclamar_documento(self, id_secretario: str) -> Optional[Dict[str, Any]]:
+        """Reclama el siguiente documento pendiente, o None si no hay (``POST .../documentos/reclamar``)."""
+        return await self.pedir('POST', f'/secretarios/{_segmento(id_secretario)}/documentos/reclamar',
+                                opcional=True)
+
+    async def cerrar_documentos(self, id_secretario: str, ids: List[Any]) -> Dict[str, Any]:
+        """Cierra documentos de un secretario (``POST .../documentos/cerrar``)."""
+        return await self.pedir('POST', f'/secretarios/{_segmento(id_secretario)}/documentos/cerrar', {'ids': ids})
+
+    async def asignar_documentos(self, id_secretario: str, ids: List[Any]) -> Dict[str, Any]:
+        """Asigna documentos a un secretario (``POST .../documentos/asignar``)."""
+        return await self.pedir('POST', f'/secretarios/{_segmento(id_secretario)}/documentos/asignar', {'ids': ids})
+
+    async def marcar_documentos_urgentes(self, ids: List[Any]) -> Dict[str, Any]:
+        """Marca documentos como urgentes (``POST /documentos/urgentes``)."""
+        return await self.pedir('POST', '/documentos/urgentes', {'ids': ids})
+
+    # --- Administración ---
+
+    async def estadisticas_sql(self, orden: str = 'total_ms', limite: Optional[int] = None) -> Dict[str, Any]:
+        """Estadísticas de las consultas SQL (``GET /admin/consultas``, solo administradores)."""
+        params = {'orden': orden, **({'limite': limite} if limite else {})}
+        return await self.pedir('GET', '/admin/consultas', params=params)
+
+    # --- Ciclo de vida ---
+
+    async def cerrar(self) -> None:
+        """Espera a las peticiones en curso y cierra los hilos y las conexiones."""
+        await asyncio.get_running_loop().run_in_executor(None, self._hilos.shutdown)
+        self.cliente.cerrar()
+
+    async def __aenter__(self) -> 'ClienteAsync':
+        return self
+
+    async def __aexit__(self, *_excepcion) -> None:
+        await self.cerrar()
+
+
+async def _en_lista(iterador: AsyncIterator[Any]) -> List[Any]:
+    return [elemento async for elemento in iterador]
+
+
+class ClienteSincrono:
+    """
+    Fachada bloqueante de ``ClienteAsync``: los mismos métodos, que devuelven el resultado directamente.
+
+    Los listados (``pacientes()``, ``medicos()``...) devuelven una lista con
+    todas las páginas; ``mapear('consultar_sip', ids)`` hace las consultas a
+    la vez, hasta ``concurrencia``.
+
+    Parámetros:
+        Los mismos que ``ClienteAsync``.
+    """
+
+    def __init__(self, *args: Any, **opciones: Any) -> None:
+        self._bucle = asyncio.new_event_loop()
+        self._hilo = threading.Thread(target=self._bucle.run_forever, name='cliente-sincrono', daemon=True)
+        self._hilo.start()
+        self.asincrono = ClienteAsync(*args, **opciones)
+
+    def _ejecutar(self, corrutina: Any) -> Any:
+        return asyncio.run_coroutine_threadsafe(corrutina, self._bucle).result()
+
+    def __getattr__(self, nombre: str) -> Any:
+        metodo = getattr(self.asincrono, nombre)
+        if nombre.startswith('_'):
+            raise AttributeError(nombre)
+        if inspect.iscoroutinefunction(metodo):
+            return lambda *args, **kwargs: self._ejecutar(metodo(*args, **kwargs))
+        if callable(metodo):
+            # Listados: devuelven un iterador asíncrono
+            def llamar(*args: Any, **kwargs: Any) -> Any:
+                resultado = metodo(*args, **kwargs)
+                return self._ejecutar(_en_lista(resultado)) if inspect.isasyncgen(resultado) else resultado
+            return llamar
+        return metodo
+
+    def cerrar(self) -> None:
+        """Cierra el cliente y detiene su bucle."""
+        self._ejecutar(self.asincrono.cerrar())
+        self._bucle.call_soon_threadsafe(self._bucle.stop)
+        self._hilo.join()
+        self._bucle.close()
+
+    def __enter__(self) -> 'ClienteSincrono':
+        return self
+
+    def __exit__(self, *_excepcion) -> None:
+        self.cerrar()
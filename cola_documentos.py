@@ -0,0 +1,185 @@
+"""
+Cola de trabajo de documentos por secretario
+============================================
+
+Cada secretario tiene su cola de documentos pendientes ('documentos' con
+su ``id_secretario``) y comparte con los demás los documentos sin asignar.
+Se atienden primero los urgentes (``prioridad`` 1) y, dentro de cada
+prioridad, por orden de llegada.
+
+La base de datos sirve cada cola ya ordenada con el índice parcial
+idx_documentos_cola (ver ``tabla_documento.py``). Encima, cada proceso
+guarda en memoria un montículo con los primeros ``TAMANO_CACHE``
+documentos de cada cola: consultar los siguientes o elegir el próximo a
+reclamar no toca la base de datos mientras la caché esté al día. Reclamar
+sí es siempre un UPDATE atómico, así que una caché desfasada nunca hace
+que dos secretarios trabajen el mismo documento: si otro se lo ha llevado,
+se pasa al siguiente.
+"""
+
+import heapq
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from Base_De_Datos.tablas import tabla_documento
+
+# Documentos de cada cola que se guardan en memoria
+TAMANO_CACHE = 64
+
+# Segundos que se da por buena una caché (cambios hechos por otros procesos)
+VIGENCIA_CACHE_S = 1.0
+
+
+class _Cache:
+    """Primeros documentos pendientes de una cola, en un montículo (-prioridad, orden)."""
+
+    __slots__ = ('monticulo', 'completa', 'cargada')
+
+    def __init__(self, filas: List[tuple], tamano: int) -> None:
+        self.monticulo = [(-fila[5], fila[0], fila) for fila in filas]
+        heapq.heapify(self.monticulo)
+        # Si la base de datos devolvió menos de las pedidas, la caché tiene la cola entera
+        self.completa = len(filas) < tamano
+        self.cargada = time.monotonic()
+
+
+class ColaDocumentos:
+    """
+    Colas de documentos de los secretarios con caché en memoria.
+
+    Parámetros:
+        tamano_cache (int, opcional): Documentos de cada cola en memoria.
+        vigencia_s (float, opcional): Segundos que se usa una caché sin releerla.
+    """
+
+    def __init__(self, tamano_cache: int = TAMANO_CACHE, vigencia_s: float = VIGENCIA_CACHE_S) -> None:
+        self.tamano_cache = tamano_cache
+        self.vigencia_s = vigencia_s
+        # Clave: id del secretario, o None para los documentos sin asignar
+        self._caches: Dict[Optional[str], _Cache] = {}
+        self._cerrojo = threading.Lock()
+
+    def _cache(self, id_secretario: Optional[str]) -> _Cache:
+        """Caché de una cola, releída si ha caducado o se ha vaciado (con el cerrojo tomado)."""
+        cache = self._caches.get(id_secretario)
+        if (cache is None or time.monotonic() - cache.cargada > self.vigencia_s
+                or (not cache.monticulo and not cache.completa)):
+            cache = _Cache(tabla_documento.leer_cola_documentos(id_secretario, self.tamano_cache),
+                           self.tamano_cache)
+            self._caches[id_secretario] = cache
+        return cache
+
+    def invalidar(self, *colas: Optional[str]) -> None:
+        """Descarta la caché de las colas indicadas (todas si no se indica ninguna)."""
+        with self._cerrojo:
+            if not colas:
+                self._caches.clear()
+            for cola in colas:
+                self._caches.pop(cola, None)
+
+    @staticmethod
+    def _describir(fila: tuple) -> Dict:
+        _orden, id_, titulo, descripcion, urgente, prioridad, id_secretario = fila
+        return {"id": id_, "titulo": titulo, "descripcion": descripcion, "urgente": bool(urgente),
+                "prioridad": prioridad, "id_secretario": id_secretario}
+
+    # --- Consulta ---
+
+    def siguientes(self, id_secretario: str, n: int = 10, sin_asignar: bool = True) -> List[Dict]:
+        """
+        Los ``n`` próximos documentos que atendería un secretario, sin reclamarlos.
+
+        Parámetros:
+            id_secretario (str): Secretario.
+            n (int, opcional): Cuántos documentos.
+            sin_asignar (bool, opcional): Si incluye los documentos sin asignar.
+
+        Devuelve:
+            List[Dict]: Documentos en el orden en que se reclamarían
+            (prioridad y llegada, mezclando su cola y los sin asignar).
+        """
+        colas = [id_secretario, None] if sin_asignar else [id_secretario]
+        if n > self.tamano_cache:
+            # Más de lo que guarda la caché: directamente del índice
+            listas = [[(-f[5], f[0], f) for f in tabla_documento.leer_cola_documentos(cola, n)] for cola in colas]
+        else:
+            with self._cerrojo:
+                listas = [heapq.nsmallest(n, self._cache(cola).monticulo) for cola in colas]
+        return [self._describir(fila) for _, _, fila in heapq.merge(*listas)][:n]
+
+    # --- Trabajo ---
+
+    def reclamar(self, id_secretario: str) -> Optional[Dict]:
+        """
+        Reclama para un secretario el documento más urgente de su cola o de los sin asignar.
+
+        Devuelve:
+            Optional[Dict]: El documento, ya 'en_proceso' y de este secretario,
+            o None si no queda ninguno.
+        """
+        while True:
+            with self._cerrojo:
+                propia, comun = self._cache(id_secretario), self._cache(None)
+                candidatas = [c for c in (propia, comun) if c.monticulo]
+                if not candidatas:
+                    return None
+                cache = min(candidatas, key=lambda c: c.monticulo[0][:2])
+                fila = heapq.heappop(cache.monticulo)[2]
+            if tabla_documento.reclamar_documento(fila[1], id_secretario):
+                documento = self._describir(fila)
+                documento["id_secretario"] = id_secretario
+                return documento
+            # Otro secretario se lo ha llevado (caché desfasada): al siguiente
+
+    def registrar(self, doc_id: str, titulo: str, descripcion: str, urgente: bool = False,
+                  id_secretario: Optional[str] = None) -> None:
+        """
+        Da de alta un documento en la cola de un secretario o sin asignar.
+
+        Excepciones:
+            ValueError: Si el documento ya existe o el secretario no existe.
+        """
+        tabla_documento.insertar_documento(doc_id, titulo, descripcion, urgente, int(urgente), id_secretario)
+        self.invalidar(id_secretario)
+
+    def marcar_urgentes(self, doc_ids: Iterable[str]) -> int:
+        """
+        Marca varios documentos como urgentes de una vez.
+
+        Devuelve:
+            int: Documentos que han pasado a urgentes.
+        """
+        cambiados = tabla_documento.marcar_documentos_urgentes(doc_ids)
+        if cambiados:
+            self.invalidar()
+        return cambiados
+
+    def asignar(self, doc_ids: Iterable[str], id_secretario: Optional[str]) -> int:
+        """
+        Mueve varios documentos pendientes a la cola de un secretario.
+
+        Excepciones:
+            ValueError: Si el secretario no existe.
+
+        Devuelve:
+            int: Documentos movidos.
+        """
+        movidos = tabla_documento.asignar_documentos(doc_ids, id_secretario)
+        if movidos:
+            # Salen de colas que no se conocen sin releerlas
+            self.invalidar()
+        return movidos
+
+    def cerrar(self, doc_ids: Iterable[str], id_secretario: str) -> int:
+        """
+        Cierra varios documentos de un secretario de una vez.
+
+        Devuelve:
+            int: Documentos cerrados.
+        """
+        cerrados = tabla_documento.cerrar_documentos(doc_ids, id_secretario)
+        if cerrados:
+            # Puede haber cerrado documentos que seguían pendientes en su cola
+            self.invalidar(id_secretario)
+        return cerrados
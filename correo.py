@@ -0,0 +1,426 @@
+"""
+Envío de correo
+===============
+
+Los correos de la aplicación no se mandan dentro de la petición que los
+genera: ``encolar`` los guarda en la bandeja de salida
+('correos_salientes', ver ``tabla_correo.py``) y vuelve enseguida. Un
+``EnviadorCorreo`` en segundo plano los reclama por lotes y los manda:
+
+- por una sola conexión SMTP que se reutiliza entre mensajes y lotes (se
+  comprueba con NOOP tras un rato sin uso y se reabre si el servidor la
+  cerró);
+- con un límite de ``CORREOS_POR_SEGUNDO`` mensajes por segundo (cubo de
+  fichas) para no superar el del proveedor;
+- reintentando los fallos temporales (respuestas 4xx, conexión caída) con
+  espera exponencial y aleatoria, hasta ``MAX_INTENTOS``; las respuestas
+  5xx (dirección inexistente...) dejan el correo 'fallido' sin reintentar.
+
+Los lotes se reclaman con un UPDATE atómico, así que pueden convivir varios
+enviadores (cada uno con su propio límite). La entrega es "al menos una
+vez": si un enviador muere tras mandar un correo y antes de anotarlo, otro
+lo reenviará al vencer el plazo del lote.
+
+Configuración por variables de entorno: ``PROSALUD_SMTP_HOST``,
+``PROSALUD_SMTP_PUERTO``, ``PROSALUD_SMTP_USUARIO``, ``PROSALUD_SMTP_CLAVE``,
+``PROSALUD_SMTP_STARTTLS=1``, ``PROSALUD_CORREO_REMITENTE`` y
+``PROSALUD_CORREOS_POR_SEGUNDO`` (0 sin límite).
+
+Uso::
+
+    python correo.py            # enviador en primer plano
+    python servidor.py --correo # enviador junto a la API
+"""
+
+import argparse
+import logging
+import os
+import random
+import smtplib
+import threading
+import time
+from email.header import Header
+from email.mime.text import MIMEText
+from email.utils import formatdate, make_msgid
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from Base_De_Datos.tablas import tabla_correo
+
+logger = logging.getLogger(__name__)
+
+SMTP_HOST = os.environ.get('PROSALUD_SMTP_HOST', 'localhost')
+SMTP_PUERTO = int(os.environ.get('PROSALUD_SMTP_PUERTO', '25'))
+SMTP_USUARIO = os.environ.get('PROSALUD_SMTP_USUARIO')
+SMTP_CLAVE = os.environ.get('PROSALUD_SMTP_CLAVE')
+SMTP_STARTTLS = os.environ.get('PROSALUD_SMTP_STARTTLS', '0') == '1'
+REMITENTE = os.environ.get('PROSALUD_CORREO_REMITENTE', 'no-responder@prosalud.es')
+
+# Límite de envío (mensajes por segundo); 0 para no limitar
+CORREOS_POR_SEGUNDO = float(os.environ.get('PROSALUD_CORREOS_POR_SEGUNDO', '50'))
+
+# Correos que se reclaman de una vez
+TAMANO_LOTE = 100
+
+# Segundos que un lote reclamado es del enviador antes de que otro pueda reclamarlo
+PLAZO_LOTE_S = 300.0
+
+# Envíos fallidos tras los que un correo se da por perdido
+MAX_INTENTOS = 5
+
+# Espera antes del reintento n: ESPERA_BASE_S * 2**n (con azar), como mucho ESPERA_MAXIMA_S
+ESPERA_BASE_S = 30.0
+ESPERA_MAXIMA_S = 3600.0
+
+# Segundos sin usar la conexión SMTP tras los que se comprueba antes de reutilizarla
+INACTIVIDAD_SMTP_S = 30.0
+
+# Segundos entre consultas a la bandeja cuando está vacía
+ESPERA_BANDEJA_VACIA_S = 1.0
+
+_tabla_creada = False
+
+
+def _preparar_tabla() -> None:
+    global _tabla_creada
+    if not _tabla_creada:
+        tabla_correo.crear_tabla_correos()
+        _tabla_creada = True
+
+
+def _texto(respuesta) -> str:
+    return respuesta.decode(errors='replace') if isinstance(respuesta, bytes) else str(respuesta)
+
+
+def encolar(destinatario: str, asunto: str, cuerpo: str, remitente: Optional[str] = None) -> int:
+    """
+    Deja un correo en la bandeja de salida para que lo mande el enviador.
+
+    Parameters
+    ----------
+    destinatario : str
+        Dirección de destino.
+    asunto : str
+        Asunto del correo.
+    cuerpo : str
+        Texto del correo.
+    remitente : str, optional
+        Dirección del remitente; por defecto ``REMITENTE``.
+
+    Returns
+    -------
+    int
+        Identificador del correo en la bandeja.
+    """
+    _preparar_tabla()
+    return tabla_correo.encolar_correo(destinatario, asunto, cuerpo, remitente)
+
+
+def encolar_varios(correos: Iterable[Tuple[str, str, str, Optional[str]]]) -> int:
+    """
+    Deja varios correos (destinatario, asunto, cuerpo, remitente) en la bandeja en una transacción.
+
+    Returns
+    -------
+    int
+        Correos encolados.
+    """
+    _preparar_tabla()
+    return tabla_correo.encolar_correos(correos)
+
+
+def espera_reintento(intentos: int, base_s: float = ESPERA_BASE_S) -> float:
+    """
+    Segundos hasta reintentar un correo que ya ha fallado ``intentos`` veces.
+
+    Crece exponencialmente hasta ``ESPERA_MAXIMA_S``; el azar (entre la
+    mitad y el total) evita que los reintentos de un mismo corte lleguen
+    todos a la vez.
+
+    Returns
+    -------
+    float
+        Segundos de espera.
+    """
+    return min(ESPERA_MAXIMA_S, base_s * 2 ** intentos) * random.uniform(0.5, 1.0)
+
+
+class LimiteTasa:
+    """
+    Cubo de fichas: permite ``por_segundo`` envíos por segundo con ráfagas de hasta ``rafaga``.
+
+    Parámetros:
+        por_segundo (float): Envíos por segundo; 0 para no limitar.
+        rafaga (int, opcional): Envíos seguidos permitidos tras un rato sin enviar.
+    """
+
+    def __init__(self, por_segundo: float, rafaga: int = 10) -> None:
+        self.por_segundo = por_segundo
+        self.rafaga = max(1, rafaga)
+        self._fichas = float(self.rafaga)
+        self._ultima = time.monotonic()
+
+    def espera(self) -> float:
+        """
+        Toma una ficha si la hay.
+
+        Devuelve:
+            float: 0 si se puede enviar ya; si no, segundos hasta la siguiente ficha.
+        """
+        if self.por_segundo <= 0:
+            return 0.0
+        ahora = time.monotonic()
+        self._fichas = min(self.rafaga, self._fichas + (ahora - self._ultima) * self.por_segundo)
+        self._ultima = ahora
+        if self._fichas >= 1:
+            self._fichas -= 1
+            return 0.0
+        return (1 - self._fichas) / self.por_segundo
+
+
+class EnviadorCorreo:
+    """
+    Manda los correos de la bandeja de salida por una conexión SMTP reutilizada.
+
+    Parámetros:
+        host (str, opcional): Servidor SMTP.
+        puerto (int, opcional): Puerto del servidor.
+        usuario (str, opcional): Usuario para AUTH, si el servidor lo pide.
+        clave (str, opcional): Contraseña para AUTH.
+        starttls (bool, opcional): Si se cifra la conexión con STARTTLS.
+        remitente (str, opcional): Remitente de los correos que no traen uno.
+        por_segundo (float, opcional): Límite de envíos por segundo (0 sin límite).
+        tamano_lote (int, opcional): Correos reclamados de una vez.
+        max_intentos (int, opcional): Envíos fallidos tras los que un correo queda 'fallido'.
+        espera_base_s (float, opcional): Espera antes del primer reintento.
+        timeout_s (float, opcional): Timeout de la conexión SMTP.
+    """
+
+    def __init__(self, host: str = SMTP_HOST, puerto: int = SMTP_PUERTO, usuario: Optional[str] = SMTP_USUARIO,
+                 clave: Optional[str] = SMTP_CLAVE, starttls: bool = SMTP_STARTTLS, remitente: str = REMITENTE,
+                 por_segundo: float = CORREOS_POR_SEGUNDO, tamano_lote: int = TAMANO_LOTE,
+                 max_intentos: int = MAX_INTENTOS, espera_base_s: float = ESPERA_BASE_S,
+                 timeout_s: float = 30.0) -> None:
+        self.host = host
+        self.puerto = puerto
+        self.usuario = usuario
+        self.clave = clave
+        self.starttls = starttls
+        self.remitente = remitente
+        self.tamano_lote = tamano_lote
+        self.max_intentos = max_intentos
+        self.espera_base_s = espera_base_s
+        self.timeout_s = timeout_s
+        self.limite = LimiteTasa(por_segundo)
+        self.estadisticas: Dict[str, int] = {'enviados': 0, 'reintentos': 0, 'fallidos': 0, 'conexiones': 0}
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._ultimo_uso = 0.0
+        self._parada = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+
+    # --- Conexión SMTP ---
+
+    def _conexion(self) -> smtplib.SMTP:
+        """Conexión abierta: la de siempre si sigue viva, o una nueva."""
+        if self._smtp is not None and self._smtp.sock is None:
+            # smtplib la cerró tras una desconexión del servidor
+            self._smtp = None
+        if self._smtp is not None and time.monotonic() - self._ultimo_uso > INACTIVIDAD_SMTP_S:
+            try:
+                self._smtp.noop()
+            except (smtplib.SMTPException, OSError):
+                self.cerrar_conexion()
+        if self._smtp is None:
+            smtp = smtplib.SMTP(self.host, self.puerto, timeout=self.timeout_s)
+            try:
+                smtp.ehlo()
+                if self.starttls:
+                    smtp.starttls()
+                    smtp.ehlo()
+                if self.usuario:
+                    smtp.login(self.usuario, self.clave or '')
+            except BaseException:
+                smtp.close()
+                raise
+            self._smtp = smtp
+            self.estadisticas['conexiones'] += 1
+        self._ultimo_uso = time.monotonic()
+        return self._smtp
+
+    def cerrar_conexion(self) -> None:
+        """Cierra la conexión SMTP (se reabre sola en el siguiente envío)."""
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self._smtp.close()
+        self._smtp = None
+
+    def _reiniciar_transaccion(self) -> None:
+        """RSET tras un envío abandonado a medias; si falla, se cierra la conexión."""
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.rset()
+        except (smtplib.SMTPException, OSError):
+            self.cerrar_conexion()
+
+    def _mensaje(self, remitente: str, destinatario: str, asunto: str, cuerpo: str) -> bytes:
+        """Correo listo para DATA (MIMEText de compat32: EmailMessage cuesta varias veces más por mensaje)."""
+        mensaje = MIMEText(cuerpo, 'plain', 'utf-8')
+        mensaje['From'] = remitente
+        mensaje['To'] = destinatario
+        mensaje['Subject'] = Header(asunto, 'utf-8')
+        mensaje['Date'] = formatdate(localtime=True)
+        # Con dominio explícito: sin él make_msgid resuelve el nombre de la máquina en cada llamada
+        mensaje['Message-ID'] = make_msgid(domain=remitente.rpartition('@')[2] or 'prosalud.es')
+        return mensaje.as_bytes()
+
+    # --- Envío ---
+
+    def _esperar_ficha(self) -> None:
+        espera = self.limite.espera()
+        while espera > 0:
+            time.sleep(espera)
+            espera = self.limite.espera()
+
+    def _fallo(self, fallos: List[Tuple[int, Optional[float], str]], id_correo: int, intentos: int,
+               error: str, definitivo: bool) -> None:
+        if definitivo or intentos + 1 >= self.max_intentos:
+            fallos.append((id_correo, None, error))
+            self.estadisticas['fallidos'] += 1
+            logger.warning("Correo %s fallido: %s", id_correo, error)
+        else:
+            fallos.append((id_correo, time.time() + espera_reintento(intentos, self.espera_base_s), error))
+            self.estadisticas['reintentos'] += 1
+
+    def procesar_lote(self) -> int:
+        """
+        Reclama un lote de la bandeja, lo manda y anota el resultado.
+
+        Los enviados se marcan todos juntos al final del lote, y lo mismo
+        los fallos, aunque un error inesperado corte el lote; si la conexión
+        no puede abrirse, el resto del lote se reprograma.
+
+        Devuelve:
+            int: Correos del lote (0 si la bandeja no tenía ninguno listo).
+        """
+        lote = tabla_correo.reclamar_correos(self.tamano_lote, PLAZO_LOTE_S)
+        enviados: List[int] = []
+        fallos: List[Tuple[int, Optional[float], str]] = []
+        try:
+            for posicion, (id_correo, remitente, destinatario, asunto, cuerpo, intentos) in enumerate(lote):
+                self._esperar_ficha()
+                try:
+                    smtp = self._conexion()
+                except (smtplib.SMTPException, OSError) as e:
+                    # Sin servidor: el correo actual y los que quedan, a reintentar
+                    for id_pendiente, *_, intentos_pendiente in lote[posicion:]:
+                        self._fallo(fallos, id_pendiente, intentos_pendiente, f"Conexión SMTP: {e}", False)
+                    break
+                try:
+                    remitente = remitente or self.remitente
+                    smtp.sendmail(remitente, [destinatario], self._mensaje(remitente, destinatario, asunto, cuerpo))
+                    enviados.append(id_correo)
+                except smtplib.SMTPRecipientsRefused as e:
+                    codigo, respuesta = next(iter(e.recipients.values()))
+                    self._fallo(fallos, id_correo, intentos, f"{codigo} {_texto(respuesta)}", codigo >= 500)
+                except smtplib.SMTPResponseException as e:
+                    self._fallo(fallos, id_correo, intentos, f"{e.smtp_code} {_texto(e.smtp_error)}",
+                                e.smtp_code >= 500)
+                    if e.smtp_code == 421:
+                        # El servidor va a cerrar la conexión
+                        self.cerrar_conexion()
+                except (smtplib.SMTPServerDisconnected, OSError) as e:
+                    self.cerrar_conexion()
+                    self._fallo(fallos, id_correo, intentos, f"Conexión SMTP: {e}", False)
+                except smtplib.SMTPException as e:
+                    self._fallo(fallos, id_correo, intentos, str(e), True)
+                except ValueError as e:
+                    # Dirección o cabecera que no se puede codificar (UnicodeEncodeError...): no se
+                    # arregla reintentando. La transacción puede haber quedado a medias (MAIL sin RCPT).
+                    self._fallo(fallos, id_correo, intentos, f"Correo no válido: {e}", True)
+                    self._reiniciar_transaccion()
+        finally:
+            if enviados:
+                tabla_correo.marcar_correos_enviados(enviados)
+                self.estadisticas['enviados'] += len(enviados)
+            if fallos:
+                tabla_correo.reprogramar_correos(fallos)
+        return len(lote)
+
+    def vaciar(self, timeout_s: Optional[float] = None) -> int:
+        """
+        Procesa lotes hasta que no quede ninguno listo para enviar.
+
+        Parámetros:
+            timeout_s (float, opcional): Segundos como mucho.
+
+        Devuelve:
+            int: Correos procesados.
+        """
+        _preparar_tabla()
+        limite = None if timeout_s is None else time.monotonic() + timeout_s
+        total = 0
+        while limite is None or time.monotonic() < limite:
+            procesados = self.procesar_lote()
+            if not procesados:
+                break
+            total += procesados
+        return total
+
+    # --- En segundo plano ---
+
+    def ejecutar(self) -> None:
+        """Bucle del enviador: procesa lotes hasta ``detener``; con la bandeja vacía espera y cierra la conexión."""
+        _preparar_tabla()
+        while not self._parada.is_set():
+            try:
+                procesados = self.procesar_lote()
+            except Exception:
+                logger.exception("Error procesando la bandeja de salida")
+                procesados = 0
+            if not procesados:
+                if self._smtp is not None and time.monotonic() - self._ultimo_uso > INACTIVIDAD_SMTP_S:
+                    self.cerrar_conexion()
+                self._parada.wait(ESPERA_BANDEJA_VACIA_S)
+        self.cerrar_conexion()
+
+    def iniciar(self) -> threading.Thread:
+        """
+        Arranca el enviador en un hilo en segundo plano.
+
+        Devuelve:
+            threading.Thread: El hilo del enviador.
+        """
+        if self._hilo is None or not self._hilo.is_alive():
+            self._parada.clear()
+            self._hilo = threading.Thread(target=self.ejecutar, name='enviador-correo', daemon=True)
+            self._hilo.start()
+        return self._hilo
+
+    def detener(self, timeout_s: Optional[float] = None) -> None:
+        """Pide al hilo del enviador que termine tras el lote en curso y lo espera."""
+        self._parada.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout_s)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Enviador de la bandeja de salida de correo")
+    parser.add_argument('--host', default=SMTP_HOST)
+    parser.add_argument('--puerto', type=int, default=SMTP_PUERTO)
+    parser.add_argument('--por-segundo', type=float, default=CORREOS_POR_SEGUNDO)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    enviador = EnviadorCorreo(host=args.host, puerto=args.puerto, por_segundo=args.por_segundo)
+    logger.info("Enviando la bandeja de salida por %s:%s", args.host, args.puerto)
+    try:
+        enviador.ejecutar()
+    except KeyboardInterrupt:
+        enviador.cerrar_conexion()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,321 @@
+"""
+Credenciales
+============
+
+Cifrado y verificación de contraseñas para la API y para ``Persona``.
+
+- Cada hash guarda su algoritmo y sus parámetros: los de werkzeug
+  (``scrypt:32768:8:1$sal$hash``, ``pbkdf2:sha256:600000$sal$hash``) y los
+  de bcrypt (``$2b$12$...``, método ``bcrypt:12``). ``verificar`` admite
+  todos, así que los hashes antiguos siguen valiendo.
+- El método actual (``metodo_actual``) es, por orden: ``PROSALUD_HASH_METODO``,
+  el calibrado y guardado en la base de datos ('parametros_credenciales'),
+  o ``METODO_POR_DEFECTO``.
+- ``calibrar`` busca el coste con el que verificar una contraseña tarda
+  ``objetivo_ms`` en esta máquina (``python credenciales.py --objetivo-ms
+  100`` lo guarda para todos los procesos). Nunca baja de ``MINIMOS``.
+- Tras un inicio de sesión correcto con un hash de otro método,
+  ``rehashear`` calcula el nuevo en el servicio de cifrado, sin retrasar la
+  respuesta, y lo guarda: el coste se puede subir o bajar sin que nadie
+  tenga que cambiar su contraseña.
+
+Uso::
+
+    python credenciales.py --objetivo-ms 100                    # calibra scrypt y lo guarda
+    python credenciales.py --objetivo-ms 50 --algoritmo pbkdf2 --simular
+"""
+
+import argparse
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional, Union
+
+import bcrypt
+from werkzeug.security import check_password_hash, generate_password_hash
+
+logger = logging.getLogger(__name__)
+
+# Método si no hay otro configurado ni calibrado (el de werkzeug por defecto)
+METODO_POR_DEFECTO = 'scrypt:32768:8:1'
+
+# Latencia de verificación que busca ``calibrar`` por defecto
+OBJETIVO_MS = float(os.environ.get('PROSALUD_HASH_OBJETIVO_MS', '100'))
+
+# Coste mínimo de cada algoritmo al calibrar (N de scrypt, iteraciones de pbkdf2, rondas de bcrypt)
+MINIMOS = {'scrypt': 2 ** 14, 'pbkdf2': 100_000, 'bcrypt': 10}
+
+# Segundos que se usa el método guardado sin volver a leerlo de la base de datos
+VIGENCIA_S = 60.0
+
+# Clave del método calibrado en 'parametros_credenciales'
+CLAVE_METODO = 'metodo_hash'
+
+
+def normalizar_metodo(metodo: str) -> str:
+    """
+    Método con todos sus parámetros, como queda escrito en el hash.
+
+    ``scrypt`` → ``scrypt:32768:8:1``, ``pbkdf2`` → ``pbkdf2:sha256:600000``
+    y ``bcrypt`` → ``bcrypt:12`` (los valores por defecto de werkzeug y bcrypt).
+
+    Raises
+    ------
+    ValueError
+        Si el algoritmo no es scrypt, pbkdf2 ni bcrypt.
+    """
+    algoritmo, *parametros = metodo.split(':')
+    if algoritmo == 'scrypt':
+        por_defecto = ['32768', '8', '1']
+    elif algoritmo == 'pbkdf2':
+        por_defecto = ['sha256', '600000']
+    elif algoritmo == 'bcrypt':
+        por_defecto = ['12']
+    else:
+        raise ValueError(f"Algoritmo de cifrado no admitido: {algoritmo}")
+    return ':'.join([algoritmo] + parametros + por_defecto[len(parametros):])
+
+
+def cifrar(password: str, metodo: str) -> str:
+    """
+    Hash de una contraseña con ``metodo`` (ver ``normalizar_metodo``).
+
+    Se ejecuta en los procesos de ``servicio_hash``; desde el servidor hay
+    que usar ``servicio_hash.cifrar``.
+
+    Parameters
+    ----------
+    password : str
+        Contraseña en claro.
+    metodo : str
+        Algoritmo y parámetros.
+
+    Returns
+    -------
+    str
+        El hash, con su método.
+    """
+    algoritmo, _, parametros = normalizar_metodo(metodo).partition(':')
+    if algoritmo == 'bcrypt':
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=int(parametros))).decode('ascii')
+    return generate_password_hash(password, metodo)
+
+
+def metodo_de(hash_password: Union[str, bytes]) -> Optional[str]:
+    """
+    Método (algoritmo y parámetros) con el que se calculó un hash.
+
+    Returns
+    -------
+    Optional[str]
+        P. ej. ``scrypt:32768:8:1`` o ``bcrypt:12``; None si no se reconoce.
+    """
+    if isinstance(hash_password, bytes):
+        hash_password = hash_password.decode('ascii', 'replace')
+    if hash_password.startswith(('$2a$', '$2b$', '$2y$')):
+        return f"bcrypt:{int(hash_password.split('$')[2])}"
+    if '$' not in hash_password:
+        return None
+    try:
+        return normalizar_metodo(hash_password.split('$', 1)[0])
+    except ValueError:
+        return None
+
+
+def verificar(hash_password: Union[str, bytes], password: str) -> bool:
+    """
+    Comprueba una contraseña contra su hash, sea del método que sea.
+
+    Parameters
+    ----------
+    hash_password : Union[str, bytes]
+        Hash guardado (werkzeug o bcrypt).
+    password : str
+        Contraseña en claro.
+
+    Returns
+    -------
+    bool
+        True si coincide.
+    """
+    if isinstance(hash_password, bytes):
+        hash_password = hash_password.decode('ascii', 'replace')
+    if hash_password.startswith(('$2a$', '$2b$', '$2y$')):
+        try:
+            return bcrypt.checkpw(password.encode('utf-8'), hash_password.encode('ascii'))
+        except ValueError:
+            return False
+    return check_password_hash(hash_password, password)
+
+
+_guardado: Optional[str] = None
+_leido = float('-inf')
+_tabla_creada = False
+_cerrojo = threading.Lock()
+
+# Hilo que guarda los hashes de ``rehashear`` (se crea con el primero)
+_guardados: Optional[ThreadPoolExecutor] = None
+
+
+def metodo_actual() -> str:
+    """
+    Método con el que se cifran ahora las contraseñas.
+
+    Returns
+    -------
+    str
+        ``PROSALUD_HASH_METODO``, el calibrado o ``METODO_POR_DEFECTO``, con todos sus parámetros.
+    """
+    global _guardado, _leido, _tabla_creada
+    entorno = os.environ.get('PROSALUD_HASH_METODO')
+    if entorno:
+        return normalizar_metodo(entorno)
+    with _cerrojo:
+        if time.monotonic() - _leido >= VIGENCIA_S:
+            from Base_De_Datos.tablas import tabla_credenciales
+            if not _tabla_creada:
+                tabla_credenciales.crear_tabla_parametros_credenciales()
+                _tabla_creada = True
+            _guardado = tabla_credenciales.leer_parametro(CLAVE_METODO)
+            _leido = time.monotonic()
+        return _guardado or METODO_POR_DEFECTO
+
+
+def olvidar_metodo() -> None:
+    """Vuelve a leer el método guardado en la próxima llamada a ``metodo_actual``."""
+    global _leido
+    with _cerrojo:
+        _leido = float('-inf')
+
+
+def necesita_rehash(hash_password: Union[str, bytes]) -> bool:
+    """True si ``hash_password`` no se calculó con el método actual."""
+    return metodo_de(hash_password) != metodo_actual()
+
+
+def rehashear(password: str, guardar: Callable[[str], object]) -> bool:
+    """
+    Calcula en segundo plano el hash de ``password`` con el método actual y se lo pasa a ``guardar``.
+
+    Se usa tras verificar la contraseña con un hash anticuado. Si el
+    servicio de cifrado está lleno no hace nada: se intentará en el
+    próximo inicio de sesión.
+
+    Parameters
+    ----------
+    password : str
+        Contraseña ya verificada.
+    guardar : Callable[[str], object]
+        Guarda el hash nuevo (se llama desde un hilo propio, uno cada vez).
+
+    Returns
+    -------
+    bool
+        True si se ha encargado el cálculo.
+    """
+    # Importación diferida: servicio_hash importa este módulo
+    import servicio_hash
+
+    try:
+        futuro = servicio_hash.servicio().enviar_cifrado(password, espera_s=0)
+    except servicio_hash.ServicioSaturado:
+        return False
+
+    def guardar_resultado(futuro: 'Future[str]') -> None:
+        try:
+            guardar(futuro.result())
+        except Exception:
+            logger.exception("No se ha podido guardar el hash actualizado")
+
+    def terminado(futuro: 'Future[str]') -> None:
+        # Se llama desde el hilo que gestiona el grupo de procesos (o desde la petición, si ya ha
+        # terminado): la escritura, que puede esperar al cerrojo de SQLite, va a su propio hilo
+        global _guardados
+        with _cerrojo:
+            if _guardados is None:
+                _guardados = ThreadPoolExecutor(1, thread_name_prefix='rehashear')
+        _guardados.submit(guardar_resultado, futuro)
+
+    futuro.add_done_callback(terminado)
+    return True
+
+
+def medir_ms(metodo: str, repeticiones: int = 3) -> float:
+    """Milisegundos que tarda verificar una contraseña cifrada con ``metodo`` (el mejor de ``repeticiones``)."""
+    hash_password = cifrar('calibracion', metodo)
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        verificar(hash_password, 'calibracion')
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor * 1000
+
+
+def calibrar(objetivo_ms: float = OBJETIVO_MS, algoritmo: str = 'scrypt') -> str:
+    """
+    Método de ``algoritmo`` con el que verificar una contraseña tarda unos ``objetivo_ms`` aquí.
+
+    - scrypt: dobla N (r=8) hasta 2**16 (64 MiB por cifrado) y, si no basta, sube p.
+    - pbkdf2 (sha256): iteraciones proporcionales al tiempo medido.
+    - bcrypt: cada ronda más dobla el tiempo.
+
+    Parameters
+    ----------
+    objetivo_ms : float, optional
+        Latencia de verificación buscada.
+    algoritmo : str, optional
+        'scrypt', 'pbkdf2' o 'bcrypt'.
+
+    Returns
+    -------
+    str
+        Método con sus parámetros, nunca por debajo de ``MINIMOS``.
+
+    Raises
+    ------
+    ValueError
+        Si el algoritmo no es uno de los admitidos.
+    """
+    if algoritmo == 'scrypt':
+        medidas = {}
+        n = 2 ** 12
+        while n <= 2 ** 16:
+            medidas[n] = medir_ms(f'scrypt:{n}:8:1')
+            if medidas[n] >= objetivo_ms:
+                break
+            n *= 2
+        n = min(medidas, key=lambda m: abs(math.log(medidas[m] / objetivo_ms)))
+        p = max(1, round(objetivo_ms / medidas[n])) if n == 2 ** 16 else 1
+        return f'scrypt:{max(n, MINIMOS["scrypt"])}:8:{p}'
+    if algoritmo == 'pbkdf2':
+        base = 50_000
+        iteraciones = round(base * objetivo_ms / medir_ms(f'pbkdf2:sha256:{base}'), -3)
+        return f'pbkdf2:sha256:{max(int(iteraciones), MINIMOS["pbkdf2"])}'
+    if algoritmo == 'bcrypt':
+        rondas = 10 + round(math.log2(objetivo_ms / medir_ms('bcrypt:10')))
+        return f'bcrypt:{min(max(rondas, MINIMOS["bcrypt"]), 16)}'
+    raise ValueError(f"Algoritmo de cifrado no admitido: {algoritmo}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Calibra el coste del cifrado de contraseñas en esta máquina")
+    parser.add_argument('--objetivo-ms', type=float, default=OBJETIVO_MS,
+                        help="Latencia de verificación buscada (ms)")
+    parser.add_argument('--algoritmo', choices=['scrypt', 'pbkdf2', 'bcrypt'], default='scrypt')
+    parser.add_argument('--simular', action='store_true', help="Solo muestra el método, sin guardarlo")
+    args = parser.parse_args()
+
+    metodo = calibrar(args.objetivo_ms, args.algoritmo)
+    print(f"{metodo}: {medir_ms(metodo):.1f} ms por verificación (objetivo {args.objetivo_ms:.0f} ms)")
+    if not args.simular:
+        from Base_De_Datos.tablas import tabla_credenciales
+        tabla_credenciales.crear_tabla_parametros_credenciales()
+        tabla_credenciales.guardar_parametro(CLAVE_METODO, metodo)
+        print("Guardado: los hashes anteriores se actualizarán en el próximo inicio de sesión de cada cuenta.")
+
+
+if __name__ == '__main__':
+    main()
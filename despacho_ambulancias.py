@@ -0,0 +1,498 @@
+"""
+Central de despacho de ambulancias
+==================================
+
+Decide qué ambulancia libre sale a un aviso: la más cercana que tenga la
+tripulación necesaria (paramédicos de ``paramedicos.id_ambulancia``).
+
+Las zonas de ``ambulancias.zona`` son texto libre ("Granada 9"); sus
+coordenadas salen de un fichero local (``Base_De_Datos/zonas.csv``, o el
+de ``PROSALUD_ZONAS``) con columnas ``zona,latitud,longitud``. Si la zona
+exacta no está en el fichero se usa la de su nombre sin el número final
+(la capital de la provincia), desplazada de forma determinista hasta
+``RADIO_SUBZONA_KM`` para que las subzonas no coincidan todas en un punto.
+
+Las ambulancias libres se guardan en una rejilla uniforme de celdas de
+``CELDA_KM`` km (una por especialidad de tripulación y otra con todas);
+una búsqueda recorre anillos de celdas alrededor del aviso y se detiene en
+cuanto ningún anillo más lejano puede tener una unidad más cercana, así
+que cuesta lo mismo con 30 ambulancias que con 100.000.
+
+Las salidas se guardan en la tabla ``despachos``; su índice único parcial
+impide que dos procesos (workers de gunicorn) envíen la misma ambulancia,
+y :meth:`CentralDespacho.sincronizar` recoge las salidas y liberaciones de
+los demás procesos. También recarga la flota cuando cambian 'ambulancias' o
+'paramedicos' (altas, bajas, cambios de zona o de tripulación), hechos por
+este u otro proceso: lo detecta con los contadores de ``tabla_versiones``.
+
+Uso::
+
+    python despacho_ambulancias.py --latitud 37.18 --longitud -3.60 --especialidad "Soporte vital avanzado"
+"""
+
+import argparse
+import csv
+import hashlib
+import math
+import os
+import re
+import threading
+import time
+from types import SimpleNamespace
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from Base_De_Datos.tablas import tabla_ambulancia, tabla_versiones
+
+RUTA_ZONAS = os.environ.get('PROSALUD_ZONAS') or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'Base_De_Datos', 'zonas.csv')
+
+# Lado de las celdas de la rejilla
+CELDA_KM = 10.0
+
+# Distancia máxima de una subzona ("Granada 9") a la coordenada de su zona base
+RADIO_SUBZONA_KM = 20.0
+
+# Cada cuánto se releen las salidas en curso de los demás procesos (y se comprueba si cambió la flota)
+INTERVALO_SINCRONIZACION_S = 1.0
+
+# Tablas cuyos cambios obligan a recargar la flota
+TABLAS_FLOTA = ('ambulancias', 'paramedicos')
+
+RADIO_TIERRA_KM = 6371.0088
+KM_POR_GRADO = math.pi * RADIO_TIERRA_KM / 180
+
+_NUMERO_FINAL = re.compile(r'(\s+\d+)+$')
+
+Celda = Tuple[int, int]
+
+
+def cargar_zonas(ruta: str = RUTA_ZONAS) -> Dict[str, Tuple[float, float]]:
+    """
+    Lee las coordenadas de las zonas.
+
+    Parameters
+    ----------
+    ruta : str, optional
+        Fichero CSV con columnas zona, latitud y longitud.
+
+    Returns
+    -------
+    Dict[str, Tuple[float, float]]
+        (latitud, longitud) de cada zona.
+    """
+    with open(ruta, encoding='utf-8', newline='') as fichero:
+        return {fila['zona'].strip(): (float(fila['latitud']), float(fila['longitud']))
+                for fila in csv.DictReader(fichero)}
+
+
+def ubicar_zona(zona: str, zonas: Dict[str, Tuple[float, float]]) -> Optional[Tuple[float, float]]:
+    """
+    Coordenadas de una zona de ambulancia.
+
+    Parameters
+    ----------
+    zona : str
+        Zona tal como está en 'ambulancias' ("Granada 9").
+    zonas : Dict[str, Tuple[float, float]]
+        Resultado de :func:`cargar_zonas`.
+
+    Returns
+    -------
+    Optional[Tuple[float, float]]
+        (latitud, longitud), o None si ni la zona ni su nombre base están
+        en el fichero.
+    """
+    zona = zona.strip()
+    if zona in zonas:
+        return zonas[zona]
+    base = _NUMERO_FINAL.sub('', zona)
+    if base == zona or base not in zonas:
+        return None
+    latitud, longitud = zonas[base]
+    # Desplazamiento fijo para cada subzona (md5: no depende de PYTHONHASHSEED)
+    resumen = hashlib.md5(zona.encode('utf-8')).digest()
+    angulo = resumen[0] / 256 * 2 * math.pi
+    distancia = math.sqrt(int.from_bytes(resumen[1:3], 'big') / 65536) * RADIO_SUBZONA_KM
+    latitud += distancia * math.sin(angulo) / KM_POR_GRADO
+    longitud += distancia * math.cos(angulo) / (KM_POR_GRADO * math.cos(math.radians(latitud)))
+    return latitud, longitud
+
+
+def proyectar(latitud: float, longitud: float) -> Tuple[float, float]:
+    """Proyección sinusoidal a km: las distancias locales son casi exactas."""
+    return longitud * KM_POR_GRADO * math.cos(math.radians(latitud)), latitud * KM_POR_GRADO
+
+
+def distancia_km(latitud1: float, longitud1: float, latitud2: float, longitud2: float) -> float:
+    """Distancia por la superficie terrestre (fórmula del haversine)."""
+    fi1, fi2 = math.radians(latitud1), math.radians(latitud2)
+    a = (math.sin((fi2 - fi1) / 2) ** 2
+         + math.cos(fi1) * math.cos(fi2) * math.sin(math.radians(longitud2 - longitud1) / 2) ** 2)
+    return 2 * RADIO_TIERRA_KM * math.asin(math.sqrt(a))
+
+
+def velocidad_traslado(estado: str) -> int:
+    """Velocidad máxima (km/h) según el estado del paciente, la de ``Ambulancia.recoger_paciente``."""
+    from Clases_Base_de_datos.ambulancia import Ambulancia
+
+    # El método solo usa el estado del paciente
+    return Ambulancia.recoger_paciente(SimpleNamespace(), SimpleNamespace(estado=estado))
+
+
+class Unidad:
+    """
+    Ambulancia tal como la ve la central.
+
+    Parámetros:
+        matricula (str): Matrícula de la ambulancia.
+        zona (str): Zona de la ambulancia.
+        id_centro (str): Centro al que pertenece.
+        latitud, longitud (float): Coordenadas de la zona.
+        especialidades (Set[str]): Especialidades de sus paramédicos.
+        tripulacion (int): Número de paramédicos asignados.
+    """
+
+    __slots__ = ('matricula', 'zona', 'id_centro', 'latitud', 'longitud', 'x', 'y', 'especialidades',
+                 'tripulacion')
+
+    def __init__(self, matricula: str, zona: str, id_centro: str, latitud: float, longitud: float,
+                 especialidades: Set[str], tripulacion: int) -> None:
+        self.matricula = matricula
+        self.zona = zona
+        self.id_centro = id_centro
+        self.latitud = latitud
+        self.longitud = longitud
+        self.x, self.y = proyectar(latitud, longitud)
+        self.especialidades = especialidades
+        self.tripulacion = tripulacion
+
+
+class CentralDespacho:
+    """
+    Índice espacial de la flota con las ambulancias libres.
+
+    Parámetros:
+        zonas (Dict[str, Tuple[float, float]], opcional): Coordenadas de las
+            zonas; por defecto, las de :func:`cargar_zonas`.
+        celda_km (float, opcional): Lado de las celdas de la rejilla.
+    """
+
+    def __init__(self, zonas: Optional[Dict[str, Tuple[float, float]]] = None,
+                 celda_km: float = CELDA_KM) -> None:
+        self.zonas = zonas if zonas is not None else cargar_zonas()
+        self.celda_km = celda_km
+        self.unidades: Dict[str, Unidad] = {}
+        self.sin_ubicacion: List[str] = []
+        self.ocupadas: Set[str] = set()
+        # Una rejilla con todas las libres (clave None) y otra por especialidad.
+        # Las ambulancias de una zona comparten coordenadas, así que cada
+        # celda agrupa sus libres por zona y se compara una vez por zona.
+        self._rejillas: Dict[Optional[str], Dict[Celda, Dict[str, Set[str]]]] = {None: {}}
+        self._puntos: Dict[str, Tuple[float, float]] = {}
+        self._cerrojo = threading.Lock()
+        self._sincronizada = 0.0
+        self._version_flota: Optional[Dict[str, Tuple[int, Optional[float]]]] = None
+
+    # --- Carga y mantenimiento del índice ---
+
+    @staticmethod
+    def preparar() -> None:
+        """Crea (si faltan) la tabla 'despachos' y los contadores de cambios de la flota."""
+        tabla_ambulancia.crear_tabla_despachos()
+        tabla_versiones.crear_tabla_versiones(TABLAS_FLOTA)
+
+    def cargar(self) -> int:
+        """
+        (Re)carga la flota y las salidas en curso de la base de datos.
+
+        Devuelve:
+            int: Número de ambulancias ubicadas en la rejilla.
+        """
+        # Antes de leer la flota: un cambio durante la carga se recoge en la siguiente sincronización
+        version_flota = tabla_versiones.leer_versiones(TABLAS_FLOTA)
+        tripulaciones: Dict[str, List[str]] = {}
+        datos: Dict[str, Tuple[str, str]] = {}
+        for matricula, zona, id_centro, especialidad in tabla_ambulancia.leer_flota():
+            datos[matricula] = (zona, id_centro)
+            lista = tripulaciones.setdefault(matricula, [])
+            if especialidad is not None:
+                lista.append(especialidad)
+        unidades, sin_ubicacion = {}, []
+        for matricula, (zona, id_centro) in datos.items():
+            coordenadas = ubicar_zona(zona, self.zonas)
+            if coordenadas is None:
+                sin_ubicacion.append(matricula)
+                continue
+            tripulacion = tripulaciones[matricula]
+            unidades[matricula] = Unidad(matricula, zona, id_centro, *coordenadas,
+                                         set(tripulacion), len(tripulacion))
+        self.cargar_unidades(unidades.values(), tabla_ambulancia.leer_despachos_en_curso())
+        self.sin_ubicacion = sin_ubicacion
+        self._version_flota = version_flota
+        return len(unidades)
+
+    def cargar_unidades(self, unidades: Iterable[Unidad], ocupadas: Iterable[str] = ()) -> None:
+        """
+        Sustituye la flota del índice.
+
+        Parámetros:
+            unidades (Iterable[Unidad]): Ambulancias ya ubicadas.
+            ocupadas (Iterable[str], opcional): Matrículas con una salida en curso.
+        """
+        with self._cerrojo:
+            self.unidades = {unidad.matricula: unidad for unidad in unidades}
+            self.ocupadas = set(ocupadas) & self.unidades.keys()
+            self._rejillas = {None: {}}
+            self._puntos = {unidad.zona: (unidad.x, unidad.y) for unidad in self.unidades.values()}
+            for unidad in self.unidades.values():
+                if unidad.matricula not in self.ocupadas:
+                    self._indexar(unidad)
+            self._sincronizada = time.monotonic()
+
+    def _celda(self, x: float, y: float) -> Celda:
+        return int(math.floor(x / self.celda_km)), int(math.floor(y / self.celda_km))
+
+    def _indexar(self, unidad: Unidad) -> None:
+        if not unidad.tripulacion:
+            return  # sin paramédicos no puede salir
+        celda = self._celda(unidad.x, unidad.y)
+        for clave in (None, *unidad.especialidades):
+            celdas = self._rejillas.setdefault(clave, {})
+            celdas.setdefault(celda, {}).setdefault(unidad.zona, set()).add(unidad.matricula)
+
+    def _desindexar(self, unidad: Unidad) -> None:
+        celda = self._celda(unidad.x, unidad.y)
+        for clave in (None, *unidad.especialidades):
+            celdas = self._rejillas.get(clave, {})
+            por_zona = celdas.get(celda, {})
+            libres = por_zona.get(unidad.zona)
+            if libres is not None:
+                libres.discard(unidad.matricula)
+                if not libres:
+                    del por_zona[unidad.zona]
+                    if not por_zona:
+                        del celdas[celda]
+
+    def _marcar(self, matricula: str, ocupada: bool) -> None:
+        """Cambia la disponibilidad de una unidad en el índice (con el cerrojo tomado)."""
+        unidad = self.unidades.get(matricula)
+        if unidad is None or (matricula in self.ocupadas) == ocupada:
+            return
+        if ocupada:
+            self.ocupadas.add(matricula)
+            self._desindexar(unidad)
+        else:
+            self.ocupadas.discard(matricula)
+            self._indexar(unidad)
+
+    def sincronizar(self, forzar: bool = False) -> None:
+        """
+        Aplica las salidas y liberaciones hechas por otros procesos.
+
+        Solo relee 'despachos' si han pasado ``INTERVALO_SINCRONIZACION_S``
+        desde la última vez (o si ``forzar``); la consulta usa el índice
+        parcial de salidas en curso. Si la flota se cargó de la base de datos
+        y 'ambulancias' o 'paramedicos' han cambiado desde entonces, la recarga.
+        """
+        if not forzar and time.monotonic() - self._sincronizada < INTERVALO_SINCRONIZACION_S:
+            return
+        if self._version_flota is not None and tabla_versiones.leer_versiones(TABLAS_FLOTA) != self._version_flota:
+            self.cargar()
+            return
+        en_curso = set(tabla_ambulancia.leer_despachos_en_curso())
+        with self._cerrojo:
+            for matricula in self.ocupadas - en_curso:
+                self._marcar(matricula, False)
+            for matricula in en_curso - self.ocupadas:
+                self._marcar(matricula, True)
+            self._sincronizada = time.monotonic()
+
+    # --- Búsqueda ---
+
+    def _anillo(self, rejilla: Dict[Celda, Dict[str, Set[str]]], cx: int, cy: int,
+                radio: int) -> Iterable[Dict[str, Set[str]]]:
+        """Celdas ocupadas del anillo ``radio`` alrededor de (cx, cy)."""
+        if radio == 0:
+            if (cx, cy) in rejilla:
+                yield rejilla[(cx, cy)]
+            return
+        for dx in range(-radio, radio + 1):
+            for dy in (-radio, radio) if abs(dx) != radio else range(-radio, radio + 1):
+                por_zona = rejilla.get((cx + dx, cy + dy))
+                if por_zona:
+                    yield por_zona
+
+    def buscar(self, latitud: float, longitud: float, especialidad: Optional[str] = None,
+               tripulacion_minima: int = 1) -> Optional[Unidad]:
+        """
+        Ambulancia libre más cercana que cumple los requisitos, sin reservarla.
+
+        A igual distancia gana la zona de nombre menor y, dentro de la zona,
+        la matrícula menor.
+
+        Parámetros:
+            latitud, longitud (float): Lugar del aviso.
+            especialidad (str, opcional): Especialidad que debe tener algún
+                paramédico de la tripulación.
+            tripulacion_minima (int, opcional): Paramédicos mínimos a bordo
+                (al menos uno: las ambulancias sin tripulación no salen).
+
+        Devuelve:
+            Optional[Unidad]: La unidad elegida, o None si no hay ninguna.
+        """
+        rejilla = self._rejillas.get(especialidad)
+        if not rejilla:
+            return None
+        x, y = proyectar(latitud, longitud)
+        cx, cy = self._celda(x, y)
+        mejor = [math.inf, None, None]  # distancia², zona, matrículas libres
+        radio = 0
+        # Con pocas celdas ocupadas y lejanas los anillos saldrían más caros
+        # que recorrer esas celdas: se pasa a hacerlo al superarlas en número
+        while (2 * radio + 1) ** 2 <= len(rejilla):
+            for por_zona in self._anillo(rejilla, cx, cy, radio):
+                self._comparar(por_zona, x, y, tripulacion_minima, mejor)
+            # Las celdas de anillos posteriores están al menos a radio·celda del aviso
+            if mejor[1] is not None and mejor[0] <= (radio * self.celda_km) ** 2:
+                break
+            radio += 1
+        else:
+            for (celda_x, celda_y), por_zona in rejilla.items():
+                if max(abs(celda_x - cx), abs(celda_y - cy)) < radio:
+                    continue  # ya revisada en los anillos
+                # Distancia mínima del aviso al rectángulo de la celda
+                dx = max(celda_x * self.celda_km - x, 0.0, x - (celda_x + 1) * self.celda_km)
+                dy = max(celda_y * self.celda_km - y, 0.0, y - (celda_y + 1) * self.celda_km)
+                if dx * dx + dy * dy <= mejor[0]:
+                    self._comparar(por_zona, x, y, tripulacion_minima, mejor)
+        if mejor[1] is None:
+            return None
+        return self.unidades[min(m for m in mejor[2] if self.unidades[m].tripulacion >= tripulacion_minima)]
+
+    def _comparar(self, por_zona: Dict[str, Set[str]], x: float, y: float, tripulacion_minima: int,
+                  mejor: list) -> None:
+        """Actualiza ``mejor`` con las zonas de una celda que estén más cerca."""
+        for zona, libres in por_zona.items():
+            zx, zy = self._puntos[zona]
+            d2 = (zx - x) ** 2 + (zy - y) ** 2
+            if d2 > mejor[0] or (d2 == mejor[0] and zona > mejor[1]):
+                continue
+            if tripulacion_minima > 1 and not any(self.unidades[m].tripulacion >= tripulacion_minima
+                                                  for m in libres):
+                continue
+            mejor[:] = d2, zona, libres
+
+    def buscar_lineal(self, latitud: float, longitud: float, especialidad: Optional[str] = None,
+                      tripulacion_minima: int = 1) -> Optional[Unidad]:
+        """La misma búsqueda recorriendo todas las unidades (para comprobar :meth:`buscar`)."""
+        x, y = proyectar(latitud, longitud)
+        tripulacion_minima = max(tripulacion_minima, 1)
+        validas = [u for u in self.unidades.values()
+                   if u.matricula not in self.ocupadas and u.tripulacion >= tripulacion_minima
+                   and (especialidad is None or especialidad in u.especialidades)]
+        if not validas:
+            return None
+        return min(validas, key=lambda u: ((u.x - x) ** 2 + (u.y - y) ** 2, u.zona, u.matricula))
+
+    # --- Despacho ---
+
+    def asignar(self, latitud: float, longitud: float, especialidad: Optional[str] = None,
+                tripulacion_minima: int = 1, persistir: bool = True) -> Optional[Dict]:
+        """
+        Envía al aviso la ambulancia libre más cercana y la marca ocupada.
+
+        Parámetros:
+            latitud, longitud (float): Lugar del aviso.
+            especialidad (str, opcional): Especialidad requerida en la tripulación.
+            tripulacion_minima (int, opcional): Paramédicos mínimos a bordo.
+            persistir (bool, opcional): Si registra la salida en 'despachos'.
+
+        Excepciones:
+            ValueError: Si la base de datos rechaza el despacho por otro motivo
+            que una salida en curso de la misma ambulancia.
+
+        Devuelve:
+            Optional[Dict]: Datos de la salida (matrícula, zona, centro,
+            tripulación y distancia), o None si no hay ninguna unidad adecuada.
+        """
+        if persistir:
+            self.sincronizar()
+        while True:
+            with self._cerrojo:
+                unidad = self.buscar(latitud, longitud, especialidad, tripulacion_minima)
+                if unidad is None:
+                    return None
+                self._marcar(unidad.matricula, True)
+            distancia = distancia_km(unidad.latitud, unidad.longitud, latitud, longitud)
+            if not persistir:
+                break
+            try:
+                id_despacho = tabla_ambulancia.insertar_despacho(unidad.matricula, latitud, longitud,
+                                                                 round(distancia, 3))
+            except Exception:
+                with self._cerrojo:
+                    self._marcar(unidad.matricula, False)
+                raise
+            if id_despacho is not None:
+                break
+            # Otro proceso la ha enviado antes: queda ocupada y se prueba con la siguiente
+        return {
+            "id_despacho": id_despacho if persistir else None,
+            "matricula": unidad.matricula,
+            "zona": unidad.zona,
+            "id_centro": unidad.id_centro,
+            "tripulacion": unidad.tripulacion,
+            "especialidades": sorted(unidad.especialidades),
+            "distancia_km": round(distancia, 3),
+        }
+
+    def liberar(self, matricula: str, persistir: bool = True) -> bool:
+        """
+        Da por terminada la salida de una ambulancia, que vuelve a estar libre.
+
+        Devuelve:
+            bool: True si la ambulancia estaba ocupada.
+        """
+        if persistir:
+            cerrada = tabla_ambulancia.finalizar_despacho(matricula)
+        else:
+            cerrada = matricula in self.ocupadas
+        with self._cerrojo:
+            self._marcar(matricula, False)
+        return cerrada
+
+    def estado(self) -> Dict:
+        """Resumen de la flota: unidades ubicadas, libres, ocupadas y sin zona conocida."""
+        with self._cerrojo:
+            return {
+                "ambulancias": len(self.unidades),
+                "libres": len(self.unidades) - len(self.ocupadas),
+                "ocupadas": len(self.ocupadas),
+                "sin_ubicacion": len(self.sin_ubicacion),
+                "sin_tripulacion": sum(1 for u in self.unidades.values() if not u.tripulacion),
+                "celdas_ocupadas": len(self._rejillas[None]),
+            }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ambulancia libre más cercana a un aviso")
+    parser.add_argument('--latitud', type=float, required=True)
+    parser.add_argument('--longitud', type=float, required=True)
+    parser.add_argument('--especialidad')
+    parser.add_argument('--tripulacion-minima', type=int, default=1)
+    parser.add_argument('--enviar', action='store_true', help="Registra la salida en 'despachos'")
+    args = parser.parse_args()
+
+    CentralDespacho.preparar()
+    central = CentralDespacho()
+    inicio = time.perf_counter()
+    central.cargar()
+    print(f"Flota cargada en {(time.perf_counter() - inicio) * 1000:.1f} ms: {central.estado()}")
+    inicio = time.perf_counter()
+    salida = central.asignar(args.latitud, args.longitud, args.especialidad, args.tripulacion_minima,
+                             persistir=args.enviar)
+    print(f"{salida} ({(time.perf_counter() - inicio) * 1e6:.0f} µs)")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,8 @@
-from typing import List
+import time
+from typing import List, Optional
 from Clases_Base_de_datos.citas import Cita
 from Clases_Base_de_datos.paciente import Paciente
+from triaje import ColaTriaje, NIVELES
 
 class CitaPresencial(Cita):
 
@@ -77,6 +79,8 @@ class CitaUrgencias(Cita):
              """
         super().__init__(id_cita, paciente, medico, fecha_hora_dt, motivo)
         self.nivel_prioridad = nivel_prioridad
+        # Prioridad numérica para la cola de triaje (1 alta, 3 baja); un nivel desconocido va al final
+        self.prioridad = NIVELES.get(str(nivel_prioridad).strip().lower(), 3)
 
     def cancelar_cita(self) -> str:
         self.estado = 'Cancelada'
@@ -111,15 +115,20 @@ class GestorCitas:
                 - centro -> Centro de la cita
                 - telefono_contacto -> Telefono de contacto para la llamada
                 - nivel_prioridad: Nivel de la urgencia (aplicable a citas de urgencias).
+        cola_urgencias : ColaTriaje
+            Citas de urgencias pendientes ordenadas por prioridad y llegada (ver triaje.py).
         """
 
         self.lista_citas: List[Cita] = []
+        self.cola_urgencias = ColaTriaje()
 
     def anadir_cita(self, cita:Cita) -> None:
 
-        """ Añade una nueva cita"""
+        """ Añade una nueva cita; las de urgencias entran además en la cola de triaje"""
 
         self.lista_citas.append(cita)
+        if isinstance(cita, CitaUrgencias):
+            self.cola_urgencias.insertar(cita.id_cita, cita.prioridad, time.time(), cita)
 
     def cancelar_cita(self, id_cita : int) -> str:
 
@@ -127,18 +136,41 @@ class GestorCitas:
 
         for cita in self.lista_citas:
             if cita.id_cita == id_cita:
+                self.cola_urgencias.eliminar(id_cita)
                 return cita.cancelar_cita()
         return 'Cita no encontrada'
 
     def atender_cita(self, id_cita: int) -> str:
 
-        """ Marca que una cita ha sido atentdida dependiendo de su id"""
+        """ Marca que una cita ha sido atentdida dependiendo de su id; si es de urgencias, sale de la cola"""
 
         for cita in self.lista_citas:
             if cita.id_cita == id_cita:
+                self.cola_urgencias.eliminar(id_cita)
                 return f'La cita ha sido atendida'
         return 'Cita no encontrada'
 
+    def siguiente_urgencia(self) -> Optional[CitaUrgencias]:
+
+        """ Saca de la cola de triaje la cita de urgencias que toca atender (None si no hay)"""
+
+        extraida = self.cola_urgencias.extraer()
+        if extraida is None:
+            return None
+        return extraida[3]
+
+    def repriorizar_urgencia(self, id_cita, nivel_prioridad: str) -> bool:
+
+        """ Cambia el nivel de una cita de urgencias pendiente; devuelve False si no está en la cola"""
+
+        datos = self.cola_urgencias.datos(id_cita)
+        if datos is None:
+            return False
+        cita = datos[2]
+        cita.nivel_prioridad = nivel_prioridad
+        cita.prioridad = NIVELES.get(str(nivel_prioridad).strip().lower(), 3)
+        return self.cola_urgencias.repriorizar(id_cita, cita.prioridad)
+
     def mostrar_citas(self) -> None:
 
         """ Muestra todas las citas """
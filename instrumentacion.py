@@ -0,0 +1,332 @@
+"""
+Instrumentación de peticiones
+=============================
+
+Middleware opcional que mide, para cada endpoint de ``APIS.app``, en qué se
+va el tiempo de una petición:
+
+- ``auth``: comprobación de credenciales (``requiere_autenticacion``),
+- ``db``: consultas SQL y lectura de sus filas, tanto de SQLAlchemy como de
+  las conexiones ``sqlite3`` abiertas con ``abrir_conexion`` (ambas usan la
+  clase de conexión de ``Base_De_Datos/tablas/consultas.py``),
+- ``serializacion``: generación del JSON de respuesta,
+- ``externo``: llamadas a servicios externos (RxNorm),
+- ``otros``: el resto (lógica del endpoint, Flask...).
+
+Las fases son exclusivas: el tiempo de las consultas que se hacen durante
+la autenticación cuenta como ``db`` y no como ``auth``, de modo que la suma
+de todas las fases es el tiempo total de la petición. Construir los objetos
+del ORM a partir de las filas queda en ``otros``.
+
+Los tiempos se acumulan en histogramas en memoria del proceso y se publican
+en ``/metrics`` en formato de texto de Prometheus. Con varios trabajadores
+(gunicorn) cada proceso tiene los suyos.
+
+Además, un administrador puede añadir ``?profile=1`` a cualquier petición
+para ejecutarla bajo cProfile: el informe se guarda en ``DIR_PERFILES``
+(``.prof`` para pstats/snakeviz y ``.txt`` legible) y la respuesta lleva su
+ruta en la cabecera ``X-Perfil``.
+
+Se activa con la variable de entorno ``PROSALUD_METRICAS=1`` (o
+``python servidor.py --metricas``).
+"""
+
+import bisect
+import contextlib
+import contextvars
+import cProfile
+import io
+import logging
+import os
+import pstats
+import re
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from flask import Flask, Response, g, request
+
+from Base_De_Datos.tablas import consultas
+
+logger = logging.getLogger(__name__)
+
+ACTIVADA = os.environ.get('PROSALUD_METRICAS', '0') == '1'
+
+DIR_PERFILES = os.environ.get('PROSALUD_PERFILES', os.path.join(tempfile.gettempdir(), 'prosalud_perfiles'))
+
+FASES = ('auth', 'db', 'serializacion', 'externo', 'otros')
+
+# Límites superiores (segundos) de los cubos de los histogramas
+CUBOS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histograma:
+    """
+    Histograma acumulativo al estilo Prometheus.
+
+    Parameters
+    ----------
+    cubos : Tuple[float, ...]
+        Límites superiores de los cubos, en orden creciente.
+    """
+
+    def __init__(self, cubos: Tuple[float, ...] = CUBOS) -> None:
+        self.cubos = cubos
+        self.cuentas = [0] * (len(cubos) + 1)  # el último es +Inf
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float) -> None:
+        self.cuentas[bisect.bisect_left(self.cubos, valor)] += 1
+        self.suma += valor
+        self.total += 1
+
+    def acumulado(self) -> List[int]:
+        """Cuentas acumuladas por cubo (la última es el total, ``le="+Inf"``)."""
+        acumulado, resultado = 0, []
+        for cuenta in self.cuentas:
+            acumulado += cuenta
+            resultado.append(acumulado)
+        return resultado
+
+
+class RegistroMetricas:
+    """
+    Histogramas por (endpoint, método, fase) y contador de respuestas por código.
+
+    Todas las operaciones son seguras entre hilos.
+    """
+
+    def __init__(self) -> None:
+        self._bloqueo = threading.Lock()
+        self.histogramas: Dict[Tuple[str, str, str], Histograma] = {}
+        self.respuestas: Dict[Tuple[str, str, int], int] = {}
+
+    def registrar(self, endpoint: str, metodo: str, codigo: int, tiempos: Dict[str, float]) -> None:
+        """
+        Registra una petición terminada.
+
+        Parameters
+        ----------
+        endpoint : str
+            Regla de la ruta (``/pacientes/baja/<paciente_id>``), no la URL.
+        metodo : str
+            Método HTTP.
+        codigo : int
+            Código de estado de la respuesta.
+        tiempos : Dict[str, float]
+            Segundos por fase, incluida ``total``.
+        """
+        with self._bloqueo:
+            for fase, segundos in tiempos.items():
+                clave = (endpoint, metodo, fase)
+                histograma = self.histogramas.get(clave)
+                if histograma is None:
+                    histograma = self.histogramas[clave] = Histograma()
+                histograma.observar(segundos)
+            clave = (endpoint, metodo, codigo)
+            self.respuestas[clave] = self.respuestas.get(clave, 0) + 1
+
+    def reiniciar(self) -> None:
+        with self._bloqueo:
+            self.histogramas.clear()
+            self.respuestas.clear()
+
+    def texto_prometheus(self) -> str:
+        """
+        Exporta las métricas en el formato de texto de Prometheus (0.0.4).
+
+        Returns
+        -------
+        str
+            Métricas ``prosalud_peticion_segundos`` (histograma por fase) y
+            ``prosalud_respuestas_total`` (contador por código).
+        """
+        lineas = [
+            '# HELP prosalud_peticion_segundos Tiempo por petición y fase (auth, db, serializacion, externo, '
+            'otros, total).',
+            '# TYPE prosalud_peticion_segundos histogram',
+        ]
+        with self._bloqueo:
+            for (endpoint, metodo, fase), h in sorted(self.histogramas.items()):
+                etiquetas = f'endpoint="{_escapar(endpoint)}",metodo="{metodo}",fase="{fase}"'
+                for limite, cuenta in zip(_limites(h), h.acumulado()):
+                    lineas.append(f'prosalud_peticion_segundos_bucket{{{etiquetas},le="{limite}"}} {cuenta}')
+                lineas.append(f'prosalud_peticion_segundos_sum{{{etiquetas}}} {h.suma:.6f}')
+                lineas.append(f'prosalud_peticion_segundos_count{{{etiquetas}}} {h.total}')
+            lineas.append('# HELP prosalud_respuestas_total Respuestas por endpoint y código de estado.')
+            lineas.append('# TYPE prosalud_respuestas_total counter')
+            for (endpoint, metodo, codigo), n in sorted(self.respuestas.items()):
+                lineas.append(f'prosalud_respuestas_total{{endpoint="{_escapar(endpoint)}",metodo="{metodo}",'
+                              f'codigo="{codigo}"}} {n}')
+        return '\n'.join(lineas) + '\n'
+
+
+def _limites(histograma: Histograma) -> List[str]:
+    return [repr(c) for c in histograma.cubos] + ['+Inf']
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+METRICAS = RegistroMetricas()
+
+
+class Medicion:
+    """
+    Tiempos por fase de la petición en curso.
+
+    Mantiene una pila de fases abiertas para que el tiempo de una fase
+    anidada (p. ej. una consulta durante la autenticación) se descuente de
+    la fase que la contiene.
+    """
+
+    def __init__(self) -> None:
+        self.inicio = time.perf_counter()
+        self.tiempos: Dict[str, float] = dict.fromkeys(FASES, 0.0)
+        # Cada marco: [fase, inicio, segundos de fases hijas]
+        self._pila: List[list] = []
+
+    def sumar(self, fase: str, segundos: float) -> None:
+        """Añade ``segundos`` a ``fase`` (medidos fuera de ``abrir``/``cerrar``)."""
+        self.tiempos[fase] += segundos
+        if self._pila:
+            self._pila[-1][2] += segundos
+
+    def abrir(self, fase: str) -> None:
+        self._pila.append([fase, time.perf_counter(), 0.0])
+
+    def cerrar(self) -> None:
+        fase, inicio, hijas = self._pila.pop()
+        duracion = time.perf_counter() - inicio
+        self.tiempos[fase] += duracion - hijas
+        if self._pila:
+            self._pila[-1][2] += duracion
+
+    def resumen(self) -> Dict[str, float]:
+        """Segundos por fase, con ``otros`` como resto y ``total``."""
+        total = time.perf_counter() - self.inicio
+        tiempos = dict(self.tiempos)
+        tiempos['otros'] = max(0.0, total - sum(v for f, v in tiempos.items() if f != 'otros'))
+        tiempos['total'] = total
+        return tiempos
+
+
+_medicion: contextvars.ContextVar[Optional[Medicion]] = contextvars.ContextVar('medicion', default=None)
+
+
+@contextlib.contextmanager
+def medir(fase: str) -> Iterator[None]:
+    """
+    Atribuye a ``fase`` el tiempo del bloque ``with``.
+
+    Fuera de una petición medida (instrumentación desactivada, scripts...)
+    no hace nada.
+    """
+    medicion = _medicion.get()
+    if medicion is None:
+        yield
+        return
+    medicion.abrir(fase)
+    try:
+        yield
+    finally:
+        medicion.cerrar()
+
+
+def _sumar_db(segundos: float) -> None:
+    medicion = _medicion.get()
+    if medicion is not None:
+        medicion.sumar('db', segundos)
+
+
+def _instrumentar_json(app: Flask) -> None:
+    """Cuenta como ``serializacion`` el tiempo de ``jsonify``/``app.json.dumps``."""
+    proveedor = app.json
+    for nombre in ('dumps', 'response'):
+        original = getattr(proveedor, nombre)
+
+        def envuelta(*args, _original=original, **kwargs):
+            with medir('serializacion'):
+                return _original(*args, **kwargs)
+
+        setattr(proveedor, nombre, envuelta)
+
+
+_bloqueo_perfil = threading.Lock()
+
+
+def _nombre_fichero(ruta: str) -> str:
+    return re.sub(r'[^A-Za-z0-9]+', '_', ruta).strip('_') or 'raiz'
+
+
+def _guardar_perfil(perfil: cProfile.Profile, endpoint: str) -> str:
+    """Guarda el perfil en ``DIR_PERFILES`` (``.prof`` y ``.txt``) y devuelve la ruta del ``.prof``."""
+    os.makedirs(DIR_PERFILES, exist_ok=True)
+    base = os.path.join(DIR_PERFILES, f"{time.strftime('%Y%m%d-%H%M%S')}_{os.getpid()}_"
+                                      f"{time.perf_counter_ns() % 1_000_000:06d}_{_nombre_fichero(endpoint)}")
+    perfil.dump_stats(base + '.prof')
+    texto = io.StringIO()
+    pstats.Stats(perfil, stream=texto).sort_stats('cumulative').print_stats(40)
+    with open(base + '.txt', 'w', encoding='utf-8') as f:
+        f.write(texto.getvalue())
+    return base + '.prof'
+
+
+def instalar(app: Flask, es_administrador: Callable[[], bool]) -> None:
+    """
+    Activa la instrumentación en ``app``.
+
+    Parameters
+    ----------
+    app : Flask
+        Aplicación a instrumentar.
+    es_administrador : Callable[[], bool]
+        Indica si las credenciales de la petición en curso son de un
+        administrador (solo ellos pueden usar ``?profile=1``).
+
+    Returns
+    -------
+    None
+    """
+    consultas.observar_tiempo(_sumar_db)
+    _instrumentar_json(app)
+
+    @app.before_request
+    def _empezar_medicion():
+        g.token_medicion = _medicion.set(Medicion())
+        if request.args.get('profile') == '1' and es_administrador() and _bloqueo_perfil.acquire(blocking=False):
+            g.perfil = cProfile.Profile()
+            g.perfil.enable()
+
+    @app.after_request
+    def _anotar_respuesta(respuesta):
+        g.codigo_respuesta = respuesta.status_code
+        perfil = g.pop('perfil', None)
+        if perfil is not None:
+            perfil.disable()
+            _bloqueo_perfil.release()
+            respuesta.headers['X-Perfil'] = _guardar_perfil(perfil, request.path)
+        return respuesta
+
+    @app.teardown_request
+    def _registrar_medicion(_exc=None):
+        perfil = g.pop('perfil', None)
+        if perfil is not None:  # la petición terminó con una excepción
+            perfil.disable()
+            _bloqueo_perfil.release()
+        token = g.pop('token_medicion', None)
+        if token is None:
+            return
+        medicion = _medicion.get()
+        _medicion.reset(token)
+        regla = request.url_rule.rule if request.url_rule is not None else 'sin_ruta'
+        METRICAS.registrar(regla, request.method, g.get('codigo_respuesta', 500), medicion.resumen())
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        return Response(METRICAS.texto_prometheus(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+    logger.info("Instrumentación activada (/metrics, perfiles en %s)", DIR_PERFILES)
@@ -0,0 +1,445 @@
+"""
+Modo por lotes de la aplicación de terminal
+===========================================
+
+Ejecuta sin preguntas un fichero de órdenes contra la API, p. ej. para dar
+de alta al personal de una planta o limpiar todas sus habitaciones::
+
+    python "menu's.py" --lote ordenes.csv --usuario admin --rol medico --concurrencia 8 --informe informe.json
+
+- Formatos (según la extensión): JSON (una lista de objetos), YAML (una
+  lista; necesita PyYAML) o CSV (una fila por orden, con cabecera; las
+  celdas vacías no se envían y los enteros se envían como números). Cada
+  orden lleva una ``accion`` (ver ``ACCIONES``) y sus campos, los mismos
+  que pide el menú interactivo::
+
+      accion,entidad,id,numero,capacidad
+      alta,habitaciones,,101,2
+      limpiar,,,101,
+      baja,medicos,M7,,
+
+- Orden de ejecución: las órdenes seguidas con la misma acción (y entidad)
+  forman un tramo. Los tramos se ejecutan en el orden del fichero (un alta
+  termina antes de la limpieza que la sigue) y las órdenes de cada tramo a
+  la vez, hasta ``--concurrencia`` peticiones simultáneas, por la sesión
+  compartida de ``cliente_api.ClienteAPI`` (conexiones reutilizadas,
+  límites de tiempo y reintentos). La sesión ya repite los 429 de los
+  métodos idempotentes; los de un POST o un PATCH se repiten aquí tras el
+  ``Retry-After`` (segundos o fecha HTTP).
+- Altas: las de un tramo se envían a ``POST /bulk/<entidad>`` en bloques de
+  ``TAMANO_BLOQUE`` (ver altas_masivas.py). Si el servidor no tiene ese
+  endpoint o el usuario no es administrador, se hace un alta individual
+  (``/<entidad>/alta``) por orden.
+- Informe (``--informe``): JSON o CSV, según la extensión, con una fila por
+  orden en el orden del fichero (``CAMPOS_INFORME``). El estado es el código
+  HTTP, o 0 si la orden no es válida o no hubo respuesta. Termina con
+  código 1 si alguna orden ha fallado.
+"""
+
+import argparse
+import csv
+import getpass
+import json
+import math
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+import requests
+
+from cliente_api import ESPERA_REINTENTO_S, METODOS_IDEMPOTENTES, REINTENTOS, URL_API, ClienteAPI
+
+try:
+    import yaml
+except ImportError:  # Dependencia opcional: solo hace falta para los ficheros YAML
+    yaml = None
+
+# Peticiones simultáneas por defecto
+CONCURRENCIA = int(os.environ.get('PROSALUD_LOTE_CONCURRENCIA', '8'))
+
+# Altas por petición a /bulk/<entidad>
+TAMANO_BLOQUE = 500
+
+# Acción -> (método, ruta); los campos entre llaves salen de la orden
+ACCIONES: Dict[str, Tuple[str, str]] = {
+    'alta': ('POST', '/{entidad}/alta'),
+    'baja': ('DELETE', '/{entidad}/baja/{id}'),
+    'limpiar': ('PATCH', '/habitaciones/limpiar/{numero}'),
+    'asignar_medico': ('POST', '/pacientes/asignar_medico'),
+    'asignar_habitacion': ('POST', '/pacientes/asignar_habitacion'),
+    'crear_sip': ('GET', '/crear_sip/{id_paciente}'),
+    'consultar_sip': ('GET', '/consultar_sip/{id_paciente}'),
+    'eliminar_sip': ('DELETE', '/eliminar_sip/{id_paciente}'),
+}
+
+# Entidades que admiten alta y baja
+ENTIDADES = ('pacientes', 'medicos', 'enfermeros', 'auxiliares', 'habitaciones')
+
+# Respuestas de /bulk/<entidad> que indican que no se puede usar (se pasa a las altas individuales)
+MASIVAS_NO_DISPONIBLES = (403, 404, 405)
+
+# Columnas del informe
+CAMPOS_INFORME = ('indice', 'accion', 'metodo', 'ruta', 'estado', 'detalle', 'ms')
+
+
+def _valor_csv(texto: str) -> Any:
+    """Valor de una celda CSV: None si está vacía, int si es un entero sin ceros a la izquierda."""
+    if texto is None or texto == '':
+        return None
+    if re.fullmatch(r'-?[1-9][0-9]*|0', texto):
+        return int(texto)
+    return texto
+
+
+def leer_ordenes(ruta: str) -> List[Dict[str, Any]]:
+    """
+    Lee un fichero de órdenes JSON, YAML o CSV.
+
+    Parameters
+    ----------
+    ruta : str
+        Fichero ``.json``, ``.yaml``/``.yml`` o ``.csv``.
+
+    Returns
+    -------
+    List[Dict[str, Any]]
+        Las órdenes, en el orden del fichero.
+
+    Raises
+    ------
+    ValueError
+        Si la extensión no es de un formato admitido o el contenido no es una lista de objetos.
+    RuntimeError
+        Si el fichero es YAML y PyYAML no está instalado.
+    """
+    extension = os.path.splitext(ruta)[1].lower()
+    with open(ruta, encoding='utf-8', newline='') as fichero:
+        if extension == '.csv':
+            ordenes = [{clave: _valor_csv(valor) for clave, valor in fila.items()}
+                       for fila in csv.DictReader(fichero)]
+        elif extension in ('.yaml', '.yml'):
+            if yaml is None:
+                raise RuntimeError("Para leer órdenes en YAML hace falta PyYAML (pip install pyyaml).")
+            ordenes = yaml.safe_load(fichero)
+        elif extension == '.json':
+            ordenes = json.load(fichero)
+        else:
+            raise ValueError(f"Formato no admitido: '{extension}'. Usa .json, .yaml, .yml o .csv.")
+    if not isinstance(ordenes, list) or not all(isinstance(orden, dict) for orden in ordenes):
+        raise ValueError("El fichero debe contener una lista de órdenes (objetos con 'accion').")
+    return ordenes
+
+
+def preparar(orden: Dict[str, Any]) -> Tuple[str, str, Optional[Dict[str, Any]]]:
+    """
+    Petición HTTP de una orden.
+
+    Parameters
+    ----------
+    orden : Dict[str, Any]
+        ``accion`` y sus campos; los que no van en la ruta forman el cuerpo.
+
+    Returns
+    -------
+    Tuple[str, str, Optional[Dict[str, Any]]]
+        Método, ruta y cuerpo JSON (None si no lleva).
+
+    Raises
+    ------
+    ValueError
+        Si la acción o la entidad no existen o falta un campo de la ruta.
+    """
+    campos = {clave: valor for clave, valor in orden.items() if valor not in (None, '')}
+    accion = campos.pop('accion', None)
+    if accion not in ACCIONES:
+        raise ValueError(f"Acción desconocida: {accion!r}. Opciones: {', '.join(ACCIONES)}.")
+    metodo, plantilla = ACCIONES[accion]
+    if '{entidad}' in plantilla and campos.get('entidad') not in ENTIDADES:
+        raise ValueError(f"Entidad desconocida: {campos.get('entidad')!r}. Opciones: {', '.join(ENTIDADES)}.")
+    if accion == 'baja' and campos['entidad'] == 'habitaciones' and 'id' not in campos:
+        # Las habitaciones se identifican por su número
+        campos['id'] = campos.pop('numero', None)
+    en_ruta = re.findall(r'{(\w+)}', plantilla)
+    faltan = [campo for campo in en_ruta if campos.get(campo) is None]
+    if faltan:
+        raise ValueError(f"Campo requerido faltante: {', '.join(faltan)}")
+    ruta = plantilla.format(**{campo: quote(str(campos.pop(campo)), safe='') for campo in en_ruta})
+    return metodo, ruta, (campos or None) if metodo in ('POST', 'PATCH') else None
+
+
+def tramos(ordenes: List[Dict[str, Any]]) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+    """
+    Agrupa las órdenes seguidas con la misma acción y entidad.
+
+    Returns
+    -------
+    Iterator[List[Tuple[int, Dict[str, Any]]]]
+        (índice en el fichero, orden) de cada tramo, en orden.
+    """
+    tramo: List[Tuple[int, Dict[str, Any]]] = []
+    for indice, orden in enumerate(ordenes):
+        if tramo and (orden.get('accion'), orden.get('entidad')) != (tramo[0][1].get('accion'),
+                                                                     tramo[0][1].get('entidad')):
+            yield tramo
+            tramo = []
+        tramo.append((indice, orden))
+    if tramo:
+        yield tramo
+
+
+def _espera_reintento(respuesta: requests.Response, intento: int) -> float:
+    """
+    Segundos que esperar antes de repetir una petición rechazada con 429.
+
+    Usa el ``Retry-After`` de la respuesta, en segundos o como fecha HTTP;
+    si no lo trae o no se entiende, la espera del reintento ``intento``
+    (``ESPERA_REINTENTO_S`` doblada en cada uno).
+
+    Returns
+    -------
+    float
+        Segundos de espera (nunca negativos).
+    """
+    valor = respuesta.headers.get('Retry-After', '').strip()
+    try:
+        segundos = float(valor)
+    except ValueError:
+        try:
+            fecha = parsedate_to_datetime(valor)
+        except (TypeError, ValueError):
+            return ESPERA_REINTENTO_S * 2 ** intento
+        if fecha.tzinfo is None:
+            fecha = fecha.replace(tzinfo=timezone.utc)
+        segundos = (fecha - datetime.now(timezone.utc)).total_seconds()
+    if not math.isfinite(segundos):
+        return ESPERA_REINTENTO_S * 2 ** intento
+    return max(0.0, segundos)
+
+
+def _detalle(respuesta: requests.Response) -> str:
+    """Mensaje, error o cuerpo de una respuesta, para el informe."""
+    try:
+        cuerpo = respuesta.json()
+    except ValueError:
+        return respuesta.text[:500]
+    if isinstance(cuerpo, dict):
+        for clave in ('mensaje', 'error', 'detail'):
+            if clave in cuerpo:
+                return str(cuerpo[clave])
+    return json.dumps(cuerpo, ensure_ascii=False)
+
+
+class EjecutorLotes:
+    """
+    Ejecuta órdenes contra la API por tramos, con peticiones simultáneas y altas masivas.
+
+    Parámetros:
+        cliente (ClienteAPI): Sesión con la API; su pool debe admitir ``concurrencia`` conexiones.
+        auth (Tuple[str, str], opcional): Usuario y contraseña (HTTP Basic).
+        rol (str, opcional): Rol que se envía en X-ROL.
+        concurrencia (int, opcional): Peticiones simultáneas.
+        masivas (bool, opcional): Si se usan las altas masivas (``/bulk/<entidad>``).
+    """
+
+    def __init__(self, cliente: ClienteAPI, auth: Optional[Tuple[str, str]] = None, rol: Optional[str] = None,
+                 concurrencia: int = CONCURRENCIA, masivas: bool = True) -> None:
+        self.cliente = cliente
+        self.auth = auth
+        self.cabeceras = {'X-ROL': rol} if rol else {}
+        self.concurrencia = max(1, concurrencia)
+        self.masivas = masivas
+
+    def ejecutar(self, ordenes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Ejecuta las órdenes y devuelve su resultado.
+
+        Parámetros:
+            ordenes (List[Dict[str, Any]]): Órdenes, p. ej. de ``leer_ordenes``.
+
+        Devuelve:
+            List[Dict[str, Any]]: Un resultado por orden (``CAMPOS_INFORME``), en el orden de ``ordenes``.
+        """
+        resultados: List[Dict[str, Any]] = []
+        with ThreadPoolExecutor(self.concurrencia) as hilos:
+            for tramo in tramos(ordenes):
+                accion, entidad = tramo[0][1].get('accion'), tramo[0][1].get('entidad')
+                if accion == 'alta' and entidad in ENTIDADES and self.masivas:
+                    resultados.extend(self._altas_masivas(hilos, entidad, tramo))
+                else:
+                    resultados.extend(hilos.map(lambda par: self._una(*par), tramo))
+        return resultados
+
+    def _una(self, indice: int, orden: Dict[str, Any]) -> Dict[str, Any]:
+        """Ejecuta una orden con su endpoint individual."""
+        inicio = time.perf_counter()
+        resultado = {'indice': indice, 'accion': orden.get('accion'), 'metodo': None, 'ruta': None}
+        try:
+            metodo, ruta, cuerpo = preparar(orden)
+            resultado.update(metodo=metodo, ruta=ruta)
+            for intento in range(REINTENTOS + 1):
+                respuesta = self.cliente.peticion(metodo, ruta, cuerpo, auth=self.auth, cabeceras=self.cabeceras)
+                # Un 429 se rechaza antes de hacer nada: se puede repetir también un POST (los métodos
+                # idempotentes ya los ha repetido la sesión)
+                if respuesta.status_code != 429 or metodo in METODOS_IDEMPOTENTES or intento == REINTENTOS:
+                    break
+                time.sleep(_espera_reintento(respuesta, intento))
+            resultado.update(estado=respuesta.status_code, detalle=_detalle(respuesta))
+        except ValueError as e:
+            resultado.update(estado=0, detalle=str(e))
+        except requests.RequestException as e:
+            resultado.update(estado=0, detalle=f"Sin respuesta: {e}")
+        resultado['ms'] = round((time.perf_counter() - inicio) * 1000, 1)
+        return resultado
+
+    def _altas_masivas(self, hilos: ThreadPoolExecutor, entidad: str,
+                       tramo: List[Tuple[int, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Da de alta un tramo por bloques en /bulk/<entidad>, o de una en una si no se puede."""
+        bloques = [tramo[i:i + TAMANO_BLOQUE] for i in range(0, len(tramo), TAMANO_BLOQUE)]
+        # El primer bloque va solo: si el endpoint no se puede usar, no se envía ninguno más
+        primero = self._bloque(entidad, bloques[0])
+        if primero is None:
+            self.masivas = False
+            return list(hilos.map(lambda par: self._una(*par), tramo))
+        resultados = list(primero)
+        for resultado in hilos.map(lambda bloque: self._bloque(entidad, bloque), bloques[1:]):
+            resultados.extend(resultado)
+        return resultados
+
+    def _bloque(self, entidad: str, bloque: List[Tuple[int, Dict[str, Any]]]) -> Optional[List[Dict[str, Any]]]:
+        """Un bloque de altas en /bulk/<entidad>; None si el endpoint no está disponible."""
+        inicio = time.perf_counter()
+        ruta = f'/bulk/{entidad}'
+        elementos = [{clave: valor for clave, valor in orden.items()
+                      if clave not in ('accion', 'entidad') and valor not in (None, '')} for _, orden in bloque]
+        lineas: Dict[int, Dict[str, Any]] = {}
+        sin_respuesta = "Sin resultado del servidor."
+        try:
+            for linea in self.cliente.pedir_ndjson(ruta, elementos, auth=self.auth, cabeceras=self.cabeceras):
+                if 'indice' in linea:
+                    lineas[linea['indice']] = linea
+        except requests.HTTPError as e:
+            if e.response.status_code in MASIVAS_NO_DISPONIBLES:
+                return None
+            lineas = {posicion: {'estado': e.response.status_code, 'error': _detalle(e.response)}
+                      for posicion in range(len(bloque))}
+        except (requests.RequestException, ValueError) as e:
+            # Las altas confirmadas antes del corte ya tienen su línea
+            sin_respuesta = f"Sin respuesta: {e}"
+        ms = round((time.perf_counter() - inicio) * 1000, 1)
+        resultados = []
+        for posicion, (indice, orden) in enumerate(bloque):
+            linea = lineas.get(posicion, {'estado': 0, 'error': sin_respuesta})
+            detalle = linea['error'] if 'error' in linea else f"Dado de alta: {linea.get('id')}"
+            resultados.append({'indice': indice, 'accion': orden.get('accion'), 'metodo': 'POST', 'ruta': ruta,
+                               'estado': linea['estado'], 'detalle': detalle, 'ms': ms})
+        return resultados
+
+
+def resumir(resultados: List[Dict[str, Any]], segundos: float, peticiones: int) -> Dict[str, Any]:
+    """
+    Resumen de una ejecución.
+
+    Returns
+    -------
+    Dict[str, Any]
+        ``ordenes``, ``correctas`` (2xx), ``errores``, ``segundos`` y ``peticiones`` HTTP.
+    """
+    correctas = sum(1 for resultado in resultados if 200 <= resultado['estado'] < 300)
+    return {'ordenes': len(resultados), 'correctas': correctas, 'errores': len(resultados) - correctas,
+            'segundos': round(segundos, 3), 'peticiones': peticiones}
+
+
+def escribir_informe(ruta: str, resultados: List[Dict[str, Any]], resumen: Dict[str, Any]) -> None:
+    """
+    Escribe el informe en CSV (si ``ruta`` acaba en ``.csv``) o en JSON.
+
+    Parameters
+    ----------
+    ruta : str
+        Fichero de salida.
+    resultados : List[Dict[str, Any]]
+        Resultado de cada orden.
+    resumen : Dict[str, Any]
+        Resumen de ``resumir``; solo se escribe en el JSON.
+    """
+    with open(ruta, 'w', encoding='utf-8', newline='') as fichero:
+        if ruta.lower().endswith('.csv'):
+            escritor = csv.DictWriter(fichero, fieldnames=CAMPOS_INFORME)
+            escritor.writeheader()
+            escritor.writerows(resultados)
+        else:
+            json.dump({'resumen': resumen, 'resultados': resultados}, fichero, indent=2, ensure_ascii=False)
+
+
+def ejecutar_lote(ruta: str, url: str = URL_API, auth: Optional[Tuple[str, str]] = None, rol: Optional[str] = None,
+                  concurrencia: int = CONCURRENCIA, masivas: bool = True,
+                  informe: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Lee un fichero de órdenes, lo ejecuta contra la API y escribe el informe.
+
+    Parameters
+    ----------
+    ruta : str
+        Fichero de órdenes (ver ``leer_ordenes``).
+    url : str, optional
+        URL base de la API.
+    auth : Tuple[str, str], optional
+        Usuario y contraseña.
+    rol : str, optional
+        Rol que se envía en X-ROL.
+    concurrencia : int, optional
+        Peticiones simultáneas.
+    masivas : bool, optional
+        Si se usan las altas masivas.
+    informe : str, optional
+        Fichero del informe (JSON o CSV); sin él no se escribe.
+
+    Returns
+    -------
+    Dict[str, Any]
+        Resumen de la ejecución (ver ``resumir``).
+    """
+    ordenes = leer_ordenes(ruta)
+    with ClienteAPI(url, conexiones=max(1, concurrencia)) as cliente:
+        inicio = time.perf_counter()
+        resultados = EjecutorLotes(cliente, auth, rol, concurrencia, masivas).ejecutar(ordenes)
+        resumen = resumir(resultados, time.perf_counter() - inicio, cliente.estadisticas['peticiones'])
+    if informe:
+        escribir_informe(informe, resultados, resumen)
+    return resumen
+
+
+def main(argumentos: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Ejecuta un fichero de órdenes contra la API ProSalud sin preguntas")
+    parser.add_argument('--lote', required=True, help="Fichero de órdenes (.json, .yaml, .yml o .csv)")
+    parser.add_argument('--url', default=URL_API, help="URL base de la API")
+    parser.add_argument('--usuario', help="Usuario; la contraseña se lee de PROSALUD_CLAVE o se pide")
+    parser.add_argument('--rol', choices=['paciente', 'medico', 'enfermero', 'auxiliar', 'secretario', 'paramedico'])
+    parser.add_argument('--concurrencia', type=int, default=CONCURRENCIA, help="Peticiones simultáneas")
+    parser.add_argument('--informe', help="Fichero del informe (.json o .csv)")
+    parser.add_argument('--sin-masivas', action='store_true', help="Da de alta de una en una, sin /bulk")
+    args = parser.parse_args(argumentos)
+
+    auth = None
+    if args.usuario:
+        auth = (args.usuario, os.environ.get('PROSALUD_CLAVE') or getpass.getpass(f"Contraseña de {args.usuario}: "))
+    try:
+        resumen = ejecutar_lote(args.lote, args.url, auth, args.rol, args.concurrencia, not args.sin_masivas,
+                                args.informe)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"No se pudo ejecutar el lote: {e}")
+        return 2
+    print(f"{resumen['ordenes']} órdenes en {resumen['segundos']:.2f} s ({resumen['peticiones']} peticiones): "
+          f"{resumen['correctas']} correctas, {resumen['errores']} con error")
+    if args.informe:
+        print(f"Informe: {args.informe}")
+    return 1 if resumen['errores'] else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,10 +1,17 @@
 import requests
 import json
 import os
+import sys
 import getpass  # Para entrada segura de contraseñas
 
+import lotes
+from cliente_api import URL_API, ClienteAPI
+
 # --- Configuración ---
-BASE_URL = "http://127.0.0.1:5000"  # Asegúrate de que tu API de Flask esté corriendo en este puerto
+BASE_URL = URL_API  # PROSALUD_API_URL; por defecto http://127.0.0.1:5000, donde corre la API de Flask
+
+# Sesión compartida con la API: reutiliza conexiones, con límites de tiempo, reintentos y caché (ver cliente_api.py)
+CLIENTE = ClienteAPI(BASE_URL)
 
 # --- Variables Globales para la Sesión del Usuario ---
 GLOBAL_USERNAME = None
@@ -20,31 +27,24 @@ def make_authenticated_request(method, endpoint, data=None, params=None):
     """
     headers = {"X-ROL": GLOBAL_ROLE} if GLOBAL_ROLE else {}
     auth = (GLOBAL_USERNAME, GLOBAL_PASSWORD) if GLOBAL_USERNAME and GLOBAL_PASSWORD else None
-    url = f"{BASE_URL}{endpoint}"
 
-    try:
-        if method == "GET":
-            response = requests.get(url, auth=auth, headers=headers, params=params)
-        elif method == "POST":
-            response = requests.post(url, json=data, auth=auth, headers=headers, params=params)
-        elif method == "DELETE":
-            response = requests.delete(url, auth=auth, headers=headers, params=params)
-        elif method == "PATCH":
-            response = requests.patch(url, json=data, auth=auth, headers=headers, params=params)
-        else:
-            print(f"Método HTTP no soportado: {method}")
-            return None
+    if method not in ("GET", "POST", "DELETE", "PATCH"):
+        print(f"Método HTTP no soportado: {method}")
+        return None
 
-        response.raise_for_status()  # Lanza una excepción HTTPError para códigos de estado 4xx/5xx
-        return response.json()
+    try:
+        return CLIENTE.pedir(method, endpoint, datos=data, params=params, auth=auth, cabeceras=headers)
     except requests.exceptions.HTTPError as e:
         print(f"Error HTTP {e.response.status_code}: {e.response.json().get('detail', e.response.text)}")
         return None
     except requests.exceptions.ConnectionError:
         print("Error de conexión: Asegúrate de que la API de Flask esté en ejecución.")
         return None
-    except json.JSONDecodeError:
-        print(f"Error al decodificar la respuesta JSON: {response.text}")
+    except requests.exceptions.Timeout:
+        print("La API no ha respondido a tiempo. Inténtalo de nuevo más tarde.")
+        return None
+    except json.JSONDecodeError as e:
+        print(f"Error al decodificar la respuesta JSON: {e.doc}")
         return None
     except Exception as e:
         print(f"Ocurrió un error inesperado: {e}")
@@ -146,6 +146,7 @@ def menu_paciente():
             GLOBAL_USERNAME = None
             GLOBAL_PASSWORD = None
             GLOBAL_ROLE = None
+            CLIENTE.vaciar_cache()
             break
 
 def menu_medico():
@@ -334,6 +335,7 @@ def menu_medico():
             GLOBAL_USERNAME = None
             GLOBAL_PASSWORD = None
             GLOBAL_ROLE = None
+            CLIENTE.vaciar_cache()
             break
 
 def menu_enfermero():
@@ -458,6 +460,7 @@ def menu_enfermero():
             GLOBAL_USERNAME = None
             GLOBAL_PASSWORD = None
             GLOBAL_ROLE = None
+            CLIENTE.vaciar_cache()
             break
 # --- Función de Inicio de Sesión ---
 
@@ -481,8 +484,7 @@ def login():
     auth = (username, password)
 
     try:
-        response = requests.get(f"{BASE_URL}/menu", auth=auth, headers=headers)
-        response.raise_for_status()  # Lanza HTTPError para 4xx/5xx
+        CLIENTE.pedir("GET", "/menu", auth=auth, cabeceras=headers)  # Lanza HTTPError para 4xx/5xx
 
         # Si la autenticación es exitosa, la API devuelve el menú.
         # Almacenamos las credenciales para futuras solicitudes.
@@ -502,6 +504,9 @@ def login():
     except requests.exceptions.ConnectionError:
         print("Error de conexión: Asegúrate de que la API de Flask esté en ejecución.")
         return False
+    except requests.exceptions.Timeout:
+        print("La API no ha respondido a tiempo. Inténtalo de nuevo más tarde.")
+        return False
     except Exception as e:
         print(f"Ocurrió un error inesperado durante el inicio de sesión: {e}")
         return False
@@ -530,6 +535,7 @@ def main():
                         menu_enfermero()
             elif choice == '0':
                 print("Saliendo de la aplicación. ¡Hasta pronto!")
+                CLIENTE.cerrar()
                 break
             else:
                 print("Opción inválida. Intenta de nuevo.")
@@ -548,4 +554,7 @@ def main():
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # Modo por lotes, sin preguntas: python "menu's.py" --lote ordenes.csv ... (ver lotes.py)
+        sys.exit(lotes.main())
     main()
\ No newline at end of file
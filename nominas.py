@@ -0,0 +1,290 @@
+"""
+Motor de nóminas vectorizado
+============================
+
+Calcula de una vez el salario mensual de toda la plantilla con NumPy, sin
+construir un objeto ``Medico``/``Enfermero``/``Auxiliar`` por trabajador
+(cada uno con su hash de contraseña en ``Persona``).
+
+Lee por columnas ``trabajadores`` (salario base, turno, rol) y la
+antigüedad de ``medicos``, ``enfermeros`` y ``auxiliares``, aplica los
+mismos tramos de antigüedad y el mismo plus de noche que los métodos
+``calculo_salario`` de cada clase, y guarda el resultado del mes en la
+tabla ``nominas`` en una sola transacción.
+
+Las operaciones se hacen en el mismo orden que en las clases
+(``incremento * salario + salario``), así que el resultado es idéntico bit
+a bit; :func:`comprobar` lo verifica contra los métodos por objeto.
+
+Uso::
+
+    python nominas.py --periodo 2026-10 --comprobar
+
+La base de datos es la compartida (``PROSALUD_BD``).
+"""
+
+import argparse
+import sqlite3
+import time
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from Base_De_Datos.tablas.tabla_nomina import conectar, crear_tabla_nominas
+
+# Por rol: límites superiores (inclusive) de los tramos de antigüedad,
+# incremento de cada tramo (uno más que límites) y plus de turno de noche.
+# Son las reglas de Medico, Enfermero y Auxiliar.calculo_salario; el resto
+# de roles (paramédicos, secretarios...) cobra su salario base.
+REGLAS: Dict[str, Tuple[Tuple[int, ...], Tuple[float, ...], float]] = {
+    'medico': ((1, 5, 10), (0.0, 0.2, 0.3, 0.5), 0.2),
+    'enfermero': ((2, 7, 12), (0.0, 0.15, 0.2, 0.3), 0.15),
+    'auxiliar': ((2, 7, 12), (0.0, 0.10, 0.15, 0.25), 0.10),
+}
+
+_SQL_PLANTILLA = """
+    SELECT t.id, t.rol, t.salario, t.turno,
+           COALESCE(m.antiguedad, e.antiguedad, a.antiguedad, 0)
+    FROM trabajadores t
+    LEFT JOIN medicos m ON t.rol = 'medico' AND m.id = t.id
+    LEFT JOIN enfermeros e ON t.rol = 'enfermero' AND e.id = t.id
+    LEFT JOIN auxiliares a ON t.rol = 'auxiliar' AND a.id = t.id
+    ORDER BY t.id
+"""
+
+
+class Plantilla:
+    """
+    Datos salariales de la plantilla, por columnas.
+
+    Parámetros:
+        ids (List[str]): Identificadores de los trabajadores.
+        roles (np.ndarray): Rol de cada trabajador.
+        salario (np.ndarray): Salario mensual base (float64).
+        turnos (List[str]): Turno tal como está guardado.
+        antiguedad (np.ndarray): Años de antigüedad (0 si el rol no la tiene).
+    """
+
+    def __init__(self, ids: List[str], roles: np.ndarray, salario: np.ndarray,
+                 turnos: List[str], antiguedad: np.ndarray) -> None:
+        self.ids = ids
+        self.roles = roles
+        self.salario = salario
+        self.turnos = turnos
+        self.antiguedad = antiguedad
+        self.noche = np.array([t.lower() == 'noche' for t in turnos], dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def leer_plantilla(conn: sqlite3.Connection) -> Plantilla:
+    """
+    Lee de una consulta las columnas que necesita la nómina.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        Conexión a la base de datos.
+
+    Returns
+    -------
+    Plantilla
+        Toda la plantilla de ``trabajadores`` ordenada por id.
+    """
+    filas = conn.execute(_SQL_PLANTILLA).fetchall()
+    if not filas:
+        vacio = np.empty(0)
+        return Plantilla([], np.empty(0, dtype=str), vacio, [], vacio.astype(np.int64))
+    ids, roles, salario, turnos, antiguedad = zip(*filas)
+    return Plantilla(list(ids), np.array(roles), np.array(salario, dtype=np.float64),
+                     list(turnos), np.array(antiguedad, dtype=np.int64))
+
+
+def salario_mensual(plantilla: Plantilla) -> np.ndarray:
+    """
+    Aplica a toda la plantilla las reglas de antigüedad y turno de noche.
+
+    Parameters
+    ----------
+    plantilla : Plantilla
+        Datos leídos con :func:`leer_plantilla`.
+
+    Returns
+    -------
+    np.ndarray
+        Salario mensual ajustado de cada trabajador, en el orden de
+        ``plantilla.ids``.
+    """
+    resultado = plantilla.salario.copy()
+    for rol, (limites, incrementos, plus_noche) in REGLAS.items():
+        mascara = plantilla.roles == rol
+        if not mascara.any():
+            continue
+        base = plantilla.salario[mascara]
+        tramo = np.searchsorted(np.asarray(limites), plantilla.antiguedad[mascara], side='left')
+        ajustado = np.asarray(incrementos)[tramo] * base + base
+        ajustado = np.where(plantilla.noche[mascara], ajustado * plus_noche + ajustado, ajustado)
+        resultado[mascara] = ajustado
+    return resultado
+
+
+def guardar_nomina(conn: sqlite3.Connection, periodo: str, plantilla: Plantilla, mensual: np.ndarray) -> int:
+    """
+    Escribe las nóminas del mes en la tabla ``nominas`` en una transacción.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        Conexión a la base de datos.
+    periodo : str
+        Mes en formato 'AAAA-MM'; sus nóminas anteriores se sustituyen.
+    plantilla : Plantilla
+        Plantilla con la que se calculó ``mensual``.
+    mensual : np.ndarray
+        Resultado de :func:`salario_mensual`.
+
+    Returns
+    -------
+    int
+        Número de nóminas escritas.
+    """
+    anual = mensual * 12
+    with conn:
+        conn.execute("DELETE FROM nominas WHERE periodo = ?", (periodo,))
+        conn.executemany(
+            "INSERT INTO nominas (periodo, id_trabajador, rol, salario_base, salario_mensual, salario_anual) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            zip([periodo] * len(plantilla), plantilla.ids, plantilla.roles.tolist(),
+                plantilla.salario.tolist(), mensual.tolist(), anual.tolist()),
+        )
+    return len(plantilla)
+
+
+def generar_nomina(periodo: str) -> Tuple[int, Dict[str, float]]:
+    """
+    Calcula y guarda la nómina de un mes de toda la plantilla.
+
+    Parameters
+    ----------
+    periodo : str
+        Mes en formato 'AAAA-MM'.
+
+    Returns
+    -------
+    Tuple[int, Dict[str, float]]
+        Nóminas escritas y segundos de cada fase (lectura, calculo, escritura).
+    """
+    crear_tabla_nominas()
+    conn = conectar()
+    try:
+        tiempos = {}
+        inicio = time.perf_counter()
+        plantilla = leer_plantilla(conn)
+        tiempos['lectura'] = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        mensual = salario_mensual(plantilla)
+        tiempos['calculo'] = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        escritas = guardar_nomina(conn, periodo, plantilla, mensual)
+        tiempos['escritura'] = time.perf_counter() - inicio
+    finally:
+        conn.close()
+    return escritas, tiempos
+
+
+def salario_por_objeto(rol: str, salario: float, turno: str, antiguedad: int) -> float:
+    """
+    Salario mensual calculado con el método ``calculo_salario`` de la clase del rol.
+
+    Los métodos solo usan el salario, la antigüedad y el turno, así que se
+    llaman sobre un objeto con esos atributos en lugar de construir el
+    trabajador completo (que valida y cifra su contraseña).
+
+    Parameters
+    ----------
+    rol : str
+        Rol del trabajador.
+    salario : float
+        Salario base.
+    turno : str
+        Turno del trabajador.
+    antiguedad : int
+        Años de antigüedad.
+
+    Returns
+    -------
+    float
+        Salario mensual ajustado.
+    """
+    from Clases_Base_de_datos.auxiliar import Auxiliar
+    from Clases_Base_de_datos.enfermero import Enfermero
+    from Clases_Base_de_datos.medico import Medico
+
+    # Auxiliar.calculo_salario lee self.salario; Medico y Enfermero, self._salario
+    datos = SimpleNamespace(_salario=salario, salario=salario, turno=turno, antiguedad=antiguedad)
+    metodo = {'medico': Medico, 'enfermero': Enfermero, 'auxiliar': Auxiliar}.get(rol)
+    return metodo.calculo_salario(datos) if metodo is not None else salario
+
+
+def comprobar(plantilla: Plantilla, mensual: Optional[np.ndarray] = None) -> List[str]:
+    """
+    Compara el cálculo vectorizado con los métodos por objeto.
+
+    Parameters
+    ----------
+    plantilla : Plantilla
+        Plantilla a comprobar.
+    mensual : np.ndarray, optional
+        Resultado de :func:`salario_mensual`; se calcula si no se pasa.
+
+    Returns
+    -------
+    List[str]
+        Identificadores cuyo salario mensual o anual no coincide exactamente
+        (vacía si todo cuadra).
+    """
+    from Clases_Base_de_datos.trabajador import Trabajador
+
+    if mensual is None:
+        mensual = salario_mensual(plantilla)
+    anual = mensual * 12
+    distintos = []
+    for i, (id_, rol, base, turno, antiguedad) in enumerate(zip(
+            plantilla.ids, plantilla.roles.tolist(), plantilla.salario.tolist(),
+            plantilla.turnos, plantilla.antiguedad.tolist())):
+        esperado = salario_por_objeto(rol, base, turno, antiguedad)
+        esperado_anual = Trabajador.calcular_salario_anual(SimpleNamespace(_salario=esperado))
+        if esperado != mensual[i] or esperado_anual != anual[i]:
+            distintos.append(id_)
+    return distintos
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Nómina mensual vectorizada de la plantilla")
+    parser.add_argument('--periodo', default=time.strftime('%Y-%m'), help="Mes de la nómina (AAAA-MM)")
+    parser.add_argument('--comprobar', action='store_true',
+                        help="Compara el resultado con los métodos calculo_salario por objeto")
+    args = parser.parse_args()
+
+    escritas, tiempos = generar_nomina(args.periodo)
+    print(f"{escritas} nóminas de {args.periodo}: lectura {tiempos['lectura'] * 1000:.1f} ms, "
+          f"cálculo {tiempos['calculo'] * 1000:.1f} ms, escritura {tiempos['escritura'] * 1000:.1f} ms")
+
+    if args.comprobar:
+        conn = conectar()
+        try:
+            plantilla = leer_plantilla(conn)
+        finally:
+            conn.close()
+        inicio = time.perf_counter()
+        distintos = comprobar(plantilla)
+        print(f"Comprobación por objeto ({time.perf_counter() - inicio:.2f} s): "
+              + ("todas coinciden" if not distintos else f"{len(distintos)} distintas, p. ej. {distintos[:5]}"))
+        if distintos:
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+"""
+Recordatorios de citas
+======================
+
+Trabajo diario que avisa a los pacientes de sus citas del día siguiente.
+
+- Lee solo las citas del día, por páginas de ``TAMANO_LOTE``, recorriendo
+  el índice de la columna normalizada 'inicio' (ver
+  ``tabla_citas.crear_columna_inicio``); cada página trae ya el contacto
+  del paciente y el nombre del centro en la misma consulta.
+- Agrupa cada página por centro en cargas de notificación (un dict por
+  centro con sus citas) y redacta de ellas un correo por cita con email.
+- Guarda los correos en la bandeja de salida (``correo.py`` los manda) y
+  anota sus citas como recordadas en una sola transacción por lote: si se
+  interrumpe, volver a lanzarlo para el mismo día continúa con las citas
+  que faltan, y las citas pedidas después de una ejecución se recuerdan en
+  la siguiente (ver ``tabla_recordatorios.py``).
+
+Uso::
+
+    python recordatorios.py                    # citas de mañana
+    python recordatorios.py --dia 2025-03-15
+    python recordatorios.py --simular          # imprime las cargas sin encolar nada
+"""
+
+import argparse
+import json
+import logging
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from Base_De_Datos.tablas import tabla_citas, tabla_recordatorios
+
+logger = logging.getLogger(__name__)
+
+# Citas por lote (una consulta y una transacción cada uno)
+TAMANO_LOTE = 500
+
+# Clave de las citas sin centro (telefónicas)
+SIN_CENTRO = 'sin_centro'
+
+# Asunto de los recordatorios ({fecha}: día de la cita, DD/MM/AAAA)
+ASUNTO = "Recordatorio: tiene una cita el {fecha}"
+
+
+def intervalo_dia(dia: date) -> Tuple[str, str]:
+    """
+    Intervalo [desde, hasta) de un día en el formato de 'inicio'.
+
+    Returns
+    -------
+    Tuple[str, str]
+        Medianoche del día y del siguiente, en ISO canónico.
+    """
+    return dia.strftime('%Y-%m-%dT00:00:00'), (dia + timedelta(days=1)).strftime('%Y-%m-%dT00:00:00')
+
+
+def agrupar_por_centro(dia: date, filas: List[tuple]) -> List[Dict]:
+    """
+    Agrupa las citas de un lote (filas de ``leer_citas_recordatorio``) en una carga por centro.
+
+    Returns
+    -------
+    List[Dict]
+        Por centro: ``{"dia", "centro": {"id", "nombre"}, "citas": [...]}``,
+        con las citas en orden de hora.
+    """
+    cargas: Dict[str, Dict] = {}
+    for (id_cita, inicio, tipo, motivo, medico, centro, nombre_centro,
+         paciente_id, nombre, apellido, email, telefono) in filas:
+        clave = centro or SIN_CENTRO
+        if clave not in cargas:
+            cargas[clave] = {"dia": dia.isoformat(), "centro": {"id": centro, "nombre": nombre_centro}, "citas": []}
+        cargas[clave]["citas"].append({
+            "id_cita": id_cita,
+            "hora": inicio[11:16],
+            "tipo": tipo,
+            "motivo": motivo,
+            "medico": medico,
+            "paciente": {"id": paciente_id, "nombre": f"{nombre or ''} {apellido or ''}".strip(),
+                         "email": email, "telefono": telefono},
+        })
+    return list(cargas.values())
+
+
+def redactar_correos(carga: Dict) -> List[Tuple[str, Tuple[str, str, str, None]]]:
+    """
+    Un recordatorio (destinatario, asunto, cuerpo, remitente) por cita cuyo paciente tiene email.
+
+    Returns
+    -------
+    List[Tuple[str, Tuple[str, str, str, None]]]
+        (id_cita, correo) con los correos para la bandeja de salida, con el remitente por defecto.
+    """
+    centro = carga["centro"]
+    asunto = ASUNTO.format(fecha=date.fromisoformat(carga["dia"]).strftime('%d/%m/%Y'))
+    correos = []
+    for cita in carga["citas"]:
+        paciente = cita["paciente"]
+        if not paciente["email"]:
+            continue
+        if cita["tipo"] == 'telefonica':
+            donde = f"Le llamaremos al {paciente['telefono']}." if paciente["telefono"] else "Le llamaremos."
+        else:
+            donde = f"Lugar: {centro['nombre'] or centro['id'] or 'su centro de salud'}."
+        cuerpo = (f"Hola {paciente['nombre']},\n\n"
+                  f"Le recordamos su cita {cita['tipo'] or ''} del {carga['dia']} a las {cita['hora']}"
+                  f"{' (' + cita['motivo'] + ')' if cita['motivo'] else ''}.\n{donde}\n\n"
+                  "Si no puede acudir, anúlela para que otro paciente pueda usar su hueco.\n\nProSalud")
+        correos.append((cita["id_cita"], (paciente["email"], asunto, cuerpo, None)))
+    return correos
+
+
+class TrabajoRecordatorios:
+    """
+    Recordatorios de las citas de un día, por lotes y reanudable.
+
+    Parámetros:
+        tamano_lote (int, opcional): Citas por lote.
+        entregar (Callable[[Dict], None], opcional): Recibe cada carga por
+            centro tras guardar su lote (p. ej. para avisos por SMS).
+    """
+
+    def __init__(self, tamano_lote: int = TAMANO_LOTE, entregar: Optional[Callable[[Dict], None]] = None) -> None:
+        self.tamano_lote = tamano_lote
+        self.entregar = entregar
+
+    @staticmethod
+    def preparar() -> None:
+        """
+        Crea (si faltan) las columnas 'inicio' y 'estado' de 'citas', el índice
+        de 'inicio', la tabla de contactos y la de progreso.
+        """
+        from Base_De_Datos.tablas.tabla_centro import crear_tabla_centros
+        from Base_De_Datos.tablas.tabla_correo import crear_tabla_correos
+        from Base_De_Datos.tablas.tabla_paciente import crear_tabla_contactos_pacientes
+
+        tabla_citas.crear_columna_inicio()
+        tabla_citas.crear_tabla_agenda()
+        crear_tabla_centros()
+        crear_tabla_contactos_pacientes()
+        crear_tabla_correos()
+        tabla_recordatorios.crear_tabla_recordatorios()
+
+    def lotes(self, dia: date, despues_de: Tuple[str, str] = ('', '')) -> Iterator[Tuple[List[tuple], List[Dict]]]:
+        """
+        Recorre las citas del día sin recordatorio por lotes, a partir de ``despues_de``.
+
+        Devuelve:
+            Iterator[Tuple[List[tuple], List[Dict]]]: Por lote, sus filas y sus cargas por centro.
+        """
+        desde, hasta = intervalo_dia(dia)
+        while True:
+            filas = tabla_citas.leer_citas_recordatorio(desde, hasta, despues_de, self.tamano_lote)
+            if not filas:
+                return
+            yield filas, agrupar_por_centro(dia, filas)
+            if len(filas) < self.tamano_lote:
+                return
+            despues_de = (filas[-1][1], filas[-1][0])
+
+    def ejecutar(self, dia: Optional[date] = None, maximo_lotes: Optional[int] = None) -> Dict[str, int]:
+        """
+        Encola los recordatorios de un día (mañana por defecto) que falten.
+
+        Cada ejecución recorre las citas del día que aún no tienen
+        recordatorio, así que se puede repetir: solo encola las nuevas.
+
+        Parámetros:
+            dia (date, opcional): Día de las citas.
+            maximo_lotes (int, opcional): Para después de tantos lotes (el resto, en la siguiente ejecución).
+
+        Devuelve:
+            Dict[str, int]: Citas, correos y lotes de esta ejecución, y si el día quedó completo.
+        """
+        dia = dia or date.today() + timedelta(days=1)
+        clave = dia.isoformat()
+        resumen = {"citas": 0, "correos": 0, "lotes": 0, "completada": 0}
+        for filas, cargas in self.lotes(dia):
+            correos = [correo for carga in cargas for correo in redactar_correos(carga)]
+            resumen["correos"] += tabla_recordatorios.guardar_lote_recordatorios(
+                clave, (filas[-1][1], filas[-1][0]), [fila[0] for fila in filas], correos)
+            resumen["citas"] += len(filas)
+            resumen["lotes"] += 1
+            if self.entregar is not None:
+                for carga in cargas:
+                    self.entregar(carga)
+            if maximo_lotes is not None and resumen["lotes"] >= maximo_lotes:
+                return resumen
+        tabla_recordatorios.marcar_ejecucion_completada(clave)
+        resumen["completada"] = 1
+        logger.info("Recordatorios del %s: %s", clave, resumen)
+        return resumen
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recordatorios de las citas de un día")
+    parser.add_argument('--dia', type=lambda texto: datetime.strptime(texto, '%Y-%m-%d').date(),
+                        help="Día de las citas (YYYY-MM-DD); por defecto mañana")
+    parser.add_argument('--lote', type=int, default=TAMANO_LOTE)
+    parser.add_argument('--simular', action='store_true', help="Imprime las cargas por centro sin encolar nada")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    trabajo = TrabajoRecordatorios(args.lote)
+    trabajo.preparar()
+    dia = args.dia or date.today() + timedelta(days=1)
+    if args.simular:
+        for _, cargas in trabajo.lotes(dia):
+            for carga in cargas:
+                print(json.dumps(carga, ensure_ascii=False))
+        return
+    print(trabajo.ejecutar(dia))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""
+Benchmark de la agenda diaria de los médicos.
+
+Siembra una base de datos temporal (escala mini) con ``--citas`` citas
+(500.000 por defecto) y, para el médico con más citas en ``--dia``, mide:
+
+- la agenda sin caché: la consulta por idx_citas_medico_fecha y su
+  serialización en cada petición;
+- ``AgendaMedicos.vista`` con la agenda en memoria, y comprobando su
+  versión en cada petición (``vigencia_s=0``, el caso de otro proceso);
+- ``GET /medicos/<id>/agenda`` con el cliente de pruebas de Flask: la
+  respuesta completa y el 304 de una petición con If-None-Match (su
+  tiempo lo domina la verificación de la contraseña).
+
+Comprueba además que la agenda cambia (y su ETag) al pedir, cancelar y
+atender una cita por la API y al cambiar una cita desde otra conexión.
+
+Uso::
+
+    python -m rendimiento.benchmark_agenda --citas 500000 --peticiones 2000
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import date, datetime
+from typing import Callable, Dict
+
+from rendimiento.sembrado import CLAVE_SEMBRADO, ESCALAS, USUARIO_MEDICO, USUARIO_PACIENTE
+
+
+def _por_segundo(funcion: Callable[[], None], repeticiones: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return repeticiones / (time.perf_counter() - inicio)
+
+
+def medir(ruta: str, n_citas: int, dia: str, peticiones: int, semilla: int = 42) -> Dict[str, float]:
+    """
+    Mide la agenda de un médico sobre una base de datos sembrada en ``ruta``.
+
+    ``PROSALUD_BD`` debe apuntar ya a ``ruta``.
+
+    Returns
+    -------
+    Dict[str, float]
+        Agendas por segundo de cada modo y errores de las comprobaciones.
+    """
+    from rendimiento.sembrado import crear_bd
+    from Base_De_Datos.tablas import tabla_citas
+    import agenda
+    from APIS import app
+
+    crear_bd(ruta, dict(ESCALAS['mini'], citas=n_citas), semilla)
+    tabla_citas.crear_tabla_agenda()
+    conn = sqlite3.connect(ruta, isolation_level=None)
+    medico, n_dia = conn.execute(
+        "SELECT medico_asignado, COUNT(*) FROM citas WHERE fecha_hora >= ? AND fecha_hora < ? "
+        "GROUP BY medico_asignado ORDER BY 2 DESC LIMIT 1;", (dia, dia + 'T24')).fetchone()
+    resultados: Dict[str, float] = {'citas_agenda': n_dia}
+
+    def sin_cache() -> None:
+        _version, filas = tabla_citas.leer_agenda_medico(medico, dia)
+        agenda.serializar_agenda(medico, dia, filas)
+
+    resultados['sin_cache'] = _por_segundo(sin_cache, max(50, peticiones // 10))
+    en_memoria = agenda.AgendaMedicos(vigencia_s=3600)
+    resultados['cache'] = _por_segundo(lambda: en_memoria.vista(medico, dia), peticiones * 10)
+    comprobando = agenda.AgendaMedicos(vigencia_s=0)
+    resultados['cache_comprobando_version'] = _por_segundo(lambda: comprobando.vista(medico, dia), peticiones)
+
+    cliente = app.test_client()
+    cabeceras_medico = {'X-ROL': 'medico'}
+    ruta_agenda = f'/medicos/{medico}/agenda?fecha={dia}'
+
+    def pedir_agenda(etag=None):
+        cabeceras = dict(cabeceras_medico, **({'If-None-Match': etag} if etag else {}))
+        return cliente.get(ruta_agenda, auth=(USUARIO_MEDICO, CLAVE_SEMBRADO), headers=cabeceras)
+
+    primera = pedir_agenda()
+    etag = primera.headers['ETag']
+    resultados['bytes'] = len(primera.data)
+    resultados['bytes_304'] = len(pedir_agenda(etag).data)
+    # Cada petición verifica además la contraseña, que domina su tiempo
+    resultados['http_200_ms'] = 1000 / _por_segundo(lambda: pedir_agenda(), 10)
+    resultados['http_304_ms'] = 1000 / _por_segundo(lambda: pedir_agenda(etag), 10)
+
+    errores = 0
+    errores += pedir_agenda(etag).status_code != 304
+    # Pedir una cita por la API: la agenda del médico cambia al momento en este proceso
+    respuesta = cliente.post('/cita/pedir', auth=(USUARIO_PACIENTE, CLAVE_SEMBRADO), headers={'X-ROL': 'paciente'},
+                             json={'tipo_cita': 'presencial', 'centro': 'C-benchmark', 'medico': medico,
+                                   'fecha_hora': f'{dia}T23:30:00', 'motivo': 'Benchmark'})
+    id_cita = respuesta.get_json().get('id_cita')
+    actual = pedir_agenda(etag)
+    citas = {c['id_cita']: c for c in json.loads(actual.data)['citas']} if actual.status_code == 200 else {}
+    errores += respuesta.status_code != 201 or id_cita not in citas
+    etag = actual.headers['ETag']
+    for accion, estado in (('cancelar', 'cancelado'), ('atender', None)):
+        respuesta = cliente.post(f'/citas/{id_cita}/{accion}', auth=(USUARIO_MEDICO, CLAVE_SEMBRADO),
+                                 headers=cabeceras_medico)
+        # Atender una cita ya cancelada no es posible
+        errores += respuesta.status_code != (200 if estado else 404)
+        actual = pedir_agenda(etag)
+        if estado:
+            errores += actual.status_code != 200 or not any(
+                c['id_cita'] == id_cita and c.get('estado') == estado for c in json.loads(actual.data)['citas'])
+            etag = actual.headers['ETag']
+        else:
+            errores += actual.status_code != 304
+    # Cambio desde otra conexión (otro proceso): visible en cuanto vence la vigencia de la caché
+    otra = conn.execute("SELECT id_cita FROM citas WHERE medico_asignado = ? AND fecha_hora >= ? "
+                        "AND fecha_hora < ? AND estado = 'pendiente' LIMIT 1;", (medico, dia, dia + 'T24')).fetchone()[0]
+    conn.execute("UPDATE citas SET estado = 'completado' WHERE id_cita = ?;", (otra,))
+    time.sleep(agenda.VIGENCIA_CACHE_S + 0.1)
+    actual = pedir_agenda(etag)
+    errores += actual.status_code != 200 or not any(
+        c['id_cita'] == otra and c.get('estado') == 'completado' for c in json.loads(actual.data)['citas'])
+    conn.close()
+    resultados['errores'] = errores
+    return resultados
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de la agenda diaria de los médicos")
+    parser.add_argument('--citas', type=int, default=500_000)
+    parser.add_argument('--peticiones', type=int, default=2_000)
+    parser.add_argument('--dia', type=lambda texto: datetime.strptime(texto, '%Y-%m-%d').date(),
+                        default=date(2025, 3, 15), help="Día dentro del año sembrado (2025)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Antes de importar APIS o cualquier módulo tabla_*: todos abren PROSALUD_BD
+        ruta = os.environ['PROSALUD_BD'] = os.path.join(tmp, 'agenda.db')
+        r = medir(ruta, args.citas, args.dia.isoformat(), args.peticiones)
+    print(f"Agenda de {r['citas_agenda']:.0f} citas ({r['bytes']:.0f} bytes): sin caché {r['sin_cache']:.0f}/s, "
+          f"en memoria {r['cache']:.0f}/s, comprobando la versión {r['cache_comprobando_version']:.0f}/s")
+    print(f"GET /medicos/<id>/agenda (incluye verificar la contraseña): {r['http_200_ms']:.1f} ms la respuesta "
+          f"completa, {r['http_304_ms']:.1f} ms el 304 ({r['bytes_304']:.0f} bytes)")
+    print(f"Errores en las comprobaciones de invalidación: {r['errores']:.0f}")
+    if r['errores']:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark de las altas masivas (``POST /bulk/<entidad>``).
+
+Siembra una base de datos temporal (escala mini) y, con el cliente de
+pruebas de Flask, compara las altas por segundo de:
+
+- ``--individuales`` llamadas a ``/habitaciones/alta`` y ``/medicos/alta``;
+- ``/bulk/habitaciones`` con ``--habitaciones`` elementos en NDJSON y
+  ``/bulk/medicos`` con ``--medicos`` elementos en un array JSON.
+
+Comprueba además que cada elemento tiene su resultado (201, o 400/409 para
+los elementos incorrectos o repetidos que se mezclan a propósito), que las
+filas quedan en la base de datos y que un médico dado de alta en bloque
+puede autenticarse con su contraseña.
+
+Con contraseña el coste lo domina su cifrado, así que la mejora de
+``/bulk/medicos`` depende de los núcleos (``PROSALUD_PROCESOS_HASH``).
+
+Uso::
+
+    python -m rendimiento.benchmark_altas_masivas --habitaciones 20000 --medicos 200
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from typing import Dict, List
+
+from rendimiento.sembrado import CLAVE_SEMBRADO, ESCALAS, USUARIO_MEDICO
+
+
+def _lineas(respuesta) -> List[dict]:
+    return [json.loads(linea) for linea in respuesta.get_data(as_text=True).splitlines() if linea]
+
+
+def medir(ruta: str, individuales: int, n_habitaciones: int, n_medicos: int, semilla: int = 42) -> Dict[str, float]:
+    """
+    Mide las altas individuales y en bloque sobre una base de datos sembrada en ``ruta``.
+
+    ``PROSALUD_BD`` y ``PROSALUD_ADMINS`` deben estar ya fijadas.
+
+    Returns
+    -------
+    Dict[str, float]
+        Altas por segundo de cada modo y errores de las comprobaciones.
+    """
+    from rendimiento.sembrado import crear_bd
+    from APIS import app
+
+    crear_bd(ruta, ESCALAS['mini'], semilla)
+    cliente = app.test_client()
+    admin = {'auth': (USUARIO_MEDICO, CLAVE_SEMBRADO), 'headers': {'X-ROL': 'medico'}}
+    resultados: Dict[str, float] = {}
+    errores = 0
+
+    inicio = time.perf_counter()
+    for i in range(individuales):
+        errores += cliente.post('/habitaciones/alta', json={'numero': 1_000_000 + i, 'capacidad': 2}).status_code != 201
+    resultados['habitaciones_individual'] = individuales / (time.perf_counter() - inicio)
+    inicio = time.perf_counter()
+    for i in range(individuales):
+        errores += cliente.post('/medicos/alta', json={'id': f'MI{i}', 'username': f'medico_individual_{i}',
+                                                       'password': 'clave', 'especialidad': 'General'}
+                                ).status_code != 201
+    resultados['medicos_individual'] = individuales / (time.perf_counter() - inicio)
+
+    # Habitaciones en NDJSON, con una repetida y una incompleta al final
+    habitaciones = [{'numero': 2_000_000 + i, 'capacidad': 1 + i % 4} for i in range(n_habitaciones)]
+    habitaciones += [{'numero': 2_000_000, 'capacidad': 1}, {'capacidad': 3}]
+    cuerpo = ''.join(json.dumps(h) + '\n' for h in habitaciones) + 'esto no es JSON\n'
+    inicio = time.perf_counter()
+    respuesta = cliente.post('/bulk/habitaciones', data=cuerpo, content_type='application/x-ndjson', **admin)
+    lineas = _lineas(respuesta)
+    resultados['habitaciones_bulk'] = n_habitaciones / (time.perf_counter() - inicio)
+    estados = [linea['estado'] for linea in lineas[:-1]]
+    errores += respuesta.status_code != 200 or estados != [201] * n_habitaciones + [409, 400, 400]
+    errores += lineas[-1] != {'resumen': {'creados': n_habitaciones, 'errores': 3}}
+
+    # Médicos en un array JSON, con un nombre de usuario repetido
+    medicos = [{'id': f'MB{i}', 'username': f'medico_bulk_{i}', 'password': f'clave_{i}', 'especialidad': 'General'}
+               for i in range(n_medicos)]
+    medicos.append({'id': 'MB-repetido', 'username': 'medico_bulk_0', 'password': 'x'})
+    inicio = time.perf_counter()
+    respuesta = cliente.post('/bulk/medicos', json=medicos, **admin)
+    lineas = _lineas(respuesta)
+    resultados['medicos_bulk'] = n_medicos / (time.perf_counter() - inicio)
+    errores += [linea.get('estado') for linea in lineas[:-1]] != [201] * n_medicos + [409]
+    errores += cliente.post('/bulk/medicos', json={'id': 'no es un array'}, **admin).status_code != 400
+    errores += cliente.post('/bulk/medicos', json=[]).status_code != 403
+
+    conn = sqlite3.connect(ruta)
+    errores += conn.execute("SELECT COUNT(*) FROM habitaciones WHERE numero_habitacion >= 2000000;"
+                            ).fetchone()[0] != n_habitaciones
+    errores += conn.execute("SELECT COUNT(*) FROM medicos WHERE id LIKE 'MB%';").fetchone()[0] != n_medicos
+    conn.close()
+    # Un médico dado de alta en bloque se autentica con su contraseña
+    errores += cliente.get('/menu', auth=('medico_bulk_1', 'clave_1'), headers={'X-ROL': 'medico'}).status_code != 200
+    resultados['errores'] = errores
+    return resultados
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de las altas masivas")
+    parser.add_argument('--individuales', type=int, default=20)
+    parser.add_argument('--habitaciones', type=int, default=20_000)
+    parser.add_argument('--medicos', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Antes de importar APIS o cualquier módulo tabla_*: todos abren PROSALUD_BD
+        ruta = os.environ['PROSALUD_BD'] = os.path.join(tmp, 'altas.db')
+        os.environ['PROSALUD_ADMINS'] = USUARIO_MEDICO
+        import servicio_hash
+
+        # Grupo de procesos, como en servidor.py (fuera del servidor se cifra en el hilo)
+        servicio = servicio_hash.usar_procesos()
+        r = medir(ruta, args.individuales, args.habitaciones, args.medicos)
+        servicio.cerrar()
+    for entidad in ('habitaciones', 'medicos'):
+        individual, bulk = r[entidad + '_individual'], r[entidad + '_bulk']
+        print(f"{entidad:>12}: individuales {individual:.0f}/s, /bulk/{entidad} {bulk:.0f}/s "
+              f"({bulk / individual:.1f}×)")
+    print(f"Procesos de cifrado: {servicio.procesos}; errores en las comprobaciones: {r['errores']:.0f}")
+    if r['errores']:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,439 @@
+"""
+Benchmark de los endpoints de ``APIS.py``.
+
+Siembra una base de datos sintética (ver ``rendimiento.sembrado``), recorre
+todos los endpoints de la API con el cliente de pruebas de Flask (sin red)
+y contra un servidor real por HTTP (``servidor.py``), y guarda en JSON el
+rendimiento (peticiones/s) y los percentiles de latencia de cada uno.
+
+Si se indica una línea base, compara contra ella y termina con código 1
+cuando algún endpoint empeora por encima de la tolerancia, de forma que se
+pueda usar para detectar regresiones. Cada endpoint se mide en varias
+rondas (``--rondas``) y se queda con la mejor p50, para que una racha de
+carga en la máquina durante una sola ronda no cuente como regresión.
+
+Quedan fuera por defecto ``/medicamento/info`` (llama a la API externa de
+RxNorm; se incluye con ``--externos``) y ``/paciente/descargar_pdf`` (abre
+un diálogo de Tkinter para elegir dónde guardar). Los endpoints de
+administrador se piden con el médico sembrado, que pasa a administrador
+(``PROSALUD_ADMINS``) si no se ha fijado otro; ``/admin/consultas``
+responde 404 salvo con ``PROSALUD_ESTADISTICAS_SQL=1``.
+
+Uso::
+
+    python -m rendimiento.benchmark_api --escala mini --salida informe.json \\
+        --linea-base rendimiento/linea_base.json
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from rendimiento.sembrado import (CLAVE_SEMBRADO, USUARIO_ENFERMERO, USUARIO_MEDICO, USUARIO_PACIENTE,
+                                  anadir_args_escala, cargar_distribuciones, crear_bd, escala_desde_args,
+                                  id_medico, id_paciente, id_secretario, matricula_ambulancia)
+
+# Las latencias por debajo de este umbral (ms) no se consideran regresión
+# aunque superen la tolerancia relativa: son ruido de medida.
+UMBRAL_RUIDO_MS = 1.0
+
+
+class Caso:
+    """
+    Un endpoint a medir.
+
+    Parameters
+    ----------
+    nombre : str
+        Nombre legible (método y ruta).
+    metodo : str
+        Método HTTP.
+    ruta : Callable[[int], str]
+        Ruta de la iteración ``i``.
+    cuerpo : Callable[[int], dict], optional
+        Cuerpo JSON de la iteración ``i``.
+    rol : str, optional
+        Rol con el que autenticarse (``X-ROL``); None si no requiere auth.
+    preparar : Callable[[sqlite3.Connection, int], None], optional
+        Se ejecuta antes de cada iteración, fuera de la medida (p. ej. para
+        crear la fila que la iteración va a borrar).
+    coste : int, optional
+        Divisor del número de iteraciones para endpoints caros (listados
+        completos, hashing de contraseñas).
+    """
+
+    def __init__(self, nombre: str, metodo: str, ruta: Callable[[int], str],
+                 cuerpo: Optional[Callable[[int], dict]] = None, rol: Optional[str] = None,
+                 preparar: Optional[Callable[[sqlite3.Connection, int], None]] = None, coste: int = 1) -> None:
+        self.nombre = nombre
+        self.metodo = metodo
+        self.ruta = ruta
+        self.cuerpo = cuerpo
+        self.rol = rol
+        self.preparar = preparar
+        self.coste = coste
+
+
+def construir_casos(escala: Dict[str, int], externos: bool = False) -> List[Caso]:
+    """
+    Casos de benchmark para todos los endpoints de la API.
+
+    Los ids nuevos llevan un prefijo propio por caso para no chocar con los
+    datos sembrados ni entre casos.
+    """
+    n_pac, n_med, n_hab = escala['pacientes'], escala['medicos'], escala['habitaciones']
+    n_amb = escala['ambulancias']
+    secretario = id_secretario(0)
+
+    def paciente(i):
+        return id_paciente((i * 7919) % n_pac)
+
+    def insertar_paciente(conn, pid):
+        conn.execute("INSERT OR IGNORE INTO pacientes (id, username, password) VALUES (?, ?, 'x')", (pid, pid))
+
+    def insertar_cita(conn, id_cita):
+        # Del paciente sembrado, que es quien la cancela
+        conn.execute("INSERT OR IGNORE INTO citas (id_cita, paciente_id, medico_asignado, fecha_hora, tipo_cita, "
+                     "motivo, centro) VALUES (?, ?, ?, '2025-06-02T09:00:00', 'presencial', 'Benchmark', 'C1')",
+                     (id_cita, id_paciente(0), id_medico(0)))
+
+    def insertar_urgencia(conn, id_cita, i):
+        conn.execute("INSERT OR IGNORE INTO citas (id_cita, paciente_id, fecha_hora, tipo_cita, motivo, "
+                     "nivel_prioridad) VALUES (?, ?, '2025-06-02T09:00:00', 'urgencias', 'Benchmark', 'baja')",
+                     (id_cita, paciente(i)))
+        conn.execute("INSERT OR IGNORE INTO triaje_urgencias (id_cita, prioridad, llegada, modificado) "
+                     "VALUES (?, 3, ?, ?)", (id_cita, time.time(), time.time()))
+
+    def insertar_documento(conn, doc_id, id_secretario=None, estado='pendiente'):
+        conn.execute("INSERT OR IGNORE INTO documentos (id, titulo, descripcion, id_secretario, estado) "
+                     "VALUES (?, 'Benchmark', 'Documento de prueba', ?, ?)", (doc_id, id_secretario, estado))
+
+    def insertar_documentos(conn, prefijo):
+        # Una tanda por iteración: la caché de la cola (ver cola_documentos.py) tarda en ver los documentos
+        # que crea otra conexión, pero siempre le quedan de las tandas anteriores
+        conn.execute("WITH RECURSIVE k(n) AS (SELECT 0 UNION ALL SELECT n + 1 FROM k WHERE n < 63) "
+                     "INSERT OR IGNORE INTO documentos (id, titulo, descripcion) "
+                     "SELECT ? || '-' || n, 'Benchmark', 'Documento de prueba' FROM k", (prefijo,))
+
+    def insertar_cuenta(conn, username, id_auxiliar):
+        conn.execute("INSERT OR IGNORE INTO auxiliares (id, antiguedad) VALUES (?, 1)", (id_auxiliar,))
+        if username:
+            conn.execute("INSERT OR IGNORE INTO usuarios (username, rol, id_entidad, password) "
+                         "VALUES (?, 'auxiliar', ?, 'x')", (username, id_auxiliar))
+
+    casos = [
+        Caso('GET /', 'GET', lambda i: '/'),
+        Caso('GET /test', 'GET', lambda i: '/test'),
+        Caso('GET /menu', 'GET', lambda i: '/menu', rol='medico', coste=10),
+        Caso('GET /crear_sip/<id>', 'GET', lambda i: f'/crear_sip/{paciente(i)}',
+             preparar=lambda c, i: c.execute("DELETE FROM sips WHERE paciente_id = ?", (paciente(i),))),
+        Caso('GET /consultar_sip/<id>', 'GET', lambda i: f'/consultar_sip/{paciente(i)}'),
+        Caso('DELETE /eliminar_sip/<id>', 'DELETE', lambda i: f'/eliminar_sip/{paciente(i)}',
+             preparar=lambda c, i: c.execute("INSERT OR IGNORE INTO sips (sip, paciente_id) VALUES (?, ?)",
+                                             (f"SIP-B{i}-{paciente(i)}", paciente(i)))),
+        Caso('GET /pacientes', 'GET', lambda i: '/pacientes', coste=20),
+        Caso('POST /pacientes/alta', 'POST', lambda i: '/pacientes/alta', coste=10, cuerpo=lambda i: {
+            'id': f'BPA{i}', 'username': f'bench_alta_pac{i}', 'password': 'x', 'nombre': 'N', 'apellido': 'A',
+            'edad': 30, 'genero': 'F', 'estado': 'leve'}),
+        Caso('DELETE /pacientes/baja/<id>', 'DELETE', lambda i: f'/pacientes/baja/BPB{i}',
+             preparar=lambda c, i: insertar_paciente(c, f'BPB{i}')),
+        Caso('POST /cita/pedir', 'POST', lambda i: '/cita/pedir', rol='paciente', coste=10, cuerpo=lambda i: {
+            'tipo_cita': 'urgencias', 'fecha_hora': '2025-06-01T10:30:00', 'nivel_prioridad': 'alta',
+            'medico': id_medico(i % n_med), 'motivo': 'Benchmark'}),
+        Caso('GET /medicos', 'GET', lambda i: '/medicos', coste=5),
+        Caso('GET /medicos/<id>/agenda', 'GET', lambda i: f'/medicos/{id_medico(i % n_med)}/agenda?fecha=2025-06-01',
+             rol='medico', coste=10),
+        Caso('POST /medicos/alta', 'POST', lambda i: '/medicos/alta', coste=10, cuerpo=lambda i: {
+            'id': f'MEDBA{i}', 'username': f'bench_alta_med{i}', 'password': 'x',
+            'especialidad': 'Pediatría', 'antiguedad': 3}),
+        Caso('DELETE /medicos/baja/<id>', 'DELETE', lambda i: f'/medicos/baja/MEDBB{i}',
+             preparar=lambda c, i: c.execute(
+                 "INSERT OR IGNORE INTO medicos (id, username, password) VALUES (?, ?, 'x')", (f'MEDBB{i}',) * 2)),
+        Caso('GET /citas', 'GET', lambda i: f'/citas?medico={id_medico(i % n_med)}&limite=50', rol='medico', coste=10),
+        Caso('POST /citas/<id>/cancelar', 'POST', lambda i: f'/citas/CITBC{i}/cancelar', rol='paciente', coste=10,
+             preparar=lambda c, i: insertar_cita(c, f'CITBC{i}')),
+        Caso('POST /citas/<id>/atender', 'POST', lambda i: f'/citas/CITBA{i}/atender', rol='medico', coste=10,
+             preparar=lambda c, i: insertar_cita(c, f'CITBA{i}')),
+        Caso('GET /enfermeros', 'GET', lambda i: '/enfermeros', coste=5),
+        Caso('POST /enfermeros/alta', 'POST', lambda i: '/enfermeros/alta', coste=10, cuerpo=lambda i: {
+            'id': f'ENFBA{i}', 'username': f'bench_alta_enf{i}', 'password': 'x',
+            'antieguedad': 3, 'especialidad': 'Pediatría'}),
+        Caso('DELETE /enfermeros/baja/<id>', 'DELETE', lambda i: f'/enfermeros/baja/ENFBB{i}',
+             preparar=lambda c, i: c.execute(
+                 "INSERT OR IGNORE INTO enfermeros (id, username, password, antiguedad) VALUES (?, ?, 'x', 1)",
+                 (f'ENFBB{i}',) * 2)),
+        Caso('GET /auxiliares', 'GET', lambda i: '/auxiliares', coste=5),
+        Caso('POST /auxiliares/alta', 'POST', lambda i: '/auxiliares/alta',
+             cuerpo=lambda i: {'id': f'AUXBA{i}', 'antiguedad': 2}),
+        Caso('DELETE /auxiliares/baja/<id>', 'DELETE', lambda i: f'/auxiliares/baja/AUXBB{i}',
+             preparar=lambda c, i: c.execute(
+                 "INSERT OR IGNORE INTO auxiliares (id, antiguedad) VALUES (?, 1)", (f'AUXBB{i}',))),
+        Caso('GET /habitaciones', 'GET', lambda i: '/habitaciones', coste=5),
+        Caso('POST /habitaciones/alta', 'POST', lambda i: '/habitaciones/alta',
+             cuerpo=lambda i: {'numero': 10_000_000 + i, 'capacidad': 2}),
+        Caso('PATCH /habitaciones/limpiar/<n>', 'PATCH', lambda i: f'/habitaciones/limpiar/{i % n_hab + 1}'),
+        Caso('DELETE /habitaciones/baja/<n>', 'DELETE', lambda i: f'/habitaciones/baja/{20_000_000 + i}',
+             preparar=lambda c, i: c.execute(
+                 "INSERT OR IGNORE INTO habitaciones (numero_habitacion, capacidad, limpia) VALUES (?, 1, 0)",
+                 (20_000_000 + i,))),
+        Caso('POST /pacientes/asignar_medico', 'POST', lambda i: '/pacientes/asignar_medico',
+             cuerpo=lambda i: {'id_paciente': paciente(i), 'id_medico': id_medico(i % n_med)}),
+        Caso('POST /pacientes/asignar_habitacion', 'POST', lambda i: '/pacientes/asignar_habitacion',
+             cuerpo=lambda i: {'id_paciente': paciente(i), 'numero': i % n_hab + 1}),
+        # Administración (el médico sembrado es administrador, ver main)
+        Caso('GET /admin/consultas', 'GET', lambda i: '/admin/consultas?limite=20', rol='medico', coste=10),
+        Caso('POST /usuarios', 'POST', lambda i: '/usuarios', rol='medico', coste=10,
+             preparar=lambda c, i: insertar_cuenta(c, None, f'AUXBU{i}'),
+             cuerpo=lambda i: {'username': f'bench_usuario{i}', 'password': 'x', 'rol': 'auxiliar',
+                               'id': f'AUXBU{i}'}),
+        Caso('DELETE /usuarios/<username>', 'DELETE', lambda i: f'/usuarios/bench_usuario_baja{i}', rol='medico',
+             coste=10, preparar=lambda c, i: insertar_cuenta(c, f'bench_usuario_baja{i}', f'AUXBX{i}')),
+        Caso('POST /bulk/habitaciones', 'POST', lambda i: '/bulk/habitaciones', rol='medico', coste=10,
+             cuerpo=lambda i: [{'numero': 30_000_000 + 10 * i + k, 'capacidad': 2} for k in range(10)]),
+        # Ambulancias: cada aviso ocupa una unidad, así que antes se dan por terminadas las salidas en curso
+        # (la central de cada proceso lo ve en su siguiente sincronización)
+        Caso('POST /ambulancias/despachar', 'POST', lambda i: '/ambulancias/despachar', rol='enfermero', coste=10,
+             preparar=lambda c, i: c.execute(
+                 "UPDATE despachos SET estado = 'finalizado', fin = strftime('%Y-%m-%dT%H:%M:%S', 'now') "
+                 "WHERE estado = 'en_curso'"),
+             cuerpo=lambda i: {'latitud': 36.5 + (i % 40) * 0.1, 'longitud': -6.0 + (i % 60) * 0.1,
+                               'estado': 'grave'}),
+        Caso('POST /ambulancias/<matricula>/liberar', 'POST',
+             lambda i: f'/ambulancias/{matricula_ambulancia(i % n_amb)}/liberar', rol='enfermero', coste=10,
+             preparar=lambda c, i: c.execute(
+                 "INSERT OR IGNORE INTO despachos (matricula, latitud, longitud, distancia_km) VALUES (?, 0, 0, 0)",
+                 (matricula_ambulancia(i % n_amb),))),
+        Caso('GET /ambulancias/despacho', 'GET', lambda i: '/ambulancias/despacho', rol='enfermero', coste=10),
+        # Urgencias
+        Caso('POST /urgencias/cola', 'POST', lambda i: '/urgencias/cola', rol='enfermero', coste=10,
+             cuerpo=lambda i: {'id_paciente': paciente(i), 'nivel_prioridad': 'media', 'motivo': 'Benchmark'}),
+        Caso('GET /urgencias/cola', 'GET', lambda i: '/urgencias/cola?limite=50', rol='enfermero', coste=10),
+        Caso('PATCH /urgencias/cola/<id>', 'PATCH', lambda i: f'/urgencias/cola/URGBP{i}', rol='enfermero',
+             coste=10, preparar=lambda c, i: insertar_urgencia(c, f'URGBP{i}', i),
+             cuerpo=lambda i: {'nivel_prioridad': 'alta'}),
+        Caso('DELETE /urgencias/cola/<id>', 'DELETE', lambda i: f'/urgencias/cola/URGBD{i}', rol='enfermero',
+             coste=10, preparar=lambda c, i: insertar_urgencia(c, f'URGBD{i}', i)),
+        Caso('POST /urgencias/siguiente', 'POST', lambda i: '/urgencias/siguiente', rol='medico', coste=10),
+        # Cola de documentos de secretaría
+        Caso('GET /secretarios/<id>/documentos', 'GET', lambda i: f'/secretarios/{secretario}/documentos?limite=20',
+             rol='enfermero', coste=10, preparar=lambda c, i: insertar_documento(c, f'DOCBL{i}')),
+        Caso('POST /secretarios/<id>/documentos/reclamar', 'POST',
+             lambda i: f'/secretarios/{secretario}/documentos/reclamar', rol='enfermero', coste=10,
+             preparar=lambda c, i: insertar_documentos(c, f'DOCBR{i}')),
+        Caso('POST /secretarios/<id>/documentos/cerrar', 'POST',
+             lambda i: f'/secretarios/{secretario}/documentos/cerrar', rol='enfermero', coste=10,
+             preparar=lambda c, i: insertar_documento(c, f'DOCBC{i}', secretario, 'en_proceso'),
+             cuerpo=lambda i: {'ids': [f'DOCBC{i}']}),
+        Caso('POST /secretarios/<id>/documentos/asignar', 'POST',
+             lambda i: f'/secretarios/{secretario}/documentos/asignar', rol='enfermero', coste=10,
+             preparar=lambda c, i: insertar_documento(c, f'DOCBA{i}'), cuerpo=lambda i: {'ids': [f'DOCBA{i}']}),
+        Caso('POST /documentos/urgentes', 'POST', lambda i: '/documentos/urgentes', rol='enfermero', coste=10,
+             preparar=lambda c, i: insertar_documento(c, f'DOCBU{i}'), cuerpo=lambda i: {'ids': [f'DOCBU{i}']}),
+        Caso('POST /pacientes/register', 'POST', lambda i: '/pacientes/register', coste=10, cuerpo=lambda i: {
+            'username': f'bench_reg_pac{i}', 'password': 'x', 'nombre': 'N', 'apellido': 'A', 'edad': 30,
+            'genero': 'F', 'estado': 'leve'}),
+        Caso('POST /medicos/register', 'POST', lambda i: '/medicos/register', coste=10, cuerpo=lambda i: {
+            'id': f'MEDBR{i}', 'username': f'bench_reg_med{i}', 'password': 'x',
+            'especialidad': 'Pediatría', 'antiguedad': 3}),
+        Caso('POST /enfermeros/register', 'POST', lambda i: '/enfermeros/register', coste=10, cuerpo=lambda i: {
+            'id': f'ENFBR{i}', 'username': f'bench_reg_enf{i}', 'password': 'x',
+            'antieguedad': 3, 'especialidad': 'Pediatría'}),
+    ]
+    if externos:
+        casos.append(Caso('GET /medicamento/info', 'GET', lambda i: '/medicamento/info?name=ibuprofen', coste=10))
+    return casos
+
+
+CREDENCIALES = {'medico': (USUARIO_MEDICO, CLAVE_SEMBRADO), 'paciente': (USUARIO_PACIENTE, CLAVE_SEMBRADO),
+                'enfermero': (USUARIO_ENFERMERO, CLAVE_SEMBRADO)}
+
+
+def _peticion_test_client(cliente) -> Callable[..., int]:
+    def enviar(metodo, ruta, cuerpo, rol):
+        extra = {'auth': CREDENCIALES[rol], 'headers': {'X-ROL': rol}} if rol else {}
+        return cliente.open(ruta, method=metodo, json=cuerpo, **extra).status_code
+    return enviar
+
+
+def _peticion_http(sesion, base_url: str) -> Callable[..., int]:
+    def enviar(metodo, ruta, cuerpo, rol):
+        extra = {'auth': CREDENCIALES[rol], 'headers': {'X-ROL': rol}} if rol else {}
+        return sesion.request(metodo, base_url + ruta, json=cuerpo, timeout=120, **extra).status_code
+    return enviar
+
+
+def medir(casos: List[Caso], enviar: Callable[..., int], bd: str, iteraciones: int,
+          contador: 'itertools.count', rondas: int = 1) -> Dict[str, dict]:
+    """
+    Ejecuta cada caso ``iteraciones / coste`` veces (mínimo 3) de forma
+    secuencial y resume sus latencias.
+
+    Con varias ``rondas`` recorre todos los casos otra vez y cada uno se
+    queda con la ronda de menor p50 (la que menos ha notado el resto de la
+    máquina); sus códigos de estado son los de todas las rondas.
+
+    ``contador`` reparte los índices de iteración entre modos para que las
+    altas de un modo no choquen con las del anterior.
+    """
+    from rendimiento.carga import percentil
+
+    conn = sqlite3.connect(bd, timeout=30, isolation_level=None)
+    resultados: Dict[str, dict] = {}
+    try:
+        for _ in range(max(1, rondas)):
+            for caso in casos:
+                latencias: List[float] = []
+                codigos: Dict[int, int] = {}
+                for _ in range(max(3, iteraciones // caso.coste)):
+                    i = next(contador)
+                    if caso.preparar:
+                        caso.preparar(conn, i)
+                    cuerpo = caso.cuerpo(i) if caso.cuerpo else None
+                    inicio = time.perf_counter()
+                    codigo = enviar(caso.metodo, caso.ruta(i), cuerpo, caso.rol)
+                    latencias.append((time.perf_counter() - inicio) * 1000)
+                    codigos[codigo] = codigos.get(codigo, 0) + 1
+                total_s = sum(latencias) / 1000
+                ronda = {
+                    'n': len(latencias),
+                    'rps': round(len(latencias) / total_s, 1) if total_s else 0.0,
+                    'p50_ms': round(percentil(latencias, 50), 3),
+                    'p90_ms': round(percentil(latencias, 90), 3),
+                    'p99_ms': round(percentil(latencias, 99), 3),
+                    'max_ms': round(max(latencias), 3),
+                    'codigos': {str(k): v for k, v in sorted(codigos.items())},
+                }
+                anterior = resultados.get(caso.nombre)
+                if anterior is not None:
+                    for codigo, veces in anterior['codigos'].items():
+                        ronda['codigos'][codigo] = ronda['codigos'].get(codigo, 0) + veces
+                    ronda['codigos'] = dict(sorted(ronda['codigos'].items()))
+                    if anterior['p50_ms'] <= ronda['p50_ms']:
+                        ronda = dict(anterior, codigos=ronda['codigos'])
+                resultados[caso.nombre] = ronda
+    finally:
+        conn.close()
+    return resultados
+
+
+def comparar(actual: dict, base: dict, tolerancia: float) -> List[str]:
+    """
+    Compara un informe con la línea base.
+
+    Se considera regresión que la p50 de un endpoint supere la de la línea
+    base en más de ``tolerancia`` (relativa) y de ``UMBRAL_RUIDO_MS``, o que
+    cambie el conjunto de códigos de estado que devuelve. Los 5xx no cuentan
+    como resultado esperado: no entran en la comparación de códigos, y un
+    endpoint que en la línea base solo devolvía 5xx no tiene referencia.
+
+    Returns
+    -------
+    List[str]
+        Descripción de cada regresión encontrada (vacía si no hay).
+    """
+    regresiones = []
+    for modo, casos in actual['resultados'].items():
+        for nombre, m in casos.items():
+            ref = base.get('resultados', {}).get(modo, {}).get(nombre)
+            codigos_ref = {c for c in (ref or {}).get('codigos', ()) if not c.startswith('5')}
+            if not codigos_ref:
+                continue
+            limite = ref['p50_ms'] * (1 + tolerancia)
+            if m['p50_ms'] > limite and m['p50_ms'] - ref['p50_ms'] > UMBRAL_RUIDO_MS:
+                regresiones.append(f"[{modo}] {nombre}: p50 {m['p50_ms']} ms > {ref['p50_ms']} ms (+{tolerancia:.0%})")
+            codigos = {c for c in m['codigos'] if not c.startswith('5')}
+            if codigos != codigos_ref:
+                regresiones.append(f"[{modo}] {nombre}: códigos {sorted(codigos)} != {sorted(codigos_ref)}")
+    return regresiones
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de los endpoints de la API ProSalud")
+    anadir_args_escala(parser)
+    parser.add_argument('--bd', help="Base de datos ya sembrada a usar (se modifica); por defecto se siembra una temporal")
+    parser.add_argument('--iteraciones', type=int, default=100, help="Iteraciones por endpoint barato")
+    parser.add_argument('--rondas', type=int, default=3,
+                        help="Rondas de medición; cada endpoint se queda con la de menor p50")
+    parser.add_argument('--modos', nargs='+', choices=['test_client', 'http'], default=['test_client', 'http'])
+    parser.add_argument('--workers', type=int, default=2, help="Trabajadores del servidor en modo http")
+    parser.add_argument('--port', type=int, default=5060)
+    parser.add_argument('--externos', action='store_true', help="Incluir /medicamento/info (RxNorm)")
+    parser.add_argument('--salida', help="Fichero JSON donde guardar el informe")
+    parser.add_argument('--linea-base', help="Informe JSON de referencia con el que comparar")
+    parser.add_argument('--tolerancia', type=float, default=0.25, help="Empeoramiento relativo admitido")
+    args = parser.parse_args()
+
+    escala = escala_desde_args(args)
+    with tempfile.TemporaryDirectory() as tmp:
+        bd = args.bd or os.path.join(tmp, 'bench.db')
+        # APIS y conexion leen PROSALUD_BD (y APIS PROSALUD_ADMINS) al importarse: hay que fijarlas antes
+        os.environ['PROSALUD_BD'] = bd
+        os.environ.setdefault('PROSALUD_ADMINS', USUARIO_MEDICO)
+        filas, segundos = None, None
+        if args.bd is None:
+            filas, segundos = crear_bd(bd, escala, args.semilla, cargar_distribuciones(args.distribuciones))
+            print(f"Base de datos sembrada en {segundos:.1f} s: {filas}")
+        from rendimiento.carga import servidor_en_marcha
+
+        casos = construir_casos(escala, args.externos)
+        contador = itertools.count()
+        resultados = {}
+        if 'test_client' in args.modos:
+            from APIS import app
+            # Los endpoints que fallan (500) ya quedan reflejados en 'codigos'
+            app.logger.setLevel(logging.CRITICAL)
+            resultados['test_client'] = medir(casos, _peticion_test_client(app.test_client()), bd,
+                                              args.iteraciones, contador, args.rondas)
+        if 'http' in args.modos:
+            import requests
+            with servidor_en_marcha(bd, args.workers, args.port) as base_url, requests.Session() as sesion:
+                resultados['http'] = medir(casos, _peticion_http(sesion, base_url), bd, args.iteraciones, contador,
+                                           args.rondas)
+
+    informe = {
+        'meta': {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'escala': escala,
+            'semilla': args.semilla,
+            'iteraciones': args.iteraciones,
+            'rondas': args.rondas,
+            'workers_http': args.workers,
+            'sembrado_s': round(segundos, 2) if segundos is not None else None,
+        },
+        'resultados': resultados,
+    }
+    for modo, casos_modo in resultados.items():
+        print(f"\n=== {modo} ===")
+        print(f"{'endpoint':<46}{'n':>6}{'rps':>10}{'p50 ms':>10}{'p99 ms':>10}  códigos")
+        for nombre, m in casos_modo.items():
+            print(f"{nombre:<46}{m['n']:>6}{m['rps']:>10}{m['p50_ms']:>10}{m['p99_ms']:>10}  {m['codigos']}")
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(informe, f, indent=2, ensure_ascii=False)
+
+    if args.linea_base:
+        with open(args.linea_base, encoding='utf-8') as f:
+            base = json.load(f)
+        regresiones = comparar(informe, base, args.tolerancia)
+        if regresiones:
+            print("\nRegresiones respecto a la línea base:")
+            for r in regresiones:
+                print(f"  - {r}")
+            sys.exit(1)
+        print("\nSin regresiones respecto a la línea base.")
+
+
+if __name__ == '__main__':
+    main()
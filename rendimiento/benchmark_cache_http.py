@@ -0,0 +1,127 @@
+"""
+Benchmark de la caché HTTP de las respuestas de solo lectura.
+
+Siembra una base de datos temporal (escala mini, con ``--medicos`` médicos
+y ``--habitaciones`` habitaciones) y mide con el cliente de pruebas de
+Flask ``GET /medicos``, ``/enfermeros``, ``/habitaciones`` y
+``/consultar_sip/<id>``:
+
+- sin caché: consulta y serialización en cada petición (la caché se vacía
+  antes de cada una);
+- con el cuerpo en memoria: 200 completo sin consultar las filas;
+- revalidando (If-None-Match): 304 sin cuerpo.
+
+Comprueba además que el ETag y los datos cambian al dar de alta un médico
+y una habitación por la API y al escribir desde otra conexión.
+
+Uso::
+
+    python -m rendimiento.benchmark_cache_http --medicos 2000 --peticiones 2000
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from typing import Callable, Dict
+
+from rendimiento.sembrado import ESCALAS
+
+
+def _por_segundo(funcion: Callable[[], None], repeticiones: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return repeticiones / (time.perf_counter() - inicio)
+
+
+def medir(ruta: str, n_medicos: int, n_habitaciones: int, peticiones: int, semilla: int = 42) -> Dict[str, float]:
+    """
+    Mide las respuestas de solo lectura sobre una base de datos sembrada en ``ruta``.
+
+    ``PROSALUD_BD`` debe apuntar ya a ``ruta``.
+
+    Returns
+    -------
+    Dict[str, float]
+        Peticiones por segundo de cada ruta y modo, bytes y errores de las comprobaciones.
+    """
+    from rendimiento.sembrado import crear_bd
+    import APIS
+
+    crear_bd(ruta, dict(ESCALAS['mini'], medicos=n_medicos, habitaciones=n_habitaciones), semilla)
+    conn = sqlite3.connect(ruta, isolation_level=None)
+    paciente = conn.execute("SELECT paciente_id FROM sips LIMIT 1;").fetchone()[0]
+    cliente = APIS.app.test_client()
+    cache = APIS._respuestas()
+    resultados: Dict[str, float] = {}
+
+    for nombre, url in (('medicos', '/medicos'), ('enfermeros', '/enfermeros'),
+                        ('habitaciones', '/habitaciones'), ('sip', f'/consultar_sip/{paciente}')):
+        primera = cliente.get(url)
+        etag = primera.headers['ETag']
+        resultados[f'{nombre}_bytes'] = len(primera.data)
+
+        def sin_cache() -> None:
+            cache._entradas.clear()
+            cliente.get(url)
+
+        resultados[f'{nombre}_sin_cache'] = _por_segundo(sin_cache, max(20, peticiones // 20))
+        resultados[f'{nombre}_cache'] = _por_segundo(lambda: cliente.get(url), peticiones)
+        resultados[f'{nombre}_304'] = _por_segundo(lambda: cliente.get(url, headers={'If-None-Match': etag}),
+                                                  peticiones)
+
+    errores = 0
+    # Alta por la API: el ETag cambia y la respuesta incluye el nuevo médico
+    etag = cliente.get('/medicos').headers['ETag']
+    respuesta = cliente.post('/medicos/alta', json={'id': 'M-benchmark', 'username': 'medico_benchmark',
+                                                    'password': 'benchmark', 'especialidad': 'General'})
+    errores += respuesta.status_code != 201
+    actual = cliente.get('/medicos', headers={'If-None-Match': etag})
+    errores += actual.status_code != 200 or not any(m['id'] == 'M-benchmark' for m in actual.get_json())
+    errores += cliente.get('/medicos', headers={'If-None-Match': actual.headers['ETag']}).status_code != 304
+    etag = cliente.get('/habitaciones').headers['ETag']
+    respuesta = cliente.post('/habitaciones/alta', json={'numero': 999_999, 'capacidad': 2})
+    errores += respuesta.status_code != 201
+    actual = cliente.get('/habitaciones', headers={'If-None-Match': etag})
+    errores += actual.status_code != 200 or not any(h['numero'] == 999_999 for h in actual.get_json())
+    # Escritura desde otra conexión (otro proceso): visible en la siguiente petición
+    etag = actual.headers['ETag']
+    conn.execute("UPDATE habitaciones SET limpia = 1 WHERE numero_habitacion = 999999;")
+    actual = cliente.get('/habitaciones', headers={'If-None-Match': etag})
+    errores += actual.status_code != 200 or not any(
+        h['numero'] == 999_999 and h['limpia'] for h in actual.get_json())
+    etag = cliente.get(f'/consultar_sip/{paciente}').headers['ETag']
+    conn.execute("UPDATE sips SET sip = 'SIP-benchmark' WHERE paciente_id = ?;", (paciente,))
+    actual = cliente.get(f'/consultar_sip/{paciente}', headers={'If-None-Match': etag})
+    errores += actual.status_code != 200 or actual.get_json() != {'sip': 'SIP-benchmark'}
+    # Los cambios en una tabla no afectan a las respuestas que no la leen
+    etag = cliente.get('/enfermeros').headers['ETag']
+    errores += cliente.get('/enfermeros', headers={'If-None-Match': etag}).status_code != 304
+    conn.close()
+    resultados['errores'] = errores
+    return resultados
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de la caché HTTP de las respuestas de solo lectura")
+    parser.add_argument('--medicos', type=int, default=2_000)
+    parser.add_argument('--habitaciones', type=int, default=2_000)
+    parser.add_argument('--peticiones', type=int, default=2_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Antes de importar APIS o cualquier módulo tabla_*: todos abren PROSALUD_BD
+        ruta = os.environ['PROSALUD_BD'] = os.path.join(tmp, 'cache_http.db')
+        r = medir(ruta, args.medicos, args.habitaciones, args.peticiones)
+    for nombre in ('medicos', 'enfermeros', 'habitaciones', 'sip'):
+        print(f"{nombre:>12} ({r[nombre + '_bytes']:.0f} bytes): sin caché {r[nombre + '_sin_cache']:.0f}/s, "
+              f"cuerpo en memoria {r[nombre + '_cache']:.0f}/s, 304 {r[nombre + '_304']:.0f}/s")
+    print(f"Errores en las comprobaciones de invalidación: {r['errores']:.0f}")
+    if r['errores']:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+"""
+Benchmark del registro de centros de ``Provincia``.
+
+Mide, con ``--centros`` centros (100.000 por defecto) en una sola
+provincia, el coste por operación de añadir, buscar por id, buscar por
+nombre, autocompletar por prefijo y eliminar, y lo compara con el
+registro anterior basado en una lista (búsquedas y comprobaciones de
+duplicados recorriendo todos los centros). Con ``--bd`` mide además la
+carga de la provincia desde SQLite con ``Provincia.desde_bd``.
+
+Uso::
+
+    python -m rendimiento.benchmark_centros --centros 100000 --bd
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from rendimiento.sembrado import ADVOCACIONES, PROVINCIAS, TIPOS_CENTRO
+
+# Operaciones de cada tipo que se miden sobre el registro lineal: con
+# 100.000 centros cada una recorre la lista entera
+OPERACIONES_LINEAL = 200
+
+
+class RegistroLineal:
+    """Registro de centros tal como estaba antes en ``Provincia``: una lista que se recorre."""
+
+    def __init__(self) -> None:
+        self._centros = []
+
+    def anadir_centro(self, centro) -> None:
+        if centro not in self._centros:
+            self._centros.append(centro)
+
+    def eliminar_centro(self, centro) -> None:
+        if centro in self._centros:
+            self._centros.remove(centro)
+
+    def buscar_centro(self, nombre_centro: str):
+        for centro in self._centros:
+            if centro.nombre_centro == nombre_centro:
+                return centro
+        return None
+
+
+def nombres_centros(n: int, semilla: int = 42) -> List[str]:
+    """Nombres de centro realistas y distintos (tipo, advocación, provincia y número)."""
+    rng = random.Random(semilla)
+    return [f"{rng.choice(TIPOS_CENTRO)} {rng.choice(ADVOCACIONES)} de {PROVINCIAS[i % len(PROVINCIAS)][1]} {i}"
+            for i in range(n)]
+
+
+def _por_operacion(funcion: Callable[[], None], repeticiones: int) -> float:
+    """Microsegundos por llamada de ``funcion``."""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones * 1e6
+
+
+def medir_memoria(n: int, semilla: int = 42) -> Dict[str, Dict[str, float]]:
+    """
+    Compara en memoria el registro indexado con el lineal.
+
+    Returns
+    -------
+    Dict[str, Dict[str, float]]
+        Por operación, microsegundos por llamada de cada registro.
+    """
+    from Clases_Base_de_datos.centro import Centro
+    from Clases_Base_de_datos.provincia import Provincia
+
+    rng = random.Random(semilla)
+    nombres = nombres_centros(n, semilla)
+    centros = []
+    for i, nombre in enumerate(nombres):
+        id_centro = f"BEN{i:07d}"
+        Centro.ids_usados.discard(id_centro)
+        centros.append(Centro('Benchmark', 'Benchmark', id_centro, nombre, 10, 1000.0, 5))
+    muestra = [rng.choice(centros) for _ in range(10_000)]
+    prefijos = [c.nombre_centro[:6] for c in muestra]
+
+    provincia = Provincia('Benchmark', 'Benchmark')
+    lineal = RegistroLineal()
+    resultados: Dict[str, Dict[str, float]] = {}
+
+    iterador = iter(centros)
+    resultados['anadir'] = {'indexado': _por_operacion(lambda: provincia.anadir_centro(next(iterador)), n)}
+    for centro in centros[:-OPERACIONES_LINEAL]:
+        lineal._centros.append(centro)
+    iterador = iter(centros[-OPERACIONES_LINEAL:])
+    resultados['anadir']['lineal'] = _por_operacion(lambda: lineal.anadir_centro(next(iterador)), OPERACIONES_LINEAL)
+
+    iterador = iter(muestra)
+    resultados['buscar_por_id'] = {
+        'indexado': _por_operacion(lambda: provincia.buscar_centro_por_id(next(iterador).id_centro), len(muestra)),
+    }
+    iterador = iter(muestra)
+    resultados['buscar_por_id']['lineal'] = _por_operacion(lambda: next(iterador) in lineal._centros,
+                                                           OPERACIONES_LINEAL)
+
+    iterador = iter(muestra)
+    resultados['buscar_por_nombre'] = {
+        'indexado': _por_operacion(lambda: provincia.buscar_centro(next(iterador).nombre_centro), len(muestra)),
+    }
+    iterador = iter(muestra)
+    resultados['buscar_por_nombre']['lineal'] = _por_operacion(
+        lambda: lineal.buscar_centro(next(iterador).nombre_centro), OPERACIONES_LINEAL)
+
+    provincia.buscar_por_prefijo('')  # ordena los nombres una vez
+    iterador = iter(prefijos)
+    resultados['prefijo'] = {
+        'indexado': _por_operacion(lambda: provincia.buscar_por_prefijo(next(iterador)), len(prefijos)),
+    }
+    def prefijo_lineal(prefijo: str) -> list:
+        return [c for c in lineal._centros if c.nombre_centro.startswith(prefijo)][:10]
+
+    iterador = iter(prefijos)
+    resultados['prefijo']['lineal'] = _por_operacion(lambda: prefijo_lineal(next(iterador)), OPERACIONES_LINEAL)
+
+    eliminar = rng.sample(centros, min(n, 10_000))
+    iterador = iter(eliminar)
+    resultados['eliminar'] = {'indexado': _por_operacion(lambda: provincia.eliminar_centro(next(iterador)),
+                                                         len(eliminar))}
+    iterador = iter(eliminar)
+    resultados['eliminar']['lineal'] = _por_operacion(lambda: lineal.eliminar_centro(next(iterador)),
+                                                      OPERACIONES_LINEAL)
+    return resultados
+
+
+def medir_carga_bd(n: int, semilla: int = 42) -> Dict[str, float]:
+    """
+    Guarda ``n`` centros en una base de datos temporal y mide ``Provincia.desde_bd``.
+
+    Returns
+    -------
+    Dict[str, float]
+        Segundos de la carga y de 1.000 altas y bajas persistidas (por operación, en ms).
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        # Antes de importar conexion.py, que lee PROSALUD_BD al importarse
+        os.environ['PROSALUD_BD'] = os.path.join(tmp, 'centros.db')
+        from Base_De_Datos.tablas import tabla_centro, tabla_provincia
+        from Clases_Base_de_datos.centro import Centro
+        from Clases_Base_de_datos.provincia import Provincia
+
+        tabla_provincia.crear_tabla_provincias()
+        tabla_centro.crear_tabla_centros()
+        tabla_provincia.insertar_provincia('Benchmark', 'Benchmark')
+        conn = sqlite3.connect(os.environ['PROSALUD_BD'])
+        with conn:
+            conn.executemany(
+                "INSERT INTO centros (id_centro, nombre_centro, cantidad_trabajadores, presupuesto, habitaciones, "
+                "id_provincia) VALUES (?, ?, 10, 1000.0, 5, 1)",
+                ((f"BD{i:07d}", nombre) for i, nombre in enumerate(nombres_centros(n, semilla))))
+        conn.close()
+
+        inicio = time.perf_counter()
+        provincia = Provincia.desde_bd(1)
+        carga = time.perf_counter() - inicio
+
+        nuevos = []
+        for i in range(1000):
+            Centro.ids_usados.discard(f"NUE{i:04d}")
+            nuevos.append(Centro('Benchmark', 'Benchmark', f"NUE{i:04d}", f"Centro nuevo {i}", 1, 10.0, 1))
+        inicio = time.perf_counter()
+        for centro in nuevos:
+            provincia.anadir_centro(centro)
+        alta = (time.perf_counter() - inicio) / len(nuevos)
+        inicio = time.perf_counter()
+        for centro in nuevos:
+            provincia.eliminar_centro(centro)
+        baja = (time.perf_counter() - inicio) / len(nuevos)
+    return {'desde_bd_s': carga, 'alta_persistida_ms': alta * 1000, 'baja_persistida_ms': baja * 1000}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark del registro de centros de Provincia")
+    parser.add_argument('--centros', type=int, default=100_000)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--bd', action='store_true', help="Mide también la carga y el guardado en SQLite")
+    args = parser.parse_args()
+
+    resultados = medir_memoria(args.centros, args.semilla)
+    print(f"{args.centros} centros en una provincia (µs por operación)")
+    print(f"{'operación':<20}{'indexado':>12}{'lineal':>14}{'mejora':>10}")
+    for operacion, tiempos in resultados.items():
+        print(f"{operacion:<20}{tiempos['indexado']:>12.2f}{tiempos['lineal']:>14.1f}"
+              f"{tiempos['lineal'] / tiempos['indexado']:>9.0f}x")
+
+    if args.bd:
+        bd = medir_carga_bd(args.centros, args.semilla)
+        print(f"\nProvincia.desde_bd: {bd['desde_bd_s']:.2f} s; alta persistida {bd['alta_persistida_ms']:.2f} ms, "
+              f"baja persistida {bd['baja_persistida_ms']:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark de las consultas por médico e intervalo sobre 'citas'.
+
+Siembra una base de datos temporal con ``--citas`` citas (500.000 por
+defecto), reescribe una de cada diez al formato de la clase Cita
+('%Y %m %d %H:%M') y mide:
+
+- la migración ``normalizar_citas`` y la creación de idx_citas_medico_fecha;
+- "las citas de hoy del médico X" para ``--consultas`` médicos al azar:
+  antes, leyendo todas las citas e interpretando cada 'fecha_hora' en
+  Python; ahora, con ``leer_citas_rango``.
+
+Comprueba que ambas devuelven las mismas citas en el mismo orden.
+
+Uso::
+
+    python -m rendimiento.benchmark_citas_rango --citas 500000 --consultas 200
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List
+
+from rendimiento.sembrado import ESCALAS
+
+
+def rango_lineal(ruta: str, medico: str, desde: datetime, hasta: datetime) -> List[tuple]:
+    """Citas de un médico en [desde, hasta) como se hacía sin índice: toda la tabla, interpretada en Python."""
+    from Base_De_Datos.tablas.tabla_citas import interpretar_fecha_hora
+
+    conn = sqlite3.connect(ruta)
+    resultado = []
+    for id_cita, medico_asignado, fecha_hora in conn.execute(
+            "SELECT id_cita, medico_asignado, fecha_hora FROM citas;"):
+        if medico_asignado != medico:
+            continue
+        try:
+            instante = interpretar_fecha_hora(fecha_hora)
+        except ValueError:
+            continue
+        if desde <= instante < hasta:
+            resultado.append((instante, id_cita))
+    conn.close()
+    return [id_cita for _, id_cita in sorted(resultado)]
+
+
+def medir(ruta: str, n_citas: int, dia: date, consultas: int, semilla: int = 42) -> Dict[str, float]:
+    """
+    Mide la migración y las consultas por médico sobre una base de datos sembrada en ``ruta``.
+
+    ``PROSALUD_BD`` debe apuntar ya a ``ruta``.
+
+    Returns
+    -------
+    Dict[str, float]
+        Segundos de cada paso, consultas por segundo y diferencias encontradas.
+    """
+    from rendimiento.sembrado import crear_bd
+    from Base_De_Datos.tablas import tabla_citas
+
+    crear_bd(ruta, dict(ESCALAS['mini'], citas=n_citas), semilla)
+    conn = sqlite3.connect(ruta)
+    with conn:
+        conn.execute("DROP INDEX IF EXISTS idx_citas_medico_fecha;")
+        conn.execute(
+            "UPDATE citas SET fecha_hora = substr(fecha_hora, 1, 4) || ' ' || substr(fecha_hora, 6, 2) || ' ' "
+            "|| substr(fecha_hora, 9, 2) || ' ' || substr(fecha_hora, 12, 5) WHERE rowid % 10 = 0;")
+    medicos = [fila[0] for fila in conn.execute("SELECT DISTINCT medico_asignado FROM citas;")]
+    conn.close()
+    rng = random.Random(semilla)
+    elegidos = [rng.choice(medicos) for _ in range(consultas)]
+    desde = datetime.combine(dia, datetime.min.time())
+    hasta = desde + timedelta(days=1)
+    resultados: Dict[str, float] = {}
+
+    # Antes de migrar: recorrido completo (unas pocas consultas bastan)
+    lineales = {}
+    inicio = time.perf_counter()
+    for medico in elegidos[:5]:
+        lineales[medico] = rango_lineal(ruta, medico, desde, hasta)
+    resultados['lineal_s'] = (time.perf_counter() - inicio) / len(lineales)
+
+    inicio = time.perf_counter()
+    convertidas, no_reconocidas = tabla_citas.normalizar_citas()
+    resultados['migracion_s'] = time.perf_counter() - inicio
+    resultados['convertidas'] = convertidas
+    resultados['no_reconocidas'] = no_reconocidas
+    inicio = time.perf_counter()
+    tabla_citas.crear_indice_citas_medico()
+    resultados['indice_s'] = time.perf_counter() - inicio
+    resultados['repetida'] = tabla_citas.normalizar_citas()[0]
+
+    inicio = time.perf_counter()
+    filas = 0
+    for medico in elegidos:
+        filas += len(tabla_citas.leer_citas_rango(medico, desde, hasta))
+    resultados['rango_s'] = (time.perf_counter() - inicio) / len(elegidos)
+    resultados['filas_por_consulta'] = filas / len(elegidos)
+    resultados['diferencias'] = sum(
+        [fila[0] for fila in tabla_citas.leer_citas_rango(medico, desde, hasta)] != esperadas
+        for medico, esperadas in lineales.items())
+    return resultados
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de las consultas de citas por médico e intervalo")
+    parser.add_argument('--citas', type=int, default=500_000)
+    parser.add_argument('--consultas', type=int, default=200)
+    parser.add_argument('--dia', type=lambda texto: datetime.strptime(texto, '%Y-%m-%d').date(),
+                        default=date(2025, 3, 15), help="Día dentro del año sembrado (2025)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Antes de importar ningún módulo tabla_*: todos abren PROSALUD_BD
+        ruta = os.environ['PROSALUD_BD'] = os.path.join(tmp, 'citas.db')
+        r = medir(ruta, args.citas, args.dia, args.consultas)
+    print(f"{args.citas} citas; migración: {r['convertidas']:.0f} convertidas en {r['migracion_s'] * 1000:.0f} ms "
+          f"({r['no_reconocidas']:.0f} no reconocidas), índice en {r['indice_s'] * 1000:.0f} ms")
+    print(f"Citas de un médico en un día (~{r['filas_por_consulta']:.1f} filas): "
+          f"recorrido completo {r['lineal_s'] * 1000:.0f} ms, leer_citas_rango {r['rango_s'] * 1e6:.0f} µs")
+    print(f"Diferencias: {r['diferencias']:.0f}; segunda migración: {r['repetida']:.0f} filas")
+    if r['diferencias'] or r['repetida'] or r['no_reconocidas']:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+"""
+Benchmark y comprobaciones del cliente HTTP de la aplicación de terminal (``cliente_api.py``).
+
+Sirve la API con ``servidor.py`` (waitress) sobre una base de datos
+temporal sembrada y:
+
+- mide ``GET /medicos`` y ``GET /habitaciones`` con una conexión nueva por
+  petición (``requests.get``, como antes), con la sesión compartida y con
+  la caché local de listados, y cuenta las conexiones TCP que abre cada uno;
+- comprueba la caché: un alta la vacía y el listado siguiente ya la incluye,
+  y un listado caducado se revalida con su ETag (304);
+- contra una segunda aplicación Flask que falla a propósito, comprueba que
+  los GET con 503 se reintentan hasta que funcionan, que un POST con 503 no
+  se repite y que una respuesta lenta acaba en ``Timeout``.
+
+Uso::
+
+    python -m rendimiento.benchmark_cliente --peticiones 500
+"""
+
+import argparse
+import contextlib
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Iterator
+
+from rendimiento.sembrado import CLAVE_SEMBRADO, ESCALAS, USUARIO_MEDICO
+
+
+@contextlib.contextmanager
+def servidor_local(app) -> Iterator[str]:
+    """
+    Sirve ``app`` con el servidor de desarrollo de werkzeug en un hilo, en un puerto libre.
+
+    Yields
+    ------
+    str
+        URL base del servidor.
+    """
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class Silencioso(WSGIRequestHandler):
+        def log_request(self, *_args) -> None:
+            pass
+
+    servidor = make_server('127.0.0.1', 0, app, threaded=True, request_handler=Silencioso)
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    try:
+        yield f"http://127.0.0.1:{servidor.server_port}"
+    finally:
+        servidor.shutdown()
+
+
+def _conexiones_abiertas(cliente, url: str) -> int:
+    """Conexiones TCP que han abierto los pools de ``cliente`` hacia ``url``."""
+    pools = cliente.sesion.get_adapter(url).poolmanager.pools
+    return sum(pools[clave].num_connections for clave in pools.keys())
+
+
+def _por_segundo(funcion: Callable[[], object], repeticiones: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return repeticiones / (time.perf_counter() - inicio)
+
+
+def medir_api(ruta: str, peticiones: int, port: int, semilla: int = 42) -> Dict[str, float]:
+    """
+    Peticiones por segundo y conexiones abiertas con cada forma de llamar a la API.
+
+    ``PROSALUD_BD`` debe apuntar ya a ``ruta``. La API se sirve con
+    ``servidor.py`` y waitress, que mantiene las conexiones abiertas (el
+    servidor de desarrollo de werkzeug las cierra tras cada respuesta).
+
+    Returns
+    -------
+    Dict[str, float]
+        ``<ruta>_<modo>`` en peticiones por segundo, ``conexiones_<modo>`` y errores.
+    """
+    import requests
+    from rendimiento.carga import servidor_en_marcha
+    from rendimiento.sembrado import crear_bd
+    from cliente_api import ClienteAPI
+
+    crear_bd(ruta, ESCALAS['mini'], semilla)
+    rutas = ('/medicos', '/habitaciones')
+    resultados: Dict[str, float] = {'errores': 0}
+    with servidor_en_marcha(ruta, 1, port, 'waitress') as url:
+        for nombre in rutas:
+            resultados[f"{nombre.strip('/')}_nueva_conexion"] = _por_segundo(
+                lambda: requests.get(f"{url}{nombre}", timeout=10).json(), peticiones)
+        # requests.get abre una sesión, y con ella una conexión, por petición
+        resultados['conexiones_nueva_conexion'] = len(rutas) * peticiones
+
+        with ClienteAPI(url) as sesion, ClienteAPI(url, cache_s=60) as con_cache:
+            for modo, cliente in (('sesion', sesion), ('cache', con_cache)):
+                for nombre in rutas:
+                    resultados[f"{nombre.strip('/')}_{modo}"] = _por_segundo(
+                        lambda: cliente.pedir('GET', nombre), peticiones)
+                resultados[f'conexiones_{modo}'] = _conexiones_abiertas(cliente, url)
+
+            # Un alta vacía la caché y el listado siguiente la incluye
+            admin = {'auth': (USUARIO_MEDICO, CLAVE_SEMBRADO), 'cabeceras': {'X-ROL': 'medico'}}
+            con_cache.pedir('POST', '/medicos/alta', datos={'id': 'MCLI', 'username': 'cliente_medico',
+                                                            'password': 'clave', 'especialidad': 'General'},
+                            **admin)
+            resultados['errores'] += not any(m['id'] == 'MCLI' for m in con_cache.pedir('GET', '/medicos'))
+            resultados['errores'] += con_cache.estadisticas['aciertos_cache'] != len(rutas) * (peticiones - 1)
+
+        # Pasado cache_s el listado se revalida con su ETag: 304 sin cuerpo
+        with ClienteAPI(url, cache_s=0.01) as breve:
+            primera = breve.pedir('GET', '/habitaciones')
+            time.sleep(0.02)
+            resultados['errores'] += breve.pedir('GET', '/habitaciones') != primera
+            resultados['errores'] += breve.estadisticas['revalidadas'] != 1
+    return resultados
+
+
+def comprobar_reintentos() -> Dict[str, float]:
+    """
+    Reintentos, métodos no idempotentes y límites de tiempo contra una aplicación que falla a propósito.
+
+    Returns
+    -------
+    Dict[str, float]
+        Llamadas recibidas en cada caso, segundos hasta el Timeout y errores.
+    """
+    import requests
+    from flask import Flask
+    from cliente_api import ClienteAPI
+
+    inestable = Flask('inestable')
+    llamadas: Counter = Counter()
+
+    @inestable.route('/inestable')
+    def falla_dos_veces():
+        llamadas['inestable'] += 1
+        return ({'ok': True}, 200) if llamadas['inestable'] > 2 else ({'detail': 'no disponible'}, 503)
+
+    @inestable.route('/escritura', methods=['POST'])
+    def falla_siempre():
+        llamadas['escritura'] += 1
+        return {'detail': 'no disponible'}, 503
+
+    @inestable.route('/lenta')
+    def lenta():
+        llamadas['lenta'] += 1
+        time.sleep(1)
+        return {'ok': True}
+
+    resultados: Dict[str, float] = {'errores': 0}
+    with servidor_local(inestable) as url:
+        cliente = ClienteAPI(url, timeout=(1, 0.2), reintentos=3, espera_s=0.05)
+        resultados['errores'] += cliente.pedir('GET', '/inestable') != {'ok': True}
+        try:
+            cliente.pedir('POST', '/escritura', datos={})
+            resultados['errores'] += 1
+        except requests.HTTPError as e:
+            resultados['errores'] += e.response.status_code != 503
+        inicio = time.perf_counter()
+        try:
+            cliente.pedir('GET', '/lenta')
+            resultados['errores'] += 1
+        except (requests.Timeout, requests.ConnectionError):
+            pass
+        resultados['s_timeout'] = time.perf_counter() - inicio
+        cliente.cerrar()
+    resultados.update({f'llamadas_{clave}': valor for clave, valor in llamadas.items()})
+    resultados['errores'] += (llamadas['inestable'] != 3 or llamadas['escritura'] != 1 or llamadas['lenta'] != 4)
+    return resultados
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark del cliente HTTP de la aplicación de terminal")
+    parser.add_argument('--peticiones', type=int, default=500, help="Peticiones por listado y modo")
+    parser.add_argument('--port', type=int, default=5070)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Antes de importar APIS o cualquier módulo tabla_*: todos abren PROSALUD_BD
+        ruta = os.environ['PROSALUD_BD'] = os.path.join(tmp, 'cliente.db')
+        r = medir_api(ruta, args.peticiones, args.port)
+    c = comprobar_reintentos()
+    print(f"{args.peticiones} peticiones por listado contra servidor.py (waitress):")
+    for modo in ('nueva_conexion', 'sesion', 'cache'):
+        print(f"  {modo.replace('_', ' ')}: /medicos {r[f'medicos_{modo}']:.0f}/s, "
+              f"/habitaciones {r[f'habitaciones_{modo}']:.0f}/s, {r[f'conexiones_{modo}']:.0f} conexiones")
+    print(f"Reintentos: GET con dos 503 → {c['llamadas_inestable']:.0f} llamadas; "
+          f"POST con 503 → {c['llamadas_escritura']:.0f}; GET lento → {c['llamadas_lenta']:.0f} llamadas "
+          f"y Timeout a los {c['s_timeout']:.2f} s")
+    errores = r['errores'] + c['errores']
+    print(f"Errores en las comprobaciones: {errores:.0f}")
+    if errores:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
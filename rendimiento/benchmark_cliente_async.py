@@ -0,0 +1,178 @@
+"""
+Benchmark del SDK asíncrono (``cliente_async.py``).
+
+Siembra una base de datos temporal, da SIP a la mitad de los pacientes y
+consulta el SIP de ``--consultas`` pacientes (los de una planta) de tres
+formas:
+
+- secuencial: una petición detrás de otra con ``cliente_api.ClienteAPI``,
+  como hoy;
+- concurrente: ``asyncio.gather`` con ``ClienteAsync``, hasta
+  ``--concurrencia`` peticiones a la vez;
+- fachada: ``ClienteSincrono.mapear``, lo mismo sin asyncio.
+
+Cada forma se mide contra ``servidor.py`` (waitress, un hilo por petición
+simultánea) y contra la aplicación servida en local con ``--latencia-ms`` de
+espera por petición, como un servidor en otra máquina. Comprueba que las
+tres dan los mismos SIP que la base de datos (None si no tiene) y que los
+listados paginados del SDK coinciden con los completos.
+
+Uso::
+
+    python -m rendimiento.benchmark_cliente_async --consultas 300 --concurrencia 16 --latencia-ms 20
+"""
+
+import argparse
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+from rendimiento.sembrado import ESCALAS
+
+
+class Retardo:
+    """
+    Aplicación WSGI que espera ``latencia_ms`` antes de cada petición (latencia de red simulada).
+
+    Parámetros:
+        app: Aplicación WSGI.
+        latencia_ms (float): Milisegundos de espera.
+    """
+
+    def __init__(self, app: Callable, latencia_ms: float) -> None:
+        self.app = app
+        self.latencia_s = latencia_ms / 1000
+
+    def __call__(self, environ: Dict[str, Any], start_response: Callable) -> Any:
+        time.sleep(self.latencia_s)
+        return self.app(environ, start_response)
+
+
+def _medir_s(funcion: Callable[[], Any]) -> tuple:
+    inicio = time.perf_counter()
+    resultado = funcion()
+    return time.perf_counter() - inicio, resultado
+
+
+def medir_formas(url: str, ids: List[str], concurrencia: int) -> Dict[str, Any]:
+    """
+    Segundos y resultados de consultar el SIP de ``ids`` de cada forma.
+
+    Returns
+    -------
+    Dict[str, Any]
+        ``s_<forma>`` y ``sips_<forma>``.
+    """
+    from cliente_api import ClienteAPI
+    from cliente_async import ClienteAsync, ClienteSincrono
+
+    resultados: Dict[str, Any] = {}
+
+    with ClienteAPI(url) as cliente:
+        def secuencial() -> List[Any]:
+            sips = []
+            for id_paciente in ids:
+                respuesta = cliente.peticion('GET', f'/consultar_sip/{id_paciente}')
+                sips.append(respuesta.json()['sip'] if respuesta.status_code == 200 else None)
+            return sips
+
+        resultados['s_secuencial'], resultados['sips_secuencial'] = _medir_s(secuencial)
+
+    async def concurrente() -> List[Any]:
+        async with ClienteAsync(url, concurrencia=concurrencia) as api:
+            return list(await asyncio.gather(*(api.consultar_sip(id_paciente) for id_paciente in ids)))
+
+    resultados['s_concurrente'], resultados['sips_concurrente'] = _medir_s(lambda: asyncio.run(concurrente()))
+
+    with ClienteSincrono(url, concurrencia=concurrencia) as api:
+        resultados['s_fachada'], resultados['sips_fachada'] = _medir_s(lambda: api.mapear('consultar_sip', ids))
+    return resultados
+
+
+def comprobar_listados(url: str) -> int:
+    """Errores al comparar los listados paginados del SDK con los completos."""
+    from cliente_api import ClienteAPI
+    from cliente_async import (ClienteSincrono, FichaAuxiliar, FichaEnfermero, FichaHabitacion, FichaMedico,
+                               FichaPaciente)
+
+    errores = 0
+    with ClienteAPI(url) as cliente, ClienteSincrono(url) as api:
+        for ruta, tipo in (('/pacientes', FichaPaciente), ('/medicos', FichaMedico), ('/enfermeros', FichaEnfermero),
+                           ('/auxiliares', FichaAuxiliar), ('/habitaciones', FichaHabitacion)):
+            completo = [tipo.desde_json(elemento) for elemento in cliente.pedir('GET', ruta)]
+            paginado = getattr(api, ruta.strip('/'))(por_pagina=37)
+            errores += paginado != sorted(completo, key=lambda ficha: ficha.como_dict()[ficha.__slots__[0]])
+        errores += api.consultar_sip('NO-EXISTE') is not None
+    return errores
+
+
+def medir(ruta: str, n_consultas: int, concurrencia: int, latencia_ms: float, port: int,
+          semilla: int = 42) -> Dict[str, Any]:
+    """
+    Fan-out contra servidor.py y contra el servidor local con latencia.
+
+    ``PROSALUD_BD`` debe apuntar ya a ``ruta``.
+
+    Returns
+    -------
+    Dict[str, Any]
+        Resultados de ``medir_formas`` por servidor y errores de las comprobaciones.
+    """
+    from rendimiento.benchmark_cliente import servidor_local
+    from rendimiento.carga import servidor_en_marcha
+    from rendimiento.sembrado import crear_bd
+
+    crear_bd(ruta, ESCALAS['mini'], semilla)
+    conn = sqlite3.connect(ruta)
+    pacientes = [fila[0] for fila in conn.execute("SELECT id FROM pacientes ORDER BY id;")]
+    with conn:
+        conn.executemany("INSERT OR IGNORE INTO SIPS (sip, paciente_id) VALUES (?, ?);",
+                         [(f'SIP-{id_paciente}', id_paciente) for id_paciente in pacientes[::2]])
+    ids = pacientes[:n_consultas]
+    esperados = [conn.execute("SELECT sip FROM SIPS WHERE paciente_id = ?;", (id_paciente,)).fetchone()
+                 for id_paciente in ids]
+    esperados = [fila[0] if fila else None for fila in esperados]
+    conn.close()
+
+    from APIS import app
+
+    resultados: Dict[str, Any] = {'errores': 0}
+    with servidor_en_marcha(ruta, concurrencia, port, 'waitress') as url:
+        resultados['servidor'] = medir_formas(url, ids, concurrencia)
+        resultados['errores'] += comprobar_listados(url)
+    with servidor_local(Retardo(app, latencia_ms)) as url:
+        resultados['latencia'] = medir_formas(url, ids, concurrencia)
+    for medidas in (resultados['servidor'], resultados['latencia']):
+        resultados['errores'] += sum(medidas[f'sips_{forma}'] != esperados
+                                     for forma in ('secuencial', 'concurrente', 'fachada'))
+    return resultados
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark del SDK asíncrono de la API")
+    parser.add_argument('--consultas', type=int, default=300, help="Pacientes cuyo SIP se consulta")
+    parser.add_argument('--concurrencia', type=int, default=16)
+    parser.add_argument('--latencia-ms', type=float, default=20.0, help="Latencia simulada del segundo servidor")
+    parser.add_argument('--port', type=int, default=5090)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Antes de importar APIS o cualquier módulo tabla_*: todos abren PROSALUD_BD
+        ruta = os.environ['PROSALUD_BD'] = os.path.join(tmp, 'cliente_async.db')
+        r = medir(ruta, args.consultas, args.concurrencia, args.latencia_ms, args.port)
+    print(f"{args.consultas} consultas de SIP, concurrencia {args.concurrencia}, {os.cpu_count()} núcleos:")
+    for servidor, titulo in (('servidor', 'servidor.py (waitress)'),
+                             ('latencia', f'servidor local con {args.latencia_ms:.0f} ms de latencia')):
+        m = r[servidor]
+        print(f"  {titulo}: secuencial {m['s_secuencial']:.2f} s, concurrente {m['s_concurrente']:.2f} s "
+              f"(x{m['s_secuencial'] / m['s_concurrente']:.1f}), fachada {m['s_fachada']:.2f} s")
+    print(f"Errores en las comprobaciones: {r['errores']:.0f}")
+    if r['errores']:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
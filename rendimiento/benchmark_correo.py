@@ -0,0 +1,267 @@
+"""
+Benchmark de la bandeja de salida de correo.
+
+Levanta un servidor SMTP local de pruebas (``ServidorSMTPPrueba``, en un
+hilo con asyncio) y, sobre una base de datos temporal, mide:
+
+- correos encolados por segundo, uno a uno (lo que paga una petición) y en
+  bloque;
+- correos enviados por segundo por ``EnviadorCorreo`` con su conexión
+  reutilizada, frente a abrir una conexión SMTP por correo;
+- que el límite de envíos por segundo se respeta;
+- fiabilidad: con direcciones que el servidor rechaza temporalmente (451)
+  la primera vez, direcciones inexistentes (550), direcciones con
+  caracteres no ASCII (que smtplib no puede codificar) y cortes de
+  conexión, todo correo acaba enviado exactamente una vez o 'fallido'.
+
+``--latencia-ms`` añade un retardo a cada respuesta del servidor para
+simular un proveedor remoto.
+
+Uso::
+
+    python -m rendimiento.benchmark_correo --correos 20000 --latencia-ms 1
+"""
+
+import argparse
+import asyncio
+import collections
+import logging
+import os
+import smtplib
+import tempfile
+import threading
+import time
+from typing import Dict
+
+# Correos enviados abriendo una conexión por correo (cada uno paga la conexión)
+CORREOS_SIN_REUTILIZAR = 500
+
+
+class ServidorSMTPPrueba:
+    """
+    Servidor SMTP mínimo que acepta y cuenta los correos (no los entrega).
+
+    - Las direcciones que contienen "reintento" se rechazan con 451 la
+      primera vez y se aceptan después.
+    - Las que contienen "invalido" se rechazan siempre con 550.
+    - Con ``corte_cada`` > 0 cierra la conexión al recibir el MAIL FROM de
+      cada ``corte_cada`` correos.
+
+    Parámetros:
+        latencia_s (float, opcional): Retardo antes de cada respuesta.
+        corte_cada (int, opcional): Cada cuántos correos corta la conexión (0 nunca).
+    """
+
+    def __init__(self, latencia_s: float = 0.0, corte_cada: int = 0) -> None:
+        self.latencia_s = latencia_s
+        self.corte_cada = corte_cada
+        self.recibidos: collections.Counter = collections.Counter()
+        self.conexiones = 0
+        self._intentados: collections.Counter = collections.Counter()
+        self._mails = 0
+        self._bucle = asyncio.new_event_loop()
+        self._listo = threading.Event()
+        self.puerto = 0
+
+    def __enter__(self) -> 'ServidorSMTPPrueba':
+        self._hilo = threading.Thread(target=self._ejecutar, daemon=True)
+        self._hilo.start()
+        self._listo.wait()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self._bucle.call_soon_threadsafe(self._bucle.stop)
+        self._hilo.join()
+
+    def reiniciar(self) -> None:
+        self.recibidos.clear()
+        self._intentados.clear()
+        self.conexiones = 0
+
+    def _ejecutar(self) -> None:
+        asyncio.set_event_loop(self._bucle)
+        servidor = self._bucle.run_until_complete(asyncio.start_server(self._atender, '127.0.0.1', 0))
+        self.puerto = servidor.sockets[0].getsockname()[1]
+        self._listo.set()
+        self._bucle.run_forever()
+        # Conexiones que siguen abiertas al parar
+        pendientes = asyncio.all_tasks(self._bucle)
+        for tarea in pendientes:
+            tarea.cancel()
+        self._bucle.run_until_complete(asyncio.gather(*pendientes, return_exceptions=True))
+        servidor.close()
+        self._bucle.close()
+
+    async def _responder(self, escritor: asyncio.StreamWriter, linea: str) -> None:
+        if self.latencia_s:
+            await asyncio.sleep(self.latencia_s)
+        escritor.write(linea.encode() + b"\r\n")
+        await escritor.drain()
+
+    async def _atender(self, lector: asyncio.StreamReader, escritor: asyncio.StreamWriter) -> None:
+        self.conexiones += 1
+        destinatarios = []
+        try:
+            await self._responder(escritor, "220 prueba ESMTP")
+            while True:
+                linea = (await lector.readline()).decode(errors='replace').strip()
+                if not linea:
+                    break
+                orden = linea[:4].upper()
+                if orden in ('EHLO', 'HELO'):
+                    await self._responder(escritor, "250 prueba")
+                elif orden == 'MAIL':
+                    self._mails += 1
+                    if self.corte_cada and self._mails % self.corte_cada == 0:
+                        break
+                    destinatarios = []
+                    await self._responder(escritor, "250 OK")
+                elif orden == 'RCPT':
+                    direccion = linea.partition(':')[2].strip(' <>')
+                    self._intentados[direccion] += 1
+                    if 'invalido' in direccion:
+                        await self._responder(escritor, "550 No existe ese buzón")
+                    elif 'reintento' in direccion and self._intentados[direccion] == 1:
+                        await self._responder(escritor, "451 Inténtelo más tarde")
+                    else:
+                        destinatarios.append(direccion)
+                        await self._responder(escritor, "250 OK")
+                elif orden == 'DATA':
+                    await self._responder(escritor, "354 Adelante")
+                    while (await lector.readline()) not in (b".\r\n", b""):
+                        pass
+                    self.recibidos.update(destinatarios)
+                    await self._responder(escritor, "250 Recibido")
+                elif orden == 'QUIT':
+                    await self._responder(escritor, "221 Adiós")
+                    break
+                else:
+                    # RSET, NOOP
+                    await self._responder(escritor, "250 OK")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # Conexión abierta al parar el servidor: sin traza (asyncio la imprime si la tarea acaba cancelada)
+            pass
+        finally:
+            escritor.close()
+
+
+def _por_segundo(n: int, inicio: float) -> float:
+    return n / (time.perf_counter() - inicio)
+
+
+def _esperar_bandeja(enviador, timeout_s: float = 60.0) -> None:
+    """Procesa la bandeja hasta que no quede nada pendiente (incluidos reintentos futuros)."""
+    from Base_De_Datos.tablas.tabla_correo import contar_correos
+
+    limite = time.monotonic() + timeout_s
+    while time.monotonic() < limite:
+        enviador.vaciar()
+        estados = contar_correos()
+        if not estados.get('pendiente') and not estados.get('enviando'):
+            return
+        time.sleep(0.02)
+    raise RuntimeError("La bandeja no se vació a tiempo")
+
+
+def medir(n: int, latencia_s: float) -> Dict[str, float]:
+    """
+    Mide la bandeja de salida sobre una base de datos temporal.
+
+    Returns
+    -------
+    Dict[str, float]
+        Correos por segundo de cada modo y contadores de la prueba de fiabilidad.
+    """
+    with tempfile.TemporaryDirectory() as tmp, ServidorSMTPPrueba(latencia_s) as servidor:
+        from Base_De_Datos.tablas import tabla_correo
+        import correo
+
+        tabla_correo.db_path = os.path.join(tmp, 'correo.db')
+        tabla_correo.crear_tabla_correos()
+        resultados: Dict[str, float] = {}
+
+        inicio = time.perf_counter()
+        for i in range(1_000):
+            correo.encolar(f"uno{i}@prosalud.es", "Recordatorio", "Tiene una cita mañana.")
+        resultados['encolar_uno'] = _por_segundo(1_000, inicio)
+        inicio = time.perf_counter()
+        correo.encolar_varios((f"paciente{i}@prosalud.es", "Recordatorio", "Tiene una cita mañana.", None)
+                              for i in range(n - 1_000))
+        resultados['encolar_bloque'] = _por_segundo(n - 1_000, inicio)
+
+        enviador = correo.EnviadorCorreo(host='127.0.0.1', puerto=servidor.puerto, por_segundo=0)
+        inicio = time.perf_counter()
+        enviador.vaciar()
+        resultados['enviar_reutilizada'] = _por_segundo(n, inicio)
+        resultados['recibidos'] = sum(servidor.recibidos.values())
+        resultados['conexiones'] = enviador.estadisticas['conexiones']
+        enviador.cerrar_conexion()
+
+        inicio = time.perf_counter()
+        for i in range(CORREOS_SIN_REUTILIZAR):
+            datos = enviador._mensaje(correo.REMITENTE, f"p{i}@prosalud.es", "Recordatorio", "Tiene una cita mañana.")
+            with smtplib.SMTP('127.0.0.1', servidor.puerto) as smtp:
+                smtp.sendmail(correo.REMITENTE, [f"p{i}@prosalud.es"], datos)
+        resultados['enviar_una_conexion_cada_correo'] = _por_segundo(CORREOS_SIN_REUTILIZAR, inicio)
+
+        # Límite de envíos por segundo
+        por_segundo = 200
+        correo.encolar_varios((f"limite{i}@prosalud.es", "Aviso", "Texto", None) for i in range(3 * por_segundo))
+        enviador = correo.EnviadorCorreo(host='127.0.0.1', puerto=servidor.puerto, por_segundo=por_segundo)
+        inicio = time.perf_counter()
+        enviador.vaciar()
+        resultados['limite_pedido'] = por_segundo
+        resultados['limite_medido'] = _por_segundo(3 * por_segundo, inicio)
+        enviador.cerrar_conexion()
+
+        # Fiabilidad: rechazos temporales, definitivos y cortes de conexión
+        tabla_correo.db_path = os.path.join(tmp, 'fiabilidad.db')
+        correo._tabla_creada = False
+        servidor.reiniciar()
+        servidor.corte_cada = 97
+        prefijos = {0: 'reintento', 5: 'invalido', 10: 'reintento', 15: 'josé'}
+        direcciones = [f"{prefijos.get(i % 20, 'ok')}{i}@prosalud.es" for i in range(2_000)]
+        correo.encolar_varios((d, "Aviso", "Texto", None) for d in direcciones)
+        enviador = correo.EnviadorCorreo(host='127.0.0.1', puerto=servidor.puerto, por_segundo=0,
+                                         espera_base_s=0.01)
+        _esperar_bandeja(enviador)
+        enviador.cerrar_conexion()
+        estados = tabla_correo.contar_correos()
+        validas = [d for d in direcciones if 'invalido' not in d and d.isascii()]
+        resultados['fiabilidad_enviados'] = estados.get('enviado', 0)
+        resultados['fiabilidad_fallidos'] = estados.get('fallido', 0)
+        resultados['fiabilidad_esperados_fallidos'] = len(direcciones) - len(validas)
+        resultados['fiabilidad_reintentos'] = enviador.estadisticas['reintentos']
+        resultados['fiabilidad_conexiones'] = enviador.estadisticas['conexiones']
+        resultados['fiabilidad_errores'] = (sum(servidor.recibidos[d] != 1 for d in validas)
+                                            + (estados.get('enviado', 0) != len(validas))
+                                            + (estados.get('fallido', 0) != len(direcciones) - len(validas)))
+    return resultados
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de la bandeja de salida de correo")
+    parser.add_argument('--correos', type=int, default=20_000)
+    parser.add_argument('--latencia-ms', type=float, default=0.0,
+                        help="Retardo de cada respuesta del servidor SMTP de pruebas")
+    args = parser.parse_args()
+
+    # Los rechazos definitivos de la prueba de fiabilidad son esperados
+    logging.getLogger('correo').setLevel(logging.ERROR)
+    r = medir(max(args.correos, 2_000), args.latencia_ms / 1000)
+    print(f"Encolar: {r['encolar_uno']:.0f} correos/s uno a uno, {r['encolar_bloque']:.0f} correos/s en bloque")
+    print(f"Enviar {r['recibidos']:.0f} correos con {r['conexiones']:.0f} conexión(es) reutilizada(s): "
+          f"{r['enviar_reutilizada']:.0f} correos/s; una conexión por correo: "
+          f"{r['enviar_una_conexion_cada_correo']:.0f} correos/s")
+    print(f"Límite de {r['limite_pedido']:.0f} correos/s: medido {r['limite_medido']:.0f} correos/s")
+    print(f"Fiabilidad: {r['fiabilidad_enviados']:.0f} enviados, {r['fiabilidad_fallidos']:.0f} fallidos "
+          f"(esperados {r['fiabilidad_esperados_fallidos']:.0f}), {r['fiabilidad_reintentos']:.0f} reintentos, "
+          f"{r['fiabilidad_conexiones']:.0f} conexiones, {r['fiabilidad_errores']:.0f} errores")
+    if r['fiabilidad_errores'] or r['recibidos'] != max(args.correos, 2_000):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark de la calibración y la actualización de los hashes de contraseña (``credenciales.py``).
+
+- Calibración: el método de scrypt, pbkdf2 y bcrypt que da ``--objetivo-ms``
+  por verificación en esta máquina, y lo que tarda de verdad.
+- Actualización: siembra una base de datos temporal, deja la contraseña del
+  médico sembrado con un hash antiguo (``--metodo-antiguo``), guarda el
+  método calibrado de scrypt e inicia sesión (``GET /menu``). Comprueba que
+  el hash se re-cifra en segundo plano con el método nuevo, que se sigue
+  entrando con la misma contraseña y que no se pisa un hash que ha cambiado
+  mientras tanto; mide la latencia del inicio de sesión antes y después.
+
+Uso::
+
+    python -m rendimiento.benchmark_credenciales --objetivo-ms 50 --inicios 10
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from typing import Dict, Tuple
+
+from rendimiento.sembrado import CLAVE_SEMBRADO, ESCALAS, USUARIO_MEDICO
+
+
+def medir_calibracion(objetivo_ms: float) -> Dict[str, Tuple[str, float]]:
+    """
+    Método calibrado de cada algoritmo y sus milisegundos por verificación.
+
+    Returns
+    -------
+    Dict[str, Tuple[str, float]]
+        Algoritmo -> (método, ms).
+    """
+    import credenciales
+
+    resultados = {}
+    for algoritmo in ('scrypt', 'pbkdf2', 'bcrypt'):
+        metodo = credenciales.calibrar(objetivo_ms, algoritmo)
+        resultados[algoritmo] = (metodo, credenciales.medir_ms(metodo))
+    return resultados
+
+
+def medir_actualizacion(ruta: str, metodo_antiguo: str, metodo_nuevo: str, inicios: int,
+                        semilla: int = 42) -> Dict[str, float]:
+    """
+    Inicios de sesión con un hash antiguo y con el re-cifrado.
+
+    ``PROSALUD_BD`` debe apuntar ya a ``ruta``.
+
+    Returns
+    -------
+    Dict[str, float]
+        ms por inicio de sesión antes y después, segundos hasta el re-cifrado y errores.
+    """
+    from rendimiento.sembrado import crear_bd
+    import credenciales
+    from APIS import app
+    from Base_De_Datos.tablas import tabla_credenciales
+
+    crear_bd(ruta, ESCALAS['mini'], semilla)
+    conn = sqlite3.connect(ruta, isolation_level=None)
+    conn.execute("UPDATE medicos SET password = ? WHERE username = ?;",
+                 (credenciales.cifrar(CLAVE_SEMBRADO, metodo_antiguo), USUARIO_MEDICO))
+    tabla_credenciales.guardar_parametro(credenciales.CLAVE_METODO, metodo_nuevo)
+    credenciales.olvidar_metodo()
+
+    cliente = app.test_client()
+
+    def iniciar_sesion() -> Tuple[int, float]:
+        inicio = time.perf_counter()
+        codigo = cliente.get('/menu', auth=(USUARIO_MEDICO, CLAVE_SEMBRADO), headers={'X-ROL': 'medico'}).status_code
+        return codigo, (time.perf_counter() - inicio) * 1000
+
+    def hash_actual() -> str:
+        return conn.execute("SELECT password FROM medicos WHERE username = ?;", (USUARIO_MEDICO,)).fetchone()[0]
+
+    resultados: Dict[str, float] = {'errores': 0}
+    codigo, resultados['ms_antes'] = iniciar_sesion()
+    resultados['errores'] += codigo != 200
+
+    # El re-cifrado va en segundo plano: se espera a que el hash cambie
+    inicio = time.perf_counter()
+    while credenciales.metodo_de(hash_actual()) != metodo_nuevo and time.perf_counter() - inicio < 60:
+        time.sleep(0.01)
+    resultados['s_recifrado'] = time.perf_counter() - inicio
+    resultados['errores'] += credenciales.metodo_de(hash_actual()) != metodo_nuevo
+
+    tiempos = []
+    for _ in range(inicios):
+        codigo, ms = iniciar_sesion()
+        resultados['errores'] += codigo != 200
+        tiempos.append(ms)
+    resultados['ms_despues'] = sorted(tiempos)[len(tiempos) // 2]
+    resultados['errores'] += cliente.get('/menu', auth=(USUARIO_MEDICO, 'otra'),
+                                         headers={'X-ROL': 'medico'}).status_code != 401
+
+    # Un hash que ya no es el verificado (p. ej. cambio de contraseña entretanto) no se pisa
+    id_medico = conn.execute("SELECT id FROM medicos WHERE username = ?;", (USUARIO_MEDICO,)).fetchone()[0]
+    resultados['errores'] += tabla_credenciales.actualizar_hash('medico', id_medico, 'obsoleto', 'nuevo')
+    conn.close()
+    return resultados
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de la calibración y actualización de hashes")
+    parser.add_argument('--objetivo-ms', type=float, default=50.0)
+    parser.add_argument('--metodo-antiguo', default='pbkdf2:sha256:600000')
+    parser.add_argument('--inicios', type=int, default=10, help="Inicios de sesión tras el re-cifrado")
+    args = parser.parse_args()
+    # El método lo decide el calibrado guardado en la base de datos, no el entorno
+    os.environ.pop('PROSALUD_HASH_METODO', None)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Antes de importar APIS o cualquier módulo tabla_*: todos abren PROSALUD_BD
+        ruta = os.environ['PROSALUD_BD'] = os.path.join(tmp, 'credenciales.db')
+        c = medir_calibracion(args.objetivo_ms)
+        r = medir_actualizacion(ruta, args.metodo_antiguo, c['scrypt'][0], args.inicios)
+    print(f"Calibración para {args.objetivo_ms:.0f} ms por verificación ({os.cpu_count()} núcleos):")
+    for algoritmo, (metodo, ms) in c.items():
+        print(f"  {algoritmo}: {metodo} → {ms:.1f} ms")
+    print(f"Inicio de sesión con {args.metodo_antiguo}: {r['ms_antes']:.1f} ms; "
+          f"re-cifrado a {c['scrypt'][0]} en {r['s_recifrado']:.2f} s; después: {r['ms_despues']:.1f} ms (p50)")
+    print(f"Errores en las comprobaciones: {r['errores']:.0f}")
+    if r['errores']:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
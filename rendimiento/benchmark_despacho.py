@@ -0,0 +1,165 @@
+"""
+Simulación y benchmark de la central de despacho de ambulancias.
+
+Genera una flota de ``--ambulancias`` unidades repartidas por las subzonas
+de las provincias de ``Base_De_Datos/zonas.csv`` (con tripulaciones como
+las de ``sembrado.py``) y simula ``--avisos`` avisos: llegan con tiempos
+entre avisos exponenciales, cada uno pide la ambulancia libre más cercana
+(a veces con una especialidad concreta) y la unidad vuelve a estar libre
+al terminar el servicio. Mide la latencia de cada asignación en memoria y
+comprueba una muestra contra la búsqueda lineal sobre toda la flota.
+
+Con ``--bd RUTA`` (una base de datos sembrada, nunca la de la app) mide
+además la asignación completa, con el registro en 'despachos'.
+
+Uso::
+
+    python -m rendimiento.benchmark_despacho --ambulancias 100000 --avisos 200000
+    python -m rendimiento.benchmark_despacho --bd /tmp/prosalud_media.db
+"""
+
+import argparse
+import heapq
+import os
+import random
+import statistics
+import time
+from typing import Dict, List
+
+from rendimiento.sembrado import ESPECIALIDADES_PARAMEDICO, PROVINCIAS
+
+# Subzonas por provincia, como en sembrado.py
+ZONAS_POR_PROVINCIA = 20
+
+# Proporción de avisos que exigen una especialidad concreta
+AVISOS_CON_ESPECIALIDAD = 0.3
+
+
+def _percentil(valores: List[float], p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+def flota_sintetica(n: int, semilla: int = 42) -> list:
+    """Unidades ubicadas en subzonas aleatorias con dos paramédicos de especialidad aleatoria."""
+    from despacho_ambulancias import Unidad, cargar_zonas, ubicar_zona
+
+    rng = random.Random(semilla)
+    zonas = cargar_zonas()
+    unidades = []
+    for i in range(n):
+        zona = f"{rng.choice(PROVINCIAS)[1]} {rng.randint(1, ZONAS_POR_PROVINCIA)}"
+        especialidades = rng.choices(ESPECIALIDADES_PARAMEDICO, k=2)
+        unidades.append(Unidad(f"SIM{i:06d}", zona, "C0000", *ubicar_zona(zona, zonas),
+                               set(especialidades), len(especialidades)))
+    return unidades
+
+
+def lugar_aviso(rng: random.Random, unidades: list) -> tuple:
+    """Punto aleatorio a hasta ~50 km de la zona de una ambulancia de la flota."""
+    unidad = rng.choice(unidades)
+    return unidad.latitud + rng.uniform(-0.45, 0.45), unidad.longitud + rng.uniform(-0.55, 0.55)
+
+
+def simular(central, avisos: int, servicio_min: float, entre_avisos_min: float, comprobar: int,
+            persistir: bool = False, semilla: int = 42) -> Dict[str, float]:
+    """
+    Simula ``avisos`` avisos sobre la flota cargada en ``central``.
+
+    Returns
+    -------
+    Dict[str, float]
+        Latencias de asignación (µs), avisos sin unidad, ocupación máxima y
+        discrepancias con la búsqueda lineal.
+    """
+    rng = random.Random(semilla)
+    unidades = sorted(central.unidades.values(), key=lambda u: u.matricula)
+    reloj = 0.0
+    fin_servicios = []  # montículo (minuto en que queda libre, matrícula)
+    latencias, sin_unidad, ocupacion_maxima, discrepancias = [], 0, 0, 0
+    paso_comprobacion = max(1, avisos // comprobar) if comprobar else 0
+    for i in range(avisos):
+        reloj += rng.expovariate(1 / entre_avisos_min)
+        while fin_servicios and fin_servicios[0][0] <= reloj:
+            central.liberar(heapq.heappop(fin_servicios)[1], persistir=persistir)
+        latitud, longitud = lugar_aviso(rng, unidades)
+        especialidad = rng.choice(ESPECIALIDADES_PARAMEDICO) if rng.random() < AVISOS_CON_ESPECIALIDAD else None
+        if paso_comprobacion and i % paso_comprobacion == 0:
+            esperada = central.buscar_lineal(latitud, longitud, especialidad)
+            obtenida = central.buscar(latitud, longitud, especialidad)
+            if (esperada and esperada.matricula) != (obtenida and obtenida.matricula):
+                discrepancias += 1
+        inicio = time.perf_counter()
+        salida = central.asignar(latitud, longitud, especialidad, persistir=persistir)
+        latencias.append((time.perf_counter() - inicio) * 1e6)
+        if salida is None:
+            sin_unidad += 1
+            continue
+        # Ida a 90 km/h más el servicio
+        duracion = salida['distancia_km'] / 90 * 60 + rng.expovariate(1 / servicio_min)
+        heapq.heappush(fin_servicios, (reloj + duracion, salida['matricula']))
+        ocupacion_maxima = max(ocupacion_maxima, len(fin_servicios))
+    for _, matricula in fin_servicios:
+        central.liberar(matricula, persistir=persistir)
+    return {
+        'p50_us': statistics.median(latencias),
+        'p99_us': _percentil(latencias, 0.99),
+        'max_us': max(latencias),
+        'media_us': statistics.fmean(latencias),
+        'sin_unidad': sin_unidad,
+        'ocupacion_maxima': ocupacion_maxima,
+        'discrepancias': discrepancias,
+    }
+
+
+def _imprimir(titulo: str, resultado: Dict[str, float]) -> None:
+    print(f"{titulo}: p50 {resultado['p50_us']:.1f} µs, p99 {resultado['p99_us']:.1f} µs, "
+          f"máx {resultado['max_us']:.0f} µs; sin unidad {resultado['sin_unidad']}, "
+          f"ocupación máxima {resultado['ocupacion_maxima']}, discrepancias {resultado['discrepancias']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Simulación de la central de despacho de ambulancias")
+    parser.add_argument('--ambulancias', type=int, default=5_000)
+    parser.add_argument('--avisos', type=int, default=100_000)
+    parser.add_argument('--servicio', type=float, default=45.0, help="Minutos medios de servicio")
+    parser.add_argument('--entre-avisos', type=float, default=0.05, help="Minutos medios entre avisos")
+    parser.add_argument('--comprobar', type=int, default=1_000, help="Avisos comparados con la búsqueda lineal")
+    parser.add_argument('--bd', help="Base de datos sembrada para medir también con registro en 'despachos'")
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args()
+
+    if args.bd:
+        # Antes de importar conexion.py, que lee PROSALUD_BD al importarse
+        os.environ['PROSALUD_BD'] = args.bd
+    from despacho_ambulancias import CentralDespacho
+
+    central = CentralDespacho()
+    inicio = time.perf_counter()
+    central.cargar_unidades(flota_sintetica(args.ambulancias, args.semilla))
+    print(f"{args.ambulancias} ambulancias indexadas en {(time.perf_counter() - inicio) * 1000:.0f} ms "
+          f"({central.estado()['celdas_ocupadas']} celdas)")
+    resultado = simular(central, args.avisos, args.servicio, args.entre_avisos, args.comprobar,
+                        semilla=args.semilla)
+    _imprimir(f"{args.avisos} avisos en memoria", resultado)
+    discrepancias = resultado['discrepancias']
+
+    if args.bd:
+        CentralDespacho.preparar()
+        central = CentralDespacho()
+        inicio = time.perf_counter()
+        central.cargar()
+        print(f"\nFlota de {args.bd} cargada en {(time.perf_counter() - inicio) * 1000:.0f} ms: {central.estado()}")
+        avisos = min(args.avisos, 2_000)
+        # Ritmo de avisos que deja libre buena parte de la flota sembrada
+        entre_avisos = max(args.entre_avisos, args.servicio / max(1, len(central.unidades) // 4))
+        resultado = simular(central, avisos, args.servicio, entre_avisos, args.comprobar,
+                            persistir=True, semilla=args.semilla)
+        _imprimir(f"{avisos} avisos con registro en 'despachos'", resultado)
+        discrepancias += resultado['discrepancias']
+    if discrepancias:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""
+Benchmark de la cola de documentos de los secretarios.
+
+Siembra una base de datos temporal (escala mini) con ``--documentos``
+documentos pendientes (100.000 por defecto) repartidos entre los
+secretarios y sin asignar, y mide:
+
+- los 10 siguientes de un secretario: leyendo la tabla entera y filtrando
+  en Python (como se hacía con ``leer_documentos``), con el índice
+  idx_documentos_cola y con la caché en memoria de ``ColaDocumentos``;
+- reclamaciones por segundo, con un UPDATE ... RETURNING por reclamación y
+  con ``ColaDocumentos.reclamar``;
+- marcar urgentes y cerrar en bloque;
+- ``--procesos`` procesos reclamando a la vez: ningún documento debe
+  reclamarse dos veces.
+
+Uso::
+
+    python -m rendimiento.benchmark_documentos --documentos 100000 --procesos 4
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from rendimiento.sembrado import ESCALAS, id_secretario
+
+# Consultas de "los siguientes" con la tabla entera (cada una la recorre)
+CONSULTAS_LINEAL = 20
+
+
+def _por_segundo(funcion: Callable[[], None], repeticiones: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return repeticiones / (time.perf_counter() - inicio)
+
+
+def _siguientes_lineal(id_sec: str, n: int) -> list:
+    """Los ``n`` siguientes de un secretario leyendo todos los documentos."""
+    from Base_De_Datos.tablas.tabla_documento import leer_documentos
+
+    filas = [f for f in leer_documentos() if f[5] in (id_sec, None)]
+    return sorted(filas, key=lambda f: -f[4])[:n]
+
+
+def sembrar_documentos(ruta: str, n: int, secretarios: List[str], semilla: int) -> None:
+    """Inserta ``n`` documentos pendientes: un 10 % urgentes y un 20 % sin asignar."""
+    rng = random.Random(semilla)
+    conn = sqlite3.connect(ruta)
+    with conn:
+        filas = []
+        for i in range(n):
+            urgente = int(rng.random() < 0.1)
+            secretario = None if rng.random() < 0.2 else rng.choice(secretarios)
+            filas.append((f"DOC{i:08d}", f"Documento {i}", "Trámite administrativo", urgente, urgente, secretario))
+        conn.executemany(
+            "INSERT INTO documentos (id, titulo, descripcion, urgente, prioridad, id_secretario) "
+            "VALUES (?, ?, ?, ?, ?, ?)", filas)
+    conn.close()
+
+
+def _trabajador(ruta: str, secretarios: List[str], reclamaciones: int, salida) -> None:
+    """Proceso que reclama ``reclamaciones`` documentos con su propia ``ColaDocumentos``."""
+    from Base_De_Datos.tablas import tabla_documento
+    from cola_documentos import ColaDocumentos
+
+    tabla_documento.db_path = ruta
+    cola = ColaDocumentos()
+    reclamados = []
+    for i in range(reclamaciones):
+        secretario = secretarios[i % len(secretarios)]
+        documento = cola.reclamar(secretario)
+        if documento is not None:
+            reclamados.append((documento["id"], secretario))
+    salida.put(reclamados)
+
+
+def medir(n: int, procesos: int, semilla: int = 42) -> Dict[str, float]:
+    """
+    Mide la cola de documentos sobre una base de datos sembrada temporal.
+
+    Returns
+    -------
+    Dict[str, float]
+        Consultas y reclamaciones por segundo, segundos de las operaciones
+        en bloque y reclamaciones repetidas entre procesos.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, 'documentos.db')
+        from Base_De_Datos.tablas import tabla_documento
+        from rendimiento.sembrado import crear_bd
+        from cola_documentos import ColaDocumentos
+
+        tabla_documento.db_path = ruta
+        escala = ESCALAS['mini']
+        crear_bd(ruta, escala, semilla)
+        secretarios = [id_secretario(i) for i in range(escala['secretarios'])]
+        sembrar_documentos(ruta, n, secretarios, semilla)
+        rng = random.Random(semilla)
+        resultados: Dict[str, float] = {}
+
+        resultados['siguientes_lineal'] = _por_segundo(
+            lambda: _siguientes_lineal(rng.choice(secretarios), 10), CONSULTAS_LINEAL)
+        resultados['siguientes_indice'] = _por_segundo(
+            lambda: (tabla_documento.leer_cola_documentos(rng.choice(secretarios), 10),
+                     tabla_documento.leer_cola_documentos(None, 10)), 2_000)
+        cola = ColaDocumentos()
+        resultados['siguientes_cache'] = _por_segundo(lambda: cola.siguientes(rng.choice(secretarios), 10), 20_000)
+
+        reclamaciones = 2_000
+        resultados['reclamar_sql'] = _por_segundo(
+            lambda: tabla_documento.reclamar_siguiente_documento(rng.choice(secretarios)), reclamaciones)
+        resultados['reclamar_cola'] = _por_segundo(lambda: cola.reclamar(rng.choice(secretarios)), reclamaciones)
+
+        ids = [f"DOC{i:08d}" for i in rng.sample(range(n), min(n, 10_000))]
+        inicio = time.perf_counter()
+        resultados['marcados'] = cola.marcar_urgentes(ids)
+        resultados['marcar_s'] = time.perf_counter() - inicio
+        conn = sqlite3.connect(ruta)
+        por_secretario: Dict[str, List[str]] = {}
+        for doc, secretario in conn.execute(
+                f"SELECT id, id_secretario FROM documentos WHERE id IN ({','.join('?' * len(ids))}) "
+                "AND id_secretario IS NOT NULL", ids):
+            por_secretario.setdefault(secretario, []).append(doc)
+        conn.close()
+        inicio = time.perf_counter()
+        resultados['cerrados'] = sum(cola.cerrar(docs, s) for s, docs in por_secretario.items())
+        resultados['cerrar_s'] = time.perf_counter() - inicio
+
+        # Varios procesos reclamando a la vez las mismas colas
+        contexto = multiprocessing.get_context('spawn')
+        salida = contexto.Queue()
+        por_proceso = 1_000
+        trabajadores = [contexto.Process(target=_trabajador, args=(ruta, secretarios, por_proceso, salida))
+                        for _ in range(procesos)]
+        inicio = time.perf_counter()
+        for trabajador in trabajadores:
+            trabajador.start()
+        reclamados = [par for _ in trabajadores for par in salida.get()]
+        for trabajador in trabajadores:
+            trabajador.join()
+        resultados['concurrente_s'] = len(reclamados) / (time.perf_counter() - inicio)
+        resultados['reclamados_concurrente'] = len(reclamados)
+        resultados['repetidos'] = len(reclamados) - len({doc for doc, _ in reclamados})
+        # Cada documento reclamado debe ser, en la base de datos, del secretario que lo obtuvo
+        conn = sqlite3.connect(ruta)
+        duenos = dict(conn.execute("SELECT id, id_secretario FROM documentos WHERE estado = 'en_proceso'"))
+        conn.close()
+        resultados['repetidos'] += sum(duenos.get(doc) != secretario for doc, secretario in reclamados)
+    return resultados
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de la cola de documentos de los secretarios")
+    parser.add_argument('--documentos', type=int, default=100_000)
+    parser.add_argument('--procesos', type=int, default=4)
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args()
+
+    r = medir(args.documentos, args.procesos, args.semilla)
+    print(f"{args.documentos} documentos pendientes")
+    print(f"10 siguientes: tabla entera {r['siguientes_lineal']:.0f}/s, índice {r['siguientes_indice']:.0f}/s, "
+          f"caché {r['siguientes_cache']:.0f}/s")
+    print(f"Reclamar: UPDATE ... RETURNING {r['reclamar_sql']:.0f}/s, ColaDocumentos {r['reclamar_cola']:.0f}/s")
+    print(f"En bloque: {r['marcados']} marcados urgentes en {r['marcar_s'] * 1000:.0f} ms, "
+          f"{r['cerrados']} cerrados en {r['cerrar_s'] * 1000:.0f} ms")
+    print(f"{args.procesos} procesos: {r['reclamados_concurrente']} reclamados a {r['concurrente_s']:.0f}/s, "
+          f"{r['repetidos']} repetidos")
+    if r['repetidos']:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
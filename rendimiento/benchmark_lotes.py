@@ -0,0 +1,167 @@
+"""
+Benchmark del modo por lotes de la aplicación de terminal (``lotes.py``).
+
+Siembra una base de datos temporal, la sirve con ``servidor.py`` (waitress)
+y ejecuta el mismo lote de órdenes (altas de habitaciones y médicos,
+limpiezas y bajas, más una orden no válida y un alta repetida) de tres
+formas:
+
+- como el menú interactivo: una petición por orden, de una en una;
+- con ``--concurrencia`` peticiones simultáneas y altas masivas (``/bulk``);
+- igual, pero sin ser administrador: las altas pasan a ser individuales.
+
+Comprueba que el lote se lee igual en JSON, YAML y CSV, el estado de cada
+orden en el informe y el resultado en la base de datos.
+
+Uso::
+
+    python -m rendimiento.benchmark_lotes --habitaciones 1000 --medicos 40 --concurrencia 8
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import tempfile
+from typing import Any, Dict, List, Tuple
+
+from rendimiento.sembrado import CLAVE_SEMBRADO, ESCALAS, USUARIO_MEDICO
+
+# Primer número de las habitaciones del lote (lejos de las sembradas)
+NUMERO_INICIAL = 900_000
+
+
+def generar_ordenes(prefijo: str, n_habitaciones: int, n_medicos: int,
+                    base: int) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """
+    Órdenes de un lote y el estado esperado de cada una.
+
+    Returns
+    -------
+    Tuple[List[Dict[str, Any]], List[int]]
+        Órdenes y estados (0 si la orden no es válida; el alta repetida, 409 o cualquier error).
+    """
+    ordenes: List[Dict[str, Any]] = []
+    esperados: List[int] = []
+    numeros = range(base, base + n_habitaciones)
+    for numero in numeros:
+        ordenes.append({'accion': 'alta', 'entidad': 'habitaciones', 'numero': numero, 'capacidad': 2})
+        esperados.append(201)
+    for i in range(n_medicos):
+        ordenes.append({'accion': 'alta', 'entidad': 'medicos', 'id': f'{prefijo}M{i}', 'username': f'{prefijo}_m{i}',
+                        'password': 'clave', 'especialidad': 'General', 'antiguedad': 1})
+        esperados.append(201)
+    # Alta repetida: la rechaza la restricción UNIQUE
+    ordenes.append(dict(ordenes[-1]))
+    esperados.append(409)
+    for numero in numeros:
+        ordenes.append({'accion': 'limpiar', 'numero': numero})
+        esperados.append(200)
+    for i in range(0, n_medicos, 2):
+        ordenes.append({'accion': 'baja', 'entidad': 'medicos', 'id': f'{prefijo}M{i}'})
+        esperados.append(200)
+    ordenes.append({'accion': 'mudar', 'numero': base})
+    esperados.append(0)
+    return ordenes, esperados
+
+
+def escribir_formatos(ordenes: List[Dict[str, Any]], carpeta: str, nombre: str) -> Dict[str, str]:
+    """Escribe las órdenes en JSON, YAML y CSV; devuelve formato -> fichero."""
+    import yaml
+
+    rutas = {formato: os.path.join(carpeta, f'{nombre}.{formato}') for formato in ('json', 'yaml', 'csv')}
+    with open(rutas['json'], 'w', encoding='utf-8') as fichero:
+        json.dump(ordenes, fichero)
+    with open(rutas['yaml'], 'w', encoding='utf-8') as fichero:
+        yaml.safe_dump(ordenes, fichero, allow_unicode=True)
+    columnas = list(dict.fromkeys(clave for orden in ordenes for clave in orden))
+    with open(rutas['csv'], 'w', encoding='utf-8', newline='') as fichero:
+        escritor = csv.DictWriter(fichero, fieldnames=columnas)
+        escritor.writeheader()
+        escritor.writerows(ordenes)
+    return rutas
+
+
+def medir(ruta: str, n_habitaciones: int, n_medicos: int, concurrencia: int, port: int,
+          semilla: int = 42) -> Dict[str, Any]:
+    """
+    Ejecuta el lote de las tres formas y comprueba el resultado.
+
+    ``PROSALUD_BD`` debe apuntar ya a ``ruta``.
+
+    Returns
+    -------
+    Dict[str, Any]
+        Resumen de cada forma (``resumir``) y errores de las comprobaciones.
+    """
+    import lotes
+    from rendimiento.carga import servidor_en_marcha
+    from rendimiento.sembrado import crear_bd
+
+    crear_bd(ruta, ESCALAS['mini'], semilla)
+    carpeta = os.path.dirname(ruta)
+    admin = (USUARIO_MEDICO, CLAVE_SEMBRADO)
+    formas = {
+        'interactivo': {'auth': admin, 'concurrencia': 1, 'masivas': False},
+        'lotes': {'auth': admin, 'concurrencia': concurrencia, 'masivas': True},
+        'sin_admin': {'auth': None, 'concurrencia': concurrencia, 'masivas': True},
+    }
+    resultados: Dict[str, Any] = {'errores': 0}
+    conn = sqlite3.connect(ruta)
+    with servidor_en_marcha(ruta, concurrencia, port, 'waitress') as url:
+        for posicion, (forma, opciones) in enumerate(formas.items()):
+            base = NUMERO_INICIAL + posicion * n_habitaciones
+            ordenes, esperados = generar_ordenes(f'L{posicion}', n_habitaciones, n_medicos, base)
+            ficheros = escribir_formatos(ordenes, carpeta, forma)
+            # Las tres lecturas dan las mismas órdenes (en CSV, las celdas vacías son None)
+            leidas = [[{k: v for k, v in orden.items() if v is not None} for orden in lotes.leer_ordenes(fichero)]
+                      for fichero in ficheros.values()]
+            resultados['errores'] += any(lectura != ordenes for lectura in leidas)
+
+            informe = os.path.join(carpeta, f'{forma}.informe.json')
+            resumen = lotes.ejecutar_lote(ficheros['csv'], url, rol='medico', informe=informe, **opciones)
+            with open(informe, encoding='utf-8') as fichero:
+                filas = json.load(fichero)['resultados']
+            estados = [fila['estado'] for fila in filas]
+            # El alta repetida: 409 en /bulk; /medicos/alta no distingue el duplicado de otros errores
+            resultados['errores'] += [409 if esperado == 409 and estado >= 400 else estado
+                                      for estado, esperado in zip(estados, esperados)] != esperados
+            resultados['errores'] += [fila['indice'] for fila in filas] != list(range(len(ordenes)))
+            limpias = conn.execute("SELECT COUNT(*) FROM habitaciones WHERE numero_habitacion BETWEEN ? AND ? "
+                                   "AND limpia = 1;", (base, base + n_habitaciones - 1)).fetchone()[0]
+            medicos = conn.execute("SELECT COUNT(*) FROM medicos WHERE id LIKE ?;", (f'L{posicion}M%',)).fetchone()[0]
+            resultados['errores'] += limpias != n_habitaciones or medicos != n_medicos // 2
+            resultados[forma] = resumen
+    conn.close()
+    return resultados
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark del modo por lotes de la aplicación de terminal")
+    parser.add_argument('--habitaciones', type=int, default=1000)
+    parser.add_argument('--medicos', type=int, default=40)
+    parser.add_argument('--concurrencia', type=int, default=8)
+    parser.add_argument('--port', type=int, default=5080)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Antes de importar APIS o cualquier módulo tabla_*: todos abren PROSALUD_BD
+        os.environ.setdefault('PROSALUD_ADMINS', USUARIO_MEDICO)
+        ruta = os.environ['PROSALUD_BD'] = os.path.join(tmp, 'lotes.db')
+        r = medir(ruta, args.habitaciones, args.medicos, args.concurrencia, args.port)
+    print(f"Lote de {r['interactivo']['ordenes']} órdenes ({args.habitaciones} habitaciones, "
+          f"{args.medicos} médicos), {os.cpu_count()} núcleos:")
+    for forma, titulo in (('interactivo', 'una a una, sin /bulk'),
+                          ('lotes', f'concurrencia {args.concurrencia} y /bulk'),
+                          ('sin_admin', f'concurrencia {args.concurrencia}, sin ser administrador')):
+        resumen = r[forma]
+        print(f"  {titulo}: {resumen['segundos']:.2f} s ({resumen['ordenes'] / resumen['segundos']:.0f} órdenes/s), "
+              f"{resumen['peticiones']} peticiones, {resumen['errores']} órdenes con error")
+    print(f"Errores en las comprobaciones: {r['errores']:.0f}")
+    if r['errores']:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+Benchmark del trabajo de recordatorios de citas.
+
+Siembra una base de datos temporal con ``--citas`` citas repartidas en un
+año (500.000 por defecto), reescribe una de cada diez al formato de la
+clase Cita ('%Y %m %d %H:%M') para tener formatos mezclados, cancela una
+de cada siete y compara para un día:
+
+- el recorrido anterior: leer todas las citas, interpretar cada
+  'fecha_hora' en Python, quedarse con las del día y consultar el
+  contacto de cada paciente por separado;
+- ``TrabajoRecordatorios``: páginas del índice de 'inicio' con el
+  contacto en la misma consulta, y la ejecución completa (con los correos
+  en la bandeja de salida).
+
+Comprueba además que una ejecución interrumpida y reanudada encola
+exactamente un correo por cita pendiente con email, igual que el recorrido
+anterior, que ninguna cita cancelada recibe recordatorio, que repetirla no encola nada y que una cita pedida después recibe el suyo
+en la siguiente ejecución.
+
+Uso::
+
+    python -m rendimiento.benchmark_recordatorios --citas 500000 --dia 2025-03-15
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import date, datetime
+from typing import Dict, List
+
+from rendimiento.sembrado import ESCALAS
+
+
+def recorrido_lineal(ruta: str, dia: date) -> List[tuple]:
+    """Citas del día con su contacto, como se haría sin 'inicio': toda la tabla y una consulta por paciente."""
+    from Base_De_Datos.tablas.tabla_citas import normalizar_fecha_hora
+
+    conn = sqlite3.connect(ruta)
+    prefijo = dia.isoformat()
+    resultado = []
+    for id_cita, paciente_id, fecha_hora, tipo in conn.execute(
+            "SELECT id_cita, paciente_id, fecha_hora, tipo_cita FROM citas WHERE estado = 'pendiente';"):
+        try:
+            inicio = normalizar_fecha_hora(fecha_hora)
+        except ValueError:
+            continue
+        if not inicio.startswith(prefijo) or tipo == 'urgencias':
+            continue
+        contacto = conn.execute("SELECT email, telefono FROM contactos_pacientes WHERE paciente_id = ?;",
+                                (paciente_id,)).fetchone()
+        resultado.append((id_cita, inicio, paciente_id, *(contacto or (None, None))))
+    conn.close()
+    return resultado
+
+
+def medir(ruta: str, n_citas: int, dia: date, tamano_lote: int, semilla: int = 42) -> Dict[str, float]:
+    """
+    Mide el recorrido anterior y el trabajo de recordatorios sobre una base de datos sembrada en ``ruta``.
+
+    ``PROSALUD_BD`` debe apuntar ya a ``ruta``: el trabajo crea tablas en
+    varios módulos tabla_*.
+
+    Returns
+    -------
+    Dict[str, float]
+        Segundos de cada recorrido, citas del día y correos encolados.
+    """
+    from rendimiento.sembrado import crear_bd
+    from recordatorios import TrabajoRecordatorios
+
+    crear_bd(ruta, dict(ESCALAS['mini'], citas=n_citas), semilla)
+    trabajo = TrabajoRecordatorios(tamano_lote)
+    trabajo.preparar()
+    conn = sqlite3.connect(ruta)
+    with conn:
+        conn.execute(
+            "UPDATE citas SET fecha_hora = substr(fecha_hora, 1, 4) || ' ' || substr(fecha_hora, 6, 2) || ' ' "
+            "|| substr(fecha_hora, 9, 2) || ' ' || substr(fecha_hora, 12, 5) WHERE rowid % 10 = 0;")
+        conn.execute("UPDATE citas SET estado = 'cancelado' WHERE rowid % 7 = 0;")
+    conn.close()
+    resultados: Dict[str, float] = {}
+
+    inicio = time.perf_counter()
+    lineal = recorrido_lineal(ruta, dia)
+    resultados['lineal_s'] = time.perf_counter() - inicio
+    resultados['citas_dia'] = len(lineal)
+    esperados = sum(1 for fila in lineal if fila[3])
+
+    inicio = time.perf_counter()
+    indexadas = sum(len(filas) for filas, _ in trabajo.lotes(dia))
+    resultados['indice_s'] = time.perf_counter() - inicio
+    resultados['citas_indice'] = indexadas
+
+    # Ejecución completa, interrumpida tras el primer lote y reanudada
+    inicio = time.perf_counter()
+    primera = trabajo.ejecutar(dia, maximo_lotes=1)
+    segunda = trabajo.ejecutar(dia)
+    resultados['trabajo_s'] = time.perf_counter() - inicio
+    resultados['lotes'] = primera['lotes'] + segunda['lotes']
+    resultados['correos'] = primera['correos'] + segunda['correos']
+    resultados['correos_esperados'] = esperados
+    resultados['repetida'] = sum(trabajo.ejecutar(dia).values()) - 1
+    conn = sqlite3.connect(ruta)
+    resultados['canceladas_avisadas'] = conn.execute(
+        "SELECT count(*) FROM recordatorios_citas r JOIN citas c ON c.id_cita = r.id_cita "
+        "WHERE c.estado = 'cancelado';").fetchone()[0]
+    conn.close()
+
+    # Una cita pedida después de completar el día, a primera hora, de un paciente con email
+    conn = sqlite3.connect(ruta)
+    with conn:
+        paciente = conn.execute("SELECT paciente_id FROM contactos_pacientes WHERE email IS NOT NULL LIMIT 1;"
+                                ).fetchone()[0]
+        conn.execute("INSERT INTO citas (id_cita, paciente_id, fecha_hora, tipo_cita, motivo) "
+                     "VALUES ('CITA-NUEVA', ?, ?, 'telefonica', 'Revisión');",
+                     (paciente, f"{dia.isoformat()}T00:00:00"))
+    conn.close()
+    nueva = trabajo.ejecutar(dia)
+    resultados['nueva'] = (nueva['citas'], nueva['correos'])
+    return resultados
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark del trabajo de recordatorios de citas")
+    parser.add_argument('--citas', type=int, default=500_000)
+    parser.add_argument('--dia', type=lambda texto: datetime.strptime(texto, '%Y-%m-%d').date(),
+                        default=date(2025, 3, 15), help="Día dentro del año sembrado (2025)")
+    parser.add_argument('--lote', type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Antes de importar ningún módulo tabla_*: todos abren PROSALUD_BD
+        ruta = os.environ['PROSALUD_BD'] = os.path.join(tmp, 'recordatorios.db')
+        r = medir(ruta, args.citas, args.dia, args.lote)
+    print(f"{args.citas} citas, {r['citas_dia']:.0f} el {args.dia}")
+    print(f"Recorrido anterior (tabla entera + contacto por paciente): {r['lineal_s'] * 1000:.0f} ms")
+    print(f"Índice de 'inicio' con contacto en la consulta: {r['indice_s'] * 1000:.1f} ms "
+          f"({r['citas_indice']:.0f} citas)")
+    print(f"Trabajo completo en dos ejecuciones ({r['lotes']:.0f} lotes): {r['trabajo_s'] * 1000:.1f} ms, "
+          f"{r['correos']:.0f} correos (esperados {r['correos_esperados']:.0f})")
+    print(f"Repetida: {'nada nuevo' if not r['repetida'] else 'ERROR'}; cita pedida después: "
+          f"{r['nueva'][1]} correo(s) para {r['nueva'][0]} cita(s); "
+          f"canceladas con recordatorio: {r['canceladas_avisadas']:.0f}")
+    if (r['citas_indice'] != r['citas_dia'] or r['correos'] != r['correos_esperados'] or r['repetida']
+            or r['nueva'] != (1, 1) or r['canceladas_avisadas']):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
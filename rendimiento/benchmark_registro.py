@@ -0,0 +1,143 @@
+"""
+Prueba de carga de los registros (``POST /pacientes/register``, ``/medicos/register``...).
+
+Lanza desde ``--hilos`` hilos ``--intentos`` registros simultáneos de cada
+uno de ``--usuarios`` usernames y comprueba que cada username queda
+registrado una sola vez: un 201 y el resto 409, sin ningún 500. Cuenta las
+sentencias SQL que llegan a SQLite por registro, y repite la carga con la
+comprobación previa anterior (``SELECT`` por username y después ``INSERT``)
+para comparar.
+
+El cifrado de las contraseñas usa un método barato
+(``--metodo``): aquí se mide la base de datos, no el cifrado.
+
+Uso::
+
+    python -m rendimiento.benchmark_registro --usuarios 50 --intentos 4 --hilos 16
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Tuple
+
+from rendimiento.sembrado import ESCALAS
+
+
+def _cargar(registrar: Callable[[str], int], usuarios: int, intentos: int, hilos: int,
+            prefijo: str) -> Tuple[Counter, float]:
+    """Registra cada username ``intentos`` veces a la vez; devuelve los códigos y los segundos."""
+    nombres = [f'{prefijo}{i}' for i in range(usuarios) for _ in range(intentos)]
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(hilos) as grupo:
+        codigos = Counter(grupo.map(registrar, nombres))
+    return codigos, time.perf_counter() - inicio
+
+
+def medir(ruta: str, usuarios: int, intentos: int, hilos: int, metodo: str, semilla: int = 42) -> Dict[str, object]:
+    """
+    Registros simultáneos de médicos con el endpoint y con la comprobación previa anterior.
+
+    ``PROSALUD_BD`` debe apuntar ya a ``ruta``.
+
+    Returns
+    -------
+    Dict[str, object]
+        Por variante (``endpoint``, ``consulta_previa``): códigos, sentencias por
+        registro, registros por segundo y usernames repetidos; y ``errores``.
+    """
+    from sqlalchemy import event
+    from rendimiento.sembrado import crear_bd
+    import servicio_hash
+    import APIS
+
+    crear_bd(ruta, ESCALAS['mini'], semilla)
+    servicio_hash._servicio = servicio_hash.ServicioHash(max_pendientes=usuarios * intentos, metodo=metodo)
+    servicio_hash.servicio().cifrar('calentar')
+
+    sentencias = Counter()
+    cerrojo = threading.Lock()
+
+    @event.listens_for(APIS.engine, 'before_cursor_execute')
+    def contar(_conn, _cursor, sql, *_):
+        with cerrojo:
+            sentencias[sql.split(None, 1)[0].upper()] += 1
+
+    def por_endpoint(username: str) -> int:
+        return APIS.app.test_client().post('/medicos/register', json={
+            'id': username, 'username': username, 'password': 'clave', 'especialidad': 'General',
+            'antiguedad': 3}).status_code
+
+    def con_consulta_previa(username: str) -> int:
+        # Lo que hacían los registros antes: SELECT por username, cifrado e INSERT
+        db = APIS.SessionLocal()
+        try:
+            if db.query(APIS.MedicoDB).filter(APIS.MedicoDB.username == username).first():
+                return 409
+            db.add(APIS.MedicoDB(id=username, username=username, password=servicio_hash.cifrar('clave'),
+                                 especialidad='General', antiguedad=3))
+            db.commit()
+            return 201
+        except Exception:
+            db.rollback()
+            return 500
+        finally:
+            APIS.SessionLocal.remove()
+
+    conn = sqlite3.connect(ruta, isolation_level=None)
+    resultados: Dict[str, object] = {}
+    errores = 0
+    variantes = (('endpoint', por_endpoint, 'reg_'), ('consulta_previa', con_consulta_previa, 'previa_'))
+    for variante, registrar, prefijo in variantes:
+        sentencias.clear()
+        codigos, segundos = _cargar(registrar, usuarios, intentos, hilos, prefijo)
+        filas = conn.execute("SELECT COUNT(*), COUNT(DISTINCT username) FROM medicos WHERE username LIKE ?;",
+                             (f'{prefijo}%',)).fetchone()
+        resultados[variante] = {
+            'codigos': dict(codigos),
+            'sentencias': {sql: n / (usuarios * intentos) for sql, n in sentencias.items()},
+            'por_segundo': usuarios * intentos / segundos,
+            'repetidos': filas[0] - filas[1],
+            'creados': filas[0],
+        }
+        if variante == 'endpoint':
+            esperados = Counter({201: usuarios, 409: usuarios * (intentos - 1)})
+            errores += codigos != esperados or filas != (usuarios, usuarios)
+    event.remove(APIS.engine, 'before_cursor_execute', contar)
+    conn.close()
+    servicio_hash.servicio().cerrar()
+    resultados['errores'] = errores
+    return resultados
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Prueba de carga de los registros")
+    parser.add_argument('--usuarios', type=int, default=50)
+    parser.add_argument('--intentos', type=int, default=4, help="Registros simultáneos de cada username")
+    parser.add_argument('--hilos', type=int, default=16)
+    parser.add_argument('--metodo', default='pbkdf2:sha256:1000', help="Método de cifrado de las contraseñas")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Antes de importar APIS o cualquier módulo tabla_*: todos abren PROSALUD_BD
+        ruta = os.environ['PROSALUD_BD'] = os.path.join(tmp, 'registro.db')
+        r = medir(ruta, args.usuarios, args.intentos, args.hilos, args.metodo)
+    print(f"{args.usuarios} usernames x {args.intentos} registros simultáneos desde {args.hilos} hilos:")
+    for variante in ('endpoint', 'consulta_previa'):
+        v = r[variante]
+        sentencias = ', '.join(f"{sql} {n:.2f}" for sql, n in sorted(v['sentencias'].items()))
+        print(f"  {variante.replace('_', ' ')}: códigos {v['codigos']}, {v['creados']} creados, "
+              f"{v['repetidos']} repetidos, {v['por_segundo']:.0f} registros/s")
+        print(f"    sentencias por registro: {sentencias}")
+    print(f"Errores en las comprobaciones: {r['errores']:.0f}")
+    if r['errores']:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
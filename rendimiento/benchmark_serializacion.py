@@ -0,0 +1,159 @@
+"""
+Benchmark de la serialización JSON y la compresión de las respuestas.
+
+Con ``--filas`` filas (100.000 por defecto) con la forma de las de
+``GET /pacientes`` mide:
+
+- el tiempo de serialización con el proveedor por defecto de Flask (stdlib
+  ``json``) y con ``serializacion.ProveedorJSON`` (``orjson`` si está);
+- los bytes de la respuesta sin comprimir, con gzip y con deflate, y el
+  tiempo de comprimirla.
+
+Después siembra una base de datos temporal (escala mini, con ``--filas``
+pacientes) y pide ``GET /pacientes`` con el cliente de pruebas de Flask
+sin comprimir y con ``Accept-Encoding: gzip`` y ``deflate``: mide el tiempo
+y los bytes enviados, y comprueba que las tres respuestas tienen los mismos
+datos y que un 304 con el ETag débil de una respuesta comprimida funciona.
+
+Uso::
+
+    python -m rendimiento.benchmark_serializacion --filas 100000
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+import tempfile
+import time
+import zlib
+from typing import Callable, Dict, List, Tuple
+
+from rendimiento.sembrado import ESCALAS
+
+
+def _segundos(funcion: Callable[[], object], repeticiones: int = 3) -> Tuple[float, object]:
+    """Mejor tiempo de ``repeticiones`` llamadas y el resultado de la última."""
+    mejor, resultado = float('inf'), None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def filas_pacientes(n: int, semilla: int = 42) -> List[dict]:
+    """Filas sintéticas con la forma de las de ``GET /pacientes``."""
+    rng = random.Random(semilla)
+    estados = ('ingresado', 'alta', 'en observación', 'urgencias')
+    return [{"id": f"P{i:07d}", "username": f"paciente_{i}", "nombre": rng.choice(('Ana', 'Luis', 'María', 'José')),
+             "apellido": rng.choice(('García', 'Pérez', 'López', 'Núñez')), "edad": rng.randint(0, 99),
+             "genero": rng.choice('MF'), "estado": rng.choice(estados),
+             "id_enfermero": f"E{rng.randint(1, 2000):05d}", "id_medico": f"M{rng.randint(1, 1000):05d}",
+             "id_habitacion": rng.choice((None, rng.randint(1, 5000)))} for i in range(n)]
+
+
+def medir_serializacion(n_filas: int) -> Dict[str, float]:
+    """
+    Serialización y compresión de ``n_filas`` filas, fuera de la aplicación.
+
+    Returns
+    -------
+    Dict[str, float]
+        Segundos y bytes de cada paso.
+    """
+    from flask import Flask
+    from flask.json.provider import DefaultJSONProvider
+    import serializacion
+
+    app = Flask(__name__)
+    filas = filas_pacientes(n_filas)
+    resultados: Dict[str, float] = {'orjson': serializacion.orjson is not None}
+    with app.app_context():
+        for nombre, proveedor in (('stdlib', DefaultJSONProvider(app)), ('proveedor', serializacion.ProveedorJSON(app))):
+            segundos, respuesta = _segundos(lambda: proveedor.response(filas))
+            cuerpo = respuesta.get_data()
+            resultados[f'{nombre}_s'] = segundos
+            resultados[f'{nombre}_bytes'] = len(cuerpo)
+            resultados[f'{nombre}_iguales'] = json.loads(cuerpo) == filas
+    for codificacion in serializacion.CODIFICACIONES:
+        segundos, comprimido = _segundos(lambda: serializacion._comprimir_bytes(cuerpo, codificacion))
+        resultados[f'{codificacion}_s'] = segundos
+        resultados[f'{codificacion}_bytes'] = len(comprimido)
+    return resultados
+
+
+def medir_api(ruta: str, n_pacientes: int, semilla: int = 42) -> Dict[str, float]:
+    """
+    ``GET /pacientes`` sin comprimir y comprimido sobre una base de datos sembrada en ``ruta``.
+
+    ``PROSALUD_BD`` debe apuntar ya a ``ruta``.
+
+    Returns
+    -------
+    Dict[str, float]
+        Segundos y bytes de cada codificación y errores de las comprobaciones.
+    """
+    from rendimiento.sembrado import crear_bd
+    from APIS import app
+
+    crear_bd(ruta, dict(ESCALAS['mini'], pacientes=n_pacientes), semilla)
+    cliente = app.test_client()
+    resultados: Dict[str, float] = {}
+    errores = 0
+    datos = None
+    for codificacion in ('identity', 'gzip', 'deflate'):
+        segundos, respuesta = _segundos(
+            lambda: cliente.get('/pacientes', headers={'Accept-Encoding': codificacion}))
+        cuerpo = respuesta.get_data()
+        resultados[f'{codificacion}_s'] = segundos
+        resultados[f'{codificacion}_bytes'] = len(cuerpo)
+        usada = respuesta.headers.get('Content-Encoding', 'identity')
+        errores += usada != codificacion
+        if usada == 'gzip':
+            cuerpo = gzip.decompress(cuerpo)
+        elif usada == 'deflate':
+            cuerpo = zlib.decompress(cuerpo)
+        if datos is None:
+            datos = json.loads(cuerpo)
+        errores += json.loads(cuerpo) != datos
+    resultados['filas'] = len(datos)
+    # Respuesta con ETag (cache_respuestas.py): la comprimida lleva el ETag débil y sigue admitiendo 304
+    comprimida = cliente.get('/habitaciones', headers={'Accept-Encoding': 'gzip'})
+    errores += comprimida.headers.get('Content-Encoding') != 'gzip' or not comprimida.headers['ETag'].startswith('W/')
+    errores += cliente.get('/habitaciones', headers={'Accept-Encoding': 'gzip',
+                                                     'If-None-Match': comprimida.headers['ETag']}).status_code != 304
+    errores += cliente.get('/habitaciones', headers={'If-None-Match': comprimida.headers['ETag']}).status_code != 304
+    resultados['errores'] = errores
+    return resultados
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de la serialización JSON y la compresión")
+    parser.add_argument('--filas', type=int, default=100_000)
+    args = parser.parse_args()
+
+    r = medir_serializacion(args.filas)
+    print(f"{args.filas} filas (orjson {'disponible' if r['orjson'] else 'no instalado'}):")
+    print(f"  stdlib json: {r['stdlib_s'] * 1000:.0f} ms, {r['stdlib_bytes'] / 1e6:.2f} MB")
+    print(f"  ProveedorJSON: {r['proveedor_s'] * 1000:.0f} ms, {r['proveedor_bytes'] / 1e6:.2f} MB")
+    for codificacion in ('gzip', 'deflate'):
+        print(f"  {codificacion}: {r[codificacion + '_bytes'] / 1e6:.2f} MB en {r[codificacion + '_s'] * 1000:.0f} ms")
+    errores = (not r['stdlib_iguales']) + (not r['proveedor_iguales'])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Antes de importar APIS o cualquier módulo tabla_*: todos abren PROSALUD_BD
+        ruta = os.environ['PROSALUD_BD'] = os.path.join(tmp, 'serializacion.db')
+        a = medir_api(ruta, args.filas)
+    print(f"GET /pacientes ({a['filas']:.0f} pacientes):")
+    for codificacion in ('identity', 'gzip', 'deflate'):
+        print(f"  {codificacion}: {a[codificacion + '_bytes'] / 1e6:.2f} MB en {a[codificacion + '_s'] * 1000:.0f} ms")
+    errores += a['errores']
+    print(f"Errores en las comprobaciones: {errores:.0f}")
+    if errores:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
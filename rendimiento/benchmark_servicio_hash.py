@@ -0,0 +1,116 @@
+"""
+Benchmark del servicio de cifrado de contraseñas (``servicio_hash.py``).
+
+- Rendimiento: cifra ``--contrasenas`` contraseñas desde ``--hilos`` hilos,
+  en el propio hilo (como antes) y con el servicio con 1, 2, 4... procesos
+  hasta ``--procesos`` (uno por núcleo por defecto).
+- Contrapresión: lanza a la vez más altas (``POST /medicos/alta``) de las
+  que caben en la cola de un servicio pequeño y comprueba que las que no
+  caben reciben un 429 con ``Retry-After`` y el resto se crean.
+
+Uso::
+
+    python -m rendimiento.benchmark_servicio_hash --contrasenas 64 --hilos 8
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from rendimiento.sembrado import ESCALAS
+
+
+def _por_segundo(cifrar, contrasenas: List[str], hilos: int) -> float:
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(hilos) as hilos_cifrado:
+        list(hilos_cifrado.map(cifrar, contrasenas))
+    return len(contrasenas) / (time.perf_counter() - inicio)
+
+
+def medir_rendimiento(n: int, hilos: int, max_procesos: int) -> Dict[str, float]:
+    """
+    Contraseñas cifradas por segundo en el hilo y con el servicio según sus procesos.
+
+    Returns
+    -------
+    Dict[str, float]
+        ``en_hilo`` y ``procesos_<n>``, en contraseñas por segundo.
+    """
+    import credenciales
+    import servicio_hash
+
+    contrasenas = [f'clave_{i}' for i in range(n)]
+    metodo = credenciales.metodo_actual()
+    resultados = {'en_hilo': _por_segundo(lambda p: credenciales.cifrar(p, metodo), contrasenas, hilos)}
+    procesos = 1
+    while procesos <= max_procesos:
+        servicio = servicio_hash.ServicioHash(procesos=procesos, max_pendientes=n)
+        servicio.cifrar('calentar', espera_s=None)  # arranque de los procesos
+        resultados[f'procesos_{procesos}'] = _por_segundo(lambda p: servicio.cifrar(p, espera_s=None),
+                                                          contrasenas, hilos)
+        servicio.cerrar()
+        procesos *= 2
+    return resultados
+
+
+def medir_contrapresion(ruta: str, peticiones: int, semilla: int = 42) -> Dict[str, float]:
+    """
+    Ráfaga de ``peticiones`` altas simultáneas contra un servicio con una cola de 2.
+
+    ``PROSALUD_BD`` debe apuntar ya a ``ruta``.
+
+    Returns
+    -------
+    Dict[str, float]
+        Respuestas 201 y 429, y errores de las comprobaciones.
+    """
+    from rendimiento.sembrado import crear_bd
+    import servicio_hash
+    from APIS import app
+
+    crear_bd(ruta, ESCALAS['mini'], semilla)
+    servicio_hash._servicio = servicio_hash.ServicioHash(procesos=1, max_pendientes=2)
+    servicio_hash.servicio().cifrar('calentar')
+
+    def alta(i: int):
+        respuesta = app.test_client().post('/medicos/alta', json={'id': f'MR{i}', 'username': f'rafaga_{i}',
+                                                                  'password': 'clave', 'especialidad': 'General'})
+        return respuesta.status_code, respuesta.headers.get('Retry-After')
+
+    with ThreadPoolExecutor(peticiones) as hilos:
+        respuestas = list(hilos.map(alta, range(peticiones)))
+    codigos = [codigo for codigo, _ in respuestas]
+    resultados: Dict[str, float] = {'201': codigos.count(201), '429': codigos.count(429)}
+    resultados['errores'] = (resultados['201'] + resultados['429'] != peticiones or not resultados['429']
+                             or any(codigo == 429 and not reintento for codigo, reintento in respuestas))
+    servicio_hash.servicio().cerrar()
+    return resultados
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark del servicio de cifrado de contraseñas")
+    parser.add_argument('--contrasenas', type=int, default=64)
+    parser.add_argument('--hilos', type=int, default=8, help="Hilos que piden cifrados a la vez")
+    parser.add_argument('--procesos', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--rafaga', type=int, default=12, help="Altas simultáneas de la prueba de contrapresión")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Antes de importar APIS o cualquier módulo tabla_*: todos abren PROSALUD_BD
+        ruta = os.environ['PROSALUD_BD'] = os.path.join(tmp, 'hash.db')
+        r = medir_rendimiento(args.contrasenas, args.hilos, args.procesos)
+        c = medir_contrapresion(ruta, args.rafaga)
+    print(f"{args.contrasenas} contraseñas desde {args.hilos} hilos ({os.cpu_count()} núcleos):")
+    for clave, valor in r.items():
+        print(f"  {clave.replace('_', ' ')}: {valor:.1f}/s")
+    print(f"Ráfaga de {args.rafaga} altas con una cola de 2: {c['201']:.0f} creadas, {c['429']:.0f} con 429")
+    print(f"Errores en las comprobaciones: {c['errores']:.0f}")
+    if c['errores']:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+"""
+Benchmark de la cola de triaje de urgencias.
+
+En memoria mide, con ``--en-espera`` citas esperando (100.000 por
+defecto), cuántas altas, extracciones y cambios de prioridad por segundo
+admite ``ColaTriaje`` y lo compara con la lista en orden de inserción que
+usaba ``GestorCitas`` (buscar la siguiente recorriendo la lista entera).
+Comprueba además que el orden de salida coincide con ordenar por
+prioridad efectiva (con envejecimiento) en el momento de cada extracción.
+
+Con ``--bd`` siembra una base de datos temporal (escala mini) y mide
+``ColaUrgencias``: altas, extracciones y cambios de prioridad persistidos
+por segundo y la reconstrucción de la cola tras un reinicio.
+
+Uso::
+
+    python -m rendimiento.benchmark_triaje --en-espera 100000 --bd
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from typing import Callable, Dict
+
+from rendimiento.sembrado import ESCALAS, id_paciente
+
+# Operaciones sobre la lista lineal: cada una recorre todas las citas en espera
+OPERACIONES_LINEAL = 200
+
+
+def _por_segundo(funcion: Callable[[], None], repeticiones: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return repeticiones / (time.perf_counter() - inicio)
+
+
+class ColaLineal:
+    """Urgencias en orden de inserción; la siguiente se busca recorriendo la lista."""
+
+    def __init__(self, envejecimiento_s: float) -> None:
+        self.envejecimiento_s = envejecimiento_s
+        self.citas = []
+
+    def insertar(self, id_cita: str, prioridad: int, llegada: float) -> None:
+        self.citas.append([id_cita, prioridad, llegada])
+
+    def extraer(self):
+        mejor = min(range(len(self.citas)),
+                    key=lambda i: self.citas[i][2] + (self.citas[i][1] - 1) * self.envejecimiento_s)
+        return self.citas.pop(mejor)
+
+    def repriorizar(self, id_cita: str, prioridad: int) -> None:
+        for cita in self.citas:
+            if cita[0] == id_cita:
+                cita[1] = prioridad
+                return
+
+
+def medir_memoria(n: int, semilla: int = 42) -> Dict[str, Dict[str, float]]:
+    """
+    Operaciones por segundo de la cola indexada y de la lista lineal con ``n`` citas esperando.
+
+    Returns
+    -------
+    Dict[str, Dict[str, float]]
+        Por operación, operaciones por segundo de cada cola.
+    """
+    from triaje import ColaTriaje, ENVEJECIMIENTO_S
+
+    rng = random.Random(semilla)
+    citas = [(f"URG{i:08d}", rng.choice((1, 2, 2, 3, 3, 3)), i * 0.5) for i in range(n)]
+    resultados: Dict[str, Dict[str, float]] = {}
+
+    cola = ColaTriaje(ENVEJECIMIENTO_S)
+    iterador = iter(citas)
+    resultados['insertar'] = {'indexada': _por_segundo(lambda: cola.insertar(*next(iterador)), n)}
+    lineal = ColaLineal(ENVEJECIMIENTO_S)
+    iterador = iter(citas)
+    resultados['insertar']['lineal'] = _por_segundo(lambda: lineal.insertar(*next(iterador)), n)
+
+    muestra = [(rng.choice(citas)[0], rng.randint(1, 3)) for _ in range(min(n, 50_000))]
+    iterador = iter(muestra)
+    resultados['repriorizar'] = {'indexada': _por_segundo(lambda: cola.repriorizar(*next(iterador)), len(muestra))}
+    iterador = iter(muestra)
+    resultados['repriorizar']['lineal'] = _por_segundo(lambda: lineal.repriorizar(*next(iterador)),
+                                                       OPERACIONES_LINEAL)
+
+    extracciones = min(n // 2, 50_000)
+    resultados['extraer'] = {'indexada': _por_segundo(cola.extraer, extracciones)}
+    resultados['extraer']['lineal'] = _por_segundo(lineal.extraer, OPERACIONES_LINEAL)
+
+    # Carga mixta de un servicio de urgencias: llegadas, retriajes y altas
+    llegada = n * 0.5
+    contador = [0]
+
+    def operacion_mixta() -> None:
+        contador[0] += 1
+        tirada = rng.random()
+        if tirada < 0.4:
+            cola.insertar(f"MIX{contador[0]:08d}", rng.randint(1, 3), llegada + contador[0])
+        elif tirada < 0.6 and len(cola):
+            cola.repriorizar(cola.primera(), rng.randint(1, 3))
+        else:
+            cola.extraer()
+
+    resultados['mixta'] = {'indexada': _por_segundo(operacion_mixta, 100_000)}
+    return resultados
+
+
+def comprobar_orden(n: int = 20_000, semilla: int = 7) -> int:
+    """
+    Compara cada extracción con la cita de menor prioridad efectiva en ese instante.
+
+    Returns
+    -------
+    int
+        Extracciones que no coinciden (0 si el orden es correcto).
+    """
+    from triaje import ColaTriaje
+
+    rng = random.Random(semilla)
+    envejecimiento = 900.0
+    cola = ColaTriaje(envejecimiento)
+    esperando = {}
+    ahora, errores = 0.0, 0
+    for i in range(n):
+        ahora += rng.expovariate(1 / 60)
+        if rng.random() < 0.55:
+            prioridad = rng.randint(1, 3)
+            cola.insertar(str(i), prioridad, ahora)
+            esperando[str(i)] = [prioridad, ahora, i]
+        elif rng.random() < 0.3 and esperando:
+            id_cita = rng.choice(list(esperando))
+            prioridad = rng.randint(1, 3)
+            cola.repriorizar(id_cita, prioridad)
+            esperando[id_cita][0] = prioridad
+        elif esperando:
+            # Prioridad efectiva continua: prioridad - espera / envejecimiento
+            esperada = min(esperando, key=lambda c: (esperando[c][0] - (ahora - esperando[c][1]) / envejecimiento,
+                                                     esperando[c][2]))
+            obtenida = cola.extraer()[0]
+            errores += obtenida != esperada
+            del esperando[obtenida]
+    return errores
+
+
+def medir_bd(n: int, semilla: int = 42) -> Dict[str, float]:
+    """
+    Mide ``ColaUrgencias`` sobre una base de datos sembrada temporal.
+
+    Returns
+    -------
+    Dict[str, float]
+        Operaciones persistidas por segundo y segundos de la reconstrucción
+        de ``n`` citas en espera.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, 'triaje.db')
+        from Base_De_Datos.tablas import tabla_urgencias
+        from rendimiento.sembrado import crear_bd
+        from triaje import ColaUrgencias
+
+        # triaje.py ya se importó (medir_memoria) con la base de datos por defecto
+        tabla_urgencias.db_path = ruta
+
+        escala = ESCALAS['mini']
+        crear_bd(ruta, escala, semilla)
+        rng = random.Random(semilla)
+        pacientes = [id_paciente(i) for i in range(escala['pacientes'])]
+        cola = ColaUrgencias()
+        cola.cargar()
+
+        operaciones = 2_000
+        ids = []
+        resultados = {'registrar_s': _por_segundo(
+            lambda: ids.append(cola.registrar(rng.choice(pacientes), rng.choice('123'))), operaciones)}
+        iterador = iter(ids)
+        resultados['repriorizar_s'] = _por_segundo(lambda: cola.repriorizar(next(iterador), rng.choice('123')),
+                                                   operaciones // 2)
+        resultados['siguiente_s'] = _por_segundo(lambda: cola.siguiente('MED000000'), operaciones)
+
+        conn = sqlite3.connect(ruta)
+        with conn:
+            ahora = time.time()
+            conn.executemany(
+                "INSERT INTO citas (id_cita, paciente_id, tipo_cita, nivel_prioridad) VALUES (?, ?, 'urgencias', ?)",
+                ((f"REC{i:08d}", pacientes[i % len(pacientes)], 'media') for i in range(n)))
+            conn.executemany(
+                "INSERT INTO triaje_urgencias (id_cita, prioridad, llegada, modificado) VALUES (?, 2, ?, ?)",
+                ((f"REC{i:08d}", ahora - i, ahora) for i in range(n)))
+        conn.close()
+        inicio = time.perf_counter()
+        cargadas = ColaUrgencias().cargar()
+        resultados['reconstruir_s'] = time.perf_counter() - inicio
+        resultados['reconstruidas'] = cargadas
+    return resultados
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de la cola de triaje de urgencias")
+    parser.add_argument('--en-espera', type=int, default=100_000)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--bd', action='store_true', help="Mide también la cola persistida en SQLite")
+    args = parser.parse_args()
+
+    resultados = medir_memoria(args.en_espera, args.semilla)
+    print(f"{args.en_espera} citas en espera (operaciones por segundo)")
+    print(f"{'operación':<14}{'indexada':>12}{'lineal':>12}")
+    for operacion, valores in resultados.items():
+        lineal = f"{valores['lineal']:>12.0f}" if 'lineal' in valores else f"{'-':>12}"
+        print(f"{operacion:<14}{valores['indexada']:>12.0f}{lineal}")
+
+    errores = comprobar_orden()
+    print(f"\nOrden con envejecimiento: {'correcto' if not errores else f'{errores} extracciones distintas'}")
+
+    if args.bd:
+        bd = medir_bd(args.en_espera, args.semilla)
+        print(f"\nPersistida: {bd['registrar_s']:.0f} altas/s, {bd['repriorizar_s']:.0f} cambios/s, "
+              f"{bd['siguiente_s']:.0f} extracciones/s; reconstruir {bd['reconstruidas']} citas "
+              f"{bd['reconstruir_s']:.2f} s")
+    if errores:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+Benchmark del directorio de usuarios (``tabla_usuarios.py``).
+
+- Migración: siembra una base de datos temporal con ``--pacientes``
+  pacientes, borra el directorio y mide lo que tarda en rellenarse desde
+  pacientes, médicos y enfermeros.
+- Búsqueda: el plan de la consulta de autenticación (una búsqueda por la
+  clave primaria) y búsquedas por segundo en el directorio frente a las
+  tres tablas por rol de antes.
+- Sincronía: por la API, comprueba que el directorio sigue a los registros,
+  las bajas y los cambios de contraseña, que un username no se repite entre
+  roles y que un auxiliar con cuenta (``POST /usuarios``) puede iniciar sesión.
+
+Uso::
+
+    python -m rendimiento.benchmark_usuarios --pacientes 100000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from typing import Dict
+
+from rendimiento.sembrado import CLAVE_SEMBRADO, ESCALAS, USUARIO_MEDICO
+
+
+def medir(ruta: str, n_pacientes: int, busquedas: int, semilla: int = 42) -> Dict[str, object]:
+    """
+    Migración, búsquedas y sincronía del directorio sobre una base de datos sembrada en ``ruta``.
+
+    ``PROSALUD_BD`` debe apuntar ya a ``ruta``.
+
+    Returns
+    -------
+    Dict[str, object]
+        Tiempos, plan de la consulta, búsquedas por segundo y errores de las comprobaciones.
+    """
+    from rendimiento.sembrado import crear_bd
+    from Base_De_Datos.tablas import tabla_usuarios
+    from APIS import app
+
+    crear_bd(ruta, dict(ESCALAS['mini'], pacientes=n_pacientes), semilla)
+    conn = sqlite3.connect(ruta, isolation_level=None)
+    resultados: Dict[str, object] = {}
+    errores = 0
+
+    # Migración desde cero
+    conn.execute("DROP TABLE usuarios;")
+    for (disparador,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' "
+                                      "AND name LIKE '%_usuarios_%';").fetchall():
+        conn.execute(f"DROP TRIGGER {disparador};")
+    inicio = time.perf_counter()
+    tabla_usuarios.crear_tabla_usuarios()
+    resultados['s_migracion'] = time.perf_counter() - inicio
+    cuentas = sum(conn.execute(f"SELECT COUNT(*) FROM {tabla};").fetchone()[0]
+                  for tabla in tabla_usuarios.ROLES_CON_CLAVE.values())
+    resultados['cuentas'] = conn.execute("SELECT COUNT(*) FROM usuarios;").fetchone()[0]
+    errores += resultados['cuentas'] != cuentas
+
+    # Búsqueda de autenticación
+    consulta = "SELECT rol, id_entidad, password FROM usuarios WHERE username = ?;"
+    resultados['plan'] = conn.execute(f"EXPLAIN QUERY PLAN {consulta}", ('x',)).fetchone()[-1]
+    nombres = [f'paciente{random.Random(semilla + i).randrange(1, n_pacientes)}' for i in range(busquedas)]
+    inicio = time.perf_counter()
+    for nombre in nombres:
+        conn.execute(consulta, (nombre,)).fetchone()
+    resultados['directorio_por_s'] = busquedas / (time.perf_counter() - inicio)
+    # Antes: sin X-ROL fiable habría que probar tabla por tabla
+    inicio = time.perf_counter()
+    for nombre in nombres:
+        for tabla in ('medicos', 'enfermeros', 'pacientes'):
+            if conn.execute(f"SELECT id, password FROM {tabla} WHERE username = ?;", (nombre,)).fetchone():
+                break
+    resultados['por_tablas_por_s'] = busquedas / (time.perf_counter() - inicio)
+
+    # Sincronía por la API
+    cliente = app.test_client()
+    admin = {'auth': (USUARIO_MEDICO, CLAVE_SEMBRADO), 'headers': {'X-ROL': 'medico'}}
+
+    def codigo_menu(usuario: str, clave: str, rol: str = None) -> int:
+        cabeceras = {'X-ROL': rol} if rol else {}
+        return cliente.get('/menu', auth=(usuario, clave), headers=cabeceras).status_code
+
+    errores += codigo_menu(USUARIO_MEDICO, CLAVE_SEMBRADO) != 200
+    errores += codigo_menu(USUARIO_MEDICO, CLAVE_SEMBRADO, 'paciente') != 401
+    errores += cliente.post('/medicos/register', json={'id': 'MDIR1', 'username': 'directorio_medico',
+                                                       'password': 'clave', 'especialidad': 'General',
+                                                       'antiguedad': 1}).status_code != 201
+    errores += codigo_menu('directorio_medico', 'clave', 'medico') != 200
+    # El mismo username en otro rol
+    errores += cliente.post('/enfermeros/register', json={'id': 'EDIR1', 'username': 'directorio_medico',
+                                                          'password': 'clave', 'especialidad': 'General',
+                                                          'antieguedad': 1}).status_code != 409
+    # Cambio de contraseña fuera de la API y baja
+    from werkzeug.security import generate_password_hash
+    conn.execute("UPDATE medicos SET password = ? WHERE id = 'MDIR1';", (generate_password_hash('nueva'),))
+    errores += codigo_menu('directorio_medico', 'clave') != 401
+    errores += codigo_menu('directorio_medico', 'nueva') != 200
+    errores += cliente.delete('/medicos/baja/MDIR1').status_code != 200
+    errores += codigo_menu('directorio_medico', 'nueva') != 401
+
+    # Cuenta de un auxiliar
+    id_auxiliar = conn.execute("SELECT id FROM auxiliares LIMIT 1;").fetchone()[0]
+    cuenta = {'username': 'directorio_aux', 'password': 'clave', 'rol': 'auxiliar', 'id': id_auxiliar}
+    errores += cliente.post('/usuarios', json=cuenta, **admin).status_code != 201
+    errores += cliente.post('/usuarios', json=cuenta, **admin).status_code != 409
+    errores += cliente.post('/usuarios', json=dict(cuenta, id='NO-EXISTE', username='otro'), **admin).status_code != 404
+    errores += codigo_menu('directorio_aux', 'clave', 'auxiliar') != 200
+    errores += cliente.delete(f'/auxiliares/baja/{id_auxiliar}').status_code != 200
+    errores += codigo_menu('directorio_aux', 'clave') != 401
+    conn.close()
+    resultados['errores'] = errores
+    return resultados
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark del directorio de usuarios")
+    parser.add_argument('--pacientes', type=int, default=100_000)
+    parser.add_argument('--busquedas', type=int, default=20_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Antes de importar APIS o cualquier módulo tabla_*: todos abren PROSALUD_BD
+        os.environ.setdefault('PROSALUD_ADMINS', USUARIO_MEDICO)
+        ruta = os.environ['PROSALUD_BD'] = os.path.join(tmp, 'usuarios.db')
+        r = medir(ruta, args.pacientes, args.busquedas)
+    print(f"Migración de {r['cuentas']} cuentas: {r['s_migracion']:.2f} s")
+    print(f"Plan de la búsqueda: {r['plan']}")
+    print(f"Búsquedas por segundo: directorio {r['directorio_por_s']:.0f}, "
+          f"tabla por tabla {r['por_tablas_por_s']:.0f}")
+    print(f"Errores en las comprobaciones: {r['errores']:.0f}")
+    if r['errores']:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,263 @@
+"""
+Prueba de carga de la API con distinto número de trabajadores.
+
+Para cada número de trabajadores indicado arranca ``servidor.py`` sobre una
+copia de la base de datos, lanza peticiones concurrentes contra los
+endpoints principales durante un tiempo fijo y muestra, por endpoint, el
+número de peticiones, los errores y las latencias p50/p99 en milisegundos.
+
+Uso::
+
+    python -m rendimiento.carga --workers 1 2 4 --duracion 10 --concurrencia 16
+"""
+
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import requests
+
+from Base_De_Datos.tablas.conexion import RUTA_BD
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """
+    Percentil ``p`` (0-100) por el método del rango más cercano.
+
+    Parameters
+    ----------
+    valores : List[float]
+        Muestras (no hace falta que estén ordenadas).
+    p : float
+        Percentil a calcular.
+
+    Returns
+    -------
+    float
+        Valor del percentil, o 0.0 si no hay muestras.
+    """
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = max(0, min(len(ordenados) - 1, int(round(p / 100 * len(ordenados) + 0.5)) - 1))
+    return ordenados[indice]
+
+
+def resumir(muestras: Dict[str, List[Tuple[float, int]]], duracion: float) -> Dict[str, dict]:
+    """
+    Resume las muestras ``{endpoint: [(segundos, status), ...]}`` en métricas.
+
+    Returns
+    -------
+    Dict[str, dict]
+        Por endpoint: peticiones, errores (status >= 500 o sin respuesta),
+        peticiones por segundo y latencias p50/p99/máxima en ms.
+    """
+    resumen = {}
+    for nombre, datos in sorted(muestras.items()):
+        latencias = [t * 1000 for t, _ in datos]
+        resumen[nombre] = {
+            'peticiones': len(datos),
+            'errores': sum(1 for _, status in datos if status == 0 or status >= 500),
+            'rps': round(len(datos) / duracion, 1) if duracion else 0.0,
+            'p50_ms': round(percentil(latencias, 50), 2),
+            'p99_ms': round(percentil(latencias, 99), 2),
+            'max_ms': round(max(latencias), 2) if latencias else 0.0,
+        }
+    return resumen
+
+
+class PruebaCarga:
+    """
+    Genera carga concurrente contra una instancia de la API ya arrancada.
+
+    Parameters
+    ----------
+    base_url : str
+        URL base de la API (p. ej. ``http://127.0.0.1:5050``).
+    concurrencia : int
+        Número de hilos cliente, cada uno con su propia sesión HTTP.
+    """
+
+    def __init__(self, base_url: str, concurrencia: int) -> None:
+        self.base_url = base_url.rstrip('/')
+        self.concurrencia = concurrencia
+        self._numeros_habitacion = itertools.count(1_000_000 + os.getpid() * 1000)
+        self._bloqueo = threading.Lock()
+        self.muestras: Dict[str, List[Tuple[float, int]]] = {}
+        self.credenciales: Optional[Tuple[str, str]] = None
+
+    def preparar(self) -> None:
+        """Registra un médico propio para poder medir los endpoints autenticados."""
+        usuario = f"carga_{uuid.uuid4().hex[:8]}"
+        clave = uuid.uuid4().hex
+        requests.post(f"{self.base_url}/medicos/register", json={
+            'id': f"MED-{usuario}", 'username': usuario, 'password': clave,
+            'especialidad': 'Carga', 'antiguedad': 1,
+        }, timeout=30)
+        self.credenciales = (usuario, clave)
+
+    def _operaciones(self):
+        """Lista de (nombre, función) que cada hilo recorre en bucle."""
+        auth = self.credenciales
+
+        def habitacion_alta(s):
+            with self._bloqueo:
+                numero = next(self._numeros_habitacion)
+            return s.post(f"{self.base_url}/habitaciones/alta", json={'numero': numero, 'capacidad': 2}, timeout=30)
+
+        return [
+            ('GET /', lambda s: s.get(f"{self.base_url}/", timeout=30)),
+            ('GET /pacientes', lambda s: s.get(f"{self.base_url}/pacientes", timeout=30)),
+            ('GET /medicos', lambda s: s.get(f"{self.base_url}/medicos", timeout=30)),
+            ('GET /enfermeros', lambda s: s.get(f"{self.base_url}/enfermeros", timeout=30)),
+            ('GET /auxiliares', lambda s: s.get(f"{self.base_url}/auxiliares", timeout=30)),
+            ('GET /habitaciones', lambda s: s.get(f"{self.base_url}/habitaciones", timeout=30)),
+            ('GET /consultar_sip/<id>', lambda s: s.get(f"{self.base_url}/consultar_sip/P-carga", timeout=30)),
+            ('GET /menu', lambda s: s.get(f"{self.base_url}/menu", auth=auth, headers={'X-ROL': 'medico'}, timeout=30)),
+            ('POST /habitaciones/alta', habitacion_alta),
+        ]
+
+    def _hilo(self, fin: float, desplazamiento: int) -> None:
+        operaciones = self._operaciones()
+        locales: Dict[str, List[Tuple[float, int]]] = {}
+        sesion = requests.Session()
+        i = desplazamiento
+        while time.perf_counter() < fin:
+            nombre, operacion = operaciones[i % len(operaciones)]
+            i += 1
+            inicio = time.perf_counter()
+            try:
+                status = operacion(sesion).status_code
+            except requests.RequestException:
+                status = 0
+            locales.setdefault(nombre, []).append((time.perf_counter() - inicio, status))
+        sesion.close()
+        with self._bloqueo:
+            for nombre, datos in locales.items():
+                self.muestras.setdefault(nombre, []).extend(datos)
+
+    def ejecutar(self, duracion: float) -> Dict[str, dict]:
+        """
+        Lanza la carga durante ``duracion`` segundos y devuelve el resumen.
+
+        Returns
+        -------
+        Dict[str, dict]
+            Resultado de :func:`resumir`.
+        """
+        if self.credenciales is None:
+            self.preparar()
+        fin = time.perf_counter() + duracion
+        hilos = [threading.Thread(target=self._hilo, args=(fin, i)) for i in range(self.concurrencia)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        return resumir(self.muestras, duracion)
+
+
+def _esperar_servidor(base_url: str, proceso: subprocess.Popen, limite: float = 60) -> None:
+    fin = time.monotonic() + limite
+    while time.monotonic() < fin:
+        if proceso.poll() is not None:
+            raise RuntimeError(f"El servidor terminó con código {proceso.returncode}")
+        try:
+            if requests.get(f"{base_url}/", timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f"El servidor no respondió en {limite} s")
+
+
+@contextlib.contextmanager
+def servidor_en_marcha(bd: str, workers: int, port: int, servidor: str = 'auto') -> Iterator[str]:
+    """
+    Arranca ``servidor.py`` sobre la base de datos ``bd`` y lo detiene al salir.
+
+    Yields
+    ------
+    str
+        URL base del servidor ya listo para recibir peticiones.
+    """
+    entorno = dict(os.environ, PROSALUD_BD=bd)
+    proceso = subprocess.Popen(
+        [sys.executable, os.path.join(RAIZ, 'servidor.py'), '--workers', str(workers),
+         '--port', str(port), '--servidor', servidor],
+        cwd=RAIZ, env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        _esperar_servidor(base_url, proceso)
+        yield base_url
+    finally:
+        proceso.terminate()
+        try:
+            proceso.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            proceso.kill()
+
+
+def ejecutar_con_trabajadores(workers: int, duracion: float, concurrencia: int,
+                              port: int, servidor: str = 'auto', bd_origen: str = RUTA_BD) -> Dict[str, dict]:
+    """
+    Arranca ``servidor.py`` con ``workers`` trabajadores sobre una copia de
+    ``bd_origen``, ejecuta la prueba de carga y detiene el servidor.
+
+    Returns
+    -------
+    Dict[str, dict]
+        Resumen por endpoint.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        bd = os.path.join(tmp, 'bdd.db')
+        shutil.copyfile(bd_origen, bd)
+        with servidor_en_marcha(bd, workers, port, servidor) as base_url:
+            return PruebaCarga(base_url, concurrencia).ejecutar(duracion)
+
+
+def imprimir(workers: int, resumen: Dict[str, dict]) -> None:
+    print(f"\n=== {workers} trabajador(es) ===")
+    print(f"{'endpoint':<28}{'n':>8}{'err':>6}{'rps':>9}{'p50 ms':>10}{'p99 ms':>10}")
+    for nombre, m in resumen.items():
+        print(f"{nombre:<28}{m['peticiones']:>8}{m['errores']:>6}{m['rps']:>9}{m['p50_ms']:>10}{m['p99_ms']:>10}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Prueba de carga de la API ProSalud")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--duracion', type=float, default=10.0, help="Segundos de carga por configuración")
+    parser.add_argument('--concurrencia', type=int, default=16, help="Hilos cliente simultáneos")
+    parser.add_argument('--port', type=int, default=5050)
+    parser.add_argument('--servidor', choices=['auto', 'gunicorn', 'waitress'], default='auto')
+    parser.add_argument('--bd', default=RUTA_BD, help="Base de datos de partida (se usa una copia)")
+    parser.add_argument('--json', help="Fichero donde guardar los resultados")
+    args = parser.parse_args()
+
+    resultados = {}
+    for workers in args.workers:
+        resumen = ejecutar_con_trabajadores(workers, args.duracion, args.concurrencia,
+                                            args.port, args.servidor, args.bd)
+        imprimir(workers, resumen)
+        resultados[str(workers)] = resumen
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
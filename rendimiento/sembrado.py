@@ -0,0 +1,765 @@
+"""
+Sembrado de una base de datos sintética para pruebas de rendimiento.
+
+Genera datos deterministas (misma semilla y mismos parámetros, mismos datos)
+y referencialmente coherentes para todas las tablas:
+
+- provincias → centros → habitaciones y ambulancias,
+- personal: médicos, enfermeros, auxiliares, paramédicos (tripulaciones de
+  las ambulancias) y secretarios, cada uno con su ficha en ``trabajadores``,
+- pacientes → contactos, SIPs, enfermedades diagnosticadas y citas,
+- enfermedades ↔ medicamentos.
+
+Las tablas de la API se crean con los modelos SQLAlchemy
+(``Base_De_Datos/tablas/modelos.py``) y el resto con las funciones
+``crear_tabla_*`` de cada ``tabla_*.py``. Los datos se generan por columnas,
+en lotes de ``TAMANO_LOTE`` filas, y se cargan con ``executemany`` dentro de
+una única transacción por tabla.
+
+Las distribuciones (edades, estados, tipos de cita, reparto de citas entre
+médicos, plantilla por centro...) están en ``DISTRIBUCIONES`` y se pueden
+sustituir clave a clave con un fichero JSON (``--distribuciones``).
+
+Todas las cuentas comparten el mismo hash de contraseña
+(``CLAVE_SEMBRADO``): calcular un scrypt por fila haría inviable sembrar
+millones de pacientes. Su sal también se deriva de la semilla para que dos
+siembras iguales produzcan ficheros idénticos.
+
+Uso::
+
+    python -m rendimiento.sembrado /tmp/bench.db --escala produccion
+    python -m rendimiento.sembrado /tmp/bench.db --pacientes 100000 --distribuciones dist.json
+"""
+
+import argparse
+import copy
+import hashlib
+import itertools
+import json
+import os
+import random
+import sqlite3
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import create_engine
+
+from Base_De_Datos.tablas.modelos import Base
+
+# Contraseña de todas las cuentas sembradas
+CLAVE_SEMBRADO = 'bench'
+
+# Usuarios fijos para los endpoints autenticados
+USUARIO_MEDICO = 'bench_medico'
+USUARIO_PACIENTE = 'bench_paciente'
+USUARIO_ENFERMERO = 'bench_enfermero'
+
+# Escalas predefinidas (número de filas por entidad)
+ESCALAS: Dict[str, Dict[str, int]] = {
+    'mini': {'provincias': 10, 'centros': 20, 'habitaciones': 200, 'ambulancias': 30,
+             'medicos': 50, 'enfermeros': 100, 'auxiliares': 50, 'paramedicos': 60, 'secretarios': 20,
+             'pacientes': 1_000, 'enfermedades': 100, 'medicamentos': 200, 'citas': 5_000},
+    'media': {'provincias': 52, 'centros': 500, 'habitaciones': 5_000, 'ambulancias': 1_000,
+              'medicos': 1_000, 'enfermeros': 2_000, 'auxiliares': 1_000, 'paramedicos': 2_000,
+              'secretarios': 500, 'pacientes': 100_000, 'enfermedades': 1_000, 'medicamentos': 5_000,
+              'citas': 500_000},
+    'produccion': {'provincias': 52, 'centros': 2_000, 'habitaciones': 50_000, 'ambulancias': 5_000,
+                   'medicos': 10_000, 'enfermeros': 20_000, 'auxiliares': 10_000, 'paramedicos': 12_000,
+                   'secretarios': 5_000, 'pacientes': 1_000_000, 'enfermedades': 5_000,
+                   'medicamentos': 20_000, 'citas': 5_000_000},
+}
+
+# Distribuciones por defecto. Los diccionarios de categorías son pesos
+# relativos (no hace falta que sumen 100); las claves son texto para poder
+# sobrescribirlas desde JSON.
+DISTRIBUCIONES: Dict[str, object] = {
+    'edad': {'media': 45, 'desviacion': 22, 'minimo': 0, 'maximo': 105},
+    'genero': {'F': 51, 'M': 49},
+    'estado': {'leve': 70, 'moderado': 22, 'grave': 8},
+    'hospitalizados': 0.1,
+    'con_sip': 0.9,
+    'con_historial': 0.3,
+    'enfermedades_por_paciente': {'0': 50, '1': 30, '2': 15, '3': 5},
+    'tipo_cita': {'presencial': 60, 'telefonica': 30, 'urgencias': 10},
+    'prioridad': {'alta': 20, 'media': 50, 'baja': 30},
+    # Exponente Zipf del reparto de citas entre médicos (0 = uniforme)
+    'sesgo_medicos': 0.8,
+    'dias_citas': 365,
+    'capacidad_habitacion': {'1': 20, '2': 60, '4': 20},
+    'habitaciones_limpias': 0.8,
+    'presupuesto_centro': {'minimo': 1_000_000, 'maximo': 50_000_000},
+    'zonas_por_provincia': 20,
+    'sirena': {'bitonal': 60, 'secuencial': 40},
+    # Paramédicos por ambulancia; los que sobran quedan sin ambulancia
+    'tripulacion': 2,
+    'antiguedad_maxima': 35,
+    'turno': {'mañana': 50, 'tarde': 35, 'noche': 15},
+    'horas_semanales': {'35': 20, '37': 50, '40': 30},
+    'salario_base': {'medico': 4200, 'enfermero': 2400, 'auxiliar': 1600, 'paramedico': 2000,
+                     'secretario': 1500},
+    'enfermedades_cronicas': 0.3,
+    'enfermedades_graves': 0.15,
+    'medicamentos_por_enfermedad': {'1': 50, '2': 35, '3': 15},
+    'medicamentos_con_alergenos': 0.25,
+}
+
+TAMANO_LOTE = 50_000
+
+PROVINCIAS = [
+    ('Andalucía', 'Almería'), ('Andalucía', 'Cádiz'), ('Andalucía', 'Córdoba'), ('Andalucía', 'Granada'),
+    ('Andalucía', 'Huelva'), ('Andalucía', 'Jaén'), ('Andalucía', 'Málaga'), ('Andalucía', 'Sevilla'),
+    ('Aragón', 'Huesca'), ('Aragón', 'Teruel'), ('Aragón', 'Zaragoza'), ('Asturias', 'Asturias'),
+    ('Illes Balears', 'Illes Balears'), ('Canarias', 'Las Palmas'), ('Canarias', 'Santa Cruz de Tenerife'),
+    ('Cantabria', 'Cantabria'), ('Castilla y León', 'Ávila'), ('Castilla y León', 'Burgos'),
+    ('Castilla y León', 'León'), ('Castilla y León', 'Palencia'), ('Castilla y León', 'Salamanca'),
+    ('Castilla y León', 'Segovia'), ('Castilla y León', 'Soria'), ('Castilla y León', 'Valladolid'),
+    ('Castilla y León', 'Zamora'), ('Castilla-La Mancha', 'Albacete'), ('Castilla-La Mancha', 'Ciudad Real'),
+    ('Castilla-La Mancha', 'Cuenca'), ('Castilla-La Mancha', 'Guadalajara'), ('Castilla-La Mancha', 'Toledo'),
+    ('Cataluña', 'Barcelona'), ('Cataluña', 'Girona'), ('Cataluña', 'Lleida'), ('Cataluña', 'Tarragona'),
+    ('Comunitat Valenciana', 'Alicante'), ('Comunitat Valenciana', 'Castellón'),
+    ('Comunitat Valenciana', 'Valencia'), ('Extremadura', 'Badajoz'), ('Extremadura', 'Cáceres'),
+    ('Galicia', 'A Coruña'), ('Galicia', 'Lugo'), ('Galicia', 'Ourense'), ('Galicia', 'Pontevedra'),
+    ('Comunidad de Madrid', 'Madrid'), ('Región de Murcia', 'Murcia'), ('Navarra', 'Navarra'),
+    ('País Vasco', 'Álava'), ('País Vasco', 'Gipuzkoa'), ('País Vasco', 'Bizkaia'), ('La Rioja', 'La Rioja'),
+    ('Ceuta', 'Ceuta'), ('Melilla', 'Melilla'),
+]
+NOMBRES = ['Ana', 'Luis', 'María', 'Carlos', 'Lucía', 'Javier', 'Elena', 'Pablo', 'Sara', 'Jorge',
+           'Carmen', 'David', 'Laura', 'Sergio', 'Marta', 'Alberto', 'Paula', 'Raúl', 'Irene', 'Diego']
+APELLIDOS = ['García', 'Martínez', 'López', 'Sánchez', 'Pérez', 'Gómez', 'Martín', 'Jiménez', 'Ruiz',
+             'Hernández', 'Díaz', 'Moreno', 'Álvarez', 'Romero', 'Navarro', 'Torres', 'Domínguez']
+ESPECIALIDADES = ['Cardiología', 'Pediatría', 'Traumatología', 'Neurología', 'Dermatología',
+                  'Oncología', 'Medicina general', 'Urgencias', 'Geriatría', 'Psiquiatría']
+ESPECIALIDADES_PARAMEDICO = ['Soporte vital básico', 'Soporte vital avanzado', 'Rescate', 'Transporte']
+TIPOS_CENTRO = ['Hospital', 'Hospital Universitario', 'Centro de Salud', 'Clínica', 'Consultorio']
+ADVOCACIONES = ['San Juan', 'La Paz', 'Virgen del Rocío', 'Santa Lucía', 'del Mar', 'San Pedro',
+                'La Fe', 'Reina Sofía', 'Miguel Servet', 'Severo Ochoa', 'Ramón y Cajal', 'La Princesa']
+MODELOS_AMBULANCIA = ['Mercedes Sprinter', 'Renault Master', 'Fiat Ducato', 'Volkswagen Crafter',
+                      'Peugeot Boxer']
+CONSONANTES = 'BCDFGHJKLMNPRSTVWXYZ'
+TITULOS_SECRETARIO = ['Técnico en Documentación Sanitaria', 'Grado en Administración', 'Técnico Administrativo']
+DEPARTAMENTOS = ['Admisión', 'Citaciones', 'Dirección', 'Recursos Humanos', 'Facturación', 'Archivo']
+RAICES_ENFERMEDAD = ['Gastr', 'Derm', 'Neur', 'Cardi', 'Nefr', 'Hepat', 'Artr', 'Bronqu', 'Otit', 'Sinus']
+SUFIJOS_ENFERMEDAD = ['itis', 'osis', 'algia', 'patía', 'emia']
+SINTOMAS = ['fiebre', 'tos', 'dolor de cabeza', 'náuseas', 'fatiga', 'mareo', 'dolor abdominal',
+            'erupción', 'dolor articular', 'dificultad respiratoria']
+PRINCIPIOS_ACTIVOS = ['Paracetamol', 'Ibuprofeno', 'Amoxicilina', 'Omeprazol', 'Metformina', 'Enalapril',
+                      'Salbutamol', 'Atorvastatina', 'Loratadina', 'Diazepam']
+ALERGENOS = ['lactosa', 'gluten', 'penicilina', 'sulfitos', 'soja']
+
+
+def _tramos(n: int, tamano: int = TAMANO_LOTE) -> Iterator[Tuple[int, int]]:
+    for inicio in range(0, n, tamano):
+        yield inicio, min(n, inicio + tamano)
+
+
+def _lotes(filas: Iterable[tuple], tamano: int = TAMANO_LOTE) -> Iterator[list]:
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def cargar(conn: sqlite3.Connection, tabla: str, columnas: Sequence[str], filas: Iterable[tuple]) -> int:
+    """
+    Inserta ``filas`` en ``tabla`` por lotes dentro de una sola transacción.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        Conexión de destino.
+    tabla : str
+        Nombre de la tabla.
+    columnas : Sequence[str]
+        Columnas en el orden de cada tupla.
+    filas : Iterable[tuple]
+        Filas a insertar (puede ser un generador).
+
+    Returns
+    -------
+    int
+        Número de filas insertadas.
+    """
+    sql = f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES ({', '.join('?' * len(columnas))})"
+    total = 0
+    with conn:
+        for lote in _lotes(filas):
+            conn.executemany(sql, lote)
+            total += len(lote)
+    return total
+
+
+def cargar_distribuciones(ruta: Optional[str] = None) -> Dict[str, object]:
+    """
+    Devuelve ``DISTRIBUCIONES`` con las claves del JSON ``ruta`` sustituidas.
+
+    Parameters
+    ----------
+    ruta : Optional[str]
+        Fichero JSON con un objeto ``{clave: valor}``; cada clave sustituye
+        por completo a la de ``DISTRIBUCIONES``.
+
+    Returns
+    -------
+    Dict[str, object]
+        Distribuciones a usar.
+
+    Raises
+    ------
+    ValueError
+        Si el fichero contiene claves desconocidas.
+    """
+    distribuciones = copy.deepcopy(DISTRIBUCIONES)
+    if ruta:
+        with open(ruta, encoding='utf-8') as f:
+            cambios = json.load(f)
+        desconocidas = set(cambios) - set(distribuciones)
+        if desconocidas:
+            raise ValueError(f"Distribuciones desconocidas: {', '.join(sorted(desconocidas))}")
+        distribuciones.update(cambios)
+    return distribuciones
+
+
+def _muestreador(pesos: Dict[str, float], convertir: Callable = str) -> Callable[[random.Random, int], list]:
+    """Devuelve ``f(rng, k)`` que elige ``k`` valores según los pesos dados."""
+    valores = [convertir(v) for v in pesos]
+    acumulados = list(itertools.accumulate(pesos.values()))
+    return lambda rng, k: rng.choices(valores, cum_weights=acumulados, k=k)
+
+
+def id_paciente(i: int) -> str:
+    return f"PAC{i:08d}"
+
+
+def id_medico(i: int) -> str:
+    return f"MED{i:06d}"
+
+
+def id_enfermero(i: int) -> str:
+    return f"ENF{i:06d}"
+
+
+def id_auxiliar(i: int) -> str:
+    return f"AUX{i:06d}"
+
+
+def id_paramedico(i: int) -> str:
+    return f"PAR{i:06d}"
+
+
+def id_secretario(i: int) -> str:
+    return f"SEC{i:06d}"
+
+
+def id_centro(i: int) -> str:
+    return f"CEN{i:05d}"
+
+
+def id_enfermedad(i: int) -> str:
+    return f"PAT{i:06d}"
+
+
+def id_medicamento(i: int) -> str:
+    return f"FAR{i:06d}"
+
+
+def matricula_ambulancia(i: int) -> str:
+    """Matrícula única con formato ``0000 BBB``."""
+    letras = ''.join(CONSONANTES[(i // 10_000 // len(CONSONANTES) ** k) % len(CONSONANTES)] for k in (2, 1, 0))
+    return f"{i % 10_000:04d} {letras}"
+
+
+def hash_determinista(clave: str, semilla: int) -> str:
+    """
+    Hash scrypt de ``clave`` en el formato de ``werkzeug.security`` con una
+    sal derivada de ``semilla`` (``check_password_hash`` lo verifica igual).
+    """
+    sal = hashlib.sha256(f"sal:{semilla}".encode()).hexdigest()[:16]
+    n, r, p = 2 ** 15, 8, 1
+    resumen = hashlib.scrypt(clave.encode(), salt=sal.encode(), n=n, r=r, p=p, maxmem=132 * n * r * p).hex()
+    return f"scrypt:{n}:{r}:{p}${sal}${resumen}"
+
+
+class Sembrador:
+    """
+    Genera y carga los datos sintéticos de forma reproducible.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        Conexión a la base de datos de destino (con el esquema ya creado).
+    semilla : int
+        Semilla del generador pseudoaleatorio.
+    distribuciones : Optional[Dict[str, object]]
+        Distribuciones a usar; por defecto ``DISTRIBUCIONES``.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, semilla: int = 42,
+                 distribuciones: Optional[Dict[str, object]] = None) -> None:
+        self.conn = conn
+        self.semilla = semilla
+        self.dist = distribuciones if distribuciones is not None else copy.deepcopy(DISTRIBUCIONES)
+        self.hash_clave = hash_determinista(CLAVE_SEMBRADO, semilla)
+        self.filas_por_tabla: Dict[str, int] = {}
+        self.segundos_por_tabla: Dict[str, float] = {}
+        # Provincia de cada centro, necesaria para las zonas de las ambulancias
+        self._provincia_centro: List[str] = []
+
+    def _rng(self, tabla: str) -> random.Random:
+        # Un generador por tabla: sembrar una tabla no altera los datos de las demás
+        return random.Random(f"{self.semilla}:{tabla}")
+
+    def _registrar(self, tabla: str, columnas: Sequence[str], filas: Iterable[tuple]) -> None:
+        inicio = time.perf_counter()
+        n = cargar(self.conn, tabla, columnas, filas)
+        self.filas_por_tabla[tabla] = self.filas_por_tabla.get(tabla, 0) + n
+        self.segundos_por_tabla[tabla] = self.segundos_por_tabla.get(tabla, 0.0) + time.perf_counter() - inicio
+
+    def _antiguedades(self, rng: random.Random, k: int) -> List[int]:
+        maxima = self.dist['antiguedad_maxima']
+        return [rng.randint(0, maxima) for _ in range(k)]
+
+    def provincias_y_centros(self, n_provincias: int, n_centros: int, n_habitaciones: int,
+                             n_personal: int) -> None:
+        """
+        Siembra provincias y centros.
+
+        Cada provincia tiene al menos un centro si hay centros suficientes.
+        Las habitaciones y la plantilla se reparten entre los centros y se
+        guardan en sus columnas ``habitaciones`` y ``cantidad_trabajadores``;
+        el presupuesto de cada provincia es la suma del de sus centros.
+        """
+        rng = self._rng('centros')
+        nombres_provincia = [
+            PROVINCIAS[i % len(PROVINCIAS)][1] + (f" {i // len(PROVINCIAS) + 1}" if i >= len(PROVINCIAS) else '')
+            for i in range(n_provincias)
+        ]
+        presupuesto = self.dist['presupuesto_centro']
+        habitaciones = Counter(rng.choices(range(n_centros), k=n_habitaciones)) if n_centros else Counter()
+        plantilla = Counter(rng.choices(range(n_centros), k=n_personal)) if n_centros else Counter()
+        vistos: Counter = Counter()
+        centros = []
+        presupuesto_provincia = [0.0] * n_provincias
+        self._provincia_centro = []
+        for i in range(n_centros):
+            provincia = i if i < n_provincias else rng.randrange(n_provincias)
+            nombre = f"{rng.choice(TIPOS_CENTRO)} {rng.choice(ADVOCACIONES)} de {nombres_provincia[provincia]}"
+            vistos[nombre] += 1
+            if vistos[nombre] > 1:
+                nombre = f"{nombre} {vistos[nombre]}"
+            importe = round(rng.uniform(presupuesto['minimo'], presupuesto['maximo']), 2)
+            presupuesto_provincia[provincia] += importe
+            self._provincia_centro.append(nombres_provincia[provincia])
+            centros.append((id_centro(i), nombre, plantilla[i], importe, habitaciones[i], provincia + 1))
+
+        self._registrar('provincias', ('id', 'nombre_comunidad', 'nombre_provincia', 'presupuesto'), (
+            (i + 1, PROVINCIAS[i % len(PROVINCIAS)][0], nombres_provincia[i], round(presupuesto_provincia[i], 2))
+            for i in range(n_provincias)))
+        self._registrar('centros', ('id_centro', 'nombre_centro', 'cantidad_trabajadores', 'presupuesto',
+                                    'habitaciones', 'id_provincia'), centros)
+
+    def habitaciones(self, n: int) -> None:
+        rng = self._rng('habitaciones')
+        capacidad = _muestreador(self.dist['capacidad_habitacion'], int)
+        limpias = self.dist['habitaciones_limpias']
+
+        def filas():
+            for a, b in _tramos(n):
+                yield from zip(range(a + 1, b + 1), capacidad(rng, b - a),
+                               [int(rng.random() < limpias) for _ in range(b - a)])
+
+        self._registrar('habitaciones', ('numero_habitacion', 'capacidad', 'limpia'), filas())
+
+    def ambulancias(self, n: int, n_centros: int) -> None:
+        rng = self._rng('ambulancias')
+        sirena = _muestreador(self.dist['sirena'])
+        zonas = self.dist['zonas_por_provincia']
+
+        def filas():
+            for i, tipo_sirena in zip(range(n), sirena(rng, n)):
+                centro = rng.randrange(n_centros)
+                yield (matricula_ambulancia(i), f"{self._provincia_centro[centro]} {rng.randint(1, zonas)}",
+                       rng.choice(MODELOS_AMBULANCIA), tipo_sirena, id_centro(centro))
+
+        self._registrar('ambulancias', ('matricula', 'zona', 'modelo', 'sirena', 'id_centro'), filas())
+
+    def medicos(self, n: int) -> None:
+        rng = self._rng('medicos')
+        filas = ((id_medico(i), USUARIO_MEDICO if i == 0 else f"medico{i}", self.hash_clave, especialidad,
+                  antiguedad)
+                 for i, especialidad, antiguedad in zip(range(n), rng.choices(ESPECIALIDADES, k=n),
+                                                        self._antiguedades(rng, n)))
+        self._registrar('medicos', ('id', 'username', 'password', 'especialidad', 'antiguedad'), filas)
+
+    def enfermeros(self, n: int) -> None:
+        rng = self._rng('enfermeros')
+        filas = ((id_enfermero(i), USUARIO_ENFERMERO if i == 0 else f"enfermero{i}", self.hash_clave,
+                  antiguedad, especialidad)
+                 for i, antiguedad, especialidad in zip(range(n), self._antiguedades(rng, n),
+                                                        rng.choices(ESPECIALIDADES, k=n)))
+        self._registrar('enfermeros', ('id', 'username', 'password', 'antiguedad', 'especialidad'), filas)
+
+    def auxiliares(self, n: int, n_enfermeros: int) -> None:
+        rng = self._rng('auxiliares')
+        filas = ((id_auxiliar(i), antiguedad, id_enfermero(rng.randrange(n_enfermeros)) if n_enfermeros else None)
+                 for i, antiguedad in zip(range(n), self._antiguedades(rng, n)))
+        self._registrar('auxiliares', ('id', 'antiguedad', 'id_enfermero'), filas)
+
+    def paramedicos(self, n: int, n_ambulancias: int) -> None:
+        """Asigna ``tripulacion`` paramédicos a cada ambulancia; el resto queda sin ambulancia."""
+        rng = self._rng('paramedicos')
+        plazas = self.dist['tripulacion'] * n_ambulancias
+        filas = ((id_paramedico(i), especialidad, antiguedad,
+                  matricula_ambulancia(i % n_ambulancias) if i < plazas else None)
+                 for i, especialidad, antiguedad in zip(range(n), rng.choices(ESPECIALIDADES_PARAMEDICO, k=n),
+                                                        self._antiguedades(rng, n)))
+        self._registrar('paramedicos', ('id', 'especialidad', 'antiguedad', 'id_ambulancia'), filas)
+
+    def secretarios(self, n: int) -> None:
+        rng = self._rng('secretarios')
+        filas = ((id_secretario(i), rng.choice(TITULOS_SECRETARIO), 'Gestión administrativa', antiguedad,
+                  f"secretario{i}@prosalud.es", rng.choice(DEPARTAMENTOS))
+                 for i, antiguedad in zip(range(n), self._antiguedades(rng, n)))
+        self._registrar('secretarios', ('id', 'titulo', 'descripcion', 'antiguedad', 'email', 'departamento'),
+                        filas)
+
+    def trabajadores(self, plantilla: Dict[str, Tuple[Callable[[int], str], int]]) -> None:
+        """
+        Siembra la ficha laboral (turno, horas, salario) de todo el personal.
+
+        Parameters
+        ----------
+        plantilla : Dict[str, Tuple[Callable[[int], str], int]]
+            Por rol, la función que genera sus identificadores y su número.
+        """
+        rng = self._rng('trabajadores')
+        turno = _muestreador(self.dist['turno'])
+        horas = _muestreador(self.dist['horas_semanales'], int)
+        salario_base = self.dist['salario_base']
+
+        def filas():
+            for rol, (generar_id, n) in plantilla.items():
+                base = salario_base[rol]
+                for a, b in _tramos(n):
+                    yield from ((generar_id(i), t, h, round(base * rng.uniform(0.9, 1.4), 2), rol)
+                                for i, t, h in zip(range(a, b), turno(rng, b - a), horas(rng, b - a)))
+
+        self._registrar('trabajadores', ('id', 'turno', 'horas', 'salario', 'rol'), filas())
+
+    def pacientes(self, n: int, n_medicos: int, n_enfermeros: int, n_habitaciones: int) -> None:
+        rng = self._rng('pacientes')
+        edad = self.dist['edad']
+        genero = _muestreador(self.dist['genero'])
+        estado = _muestreador(self.dist['estado'])
+        hospitalizados = self.dist['hospitalizados'] if n_habitaciones else 0.0
+        con_historial = self.dist['con_historial']
+        sin_historial, revision = json.dumps([]), json.dumps(['Revisión anual'])
+
+        def filas():
+            for a, b in _tramos(n):
+                m = b - a
+                edades = [min(edad['maximo'], max(edad['minimo'], int(rng.gauss(edad['media'], edad['desviacion']))))
+                          for _ in range(m)]
+                for i, e, g, s in zip(range(a, b), edades, genero(rng, m), estado(rng, m)):
+                    hospitalizado = rng.random() < hospitalizados
+                    yield (
+                        id_paciente(i), USUARIO_PACIENTE if i == 0 else f"paciente{i}", self.hash_clave,
+                        rng.choice(NOMBRES), rng.choice(APELLIDOS), e, g, s,
+                        revision if rng.random() < con_historial else sin_historial,
+                        id_enfermero(rng.randrange(n_enfermeros)) if n_enfermeros and hospitalizado else None,
+                        id_medico(rng.randrange(n_medicos)) if n_medicos else None,
+                        rng.randint(1, n_habitaciones) if hospitalizado else None,
+                    )
+
+        self._registrar('pacientes', ('id', 'username', 'password', 'nombre', 'apellido', 'edad', 'genero',
+                                      'estado', 'historial_medico', 'id_enfermero', 'id_medico',
+                                      'id_habitacion'), filas())
+
+    def contactos(self, n_pacientes: int) -> None:
+        # Todos con teléfono; uno de cada diez sin email
+        self._registrar('contactos_pacientes', ('paciente_id', 'email', 'telefono'), (
+            (id_paciente(i), None if i % 10 == 9 else f"paciente{i}@correo.prosalud.es", f"6{i:08d}")
+            for i in range(n_pacientes)))
+
+    def sips(self, n_pacientes: int) -> None:
+        rng = self._rng('sips')
+        proporcion = self.dist['con_sip']
+        filas = ((f"SIP-{i:010d}", id_paciente(i)) for i in range(n_pacientes) if rng.random() < proporcion)
+        self._registrar('sips', ('sip', 'paciente_id'), filas)
+
+    def enfermedades(self, n: int) -> None:
+        rng = self._rng('enfermedades')
+        cronicas, graves = self.dist['enfermedades_cronicas'], self.dist['enfermedades_graves']
+        filas = ((id_enfermedad(i), f"{rng.choice(RAICES_ENFERMEDAD)}{rng.choice(SUFIJOS_ENFERMEDAD)} {i}",
+                  ', '.join(rng.sample(SINTOMAS, rng.randint(1, 4))),
+                  int(rng.random() < cronicas), int(rng.random() < graves)) for i in range(n))
+        self._registrar('enfermedades', ('id', 'nombre', 'sintomas', 'cronica', 'grave'), filas)
+
+    def medicamentos(self, n: int, n_enfermedades: int) -> None:
+        rng = self._rng('medicamentos')
+        con_alergenos = self.dist['medicamentos_con_alergenos']
+        caducidad = datetime(2026, 1, 1)
+        self._registrar('medicamentos', ('id', 'nombre', 'dosis', 'precio', 'fecha_caducidad', 'alergenos'), (
+            (id_medicamento(i), f"{rng.choice(PRINCIPIOS_ACTIVOS)} {i}", f"{rng.choice((5, 10, 20, 250, 500))} mg",
+             round(rng.uniform(1, 120), 2), (caducidad + timedelta(days=rng.randrange(1500))).date().isoformat(),
+             rng.choice(ALERGENOS) if rng.random() < con_alergenos else None)
+            for i in range(n)))
+
+        if not n_enfermedades:
+            return
+        por_enfermedad = _muestreador(self.dist['medicamentos_por_enfermedad'], int)
+        tratamientos = ((id_medicamento(i), id_enfermedad(j))
+                        for i, k in zip(range(n), por_enfermedad(rng, n))
+                        for j in rng.sample(range(n_enfermedades), min(k, n_enfermedades)))
+        self._registrar('medicamento_enfermedad', ('medicamento_id', 'enfermedad_id'), tratamientos)
+
+    def diagnosticos(self, n_pacientes: int, n_enfermedades: int) -> None:
+        """Relaciona cada paciente con 0..N enfermedades distintas (``paciente_enfermedad``)."""
+        if not n_enfermedades:
+            return
+        rng = self._rng('paciente_enfermedad')
+        por_paciente = _muestreador(self.dist['enfermedades_por_paciente'], int)
+
+        def filas():
+            for a, b in _tramos(n_pacientes):
+                for i, k in zip(range(a, b), por_paciente(rng, b - a)):
+                    if k:
+                        paciente = id_paciente(i)
+                        for j in rng.sample(range(n_enfermedades), min(k, n_enfermedades)):
+                            yield paciente, id_enfermedad(j)
+
+        self._registrar('paciente_enfermedad', ('paciente_id', 'enfermedad_id'), filas())
+
+    def citas(self, n: int, n_pacientes: int, n_medicos: int, n_centros: int, desde: datetime) -> None:
+        """
+        Siembra ``n`` citas en franjas de 30 minutos a partir de ``desde``.
+
+        Las citas se reparten entre los médicos con una ley de Zipf de
+        exponente ``sesgo_medicos`` (unos pocos médicos muy solicitados).
+        """
+        rng = self._rng('citas')
+        tipo_cita = _muestreador(self.dist['tipo_cita'])
+        prioridad = _muestreador(self.dist['prioridad'])
+        franjas = [(desde + timedelta(minutes=30 * k)).strftime('%Y-%m-%dT%H:%M:%S')
+                   for k in range(self.dist['dias_citas'] * 48)]
+        pacientes = [id_paciente(i) for i in range(n_pacientes)]
+        medicos = [id_medico(i) for i in range(n_medicos)]
+        rng.shuffle(medicos)
+        sesgo = self.dist['sesgo_medicos']
+        pesos_medicos = list(itertools.accumulate(1 / (k + 1) ** sesgo for k in range(n_medicos)))
+        centros = [id_centro(i) for i in range(n_centros)]
+
+        def filas():
+            for a, b in _tramos(n):
+                m = b - a
+                asignados = rng.choices(medicos, cum_weights=pesos_medicos, k=m) if medicos else [None] * m
+                for i, paciente, medico, fecha, tipo, nivel in zip(
+                        range(a, b), rng.choices(pacientes, k=m), asignados, rng.choices(franjas, k=m),
+                        tipo_cita(rng, m), prioridad(rng, m)):
+                    yield (
+                        f"CITA{i:09d}", paciente, medico, fecha, tipo, 'Consulta',
+                        rng.choice(centros) if tipo == 'presencial' and centros else None,
+                        f"6{rng.randint(0, 99_999_999):08d}" if tipo == 'telefonica' else None,
+                        nivel if tipo == 'urgencias' else None,
+                    )
+
+        self._registrar('citas', ('id_cita', 'paciente_id', 'medico_asignado', 'fecha_hora', 'tipo_cita',
+                                  'motivo', 'centro', 'telefono_contacto', 'nivel_prioridad'), filas())
+
+    def sembrar(self, escala: Dict[str, int], desde: datetime = datetime(2025, 1, 1)) -> Dict[str, int]:
+        """
+        Siembra todas las tablas con los tamaños de ``escala``.
+
+        Returns
+        -------
+        Dict[str, int]
+            Filas insertadas por tabla.
+        """
+        plantilla = {
+            'medico': (id_medico, escala['medicos']),
+            'enfermero': (id_enfermero, escala['enfermeros']),
+            'auxiliar': (id_auxiliar, escala['auxiliares']),
+            'paramedico': (id_paramedico, escala['paramedicos']),
+            'secretario': (id_secretario, escala['secretarios']),
+        }
+        if escala['centros'] and not escala['provincias']:
+            raise ValueError("Para sembrar centros hace falta al menos una provincia")
+        self.provincias_y_centros(escala['provincias'], escala['centros'], escala['habitaciones'],
+                                  sum(n for _, n in plantilla.values()))
+        self.habitaciones(escala['habitaciones'])
+        if escala['centros']:
+            self.ambulancias(escala['ambulancias'], escala['centros'])
+        self.medicos(escala['medicos'])
+        self.enfermeros(escala['enfermeros'])
+        self.auxiliares(escala['auxiliares'], escala['enfermeros'])
+        self.paramedicos(escala['paramedicos'], self.filas_por_tabla.get('ambulancias', 0))
+        self.secretarios(escala['secretarios'])
+        self.trabajadores(plantilla)
+        self.pacientes(escala['pacientes'], escala['medicos'], escala['enfermeros'], escala['habitaciones'])
+        self.contactos(escala['pacientes'])
+        self.sips(escala['pacientes'])
+        self.enfermedades(escala['enfermedades'])
+        self.medicamentos(escala['medicamentos'], escala['enfermedades'])
+        self.diagnosticos(escala['pacientes'], escala['enfermedades'])
+        if escala['pacientes']:
+            self.citas(escala['citas'], escala['pacientes'], escala['medicos'], escala['centros'], desde)
+        return self.filas_por_tabla
+
+
+def _ejecutar_en(ruta: str, creadores: List[Tuple[Any, List[Callable[[], None]]]], *otros: Any) -> None:
+    """
+    Ejecuta funciones ``crear_*`` de los módulos ``tabla_*.py`` sobre ``ruta``.
+
+    Abren su conexión con el ``conectar()`` de su módulo, que apunta a la
+    base de datos compartida; mientras se ejecutan se redirige a ``ruta``
+    (también el de ``otros``, módulos que usan sin ser los suyos).
+    """
+    from Base_De_Datos.tablas.conexion import abrir_conexion
+
+    # Todas a la vez: algunas crean también tablas de otro módulo (centros → presupuestos)
+    modulos = [modulo for modulo, _ in creadores] + list(otros)
+    originales = [modulo.conectar for modulo in modulos]
+    for modulo in modulos:
+        modulo.conectar = lambda: abrir_conexion(ruta)
+    try:
+        for _, funciones in creadores:
+            for crear in funciones:
+                crear()
+    finally:
+        for modulo, original in zip(modulos, originales):
+            modulo.conectar = original
+
+
+def crear_esquema(ruta: str) -> None:
+    """
+    Crea en ``ruta`` las tablas de los modelos SQLAlchemy y las del resto de
+    ``tabla_*.py``.
+
+    Los índices que ``crear_indices`` construye tras la carga se dejan para entonces.
+    """
+    # Importación diferida: conexion.py lee PROSALUD_BD al importarse y quien
+    # importa este módulo (benchmark_api) aún puede fijarla antes de sembrar
+    from Base_De_Datos.tablas import (tabla_ambulancia, tabla_centro, tabla_correo, tabla_credenciales,
+                                      tabla_documento, tabla_enfermedades, tabla_medicamento, tabla_nomina,
+                                      tabla_paciente, tabla_paramedico, tabla_presupuesto, tabla_provincia,
+                                      tabla_recordatorios, tabla_secretario, tabla_trabajador, tabla_urgencias)
+
+    motor = create_engine(f"sqlite:///{ruta}")
+    Base.metadata.create_all(motor)
+    motor.dispose()
+
+    creadores = [
+        (tabla_provincia, [tabla_provincia.crear_tabla_provincias]),
+        (tabla_centro, [tabla_centro.crear_tabla_centros]),
+        (tabla_ambulancia, [tabla_ambulancia.crear_tabla_ambulancias, tabla_ambulancia.crear_tabla_despachos]),
+        (tabla_paramedico, [tabla_paramedico.crear_tabla_paramedicos]),
+        (tabla_secretario, [tabla_secretario.crear_tabla_secretarios]),
+        (tabla_documento, [tabla_documento.crear_tabla_documentos]),
+        (tabla_correo, [tabla_correo.crear_tabla_correos]),
+        (tabla_trabajador, [tabla_trabajador.crear_tabla_trabajadores]),
+        (tabla_nomina, [tabla_nomina.crear_tabla_nominas]),
+        (tabla_enfermedades, [tabla_enfermedades.crear_tabla_enfermedades]),
+        (tabla_medicamento, [tabla_medicamento.crear_tabla_medicamentos,
+                             tabla_medicamento.crear_tabla_medicamento_enfermedad]),
+        (tabla_paciente, [tabla_paciente.crear_tabla_paciente_enfermedad,
+                          tabla_paciente.crear_tabla_contactos_pacientes]),
+        (tabla_urgencias, [tabla_urgencias.crear_tabla_triaje]),
+        (tabla_recordatorios, [tabla_recordatorios.crear_tabla_recordatorios]),
+        (tabla_credenciales, [tabla_credenciales.crear_tabla_parametros_credenciales]),
+    ]
+    _ejecutar_en(ruta, creadores, tabla_presupuesto)
+
+
+def crear_indices(ruta: str) -> None:
+    """
+    Crea en ``ruta``, ya sembrada, los índices de 'citas' (idx_citas_inicio e
+    idx_citas_medico_fecha).
+
+    Construirlos de una vez al final es mucho más rápido que mantenerlos
+    fila a fila durante la carga.
+    """
+    from Base_De_Datos.tablas import tabla_citas
+
+    _ejecutar_en(ruta, [(tabla_citas, [tabla_citas.crear_columna_inicio, tabla_citas.crear_indice_citas_medico])])
+
+
+def crear_bd(ruta: str, escala: Dict[str, int], semilla: int = 42,
+             distribuciones: Optional[Dict[str, object]] = None) -> Tuple[Dict[str, int], float]:
+    """
+    Crea desde cero una base de datos sembrada en ``ruta``.
+
+    Durante la carga se desactivan el journal y la sincronización, y el
+    fichero se deja al final en modo WAL como en producción.
+
+    Returns
+    -------
+    Tuple[Dict[str, int], float]
+        Filas por tabla y segundos empleados.
+    """
+    for sufijo in ('', '-wal', '-shm'):
+        if os.path.exists(ruta + sufijo):
+            os.remove(ruta + sufijo)
+    crear_esquema(ruta)
+    from Base_De_Datos.tablas.tabla_presupuesto import recalcular_presupuestos
+    from Base_De_Datos.tablas.tabla_usuarios import crear_tabla_usuarios
+
+    inicio = time.perf_counter()
+    conn = sqlite3.connect(ruta)
+    conn.execute("PRAGMA journal_mode = OFF;")
+    conn.execute("PRAGMA synchronous = OFF;")
+    conn.execute("PRAGMA cache_size = -262144;")
+    conn.execute("PRAGMA temp_store = MEMORY;")
+    try:
+        filas = Sembrador(conn, semilla, distribuciones).sembrar(escala)
+        recalcular_presupuestos(conn)
+        # Al final: el directorio se copia de una vez en lugar de fila a fila con los disparadores
+        crear_tabla_usuarios(conn)
+        conn.commit()
+        crear_indices(ruta)
+        conn.execute("ANALYZE;")
+        conn.execute("PRAGMA journal_mode = WAL;")
+    finally:
+        conn.close()
+    return filas, time.perf_counter() - inicio
+
+
+def escala_desde_args(args: argparse.Namespace) -> Dict[str, int]:
+    """Combina la escala predefinida elegida con los tamaños indicados a mano."""
+    escala = dict(ESCALAS[args.escala])
+    for clave in escala:
+        valor = getattr(args, clave, None)
+        if valor is not None:
+            escala[clave] = valor
+    return escala
+
+
+def anadir_args_escala(parser: argparse.ArgumentParser) -> None:
+    """Añade al parser las opciones de tamaño comunes a sembrado y benchmark."""
+    parser.add_argument('--escala', choices=sorted(ESCALAS), default='mini')
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--distribuciones', help="JSON que sustituye claves de DISTRIBUCIONES")
+    for clave in ESCALAS['mini']:
+        parser.add_argument(f'--{clave}', type=int, help=f"Número de {clave} (sobrescribe la escala)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Siembra una base de datos sintética")
+    parser.add_argument('ruta', help="Fichero SQLite a crear (se sobrescribe)")
+    anadir_args_escala(parser)
+    args = parser.parse_args()
+
+    filas, segundos = crear_bd(args.ruta, escala_desde_args(args), args.semilla,
+                               cargar_distribuciones(args.distribuciones))
+    total = sum(filas.values())
+    for tabla, n in filas.items():
+        print(f"{tabla:<24}{n:>12}")
+    print(f"{'total':<24}{total:>12}  ({segundos:.1f} s, {total / segundos:,.0f} filas/s)")
+
+
+if __name__ == '__main__':
+    main()
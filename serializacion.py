@@ -0,0 +1,207 @@
+"""
+Serialización y compresión de las respuestas
+============================================
+
+- ``ProveedorJSON``: proveedor JSON de la aplicación Flask (``app.json``, el
+  que usan ``jsonify`` y ``request.get_json``). Si está instalado ``orjson``
+  serializa con él, directamente a bytes; si no, o si un objeto no se puede
+  serializar con él, se usa el proveedor por defecto de Flask (stdlib
+  ``json``). Los datos son los mismos en ambos casos; ``orjson`` escribe
+  siempre JSON compacto y los caracteres no ASCII en UTF-8 en lugar de
+  como ``\\uXXXX``.
+- ``comprimir``: comprime con gzip o deflate, según ``Accept-Encoding``, las
+  respuestas JSON o de texto a partir de ``UMBRAL_COMPRESION`` bytes. Una
+  respuesta comprimida lleva su ETag como débil (``W/"..."``): el mismo
+  validador sirve para la versión comprimida y la sin comprimir, y los 304
+  siguen funcionando. Las últimas respuestas comprimidas con ETag se guardan
+  en memoria, así que una respuesta que ya sale de una caché
+  (``cache_respuestas.py``, ``agenda.py``) no se vuelve a comprimir.
+
+``instalar(app)`` activa ambas cosas; APIS.py lo hace al crear la aplicación,
+antes de la instrumentación (que envuelve ``app.json``).
+"""
+
+import gzip
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from flask import Flask, Response, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Dependencia opcional: sin ella se usa json de la stdlib
+    orjson = None
+
+# Tamaño mínimo (bytes) de una respuesta para comprimirla
+UMBRAL_COMPRESION = int(os.environ.get('PROSALUD_COMPRESION_MIN', '1024'))
+
+# Nivel de compresión de gzip y deflate (1 = más rápido, 9 = más pequeño); con JSON el 3
+# cuesta casi lo mismo que el 1 y comprime casi como el 6 (ver benchmark_serializacion)
+NIVEL_COMPRESION = int(os.environ.get('PROSALUD_COMPRESION_NIVEL', '3'))
+
+# Tipos de contenido que se comprimen
+TIPOS_COMPRIMIBLES = ('application/json', 'text/')
+
+# Codificaciones en orden de preferencia si el cliente acepta varias por igual
+CODIFICACIONES = ('gzip', 'deflate')
+
+# Respuestas comprimidas (por ETag y codificación) que se guardan en memoria
+TAMANO_CACHE = 256
+
+
+class ProveedorJSON(DefaultJSONProvider):
+    """
+    Proveedor JSON de Flask que usa ``orjson`` si está disponible.
+
+    Respeta ``sort_keys`` y el ``default`` de Flask (fechas en formato HTTP,
+    ``Decimal``, ``UUID``...). Con argumentos propios de ``json.dumps``
+    (p. ej. ``indent``) o en modo depuración usa el de la stdlib.
+    """
+
+    def _orjson(self, obj: Any) -> Optional[bytes]:
+        """JSON de ``obj`` con orjson, o None si no está o no puede serializarlo."""
+        if orjson is None:
+            return None
+        opciones = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            opciones |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, default=self.default, option=opciones)
+        except TypeError:
+            # Enteros de más de 64 bits, claves no admitidas...
+            return None
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if not kwargs:
+            datos = self._orjson(obj)
+            if datos is not None:
+                return datos.decode('utf-8')
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        if orjson is not None and not kwargs:
+            try:
+                return orjson.loads(s)
+            except ValueError:
+                # Lo que orjson no admite (NaN, enteros enormes...) o JSON mal
+                # formado: la stdlib lo acepta o da su error habitual
+                pass
+        return super().loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        legible = (self.compact is None and self._app.debug) or self.compact is False
+        cuerpo = None if legible else self._orjson(obj)
+        if cuerpo is None:
+            return super().response(*args, **kwargs)
+        return self._app.response_class(cuerpo + b'\n', mimetype=self.mimetype)
+
+
+def _codificacion_aceptada() -> Optional[str]:
+    """Codificación de ``CODIFICACIONES`` que el cliente prefiere, o None."""
+    aceptadas = request.accept_encodings
+    mejor, calidad_mejor = None, 0.0
+    for codificacion in CODIFICACIONES:
+        calidad = aceptadas[codificacion]
+        if calidad > calidad_mejor:
+            mejor, calidad_mejor = codificacion, calidad
+    return mejor
+
+
+def _comprimir_bytes(datos: bytes, codificacion: str) -> bytes:
+    if codificacion == 'gzip':
+        return gzip.compress(datos, compresslevel=NIVEL_COMPRESION, mtime=0)
+    return zlib.compress(datos, NIVEL_COMPRESION)
+
+
+class _Comprimidas:
+    """Últimas respuestas comprimidas, por (ETag, codificación)."""
+
+    def __init__(self, tamano: int) -> None:
+        self.tamano = tamano
+        self._cuerpos: 'OrderedDict[Tuple[str, str], bytes]' = OrderedDict()
+        self._cerrojo = threading.Lock()
+
+    def obtener(self, etag: Optional[str], codificacion: str, datos: bytes) -> bytes:
+        if etag is None:
+            return _comprimir_bytes(datos, codificacion)
+        clave = (etag, codificacion)
+        with self._cerrojo:
+            cuerpo = self._cuerpos.get(clave)
+            if cuerpo is not None:
+                self._cuerpos.move_to_end(clave)
+                return cuerpo
+        cuerpo = _comprimir_bytes(datos, codificacion)
+        with self._cerrojo:
+            self._cuerpos[clave] = cuerpo
+            if len(self._cuerpos) > self.tamano:
+                self._cuerpos.popitem(last=False)
+        return cuerpo
+
+
+_comprimidas = _Comprimidas(TAMANO_CACHE)
+
+
+def comprimir(respuesta: Response) -> Response:
+    """
+    Comprime ``respuesta`` con gzip o deflate si el cliente lo acepta y merece la pena.
+
+    Solo se comprimen las respuestas 200 de tipo JSON o texto, con el cuerpo
+    ya en memoria, de al menos ``UMBRAL_COMPRESION`` bytes y sin
+    ``Content-Encoding``. Añade ``Vary: Accept-Encoding`` a todas las que
+    podrían comprimirse.
+
+    Parameters
+    ----------
+    respuesta : Response
+        Respuesta de la petición en curso.
+
+    Returns
+    -------
+    Response
+        La misma respuesta, comprimida o no.
+    """
+    if (respuesta.status_code != 200 or respuesta.direct_passthrough or respuesta.is_streamed
+            or 'Content-Encoding' in respuesta.headers
+            or not (respuesta.mimetype or '').startswith(TIPOS_COMPRIMIBLES)):
+        return respuesta
+    respuesta.vary.add('Accept-Encoding')
+    if request.method == 'HEAD':
+        return respuesta
+    codificacion = _codificacion_aceptada()
+    if codificacion is None:
+        return respuesta
+    datos = respuesta.get_data()
+    if len(datos) < UMBRAL_COMPRESION:
+        return respuesta
+    etag, debil = respuesta.get_etag()
+    # Un ETag débil puede compartirse entre respuestas distintas: no sirve de clave
+    cuerpo = _comprimidas.obtener(None if debil else etag, codificacion, datos)
+    if len(cuerpo) >= len(datos):
+        return respuesta
+    respuesta.set_data(cuerpo)
+    respuesta.headers['Content-Encoding'] = codificacion
+    if etag is not None:
+        respuesta.set_etag(etag, weak=True)
+    return respuesta
+
+
+def instalar(app: Flask) -> None:
+    """
+    Usa ``ProveedorJSON`` en ``app`` y comprime sus respuestas (ver ``comprimir``).
+
+    Parameters
+    ----------
+    app : Flask
+        Aplicación a configurar.
+
+    Returns
+    -------
+    None
+    """
+    app.json = ProveedorJSON(app)
+    app.after_request(comprimir)
@@ -0,0 +1,232 @@
+"""
+Servicio de cifrado de contraseñas
+==================================
+
+Cifrar una contraseña (``credenciales.cifrar``: scrypt, pbkdf2 o bcrypt)
+es CPU pura: hecho en el hilo de la petición lo bloquea y,
+con el GIL, frena al resto de hilos del proceso. En el servidor, este
+servicio lo hace en un grupo de procesos, así que el rendimiento crece con
+los núcleos.
+
+- Cola acotada: como mucho ``MAX_PENDIENTES`` cifrados en marcha o
+  esperando. Si está llena, ``cifrar`` espera hasta ``ESPERA_S`` segundos a
+  que quede sitio y si no lanza ``ServicioSaturado`` (APIS.py responde 429
+  con ``Retry-After``). Las altas masivas esperan sin límite: su respuesta
+  ya ha empezado y así ceden sitio a los registros sueltos.
+- Coste configurable: cada cifrado usa ``credenciales.metodo_actual()``
+  (``PROSALUD_HASH_METODO`` o el calibrado con ``credenciales.py``), salvo
+  que el servicio se cree con un ``metodo`` fijo.
+- Por defecto se cifra en el propio hilo, con la misma cola acotada: un
+  script que crea una ``Persona`` no arranca procesos (con spawn, eso
+  exige un ``if __name__ == '__main__'`` en el script). ``servidor.py``
+  activa el grupo con ``usar_procesos`` antes de aceptar peticiones, con
+  ``PROSALUD_PROCESOS_HASH`` procesos (0, por defecto, uno por núcleo;
+  -1 para seguir cifrando en el hilo).
+
+Cada proceso del servidor crea su grupo la primera vez que cifra.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import credenciales
+
+# Procesos del grupo que activa el servidor con usar_procesos (0 = uno por núcleo; -1 = en el hilo que llama)
+PROCESOS_HASH = int(os.environ.get('PROSALUD_PROCESOS_HASH', '0')) or os.cpu_count() or 1
+
+# Cifrados en marcha o esperando como mucho (0 = ocho por proceso)
+MAX_PENDIENTES = int(os.environ.get('PROSALUD_HASH_PENDIENTES', '0'))
+
+# Segundos que espera un cifrado a que haya sitio en la cola antes de rechazarse
+ESPERA_S = float(os.environ.get('PROSALUD_HASH_ESPERA', '0.5'))
+
+
+class ServicioSaturado(Exception):
+    """La cola de cifrado está llena: conviene reintentar más tarde."""
+
+
+class ServicioHash:
+    """
+    Cifrado de contraseñas en un grupo de procesos con cola acotada.
+
+    Parámetros:
+        procesos (int, opcional): Procesos del grupo; -1 (por defecto) para cifrar en el hilo que llama.
+        max_pendientes (int, opcional): Cifrados en marcha o esperando como mucho; por
+            defecto ``PROSALUD_HASH_PENDIENTES`` u ocho por proceso.
+        metodo (str, opcional): Método de cifrado fijo; None (por defecto) usa
+            ``credenciales.metodo_actual()`` en cada cifrado.
+    """
+
+    def __init__(self, procesos: int = -1, max_pendientes: int = MAX_PENDIENTES,
+                 metodo: Optional[str] = None) -> None:
+        self.procesos = procesos
+        self.max_pendientes = max_pendientes or 8 * max(procesos, 1)
+        self.metodo = metodo
+        self._plazas = threading.BoundedSemaphore(self.max_pendientes)
+        self._grupo: Optional[ProcessPoolExecutor] = None
+        self._cerrojo = threading.Lock()
+        self._cerrojo_estadisticas = threading.Lock()
+        self.estadisticas: Dict[str, int] = {'cifradas': 0, 'rechazadas': 0}
+
+    def _enviar(self, funcion: Callable[..., Any], args: tuple, espera_s: Optional[float]) -> 'Future[Any]':
+        """Reserva una plaza de la cola (o lanza ServicioSaturado) y envía el cifrado al grupo."""
+        if not (self._plazas.acquire(blocking=False) if espera_s == 0 else self._plazas.acquire(timeout=espera_s)):
+            with self._cerrojo_estadisticas:
+                self.estadisticas['rechazadas'] += 1
+            raise ServicioSaturado(f"Hay {self.max_pendientes} contraseñas esperando a cifrarse.")
+        try:
+            if self.procesos < 0:
+                futuro: 'Future[Any]' = Future()
+                futuro.set_result(funcion(*args))
+            else:
+                with self._cerrojo:
+                    if self._grupo is None:
+                        # spawn: los procesos no heredan hilos ni conexiones abiertas del servidor
+                        self._grupo = ProcessPoolExecutor(self.procesos,
+                                                          mp_context=multiprocessing.get_context('spawn'))
+                futuro = self._grupo.submit(funcion, *args)
+        except BaseException:
+            self._plazas.release()
+            raise
+        futuro.add_done_callback(self._terminado)
+        return futuro
+
+    def _terminado(self, _futuro: 'Future[Any]') -> None:
+        self._plazas.release()
+        with self._cerrojo_estadisticas:
+            self.estadisticas['cifradas'] += 1
+
+    def enviar_cifrado(self, password: str, espera_s: Optional[float] = ESPERA_S) -> 'Future[str]':
+        """
+        Encarga el hash de una contraseña sin esperar a que esté calculado.
+
+        Parámetros:
+            password (str): Contraseña en claro.
+            espera_s (float, opcional): Segundos de espera máxima por un sitio en la
+                cola; 0 no espera y None espera sin límite.
+
+        Devuelve:
+            Future[str]: El hash, cuando esté.
+
+        Excepciones:
+            ServicioSaturado: Si la cola sigue llena pasados ``espera_s`` segundos.
+        """
+        metodo = self.metodo or credenciales.metodo_actual()
+        return self._enviar(credenciales.cifrar, (password, metodo), espera_s)
+
+    def cifrar(self, password: str, espera_s: Optional[float] = ESPERA_S) -> str:
+        """
+        Hash de una contraseña con el método actual.
+
+        Parámetros:
+            password (str): Contraseña en claro.
+            espera_s (float, opcional): Segundos de espera máxima por un sitio en la
+                cola; None espera sin límite.
+
+        Devuelve:
+            str: Hash con su método (se comprueba con ``credenciales.verificar``).
+
+        Excepciones:
+            ServicioSaturado: Si la cola sigue llena pasados ``espera_s`` segundos.
+        """
+        return self.enviar_cifrado(password, espera_s).result()
+
+    def cifrar_varios(self, passwords: Iterable[str], espera_s: Optional[float] = None) -> List[str]:
+        """
+        Hashes de varias contraseñas, cifradas en paralelo.
+
+        Cada una ocupa su sitio en la cola en cuanto lo hay, así que un lote
+        grande no acapara el servicio.
+
+        Parámetros:
+            passwords (Iterable[str]): Contraseñas en claro.
+            espera_s (float, opcional): Espera máxima por cada sitio; None (por defecto) sin límite.
+
+        Devuelve:
+            List[str]: Sus hashes, en el mismo orden.
+
+        Excepciones:
+            ServicioSaturado: Si la cola sigue llena pasados ``espera_s`` segundos.
+        """
+        futuros = [self.enviar_cifrado(password, espera_s) for password in passwords]
+        return [futuro.result() for futuro in futuros]
+
+    def cerrar(self) -> None:
+        """Termina los procesos del grupo (se vuelven a crear si se cifra de nuevo)."""
+        with self._cerrojo:
+            grupo, self._grupo = self._grupo, None
+        if grupo is not None:
+            grupo.shutdown()
+
+
+_servicio: Optional[ServicioHash] = None
+_cerrojo_servicio = threading.Lock()
+
+
+def servicio() -> ServicioHash:
+    """
+    Servicio compartido por todo el proceso (se crea la primera vez).
+
+    Returns
+    -------
+    ServicioHash
+        El servicio: cifra en el hilo que llama salvo tras ``usar_procesos``.
+    """
+    global _servicio
+    with _cerrojo_servicio:
+        if _servicio is None:
+            _servicio = ServicioHash()
+        return _servicio
+
+
+def usar_procesos(procesos: int = PROCESOS_HASH) -> ServicioHash:
+    """
+    Pasa el servicio compartido a un grupo de procesos.
+
+    La llama ``servidor.py`` antes de aceptar peticiones; los procesos se
+    crean la primera vez que se cifra, ya en cada trabajador.
+
+    Parameters
+    ----------
+    procesos : int, optional
+        Procesos del grupo; por defecto ``PROSALUD_PROCESOS_HASH`` (uno por
+        núcleo si no está fijada, -1 para seguir cifrando en el hilo).
+
+    Returns
+    -------
+    ServicioHash
+        El nuevo servicio compartido.
+    """
+    global _servicio
+    nuevo = ServicioHash(procesos)
+    with _cerrojo_servicio:
+        anterior, _servicio = _servicio, nuevo
+    if anterior is not None:
+        anterior.cerrar()
+    return nuevo
+
+
+def cifrar(password: str) -> str:
+    """
+    Hash de una contraseña con el servicio compartido y el método actual.
+
+    Parameters
+    ----------
+    password : str
+        Contraseña en claro.
+
+    Returns
+    -------
+    str
+        Su hash.
+
+    Raises
+    ------
+    ServicioSaturado
+        Si la cola de cifrado está llena.
+    """
+    return servicio().cifrar(password)
+
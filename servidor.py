@@ -0,0 +1,251 @@
+"""
+Servidor de producción
+======================
+
+Punto de entrada para servir ``APIS.app`` fuera del servidor de desarrollo de
+Flask (``app.run(debug=True)``), que atiende una petición cada vez.
+
+- gunicorn (Linux/macOS): varios procesos trabajadores. La aplicación se
+  carga una vez en el proceso maestro y, tras cada ``fork``, el trabajador
+  descarta las conexiones heredadas y abre las suyas propias.
+- waitress (Windows o si gunicorn no está instalado): un único proceso con
+  varios hilos.
+
+En ambos casos la base de datos se pone en modo WAL antes de aceptar
+peticiones, de modo que las lecturas no bloquean a los escritores y los
+escritores concurrentes esperan (busy_timeout) en lugar de fallar con
+"database is locked".
+
+Uso::
+
+    python servidor.py --workers 4 --port 5000
+    python servidor.py --servidor waitress --threads 8
+    python servidor.py --metricas      # expone /metrics (ver instrumentacion.py)
+    python servidor.py --estadisticas-sql  # /admin/consultas (ver Base_De_Datos/tablas/consultas.py)
+    python servidor.py --correo    # manda la bandeja de salida de correo (ver correo.py)
+    python servidor.py --procesos-hash 4  # procesos que cifran contraseñas (ver servicio_hash.py)
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+from typing import Optional
+
+from Base_De_Datos.tablas.conexion import RUTA_BD, activar_wal
+
+logger = logging.getLogger(__name__)
+
+
+def preparar_bd() -> None:
+    """
+    Crea las tablas de los modelos SQLAlchemy y el directorio de usuarios y activa el modo WAL.
+
+    Se ejecuta una sola vez, antes de crear los trabajadores.
+
+    Returns
+    -------
+    None
+    """
+    from APIS import engine
+    from Base_De_Datos.tablas.modelos import Base as BaseModelos
+    from Base_De_Datos.tablas.tabla_usuarios import crear_tabla_usuarios
+
+    BaseModelos.metadata.create_all(engine)
+    crear_tabla_usuarios()
+    modo = activar_wal()
+    logger.info("Base de datos %s en modo %s", RUTA_BD, modo)
+
+
+def inicializar_trabajador(_arbitro, _trabajador) -> None:
+    """
+    Inicialización de cada proceso trabajador (hook ``post_fork`` de gunicorn).
+
+    Las conexiones SQLite no pueden compartirse entre procesos: se descarta
+    el pool heredado del maestro sin cerrarlo (sigue siendo suyo) para que el
+    trabajador abra conexiones nuevas bajo demanda.
+
+    Parameters
+    ----------
+    _arbitro, _trabajador
+        Objetos que gunicorn pasa al hook; no se usan.
+
+    Returns
+    -------
+    None
+    """
+    from APIS import engine
+
+    engine.dispose(close=False)
+    logger.info("Trabajador %s inicializado", os.getpid())
+
+
+def activar_cifrado(procesos: Optional[int] = None) -> None:
+    """
+    Cifra las contraseñas en un grupo de procesos (ver servicio_hash.py).
+
+    Se llama antes de crear los trabajadores: cada uno arranca sus procesos
+    la primera vez que cifra. Fuera del servidor se cifra en el propio hilo.
+
+    Parameters
+    ----------
+    procesos : int, optional
+        Procesos de cifrado por trabajador; 0 uno por núcleo, -1 en el hilo.
+        Por defecto, ``PROSALUD_PROCESOS_HASH`` (uno por núcleo si no está fijada).
+
+    Returns
+    -------
+    None
+    """
+    import servicio_hash
+
+    if procesos is None:
+        servicio = servicio_hash.usar_procesos()
+    else:
+        servicio = servicio_hash.usar_procesos(procesos or os.cpu_count() or 1)
+    logger.info("Contraseñas cifradas %s",
+                f"en {servicio.procesos} procesos" if servicio.procesos > 0 else "en el hilo de cada petición")
+
+
+def lanzar_gunicorn(host: str, port: int, workers: int, threads: int) -> None:
+    """
+    Sirve la API con gunicorn y ``workers`` procesos.
+
+    Parameters
+    ----------
+    host : str
+        Interfaz en la que escuchar.
+    port : int
+        Puerto TCP.
+    workers : int
+        Número de procesos trabajadores.
+    threads : int
+        Hilos por trabajador (con más de uno se usa el worker ``gthread``).
+
+    Returns
+    -------
+    None
+    """
+    from gunicorn.app.base import BaseApplication
+
+    from APIS import app
+
+    class _Aplicacion(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f'{host}:{port}')
+            self.cfg.set('workers', workers)
+            self.cfg.set('threads', threads)
+            self.cfg.set('worker_class', 'gthread' if threads > 1 else 'sync')
+            self.cfg.set('preload_app', True)
+            self.cfg.set('post_fork', inicializar_trabajador)
+            self.cfg.set('accesslog', None)
+
+        def load(self):
+            return app
+
+    _Aplicacion().run()
+
+
+def lanzar_waitress(host: str, port: int, threads: int) -> None:
+    """
+    Sirve la API con waitress en un solo proceso con ``threads`` hilos.
+
+    Parameters
+    ----------
+    host : str
+        Interfaz en la que escuchar.
+    port : int
+        Puerto TCP.
+    threads : int
+        Número de hilos que atienden peticiones.
+
+    Returns
+    -------
+    None
+    """
+    from waitress import serve
+
+    from APIS import app
+
+    serve(app, host=host, port=port, threads=threads)
+
+
+def _ejecutar_enviador_correo() -> None:
+    from correo import EnviadorCorreo
+
+    logging.basicConfig(level=logging.INFO)
+    EnviadorCorreo().ejecutar()
+
+
+def lanzar_enviador_correo() -> multiprocessing.Process:
+    """
+    Arranca el enviador de correo (ver correo.py) en un proceso aparte.
+
+    Es un solo proceso para toda la API: las peticiones solo encolan y un
+    único enviador mantiene una conexión SMTP y el límite de envíos por
+    segundo. Termina con el servidor.
+
+    Returns
+    -------
+    multiprocessing.Process
+        Proceso del enviador.
+    """
+    proceso = multiprocessing.Process(target=_ejecutar_enviador_correo, name='enviador-correo', daemon=True)
+    proceso.start()
+    logger.info("Enviador de correo en el proceso %s", proceso.pid)
+    return proceso
+
+
+def _gunicorn_disponible() -> bool:
+    if os.name == 'nt':
+        return False
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Servidor de producción de la API ProSalud")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count(),
+                        help="Procesos trabajadores (solo gunicorn)")
+    parser.add_argument('--threads', type=int, default=1,
+                        help="Hilos por trabajador (waitress usa al menos 'workers' hilos)")
+    parser.add_argument('--servidor', choices=['auto', 'gunicorn', 'waitress'], default='auto')
+    parser.add_argument('--metricas', action='store_true',
+                        help="Activa la instrumentación (/metrics y ?profile=1, ver instrumentacion.py)")
+    parser.add_argument('--estadisticas-sql', action='store_true',
+                        help="Acumula estadísticas de consultas SQL y el registro de lentas (/admin/consultas)")
+    parser.add_argument('--correo', action='store_true',
+                        help="Arranca el enviador de la bandeja de salida de correo (ver correo.py)")
+    parser.add_argument('--procesos-hash', type=int,
+                        help="Procesos que cifran contraseñas (0 uno por núcleo, -1 en el hilo; "
+                             "por defecto PROSALUD_PROCESOS_HASH, ver servicio_hash.py)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.metricas:
+        # Antes de importar APIS, que decide al importarse si instala el middleware
+        os.environ['PROSALUD_METRICAS'] = '1'
+    if args.estadisticas_sql:
+        os.environ['PROSALUD_ESTADISTICAS_SQL'] = '1'
+    preparar_bd()
+    activar_cifrado(args.procesos_hash)
+    if args.correo:
+        lanzar_enviador_correo()
+
+    servidor = args.servidor
+    if servidor == 'auto':
+        servidor = 'gunicorn' if _gunicorn_disponible() else 'waitress'
+
+    if servidor == 'gunicorn':
+        lanzar_gunicorn(args.host, args.port, args.workers, args.threads)
+    else:
+        lanzar_waitress(args.host, args.port, max(args.threads, args.workers))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,417 @@
+"""
+Cola de triaje de urgencias
+===========================
+
+Ordena a los pacientes de urgencias por prioridad (1 alta, 2 moderada,
+3 baja, como ``Paciente.prioridad_urgencias``) y, dentro de cada
+prioridad, por orden de llegada. Para que nadie espere indefinidamente, la
+prioridad mejora un nivel por cada ``ENVEJECIMIENTO_S`` de espera.
+
+El envejecimiento no obliga a recalcular la cola: comparar en un instante
+``t`` las prioridades efectivas ``prioridad - (t - llegada) / E`` es lo
+mismo que comparar ``llegada + (prioridad - 1) · E``, que no depende de
+``t``. Esa es la clave del montículo de :class:`ColaTriaje`, que además
+guarda la posición de cada cita para cambiar su prioridad o sacarla en
+O(log n).
+
+:class:`ColaUrgencias` mantiene esa cola respaldada por las tablas 'citas'
+y 'triaje_urgencias' (ver ``tabla_urgencias.py``): se reconstruye al
+arrancar y se sincroniza con los demás procesos.
+"""
+
+import heapq
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from Base_De_Datos.tablas import tabla_urgencias
+
+# Segundos de espera que mejoran la prioridad un nivel
+ENVEJECIMIENTO_S = float(os.environ.get('PROSALUD_TRIAJE_ENVEJECIMIENTO_MIN', '15')) * 60
+
+# Cada cuánto se releen los cambios hechos por otros procesos
+INTERVALO_SINCRONIZACION_S = 1.0
+
+# Margen al releer cambios: una fila puede confirmarse un poco después de su 'modificado'
+MARGEN_SINCRONIZACION_S = 5.0
+
+# Textos aceptados para el nivel de prioridad de una cita de urgencias
+NIVELES = {
+    '1': 1, 'alta': 1, 'grave': 1, 'urgente': 1,
+    '2': 2, 'media': 2, 'moderada': 2, 'moderado': 2,
+    '3': 3, 'baja': 3, 'leve': 3,
+}
+
+# Nivel con el que se guarda cada prioridad en 'citas.nivel_prioridad'
+NOMBRES = {1: 'alta', 2: 'media', 3: 'baja'}
+
+
+def prioridad_de(nivel: Any) -> int:
+    """
+    Prioridad numérica de un nivel de urgencia.
+
+    Parameters
+    ----------
+    nivel : Any
+        1-3 o un texto como 'alta', 'grave', 'media', 'leve'...
+
+    Raises
+    ------
+    ValueError
+        Si el nivel no se reconoce.
+
+    Returns
+    -------
+    int
+        1 (alta), 2 (moderada) o 3 (baja).
+    """
+    prioridad = NIVELES.get(str(nivel).strip().lower())
+    if prioridad is None:
+        raise ValueError(f"Nivel de prioridad desconocido: {nivel!r}. Opciones: alta, media, baja.")
+    return prioridad
+
+
+def prioridad_efectiva(prioridad: int, llegada: float, ahora: Optional[float] = None,
+                       envejecimiento_s: float = ENVEJECIMIENTO_S) -> int:
+    """Prioridad tras el envejecimiento por la espera (nunca mejor que 1)."""
+    espera = (time.time() if ahora is None else ahora) - llegada
+    return max(1, prioridad - int(max(espera, 0) // envejecimiento_s))
+
+
+class ColaTriaje:
+    """
+    Montículo binario indexado de citas de urgencias.
+
+    Cada entrada es ``[clave, secuencia, id_cita]``; la secuencia desempata
+    llegadas simultáneas en orden de inserción y ``_posiciones`` guarda el
+    índice de cada cita en el montículo.
+
+    Parámetros:
+        envejecimiento_s (float, opcional): Segundos de espera que mejoran
+            la prioridad un nivel.
+    """
+
+    def __init__(self, envejecimiento_s: float = ENVEJECIMIENTO_S) -> None:
+        self.envejecimiento_s = envejecimiento_s
+        self._monticulo: List[list] = []
+        self._posiciones: Dict[str, int] = {}
+        self._datos: Dict[str, Tuple[int, float, Any]] = {}
+        self._secuencia = 0
+
+    def __len__(self) -> int:
+        return len(self._monticulo)
+
+    def __contains__(self, id_cita: str) -> bool:
+        return id_cita in self._posiciones
+
+    def clave(self, prioridad: int, llegada: float) -> float:
+        """Clave de orden: la llegada retrasada (prioridad - 1) periodos de envejecimiento."""
+        return llegada + (prioridad - 1) * self.envejecimiento_s
+
+    # --- Operaciones del montículo ---
+
+    def insertar(self, id_cita: str, prioridad: int, llegada: float, dato: Any = None) -> None:
+        """
+        Pone una cita en la cola (o cambia su prioridad si ya estaba).
+
+        Parámetros:
+            id_cita (str): Identificador de la cita.
+            prioridad (int): 1 (alta) a 3 (baja).
+            llegada (float): Hora de llegada (segundos desde epoch).
+            dato (Any, opcional): Lo que devolverá :meth:`extraer` con la cita.
+        """
+        if id_cita in self._posiciones:
+            self._datos[id_cita] = (self._datos[id_cita][0], llegada, dato)
+            self.repriorizar(id_cita, prioridad)
+            return
+        self._secuencia += 1
+        self._datos[id_cita] = (prioridad, llegada, dato)
+        self._monticulo.append([self.clave(prioridad, llegada), self._secuencia, id_cita])
+        self._posiciones[id_cita] = len(self._monticulo) - 1
+        self._subir(len(self._monticulo) - 1)
+
+    def extraer(self) -> Optional[Tuple[str, int, float, Any]]:
+        """
+        Saca la cita más prioritaria.
+
+        Devuelve:
+            Optional[Tuple[str, int, float, Any]]: (id_cita, prioridad,
+            llegada, dato), o None si la cola está vacía.
+        """
+        if not self._monticulo:
+            return None
+        id_cita = self._monticulo[0][2]
+        return (id_cita, *self.eliminar(id_cita))
+
+    def primera(self) -> Optional[str]:
+        """Cita más prioritaria, sin sacarla."""
+        return self._monticulo[0][2] if self._monticulo else None
+
+    def repriorizar(self, id_cita: str, prioridad: int) -> bool:
+        """
+        Cambia la prioridad de una cita en espera, conservando su llegada.
+
+        Devuelve:
+            bool: True si la cita estaba en la cola.
+        """
+        posicion = self._posiciones.get(id_cita)
+        if posicion is None:
+            return False
+        _, llegada, dato = self._datos[id_cita]
+        self._datos[id_cita] = (prioridad, llegada, dato)
+        self._monticulo[posicion][0] = self.clave(prioridad, llegada)
+        self._subir(posicion)
+        self._bajar(self._posiciones[id_cita])
+        return True
+
+    def eliminar(self, id_cita: str) -> Optional[Tuple[int, float, Any]]:
+        """
+        Saca una cita cualquiera de la cola (cancelada, atendida en otro proceso...).
+
+        Devuelve:
+            Optional[Tuple[int, float, Any]]: (prioridad, llegada, dato), o
+            None si no estaba.
+        """
+        posicion = self._posiciones.pop(id_cita, None)
+        if posicion is None:
+            return None
+        ultima = self._monticulo.pop()
+        if posicion < len(self._monticulo):
+            self._monticulo[posicion] = ultima
+            self._posiciones[ultima[2]] = posicion
+            self._subir(posicion)
+            self._bajar(self._posiciones[ultima[2]])
+        return self._datos.pop(id_cita)
+
+    def _subir(self, posicion: int) -> None:
+        monticulo, posiciones = self._monticulo, self._posiciones
+        entrada = monticulo[posicion]
+        while posicion > 0:
+            padre = (posicion - 1) >> 1
+            if monticulo[padre][:2] <= entrada[:2]:
+                break
+            monticulo[posicion] = monticulo[padre]
+            posiciones[monticulo[posicion][2]] = posicion
+            posicion = padre
+        monticulo[posicion] = entrada
+        posiciones[entrada[2]] = posicion
+
+    def _bajar(self, posicion: int) -> None:
+        monticulo, posiciones = self._monticulo, self._posiciones
+        n = len(monticulo)
+        entrada = monticulo[posicion]
+        while True:
+            hijo = 2 * posicion + 1
+            if hijo >= n:
+                break
+            if hijo + 1 < n and monticulo[hijo + 1][:2] < monticulo[hijo][:2]:
+                hijo += 1
+            if entrada[:2] <= monticulo[hijo][:2]:
+                break
+            monticulo[posicion] = monticulo[hijo]
+            posiciones[monticulo[posicion][2]] = posicion
+            posicion = hijo
+        monticulo[posicion] = entrada
+        posiciones[entrada[2]] = posicion
+
+    # --- Consulta ---
+
+    def datos(self, id_cita: str) -> Optional[Tuple[int, float, Any]]:
+        """(prioridad, llegada, dato) de una cita en espera."""
+        return self._datos.get(id_cita)
+
+    def primeras(self, n: Optional[int] = None) -> Iterator[Tuple[str, int, float, Any]]:
+        """
+        Las ``n`` citas más prioritarias (todas si ``n`` es None), en orden.
+
+        Devuelve:
+            Iterator[Tuple[str, int, float, Any]]: (id_cita, prioridad, llegada, dato).
+        """
+        entradas = sorted(self._monticulo) if n is None else heapq.nsmallest(n, self._monticulo)
+        for _, _, id_cita in entradas:
+            yield (id_cita, *self._datos[id_cita])
+
+
+class ColaUrgencias:
+    """
+    Cola de triaje respaldada por la base de datos.
+
+    Las altas, cambios de prioridad y salidas se guardan primero en
+    'citas' / 'triaje_urgencias' y luego en el montículo; sacar una cita
+    la reclama en la base de datos, así que dos procesos nunca atienden la
+    misma. Con varios procesos, cada uno aplica los cambios de los demás
+    al sincronizar (como mucho cada ``INTERVALO_SINCRONIZACION_S``).
+
+    Parámetros:
+        envejecimiento_s (float, opcional): Ver :class:`ColaTriaje`.
+    """
+
+    def __init__(self, envejecimiento_s: float = ENVEJECIMIENTO_S) -> None:
+        self.cola = ColaTriaje(envejecimiento_s)
+        self._cerrojo = threading.Lock()
+        self._sincronizada = 0.0
+        self._leido_hasta = 0.0
+
+    def cargar(self) -> int:
+        """
+        Reconstruye la cola con las citas en espera de la base de datos.
+
+        Devuelve:
+            int: Citas en espera.
+        """
+        inicio = time.time()
+        filas = tabla_urgencias.leer_urgencias_en_espera()
+        with self._cerrojo:
+            self.cola = ColaTriaje(self.cola.envejecimiento_s)
+            for fila in filas:
+                self._aplicar(fila)
+            self._leido_hasta = inicio
+            self._sincronizada = time.monotonic()
+        return len(self.cola)
+
+    def _aplicar(self, fila: Tuple[str, int, float, str, float, str, str]) -> None:
+        """Refleja en el montículo una fila de 'triaje_urgencias' (con el cerrojo tomado)."""
+        id_cita, prioridad, llegada, estado, _modificado, paciente_id, motivo = fila
+        if estado == 'en_espera':
+            self.cola.insertar(id_cita, prioridad, llegada, {"paciente_id": paciente_id, "motivo": motivo})
+        else:
+            self.cola.eliminar(id_cita)
+
+    def sincronizar(self, forzar: bool = False) -> None:
+        """
+        Aplica los cambios de la cola hechos por otros procesos.
+
+        Relee solo las filas con 'modificado' reciente (índice
+        idx_triaje_modificado); aplicar dos veces la misma fila no cambia nada.
+        """
+        if not forzar and time.monotonic() - self._sincronizada < INTERVALO_SINCRONIZACION_S:
+            return
+        inicio = time.time()
+        filas = tabla_urgencias.leer_urgencias_modificadas(self._leido_hasta - MARGEN_SINCRONIZACION_S)
+        with self._cerrojo:
+            for fila in filas:
+                self._aplicar(fila)
+            self._leido_hasta = inicio
+            self._sincronizada = time.monotonic()
+
+    def registrar(self, paciente_id: str, nivel: Any, motivo: str = '', llegada: Optional[float] = None) -> str:
+        """
+        Registra la llegada de un paciente a urgencias.
+
+        Parámetros:
+            paciente_id (str): Paciente que llega.
+            nivel (Any): Nivel de prioridad (ver :func:`prioridad_de`).
+            motivo (str, opcional): Motivo de la consulta.
+            llegada (float, opcional): Hora de llegada; por defecto, ahora.
+
+        Excepciones:
+            ValueError: Si el nivel no se reconoce o el paciente no existe.
+
+        Devuelve:
+            str: Identificador de la nueva cita de urgencias.
+        """
+        prioridad = prioridad_de(nivel)
+        llegada = time.time() if llegada is None else llegada
+        id_cita = str(uuid.uuid4())
+        tabla_urgencias.insertar_urgencia(id_cita, paciente_id, prioridad, NOMBRES[prioridad], llegada, motivo)
+        with self._cerrojo:
+            self.cola.insertar(id_cita, prioridad, llegada, {"paciente_id": paciente_id, "motivo": motivo})
+        return id_cita
+
+    def siguiente(self, medico: Optional[str] = None) -> Optional[Dict]:
+        """
+        Saca de la cola la cita más prioritaria y la asigna a ``medico``.
+
+        Devuelve:
+            Optional[Dict]: La cita atendida, o None si no queda nadie esperando.
+        """
+        self.sincronizar()
+        while True:
+            with self._cerrojo:
+                extraida = self.cola.extraer()
+            if extraida is None:
+                return None
+            id_cita, prioridad, llegada, dato = extraida
+            try:
+                reclamada = tabla_urgencias.reclamar_urgencia(id_cita, medico)
+            except Exception:
+                with self._cerrojo:
+                    self.cola.insertar(id_cita, prioridad, llegada, dato)
+                raise
+            if reclamada:
+                return self._describir(id_cita, prioridad, llegada, dato, time.time())
+            # Otro proceso ya la atendió o la canceló: se prueba con la siguiente
+
+    def repriorizar(self, id_cita: str, nivel: Any) -> bool:
+        """
+        Cambia el nivel de prioridad de una cita en espera.
+
+        Excepciones:
+            ValueError: Si el nivel no se reconoce.
+
+        Devuelve:
+            bool: True si la cita estaba en espera.
+        """
+        prioridad = prioridad_de(nivel)
+        if not tabla_urgencias.actualizar_urgencia(id_cita, prioridad, NOMBRES[prioridad]):
+            with self._cerrojo:
+                self.cola.eliminar(id_cita)
+            return False
+        with self._cerrojo:
+            en_cola = self.cola.repriorizar(id_cita, prioridad)
+        if not en_cola:
+            # Registrada por otro proceso y aún no sincronizada (sincronizar toma el cerrojo)
+            self.sincronizar(forzar=True)
+        return True
+
+    def cancelar(self, id_cita: str) -> bool:
+        """
+        Saca de la cola una cita en espera (el paciente se ha ido...).
+
+        Devuelve:
+            bool: True si la cita estaba en espera.
+        """
+        cancelada = tabla_urgencias.actualizar_urgencia(id_cita, estado='cancelada')
+        self.descartar(id_cita)
+        return cancelada
+
+    def descartar(self, id_cita: str) -> None:
+        """
+        Quita del montículo una cita que ya salió de la cola en la base de
+        datos (cancelada o atendida desde 'citas'); los demás procesos la
+        quitan al sincronizar.
+        """
+        with self._cerrojo:
+            self.cola.eliminar(id_cita)
+
+    def listar(self, limite: Optional[int] = None) -> List[Dict]:
+        """
+        Citas en espera en el orden en que se atenderán.
+
+        Parámetros:
+            limite (int, opcional): Máximo de citas a devolver.
+
+        Devuelve:
+            List[Dict]: Una por cita, con su prioridad original y efectiva y la espera.
+        """
+        self.sincronizar()
+        ahora = time.time()
+        with self._cerrojo:
+            return [self._describir(id_cita, prioridad, llegada, dato, ahora)
+                    for id_cita, prioridad, llegada, dato in self.cola.primeras(limite)]
+
+    def __len__(self) -> int:
+        return len(self.cola)
+
+    def _describir(self, id_cita: str, prioridad: int, llegada: float, dato: Dict, ahora: float) -> Dict:
+        return {
+            "id_cita": id_cita,
+            "paciente_id": dato["paciente_id"],
+            "motivo": dato["motivo"],
+            "prioridad": prioridad,
+            "prioridad_efectiva": prioridad_efectiva(prioridad, llegada, ahora, self.cola.envejecimiento_s),
+            "llegada": time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(llegada)),
+            "espera_min": round(max(ahora - llegada, 0) / 60, 1),
+        }